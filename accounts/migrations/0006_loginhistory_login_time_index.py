@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_update_currency_choices"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="loginhistory",
+            index=models.Index(fields=["login_time"], name="accounts_lo_login_t_c54338_idx"),
+        ),
+    ]
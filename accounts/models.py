@@ -60,9 +60,9 @@ class User(AbstractUser, PrivacyModel):
         else:
             return "Beginner"
 
-    def generate_pgp_challenge(self):
-        """Generate a new PGP challenge for 2FA authentication"""
-        challenge = secrets.token_urlsafe(32)
+    def generate_pgp_challenge(self, challenge=None):
+        """Generate a new PGP challenge for 2FA authentication, or activate a precomputed one"""
+        challenge = challenge or secrets.token_urlsafe(32)
         self.pgp_challenge = challenge
         self.pgp_challenge_expires = timezone.now() + timedelta(minutes=5)
         self.save()
@@ -97,6 +97,9 @@ class LoginHistory(models.Model):
 
     class Meta:
         ordering = ["-login_time"]
+        indexes = [
+            models.Index(fields=["login_time"]),
+        ]
 
 
 class UserSession(PrivacyModel):
@@ -0,0 +1,315 @@
+"""
+PGP Challenge Pool
+Ready-encrypted 2FA challenges so logins do not wait for gpg.
+
+For each recently active PGP user the pool keeps a few challenges per purpose
+("login" for accounts.views.login_view, "admin" for AdminSecurityManager). Each
+challenge is already encrypted to the user's key. The stock lives in the shared
+cache as numbered slots between a head and a tail counter. A login pops one slot
+with a single ``incr`` and a ``get``. When the stock is empty, or was encrypted for
+a fingerprint the user no longer has, the caller falls back to encrypting inline.
+
+Refills are batched. The challenges a user still needs are encrypted in one
+``gpg --multifile`` run, and a background thread drains refill requests made at
+login. core.tasks.refill_pgp_challenge_pool warms the stock for users who logged
+in recently.
+"""
+
+import logging
+import os
+import secrets
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import User
+from .pgp_keyring import get_keyring
+from .pgp_service import PGPService
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'STOCK_SIZE': 3,  # ready challenges per user and purpose
+    'STOCK_TTL': 3600,  # seconds an unused challenge stays in stock
+    'BATCH_SIZE': 16,  # challenges per gpg invocation
+    'ACTIVE_DAYS': 7,  # users who logged in this recently are kept stocked
+    'MAX_USERS': 500,  # users refilled per periodic run
+    'GPG_TIMEOUT': 30,
+}
+
+LOGIN = 'login'
+ADMIN = 'admin'
+
+
+def get_options() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, 'PGP_CHALLENGE_POOL', {})}
+
+
+def make_challenge(purpose: str) -> Tuple[str, str]:
+    """Return (challenge, plaintext to encrypt) in the format each verifier expects"""
+    if purpose == ADMIN:
+        challenge = f"ADMIN-VERIFY:{int(time.time())}:{secrets.token_urlsafe(16)}"
+        return challenge, challenge
+    challenge = secrets.token_urlsafe(32)
+    return challenge, f"MARKETPLACE-2FA:{challenge}"
+
+
+def encrypt_batch(fingerprint: str, messages: List[str], timeout: float = 30) -> List[str]:
+    """
+    Encrypt several messages to one recipient with a single gpg process.
+
+    ``--multifile`` only reads files. The plaintexts are written to a private
+    directory inside the keyring home and removed right after gpg exits.
+    """
+    if not messages:
+        return []
+    keyring = get_keyring()
+    workdir = tempfile.mkdtemp(prefix="challenges_", dir=keyring.home)
+    try:
+        paths = []
+        for index, message in enumerate(messages):
+            path = os.path.join(workdir, f"c{index}")
+            with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as f:
+                f.write(message)
+            paths.append(path)
+
+        with keyring.context() as gpg:
+            command = [
+                gpg.gpgbinary, "--homedir", keyring.home, "--batch", "--yes", "--no-tty",
+                "--trust-model", "always", "--armor", "--multifile", "--encrypt", "-r", fingerprint,
+            ]
+            result = subprocess.run(command + paths, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0:
+            raise RuntimeError(f"gpg exited with {result.returncode}: {result.stderr.strip()}")
+
+        encrypted = []
+        for path in paths:
+            with open(f"{path}.asc") as f:
+                encrypted.append(f.read())
+        return encrypted
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class ChallengeStock:
+    """Per-user queues of encrypted challenges in the shared cache"""
+
+    def __init__(self, cache_alias: str = 'default', ttl: int = 3600):
+        self.cache = caches[cache_alias]
+        self.ttl = ttl
+        self.stats = Counter()
+
+    @staticmethod
+    def _key(user_id, purpose: str, part) -> str:
+        return f"pgp-challenges:{purpose}:{user_id}:{part}"
+
+    def count(self, user_id, purpose: str) -> int:
+        values = self.cache.get_many([self._key(user_id, purpose, 'head'), self._key(user_id, purpose, 'tail')])
+        head = values.get(self._key(user_id, purpose, 'head'))
+        tail = values.get(self._key(user_id, purpose, 'tail'))
+        if head is None or tail is None:
+            return 0
+        return max(0, tail - head)
+
+    def push(self, user_id, purpose: str, fingerprint: str, challenges: List[Tuple[str, str]]):
+        """
+        Append (challenge, encrypted) pairs.
+
+        Every process's refill worker and the periodic refill task push at once, so slots
+        are reserved with an atomic incr of the tail and two writers never share one. A
+        slot popped before its write lands, or left empty by a racing writer, is only a
+        miss: the caller encrypts inline.
+        """
+        if not challenges:
+            return
+        head_key = self._key(user_id, purpose, 'head')
+        tail_key = self._key(user_id, purpose, 'tail')
+        # Counters start from the clock so a queue that expired never reuses old slot numbers
+        start = time.time_ns() // 1000
+        self.cache.add(head_key, start, self.ttl)
+        self.cache.add(tail_key, start, self.ttl)
+        head = self.cache.get(head_key, 0)
+        try:
+            tail = self.cache.incr(tail_key, len(challenges))
+            slots = list(range(max(tail - len(challenges), head) + 1, tail + 1))
+            if len(slots) < len(challenges):
+                # Pops ran past the end of the stock: move the tail beyond the head for the rest
+                extra = len(challenges) - len(slots)
+                tail = self.cache.incr(tail_key, max(0, head - tail) + extra)
+                slots += range(tail - extra + 1, tail + 1)
+        except ValueError:
+            logger.warning(f"Challenge stock for user {user_id} expired while refilling")
+            return
+
+        self.cache.set_many({
+            self._key(user_id, purpose, slot): {
+                'challenge': challenge,
+                'encrypted': encrypted,
+                'fingerprint': fingerprint,
+            }
+            for slot, (challenge, encrypted) in zip(slots, challenges)
+        }, self.ttl)
+        self.cache.touch(tail_key, self.ttl)
+        self.cache.touch(head_key, self.ttl)
+        self.stats['pushed'] += len(challenges)
+
+    def pop(self, user_id, purpose: str, fingerprint: str) -> Optional[Dict[str, str]]:
+        """Take the oldest challenge, or None when the stock is empty or for another key"""
+        try:
+            index = self.cache.incr(self._key(user_id, purpose, 'head'))
+        except ValueError:
+            self.stats['misses'] += 1
+            return None
+
+        slot_key = self._key(user_id, purpose, index)
+        item = self.cache.get(slot_key)
+        if item is not None:
+            self.cache.delete(slot_key)
+        if item is None or item['fingerprint'] != fingerprint:
+            self.stats['misses'] += 1
+            return None
+        self.stats['hits'] += 1
+        return item
+
+    def clear(self, user_id, purpose: str):
+        self.cache.delete_many([self._key(user_id, purpose, 'head'), self._key(user_id, purpose, 'tail')])
+
+
+def _missing_stock(requests: Iterable[Tuple[Any, str]], stock_size: int) -> Dict[str, Dict[str, int]]:
+    """Challenges each user is short of, per purpose"""
+    needed: Dict[str, Dict[str, int]] = {}
+    for user_id, purpose in set(requests):
+        missing = stock_size - challenge_stock.count(user_id, purpose)
+        if missing > 0:
+            needed.setdefault(str(user_id), {})[purpose] = missing
+    return needed
+
+
+def _refill_user(user, missing: Dict[str, int], options: Dict[str, Any]) -> int:
+    """Encrypt one user's missing challenges in batches and stock them; returns how many"""
+    jobs = [purpose for purpose, count in missing.items() for _ in range(count)]
+    created = 0
+    for start in range(0, len(jobs), options['BATCH_SIZE']):
+        batch = jobs[start:start + options['BATCH_SIZE']]
+        challenges = [make_challenge(purpose) for purpose in batch]
+        try:
+            encrypted = encrypt_batch(
+                user.pgp_fingerprint, [message for _, message in challenges], options['GPG_TIMEOUT']
+            )
+        except Exception as e:
+            logger.error(f"Challenge batch encryption failed for user {user.id}: {e}")
+            break
+
+        by_purpose = {}
+        for purpose, (challenge, _), armor in zip(batch, challenges, encrypted):
+            by_purpose.setdefault(purpose, []).append((challenge, armor))
+        for purpose, items in by_purpose.items():
+            challenge_stock.push(user.id, purpose, user.pgp_fingerprint, items)
+        created += len(batch)
+    return created
+
+
+def refill(requests: Iterable[Tuple[Any, str]]) -> int:
+    """Top up the stock of each (user_id, purpose); returns the number of challenges encrypted"""
+    options = get_options()
+    needed = _missing_stock(requests, options['STOCK_SIZE'])
+    if not needed:
+        return 0
+
+    users = (
+        User.objects.filter(id__in=list(needed))
+        .exclude(pgp_public_key__isnull=True)
+        .exclude(pgp_public_key="")
+        .exclude(pgp_fingerprint="")
+        .only("id", "pgp_public_key", "pgp_fingerprint")
+    )
+    service = PGPService()
+    created = 0
+    for user in users:
+        # Normally an index hit: the key was imported when it was last used
+        if not service.import_public_key(user.pgp_public_key)["success"]:
+            logger.warning(f"Skipping challenge refill for user {user.id}: key cannot be imported")
+            continue
+        created += _refill_user(user, needed[str(user.id)], options)
+    return created
+
+
+class RefillWorker:
+    """Daemon thread that refills stock for users who just popped a challenge"""
+
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def request(self, user_id, purpose: str):
+        with self._lock:
+            self._pending.add((str(user_id), purpose))
+            self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='pgp-challenge-refill', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            with self._lock:
+                # Everything requested meanwhile goes into one refill pass
+                pending, self._pending = self._pending, set()
+                self._wake.clear()
+            try:
+                refill(pending)
+            except Exception as e:
+                logger.error(f"Challenge refill failed: {e}")
+            finally:
+                close_old_connections()
+
+
+challenge_stock = ChallengeStock(get_options()['CACHE_ALIAS'], get_options()['STOCK_TTL'])
+refill_worker = RefillWorker()
+
+
+def take_challenge(user, purpose: str = LOGIN) -> Optional[Dict[str, str]]:
+    """
+    Pop a precomputed challenge for the user and schedule a top-up.
+
+    Returns a dict with ``challenge`` and ``encrypted``, or None when the caller has
+    to encrypt inline.
+    """
+    if not get_options()['ENABLED'] or not user.pgp_fingerprint:
+        return None
+    item = challenge_stock.pop(user.id, purpose, user.pgp_fingerprint)
+    refill_worker.request(user.id, purpose)
+    return item
+
+
+def active_requests(days: Optional[int] = None, limit: Optional[int] = None) -> List[Tuple[Any, str]]:
+    """(user_id, purpose) pairs worth stocking: PGP users and staff who logged in recently"""
+    options = get_options()
+    since = timezone.now() - timedelta(days=days or options['ACTIVE_DAYS'])
+    users = (
+        User.objects.filter(last_login__gte=since)
+        .exclude(pgp_fingerprint="")
+        .order_by("-last_login")
+        .values_list("id", "pgp_login_enabled", "is_staff")[: limit or options['MAX_USERS']]
+    )
+    requests = []
+    for user_id, pgp_login_enabled, is_staff in users:
+        if pgp_login_enabled:
+            requests.append((user_id, LOGIN))
+        if is_staff:
+            requests.append((user_id, ADMIN))
+    return requests
@@ -0,0 +1,245 @@
+"""
+PGP Keyring
+Process-wide GnuPG keyring shared by every PGPService instance.
+
+The keyring lives in one GnuPG home (settings.PGP_KEYRING["HOME"]) that is created
+and configured once. Public keys are imported once and indexed by the digest of
+their normalized armor, so importing the same key again skips gpg. Parsed
+``list_keys`` output is kept per fingerprint. A small pool of ``gnupg.GPG``
+contexts avoids probing the binary and version for every request.
+
+Every key imported by any user ends up in the same keyring. Signature checks
+therefore have to compare the reported fingerprint with the one expected for
+the user.
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import gnupg
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'HOME': None,  # None: a private temporary home per process
+    'POOL_SIZE': 4,
+    'ACQUIRE_TIMEOUT': 10,
+    'METADATA_CACHE_SIZE': 1024,
+}
+
+GPG_CONF = """
+personal-cipher-preferences AES256 AES192 AES CAST5
+personal-digest-preferences SHA512 SHA384 SHA256 SHA224 SHA1
+personal-compress-preferences ZLIB BZIP2 ZIP Uncompressed
+cert-digest-algo SHA256
+default-preference-list SHA512 SHA384 SHA256 SHA224 AES256 AES192 AES CAST5 ZLIB BZIP2 ZIP Uncompressed
+keyserver-options auto-key-retrieve
+trust-model always
+"""
+
+BINARY_CANDIDATES = ["gpg2", "gpg", "/usr/bin/gpg2", "/usr/bin/gpg", "/usr/local/bin/gpg"]
+
+
+def get_options() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, 'PGP_KEYRING', {})}
+
+
+def find_gpg_binary() -> Optional[str]:
+    """Find the best available GPG binary"""
+    for candidate in BINARY_CANDIDATES:
+        if shutil.which(candidate):
+            return candidate
+    return getattr(settings, 'GPG_BINARY', None)
+
+
+def key_digest(key_data: str) -> str:
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+class KeyRing:
+    """Shared GnuPG home with a pool of GPG contexts and a fingerprint index"""
+
+    def __init__(self, home: Optional[str] = None, pool_size: int = 4, acquire_timeout: float = 10,
+                 metadata_cache_size: int = 1024):
+        self.temporary = not home
+        self.home = str(home) if home else tempfile.mkdtemp(prefix="marketplace_gpg_")
+        self.pool_size = max(1, pool_size)
+        self.acquire_timeout = acquire_timeout
+        self.metadata_cache_size = metadata_cache_size
+
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._imported: Dict[str, Tuple[str, ...]] = {}  # key digest -> fingerprints
+        self._metadata: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()  # fingerprint -> list_keys entry
+
+        self._prepare_home()
+        self.gpg_binary = find_gpg_binary()
+        self.version = None
+
+        # Create one context eagerly so a broken gpg installation fails at startup
+        self._pool.put(self._new_context())
+
+    def _prepare_home(self):
+        os.makedirs(self.home, mode=0o700, exist_ok=True)
+        try:
+            os.chmod(self.home, 0o700)
+        except OSError as e:
+            logger.warning(f"Could not restrict permissions of {self.home}: {e}")
+
+        config_path = os.path.join(self.home, "gpg.conf")
+        try:
+            with open(config_path) as f:
+                if f.read() == GPG_CONF:
+                    return
+        except FileNotFoundError:
+            pass
+        try:
+            with open(config_path, "w") as f:
+                f.write(GPG_CONF)
+        except Exception as e:
+            logger.warning(f"Could not write GPG config: {e}")
+
+    def _new_context(self) -> gnupg.GPG:
+        with self._lock:
+            self._created += 1
+        kwargs = {'gnupghome': self.home}
+        if self.gpg_binary:
+            kwargs['gpgbinary'] = self.gpg_binary
+        gpg = gnupg.GPG(**kwargs)
+        self.version = gpg.version
+        logger.debug(f"GPG context {self._created}/{self.pool_size} created for {self.home} (version {gpg.version})")
+        return gpg
+
+    def _acquire(self) -> gnupg.GPG:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = self._created < self.pool_size
+        if grow:
+            return self._new_context()
+        try:
+            return self._pool.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No GPG context became free within {self.acquire_timeout}s")
+
+    @contextmanager
+    def context(self):
+        """Borrow a GPG context; at most POOL_SIZE gpg operations run at once per process"""
+        gpg = self._acquire()
+        try:
+            yield gpg
+        finally:
+            self._pool.put(gpg)
+
+    def import_key(self, key_data: str) -> Tuple[List[str], str]:
+        """
+        Import an armored public key unless the same armor was imported before.
+
+        Returns the fingerprints gpg reported and its stderr, which is empty for index hits.
+        """
+        digest = key_digest(key_data)
+        fingerprints = self._imported.get(digest)
+        if fingerprints is not None:
+            return list(fingerprints), ""
+
+        with self.context() as gpg:
+            result = gpg.import_keys(key_data)
+
+        fingerprints = tuple(dict.fromkeys(result.fingerprints)) if result.count > 0 else ()
+        if fingerprints:
+            with self._lock:
+                self._imported[digest] = fingerprints
+                # New armor for a known fingerprint may carry a new expiry or revocation
+                for fingerprint in fingerprints:
+                    self._metadata.pop(fingerprint, None)
+        return list(fingerprints), str(getattr(result, 'stderr', '') or '')
+
+    def key_metadata(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Parsed ``list_keys`` entry for a fingerprint, or None when the keyring does not hold it"""
+        if not fingerprint:
+            return None
+        with self._lock:
+            key = self._metadata.get(fingerprint)
+            if key is not None:
+                self._metadata.move_to_end(fingerprint)
+                return key
+
+        with self.context() as gpg:
+            keys = gpg.list_keys(keys=[fingerprint])
+        key = next((dict(key) for key in keys if key.get('fingerprint') == fingerprint), None)
+        if key is None:
+            return None
+
+        with self._lock:
+            self._metadata[fingerprint] = key
+            while len(self._metadata) > self.metadata_cache_size:
+                self._metadata.popitem(last=False)
+        return key
+
+    def forget(self, fingerprint: str):
+        """Drop cached metadata for a fingerprint, e.g. after the key changed on disk"""
+        with self._lock:
+            self._metadata.pop(fingerprint, None)
+            self._imported = {
+                digest: fingerprints for digest, fingerprints in self._imported.items()
+                if fingerprint not in fingerprints
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'home': self.home,
+            'contexts': self._created,
+            'idle_contexts': self._pool.qsize(),
+            'pool_size': self.pool_size,
+            'indexed_keys': len(self._imported),
+            'cached_metadata': len(self._metadata),
+        }
+
+    def close(self):
+        if self.temporary:
+            shutil.rmtree(self.home, ignore_errors=True)
+
+
+_keyring: Optional[KeyRing] = None
+_keyring_lock = threading.Lock()
+
+
+def get_keyring() -> KeyRing:
+    """The process-wide keyring, created on first use"""
+    global _keyring
+    if _keyring is None:
+        with _keyring_lock:
+            if _keyring is None:
+                options = get_options()
+                _keyring = KeyRing(
+                    home=options['HOME'],
+                    pool_size=options['POOL_SIZE'],
+                    acquire_timeout=options['ACQUIRE_TIMEOUT'],
+                    metadata_cache_size=options['METADATA_CACHE_SIZE'],
+                )
+                if _keyring.temporary:
+                    atexit.register(_keyring.close)
+                logger.info(f"PGP keyring ready at {_keyring.home} (GPG {_keyring.version})")
+    return _keyring
+
+
+def reset_keyring():
+    """Discard the process-wide keyring, e.g. after a fork or in tests"""
+    global _keyring
+    with _keyring_lock:
+        if _keyring is not None:
+            _keyring.close()
+        _keyring = None
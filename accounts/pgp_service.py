@@ -1,123 +1,96 @@
 import logging
-import os
 import re
-import shutil
-import tempfile
 from datetime import datetime
+from functools import lru_cache
 
-import gnupg
-from django.conf import settings
+from .pgp_keyring import get_keyring
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _validate_key_format(key_data):
+    """Validate and normalize PGP key format"""
+    key_data = key_data.strip()
+
+    if not key_data:
+        return {"success": False, "error": "Key data is empty"}
+
+    begin_patterns = [
+        r"-----BEGIN PGP PUBLIC KEY BLOCK-----",
+        r"-----BEGIN PGP PUBLIC KEY-----",
+        r"-----BEGIN PUBLIC KEY-----",
+    ]
+
+    end_patterns = [
+        r"-----END PGP PUBLIC KEY BLOCK-----",
+        r"-----END PGP PUBLIC KEY-----",
+        r"-----END PUBLIC KEY-----",
+    ]
+
+    has_begin = any(re.search(pattern, key_data, re.IGNORECASE) for pattern in begin_patterns)
+    has_end = any(re.search(pattern, key_data, re.IGNORECASE) for pattern in end_patterns)
+
+    if not has_begin or not has_end:
+        return {"success": False, "error": "Invalid PGP key format. Key must include BEGIN and END markers."}
+
+    lines = key_data.split("\n")
+    normalized_lines = []
+    in_key_block = False
+
+    for line in lines:
+        line = line.strip()
+        if any(re.search(pattern, line, re.IGNORECASE) for pattern in begin_patterns):
+            in_key_block = True
+            normalized_lines.append("-----BEGIN PGP PUBLIC KEY BLOCK-----")
+        elif any(re.search(pattern, line, re.IGNORECASE) for pattern in end_patterns):
+            in_key_block = False
+            normalized_lines.append("-----END PGP PUBLIC KEY BLOCK-----")
+        elif in_key_block and line:
+            if re.match(r"^[A-Za-z0-9+/=]+$", line):
+                normalized_lines.append(line)
+            elif line.startswith("=") and re.match(r"^=[A-Za-z0-9+/=]+$", line):
+                normalized_lines.append(line)
+            elif line.startswith("Version:") or line.startswith("Comment:") or line.startswith("Hash:"):
+                normalized_lines.append(line)
+            elif line and not line.startswith("-"):
+                cleaned_line = "".join(
+                    c for c in line if c in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
+                )
+                if cleaned_line and len(cleaned_line) >= 4:
+                    normalized_lines.append(cleaned_line)
+
+    normalized_key = "\n".join(normalized_lines)
+
+    if len(normalized_lines) < 3:
+        return {"success": False, "error": "Key appears to be incomplete or corrupted"}
+
+    return {"success": True, "normalized_key": normalized_key, "original_key": key_data}
+
+
+def _signed_by(verified, expected_fingerprint):
+    """Whether a verification was made by the expected key, by primary or signing-subkey fingerprint"""
+    expected = (expected_fingerprint or "").replace(" ", "").upper()
+    signers = {(getattr(verified, name, None) or "").upper() for name in ("fingerprint", "pubkey_fingerprint")}
+    return bool(expected) and expected in signers
+
+
 class PGPService:
-    def __init__(self):
-        """Initialize PGP service with temporary GPG directory and enhanced configuration"""
-        self.temp_dir = tempfile.mkdtemp(prefix="marketplace_gpg_")
-
-        self.gpg = gnupg.GPG(gnupghome=self.temp_dir)
-
-        gpg_binary = self._find_gpg_binary()
-        if gpg_binary:
-            self.gpg.gpgbinary = gpg_binary
-        elif hasattr(settings, "GPG_BINARY"):
-            self.gpg.gpgbinary = settings.GPG_BINARY
-
-        self._configure_cipher_preferences()
-
-        logger.debug(f"PGP Service initialized with temp dir: {self.temp_dir}")
-        logger.debug(f"GPG Binary: {self.gpg.gpgbinary}")
-        logger.debug(f"GPG Version: {self.gpg.version}")
-
-    def _find_gpg_binary(self):
-        """Find the best available GPG binary"""
-        candidates = ["gpg2", "gpg", "/usr/bin/gpg2", "/usr/bin/gpg", "/usr/local/bin/gpg"]
-        for candidate in candidates:
-            if shutil.which(candidate):
-                logger.debug(f"Found GPG binary: {candidate}")
-                return candidate
-        return None
-
-    def _configure_cipher_preferences(self):
-        """Configure GPG for maximum compatibility"""
-        try:
-            config_content = """
-personal-cipher-preferences AES256 AES192 AES CAST5
-personal-digest-preferences SHA512 SHA384 SHA256 SHA224 SHA1
-personal-compress-preferences ZLIB BZIP2 ZIP Uncompressed
-cert-digest-algo SHA256
-default-preference-list SHA512 SHA384 SHA256 SHA224 AES256 AES192 AES CAST5 ZLIB BZIP2 ZIP Uncompressed
-keyserver-options auto-key-retrieve
-trust-model always
-"""
-            config_path = os.path.join(self.temp_dir, "gpg.conf")
-            with open(config_path, "w") as f:
-                f.write(config_content)
-            logger.debug("GPG configuration written for enhanced compatibility")
-        except Exception as e:
-            logger.warning(f"Could not write GPG config: {e}")
+    def __init__(self, keyring=None):
+        """Bind the service to the shared, pooled keyring; construction does not start gpg"""
+        self.keyring = keyring or get_keyring()
+
+    @property
+    def temp_dir(self):
+        """GnuPG home of the shared keyring (kept under its historical name)"""
+        return self.keyring.home
 
     def validate_key_format(self, key_data):
         """Validate and normalize PGP key format"""
         if not key_data or not isinstance(key_data, str):
             return {"success": False, "error": "Key data is empty or invalid"}
-
-        key_data = key_data.strip()
-
-        if not key_data:
-            return {"success": False, "error": "Key data is empty"}
-
-        begin_patterns = [
-            r"-----BEGIN PGP PUBLIC KEY BLOCK-----",
-            r"-----BEGIN PGP PUBLIC KEY-----",
-            r"-----BEGIN PUBLIC KEY-----",
-        ]
-
-        end_patterns = [
-            r"-----END PGP PUBLIC KEY BLOCK-----",
-            r"-----END PGP PUBLIC KEY-----",
-            r"-----END PUBLIC KEY-----",
-        ]
-
-        has_begin = any(re.search(pattern, key_data, re.IGNORECASE) for pattern in begin_patterns)
-        has_end = any(re.search(pattern, key_data, re.IGNORECASE) for pattern in end_patterns)
-
-        if not has_begin or not has_end:
-            return {"success": False, "error": "Invalid PGP key format. Key must include BEGIN and END markers."}
-
-        lines = key_data.split("\n")
-        normalized_lines = []
-        in_key_block = False
-
-        for line in lines:
-            line = line.strip()
-            if any(re.search(pattern, line, re.IGNORECASE) for pattern in begin_patterns):
-                in_key_block = True
-                normalized_lines.append("-----BEGIN PGP PUBLIC KEY BLOCK-----")
-            elif any(re.search(pattern, line, re.IGNORECASE) for pattern in end_patterns):
-                in_key_block = False
-                normalized_lines.append("-----END PGP PUBLIC KEY BLOCK-----")
-            elif in_key_block and line:
-                if re.match(r"^[A-Za-z0-9+/=]+$", line):
-                    normalized_lines.append(line)
-                elif line.startswith("=") and re.match(r"^=[A-Za-z0-9+/=]+$", line):
-                    normalized_lines.append(line)
-                elif line.startswith("Version:") or line.startswith("Comment:") or line.startswith("Hash:"):
-                    normalized_lines.append(line)
-                elif line and not line.startswith("-"):
-                    cleaned_line = "".join(
-                        c for c in line if c in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/="
-                    )
-                    if cleaned_line and len(cleaned_line) >= 4:
-                        normalized_lines.append(cleaned_line)
-
-        normalized_key = "\n".join(normalized_lines)
-
-        if len(normalized_lines) < 3:
-            return {"success": False, "error": "Key appears to be incomplete or corrupted"}
-
-        return {"success": True, "normalized_key": normalized_key, "original_key": key_data}
+        # Normalization is pure, so the same armor is only parsed once per process
+        return dict(_validate_key_format(key_data))
 
     def _get_algorithm_name(self, algo_id):
         """Convert algorithm ID to readable name"""
@@ -222,17 +195,6 @@ trust-model always
             formatted_subkeys.append(formatted_subkey)
         return formatted_subkeys
 
-    def __del__(self):
-        """Clean up temporary directory"""
-        try:
-            import shutil
-
-            if hasattr(self, "temp_dir") and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
-                logger.debug(f"Cleaned up temp dir: {self.temp_dir}")
-        except Exception as e:
-            logger.error(f"Error cleaning up temp dir: {e}")
-
     def import_public_key(self, public_key_data):
         """
         Import a public key with enhanced validation and capability detection
@@ -253,10 +215,10 @@ trust-model always
             key_to_import = validation_result["normalized_key"]
 
             logger.debug("Importing public key...")
-            import_result = self.gpg.import_keys(key_to_import)
+            fingerprints, import_errors = self.keyring.import_key(key_to_import)
 
-            if import_result.count > 0:
-                fingerprint = import_result.fingerprints[0] if import_result.fingerprints else None
+            if fingerprints:
+                fingerprint = fingerprints[0]
                 logger.info(f"Successfully imported key with fingerprint: {fingerprint}")
 
                 key_info = self.get_key_info(fingerprint)
@@ -264,8 +226,8 @@ trust-model always
                 result = {
                     "success": True,
                     "fingerprint": fingerprint,
-                    "count": import_result.count,
-                    "message": f"Successfully imported {import_result.count} key(s)",
+                    "count": len(fingerprints),
+                    "message": f"Successfully imported {len(fingerprints)} key(s)",
                 }
 
                 if key_info and key_info.get("success"):
@@ -294,7 +256,7 @@ trust-model always
 
                 return result
             else:
-                error_msg = str(import_result.stderr) if hasattr(import_result, "stderr") else "Unknown error"
+                error_msg = import_errors or "Unknown error"
                 logger.warning(f"No keys were imported: {error_msg}")
 
                 if "invalid" in error_msg.lower():
@@ -335,9 +297,10 @@ trust-model always
                 if not caps.get("can_encrypt") and not caps.get("has_encryption_subkey"):
                     return {"success": False, "error": "Cannot encrypt: recipient key does not support encryption"}
 
-            encrypted_data = self.gpg.encrypt(
-                message, recipients=[recipient_fingerprint], always_trust=True, armor=True, symmetric=False
-            )
+            with self.keyring.context() as gpg:
+                encrypted_data = gpg.encrypt(
+                    message, recipients=[recipient_fingerprint], always_trust=True, armor=True, symmetric=False
+                )
 
             if encrypted_data.ok:
                 encrypted_message = str(encrypted_data)
@@ -368,12 +331,18 @@ trust-model always
             logger.error(f"Error encrypting message: {e}")
             return {"success": False, "error": f"Encryption error: {str(e)}"}
 
-    def verify_signature(self, signed_message):
+    def verify_signature(self, signed_message, expected_fingerprint=None):
         """
         Verify a PGP signed message
 
+        The keyring is shared by every user, so a signature by any imported key verifies;
+        pass expected_fingerprint whenever the signer matters. A valid result carries
+        signed_data, the text the signature covers: anything around the signed block
+        in the submission is not part of it.
+
         Args:
             signed_message (str): PGP signed message
+            expected_fingerprint (str): Only accept a signature made by this key
 
         Returns:
             dict: Verification result with success status and details
@@ -381,9 +350,20 @@ trust-model always
         try:
             logger.debug("Verifying PGP signature...")
 
-            verified = self.gpg.verify(signed_message)
+            with self.keyring.context() as gpg:
+                # decrypt verifies like verify, and also returns just the signed text
+                verified = gpg.decrypt(signed_message)
 
-            if verified.valid:
+            if verified.valid and expected_fingerprint is not None and not _signed_by(verified, expected_fingerprint):
+                logger.warning(f"Signature by {verified.fingerprint} does not match the expected key")
+                return {
+                    "success": True,
+                    "valid": False,
+                    "fingerprint": verified.fingerprint,
+                    "error": "Signature was not made by the expected key",
+                    "message": "Signature is invalid",
+                }
+            elif verified.valid:
                 logger.info(f"Signature verified successfully for key: {verified.key_id}")
                 return {
                     "success": True,
@@ -391,6 +371,7 @@ trust-model always
                     "key_id": verified.key_id,
                     "fingerprint": verified.fingerprint,
                     "username": verified.username,
+                    "signed_data": str(verified),
                     "message": "Signature is valid",
                 }
             else:
@@ -472,34 +453,33 @@ trust-model always
             dict: Detailed key information including capabilities
         """
         try:
-            keys = self.gpg.list_keys()
-            for key in keys:
-                if key["fingerprint"] == fingerprint:
-                    caps = self._check_key_capabilities(key)
+            key = self.keyring.key_metadata(fingerprint)
+            if key is not None:
+                caps = self._check_key_capabilities(key)
 
-                    return {
-                        "success": True,
-                        "fingerprint": key["fingerprint"],
-                        "keyid": key.get("keyid", ""),
-                        "uids": key.get("uids", []),
-                        "algorithm": self._get_algorithm_name(key.get("algo", "")),
-                        "length": key.get("length", ""),
-                        "created": (
-                            datetime.fromtimestamp(int(key.get("date", 0))).strftime("%Y-%m-%d")
-                            if key.get("date")
-                            else "Unknown"
-                        ),
-                        "expires": (
-                            datetime.fromtimestamp(int(key.get("expires", 0))).strftime("%Y-%m-%d")
-                            if key.get("expires")
-                            else "Never"
-                        ),
-                        "capabilities": caps,
-                        "subkeys": self._format_subkeys(key.get("subkeys", [])),
-                        "trust": key.get("trust", ""),
-                        "raw_algo": key.get("algo", ""),
-                        "raw_expires": key.get("expires", ""),
-                    }
+                return {
+                    "success": True,
+                    "fingerprint": key["fingerprint"],
+                    "keyid": key.get("keyid", ""),
+                    "uids": key.get("uids", []),
+                    "algorithm": self._get_algorithm_name(key.get("algo", "")),
+                    "length": key.get("length", ""),
+                    "created": (
+                        datetime.fromtimestamp(int(key.get("date", 0))).strftime("%Y-%m-%d")
+                        if key.get("date")
+                        else "Unknown"
+                    ),
+                    "expires": (
+                        datetime.fromtimestamp(int(key.get("expires", 0))).strftime("%Y-%m-%d")
+                        if key.get("expires")
+                        else "Never"
+                    ),
+                    "capabilities": caps,
+                    "subkeys": self._format_subkeys(key.get("subkeys", [])),
+                    "trust": key.get("trust", ""),
+                    "raw_algo": key.get("algo", ""),
+                    "raw_expires": key.get("expires", ""),
+                }
 
             return {"success": False, "error": "Key not found"}
 
@@ -516,7 +496,8 @@ trust-model always
     def decrypt_message(self, encrypted_message, passphrase=None):
         """Decrypt a PGP message (for testing purposes)"""
         try:
-            decrypted_data = self.gpg.decrypt(encrypted_message, passphrase=passphrase)
+            with self.keyring.context() as gpg:
+                decrypted_data = gpg.decrypt(encrypted_message, passphrase=passphrase)
 
             if decrypted_data.ok:
                 return {
@@ -529,10 +510,12 @@ trust-model always
         except Exception as e:
             return {"success": False, "error": f"Decryption error: {str(e)}"}
 
-    def verify_signed_message(self, signed_message):
-        """Verify a signed message and extract content"""
+    def verify_signed_message(self, signed_message, expected_fingerprint=None):
+        """Verify a signed message and extract content, optionally requiring the expected signer"""
         try:
-            verified = self.gpg.verify(signed_message)
+            with self.keyring.context() as gpg:
+                # decrypt verifies like verify, and also returns just the signed text
+                verified = gpg.decrypt(signed_message)
 
             result = {
                 "success": True,
@@ -545,6 +528,11 @@ trust-model always
 
             if not verified.valid:
                 result["error"] = verified.stderr or "Invalid signature"
+            elif expected_fingerprint is not None and not _signed_by(verified, expected_fingerprint):
+                result["valid"] = False
+                result["error"] = "Signature was not made by the expected key"
+            else:
+                result["signed_data"] = str(verified)
 
             return result
 
@@ -554,7 +542,8 @@ trust-model always
     def create_signed_message(self, message, keyid=None, passphrase=None):
         """Create a clearsigned message (for testing purposes)"""
         try:
-            signed_data = self.gpg.sign(message, keyid=keyid, passphrase=passphrase, clearsign=True)
+            with self.keyring.context() as gpg:
+                signed_data = gpg.sign(message, keyid=keyid, passphrase=passphrase, clearsign=True)
 
             if signed_data:
                 return {"success": True, "signed_message": str(signed_data), "fingerprint": signed_data.fingerprint}
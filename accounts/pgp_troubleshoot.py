@@ -59,9 +59,10 @@ class PGPTroubleshooter:
     def get_compatibility_report(self):
         """Generate compatibility report"""
         report = {
-            "gpg_version": str(self.pgp_service.gpg.version),
-            "gpg_binary": self.pgp_service.gpg.gpgbinary,
+            "gpg_version": str(self.pgp_service.keyring.version),
+            "gpg_binary": self.pgp_service.keyring.gpg_binary,
             "temp_dir": self.pgp_service.temp_dir,
+            "keyring": self.pgp_service.keyring.get_stats(),
             "supported_algorithms": [
                 "RSA (1024, 2048, 3072, 4096 bits)",
                 "DSA (1024, 2048 bits)",
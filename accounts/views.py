@@ -20,6 +20,7 @@ from products.models import Product
 
 from .forms import CustomPasswordChangeForm, DeleteAccountForm, PGPKeyForm, UserProfileForm
 from .models import LoginHistory, User
+from .pgp_challenges import LOGIN, take_challenge
 from .pgp_service import PGPService
 
 User = get_user_model()
@@ -190,28 +191,37 @@ def login_view(request):
                 )
 
                 if user.pgp_login_enabled and user.pgp_public_key:
-                    pgp_service = PGPService()
+                    # Usually a challenge encrypted ahead of time; gpg only runs here when the stock is empty
+                    stocked = take_challenge(user, LOGIN)
 
-                    import_result = pgp_service.import_public_key(user.pgp_public_key)
+                    if stocked:
+                        user.generate_pgp_challenge(stocked["challenge"])
+                        encrypted_challenge = stocked["encrypted"]
+                    else:
+                        pgp_service = PGPService()
 
-                    if not import_result["success"]:
-                        logger.error(f"Failed to import PGP key for user {username}: {import_result['error']}")
-                        messages.error(request, "PGP key error. Please update your PGP key in settings.")
-                        return render(request, "accounts/login.html", {"form": form})
+                        import_result = pgp_service.import_public_key(user.pgp_public_key)
 
-                    challenge = user.generate_pgp_challenge()
-                    challenge_message = f"MARKETPLACE-2FA:{challenge}"
+                        if not import_result["success"]:
+                            logger.error(f"Failed to import PGP key for user {username}: {import_result['error']}")
+                            messages.error(request, "PGP key error. Please update your PGP key in settings.")
+                            return render(request, "accounts/login.html", {"form": form})
 
-                    encrypt_result = pgp_service.encrypt_message(challenge_message, user.pgp_fingerprint)
+                        challenge = user.generate_pgp_challenge()
+                        challenge_message = f"MARKETPLACE-2FA:{challenge}"
 
-                    if not encrypt_result["success"]:
-                        logger.error(f"Failed to encrypt challenge: {encrypt_result['error']}")
-                        messages.error(request, "Failed to generate PGP challenge. Please try again.")
-                        return render(request, "accounts/login.html", {"form": form})
+                        encrypt_result = pgp_service.encrypt_message(challenge_message, user.pgp_fingerprint)
+
+                        if not encrypt_result["success"]:
+                            logger.error(f"Failed to encrypt challenge: {encrypt_result['error']}")
+                            messages.error(request, "Failed to generate PGP challenge. Please try again.")
+                            return render(request, "accounts/login.html", {"form": form})
+
+                        encrypted_challenge = encrypt_result["encrypted_message"]
 
                     request.session["pgp_2fa_user_id"] = str(user.id)
                     request.session["pgp_2fa_timestamp"] = timezone.now().isoformat()
-                    request.session["pgp_2fa_encrypted_challenge"] = encrypt_result["encrypted_message"]
+                    request.session["pgp_2fa_encrypted_challenge"] = encrypted_challenge
 
                     request.session.save()
 
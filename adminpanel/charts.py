@@ -0,0 +1,210 @@
+"""
+Admin Charts
+Dashboard charts rendered by a periodic task and served as stored bytes.
+
+core.tasks.render_admin_charts renders every chart in CHARTS once per date bucket
+(BUCKET_SECONDS, an hour by default). It writes the PNG and SVG bytes to
+``ROOT/<chart>/<bucket>.<format>`` and then records the bucket in ``ROOT/<chart>/version``.
+A page reads only the version files and links to
+``/adminpanel/charts/<chart>.<format>?v=<bucket>``. The bytes behind that URL never
+change, so browsers keep them until the next bucket.
+
+Only the task process imports matplotlib, through ChartGenerator. Web workers read
+the files, so ROOT (under SECURE_UPLOAD_ROOT by default) must be a directory the
+Celery worker and the web workers share, as the secure_uploads volume is.
+"""
+
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ROOT': None,  # defaults to SECURE_UPLOAD_ROOT / "admin_charts"
+    'BUCKET_SECONDS': 3600,  # charts are re-rendered once per bucket
+    'DAYS': 30,  # history shown per chart
+    'FORMATS': ('png', 'svg'),
+    'TTL': 2 * 24 * 3600,  # renders older than this are pruned once a newer one is stored
+}
+
+CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+def get_options() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, 'ADMIN_CHARTS', {})}
+
+
+def _daily(queryset, field: str, value=None):
+    """[(date, value)] per day since the start of the chart window"""
+    since = timezone.now() - timedelta(days=get_options()['DAYS'])
+    rows = (
+        queryset.filter(**{f"{field}__gte": since})
+        .annotate(day=TruncDate(field))
+        .values("day")
+        .annotate(value=value or Count("pk"))
+        .order_by("day")
+    )
+    return [(row["day"], row["value"] or 0) for row in rows]
+
+
+def _new_users():
+    from accounts.models import User
+
+    return _daily(User.objects.all(), "date_joined")
+
+
+def _orders():
+    from orders.models import Order
+
+    return _daily(Order.objects.all(), "created_at")
+
+
+def _deposits(currency):
+    def rows():
+        from wallets.models import Transaction
+
+        return _daily(Transaction.objects.filter(type="deposit", currency=currency), "created_at", Sum("amount"))
+
+    return rows
+
+
+def _transactions():
+    from wallets.models import Transaction
+
+    return _daily(Transaction.objects.all(), "created_at")
+
+
+def _withdrawals():
+    from wallets.models import WithdrawalRequest
+
+    return _daily(WithdrawalRequest.objects.all(), "created_at")
+
+
+CHARTS = {
+    'new_users': {'title': 'New users per day', 'chart_type': 'bar', 'rows': _new_users},
+    'orders': {'title': 'Orders per day', 'chart_type': 'bar', 'rows': _orders},
+    'deposits_btc': {'title': 'BTC deposits per day', 'chart_type': 'line', 'rows': _deposits("BTC")},
+    'deposits_xmr': {'title': 'XMR deposits per day', 'chart_type': 'line', 'rows': _deposits("XMR")},
+    'transactions': {'title': 'Wallet transactions per day', 'chart_type': 'bar', 'rows': _transactions},
+    'withdrawals': {'title': 'Withdrawal requests per day', 'chart_type': 'bar', 'rows': _withdrawals},
+}
+
+DASHBOARD_CHARTS = ('new_users', 'orders', 'deposits_btc', 'deposits_xmr')
+WALLET_OVERVIEW_CHARTS = ('deposits_btc', 'deposits_xmr', 'transactions', 'withdrawals')
+
+
+def _root() -> Path:
+    root = get_options()['ROOT']
+    return Path(root) if root else Path(settings.SECURE_UPLOAD_ROOT) / 'admin_charts'
+
+
+def _version_path(name: str) -> Path:
+    return _root() / name / 'version'
+
+
+def _data_path(name: str, bucket: int, image_format: str) -> Path:
+    return _root() / name / f"{bucket}.{image_format}"
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write through a temporary file so readers never see a partial file"""
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+def _prune(name: str, keep_from: int):
+    """Delete renders of buckets before keep_from"""
+    for path in (_root() / name).glob('*.*'):
+        bucket = path.name.split('.', 1)[0]
+        if bucket.isdigit() and int(bucket) < keep_from:
+            path.unlink(missing_ok=True)
+
+
+def current_bucket(now=None) -> int:
+    now = now or timezone.now()
+    return int(now.timestamp()) // get_options()['BUCKET_SECONDS']
+
+
+def chart_versions(names: Iterable[str]) -> Dict[str, int]:
+    """Bucket of the latest stored render of each chart; charts never rendered are left out"""
+    versions = {}
+    for name in names:
+        try:
+            versions[name] = int(_version_path(name).read_text())
+        except (OSError, ValueError):
+            continue
+    return versions
+
+
+def get_chart(name: str, image_format: str, bucket: Optional[int] = None) -> Optional[bytes]:
+    if bucket is None:
+        bucket = chart_versions([name]).get(name)
+        if bucket is None:
+            return None
+    try:
+        return _data_path(name, bucket, image_format).read_bytes()
+    except OSError:
+        return None
+
+
+def chart_links(names: Iterable[str], image_format: str = 'png') -> List[Dict[str, str]]:
+    """Template context: title and versioned URL of each chart that has been rendered"""
+    from django.urls import reverse
+
+    links = []
+    for name, bucket in chart_versions(names).items():
+        url = reverse("adminpanel:chart", args=[name, image_format])
+        links.append({'name': name, 'title': CHARTS[name]['title'], 'url': f"{url}?v={bucket}"})
+    return links
+
+
+def render_charts(names: Optional[Iterable[str]] = None, now=None) -> int:
+    """Render charts for the current bucket; charts already stored for it are skipped"""
+    from .utils import ChartGenerator
+
+    options = get_options()
+    bucket = current_bucket(now)
+    names = list(names or CHARTS)
+    done = chart_versions(names)
+
+    rendered = 0
+    for name in names:
+        if done.get(name) == bucket:
+            continue
+        spec = CHARTS[name]
+        try:
+            rows = spec['rows']()
+            dates = [day for day, _ in rows]
+            values = [float(value) for _, value in rows]
+            images = {
+                _data_path(name, bucket, image_format): ChartGenerator.render(
+                    dates, values, spec['title'], spec['chart_type'], image_format
+                )
+                for image_format in options['FORMATS']
+            }
+        except Exception as e:
+            logger.error(f"Rendering admin chart {name} failed: {e}")
+            continue
+
+        try:
+            # Bytes first, then the version, so a reader never sees a version without data
+            _version_path(name).parent.mkdir(parents=True, exist_ok=True)
+            for path, data in images.items():
+                _write_atomic(path, data)
+            _write_atomic(_version_path(name), str(bucket).encode())
+            # Pages rendered from the previous version may still link to it for a while
+            _prune(name, bucket - max(options['TTL'] // options['BUCKET_SECONDS'], 1))
+        except OSError as e:
+            logger.error(f"Storing admin chart {name} failed: {e}")
+            continue
+        rendered += 1
+    return rendered
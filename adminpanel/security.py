@@ -7,6 +7,9 @@ from django.contrib.auth.models import User
 from django.core.cache import cache
 from django.utils import timezone
 
+from accounts.pgp_challenges import ADMIN, make_challenge, take_challenge
+from accounts.pgp_service import PGPService
+
 
 class AdminSecurityManager:
     """Enhanced security manager for admin operations"""
@@ -47,25 +50,38 @@ class AdminSecurityManager:
         cache.delete(cache_key)
 
     def generate_pgp_challenge(self, user):
-        """Generate PGP challenge for admin verification"""
-        challenge_data = {
-            "timestamp": int(time.time()),
-            "user_id": user.id,
-            "nonce": secrets.token_urlsafe(16),
-            "action": "admin_verification",
-        }
+        """Generate PGP challenge for admin verification, encrypted to the admin's key"""
+        stocked = take_challenge(user, ADMIN)
+
+        if stocked:
+            challenge_string = stocked["challenge"]
+            encrypted_challenge = stocked["encrypted"]
+        else:
+            challenge_string, message = make_challenge(ADMIN)
+            pgp_service = PGPService()
+            if user.pgp_public_key and not pgp_service.import_public_key(user.pgp_public_key)["success"]:
+                return {"success": False, "error": "Admin PGP key could not be imported"}
+            encrypt_result = pgp_service.encrypt_message(message, user.pgp_fingerprint)
+            if not encrypt_result["success"]:
+                return {"success": False, "error": encrypt_result["error"]}
+            encrypted_challenge = encrypt_result["encrypted_message"]
 
-        challenge_string = f"ADMIN-VERIFY:{challenge_data['timestamp']}:{challenge_data['nonce']}"
         challenge_hash = hashlib.sha256(challenge_string.encode()).hexdigest()[:16]
+        timestamp = int(time.time())
 
         cache_key = f"admin_pgp_challenge:{user.id}"
         cache.set(
             cache_key,
-            {"challenge": challenge_string, "hash": challenge_hash, "timestamp": challenge_data["timestamp"]},
+            {"challenge": challenge_string, "hash": challenge_hash, "timestamp": timestamp},
             600,
         )  # 10 minutes
 
-        return challenge_string, challenge_hash
+        return {
+            "success": True,
+            "challenge_id": challenge_hash,
+            "challenge_text": challenge_string,
+            "encrypted_challenge": encrypted_challenge,
+        }
 
     def verify_pgp_challenge(self, user, decrypted_response):
         """Verify PGP challenge response"""
@@ -157,6 +173,10 @@ class TripleAuthenticator:
     def __init__(self):
         self.security_manager = AdminSecurityManager()
 
+    def generate_pgp_challenge(self, user):
+        """Generate the encrypted PGP step of the triple authentication"""
+        return self.security_manager.generate_pgp_challenge(user)
+
     def start_authentication(self, user, request):
         """Start triple authentication process"""
         can_access, message = self.security_manager.check_admin_access(user, request)
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views import (
+    admin_chart,
     admin_dashboard,
     admin_login,
     admin_logout,
@@ -59,6 +60,7 @@ urlpatterns = [
     path("withdrawal/<int:withdrawal_id>/", admin_withdrawal_detail, name="withdrawal_detail"),
     path("security-logs/", admin_security_logs, name="security_logs"),
     path("wallet-overview/", admin_wallet_overview, name="wallet_overview"),
+    path("charts/<str:name>.<str:image_format>", admin_chart, name="chart"),
     path("withdrawal-management/", withdrawal_management, name="withdrawal_management"),
     path("withdrawal-detail/<int:withdrawal_id>/", withdrawal_detail, name="withdrawal_detail"),
     path("withdrawal-approve/<int:withdrawal_id>/", withdrawal_approve, name="withdrawal_approve"),
@@ -6,20 +6,19 @@ from datetime import date, datetime
 from decimal import Decimal
 from io import BytesIO
 
-import matplotlib
 from django.conf import settings
 from django.core.cache import cache
 
-matplotlib.use("Agg")  # Non-interactive backend
-import matplotlib.pyplot as plt
-from matplotlib.dates import DateFormatter
-from matplotlib.figure import Figure
-
 logger = logging.getLogger(__name__)
 
 
 class ChartGenerator:
-    """Thread-safe chart generator with caching."""
+    """
+    Thread-safe chart generator with caching.
+
+    matplotlib is imported on first render, so importing this module stays cheap;
+    admin pages use the charts pre-rendered by adminpanel.charts instead.
+    """
 
     @staticmethod
     def get_cache_key(data, chart_type):
@@ -55,9 +54,6 @@ class ChartGenerator:
             return cached
 
         try:
-            fig = Figure(figsize=(10, 5), dpi=100, facecolor="white")
-            ax = fig.add_subplot(111)
-
             dates = [d.get("date") or d.get("order__created_at__date") or d.get("created_at__date") for d in data]
             values = [d.get(key, 0) for d in data]
 
@@ -65,53 +61,62 @@ class ChartGenerator:
             for date_val in dates:
                 if isinstance(date_val, str):
                     try:
-                        from datetime import datetime
-
                         processed_dates.append(datetime.fromisoformat(date_val).date())
                     except (ValueError, AttributeError):
                         processed_dates.append(date_val)
                 else:
                     processed_dates.append(date_val)
-            dates = processed_dates
 
-            if chart_type == "line":
-                ax.plot(dates, values, color="#4CAF50", linewidth=2, marker="o", markersize=4)
-            elif chart_type == "bar":
-                ax.bar(dates, values, color="#4CAF50", alpha=0.8)
+            encoded = base64.b64encode(cls.render(processed_dates, values, title, chart_type)).decode("utf-8")
 
-            ax.set_title(title, fontsize=16, fontweight="bold", pad=20)
-            ax.set_xlabel("Date", fontsize=12)
-            ax.set_ylabel("Value", fontsize=12)
-            ax.grid(True, alpha=0.3, linestyle="--")
+            cache.set(cache_key, encoded, 3600)
 
-            if dates and isinstance(dates[0], (datetime, datetime.date)):
-                ax.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
-                fig.autofmt_xdate()  # Rotate date labels
+            return encoded
 
-            ax.spines["top"].set_visible(False)
-            ax.spines["right"].set_visible(False)
+        except Exception as e:
+            logger.error(f"Chart generation error: {str(e)}")
+            return cls._generate_empty_chart(title)
 
-            fig.tight_layout()
+    @staticmethod
+    def render(dates, values, title, chart_type="line", image_format="png"):
+        """Render a date series and return the image bytes."""
+        from matplotlib.dates import DateFormatter
+        from matplotlib.figure import Figure
 
-            buffer = BytesIO()
-            fig.savefig(buffer, format="png", bbox_inches="tight", facecolor="white", edgecolor="none")
-            buffer.seek(0)
+        if not values:
+            return ChartGenerator._render_empty(title, image_format)
 
-            encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
+        fig = Figure(figsize=(10, 5), dpi=100, facecolor="white")
+        ax = fig.add_subplot(111)
 
-            plt.close(fig)
+        if chart_type == "line":
+            ax.plot(dates, values, color="#4CAF50", linewidth=2, marker="o", markersize=4)
+        elif chart_type == "bar":
+            ax.bar(dates, values, color="#4CAF50", alpha=0.8)
 
-            cache.set(cache_key, encoded, 3600)
+        ax.set_title(title, fontsize=16, fontweight="bold", pad=20)
+        ax.set_xlabel("Date", fontsize=12)
+        ax.set_ylabel("Value", fontsize=12)
+        ax.grid(True, alpha=0.3, linestyle="--")
 
-            return encoded
+        if dates and isinstance(dates[0], date):
+            ax.xaxis.set_major_formatter(DateFormatter("%Y-%m-%d"))
+            fig.autofmt_xdate()  # Rotate date labels
 
-        except Exception as e:
-            logger.error(f"Chart generation error: {str(e)}")
-            return cls._generate_empty_chart(title)
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format=image_format, bbox_inches="tight", facecolor="white", edgecolor="none")
+        return buffer.getvalue()
 
     @staticmethod
-    def _generate_empty_chart(title):
-        """Generate a placeholder chart for when no data is available."""
+    def _render_empty(title, image_format="png"):
+        """Render a placeholder chart for when no data is available."""
+        from matplotlib.figure import Figure
+
         fig = Figure(figsize=(10, 5), dpi=100, facecolor="white")
         ax = fig.add_subplot(111)
 
@@ -131,10 +136,10 @@ class ChartGenerator:
         ax.set_yticks([])
 
         buffer = BytesIO()
-        fig.savefig(buffer, format="png", bbox_inches="tight", facecolor="white")
-        buffer.seek(0)
-
-        encoded = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        plt.close(fig)
+        fig.savefig(buffer, format=image_format, bbox_inches="tight", facecolor="white")
+        return buffer.getvalue()
 
-        return encoded
+    @staticmethod
+    def _generate_empty_chart(title):
+        """Generate a placeholder chart for when no data is available."""
+        return base64.b64encode(ChartGenerator._render_empty(title)).decode("utf-8")
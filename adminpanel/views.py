@@ -13,7 +13,7 @@ from django.contrib.auth.decorators import login_required
 from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.db.models import Avg, Count, Q, Sum
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
@@ -30,6 +30,7 @@ from products.models import Product
 from vendors.models import Vendor
 from wallets.models import AuditLog, Transaction, Wallet, WithdrawalRequest
 
+from . import charts
 from .decorators import admin_required, log_admin_action, require_2fa, require_triple_auth
 from .forms import AdminLoginForm, AdminPGPChallengeForm, AdminTripleAuthForm, SecondaryAuthForm
 from .models import AdminAction, AdminLog, AdminProfile, SecurityAlert
@@ -287,9 +288,10 @@ def pgp_verify(request):
 
                 pgp_service = PGPService()
 
-                verify_result = pgp_service.verify_signature(signed_response, challenge)
+                # Any imported key verifies in the shared keyring: require the admin's own key
+                verify_result = pgp_service.verify_signature(signed_response, expected_fingerprint=user.pgp_fingerprint)
 
-                if verify_result["success"]:
+                if verify_result.get("valid") and verify_result["signed_data"].strip() == challenge:
                     login(request, user)
                     request.session.pop("admin_pending_user_id", None)
                     request.session.pop("admin_login_timestamp", None)
@@ -315,26 +317,21 @@ def pgp_verify(request):
     else:
         form = AdminPGPChallengeForm()
 
-        from accounts.pgp_service import PGPService
+        challenge_data = AdminSecurityManager().generate_pgp_challenge(user)
 
-        pgp_service = PGPService()
-
-        challenge = f"Admin login challenge for {user.username} at {timezone.now().isoformat()}"
-        request.session["admin_pgp_challenge"] = challenge
-
-        encrypt_result = pgp_service.encrypt_message(challenge, user.pgp_fingerprint)
-
-        if not encrypt_result["success"]:
+        if not challenge_data["success"]:
             messages.error(request, "Failed to generate PGP challenge.")
             return redirect("adminpanel:login")
 
+        request.session["admin_pgp_challenge"] = challenge_data["challenge_text"]
+
     return render(
         request,
         "adminpanel/pgp_verify.html",
         {
             "form": form,
             "user": user,
-            "encrypted_challenge": encrypt_result.get("encrypted_message", "") if "encrypt_result" in locals() else "",
+            "encrypted_challenge": challenge_data["encrypted_challenge"] if "challenge_data" in locals() else "",
         },
     )
 
@@ -441,6 +438,7 @@ def admin_dashboard(request):
         "recent_users": recent_users,
         "recent_orders": recent_orders,
         "recent_disputes": recent_disputes,
+        "charts": charts.chart_links(charts.DASHBOARD_CHARTS),
     }
     return render(request, "adminpanel/dashboard.html", context)
 
@@ -1307,10 +1305,33 @@ def admin_wallet_overview(request):
         "high_risk_withdrawals": high_risk_withdrawals,
         "recent_discrepancies": recent_discrepancies,
         "recent_transactions": recent_transactions,
+        "charts": charts.chart_links(charts.WALLET_OVERVIEW_CHARTS),
     }
     return render(request, "adminpanel/wallet_overview.html", context)
 
 
+@login_required
+def admin_chart(request, name, image_format):
+    """Serve a chart pre-rendered by core.tasks.render_admin_charts"""
+    if not request.user.is_superuser:
+        raise Http404("Chart not found")
+
+    if name not in charts.CHARTS or image_format not in charts.CONTENT_TYPES:
+        raise Http404("Chart not found")
+
+    version = request.GET.get("v", "")
+    data = charts.get_chart(name, image_format, int(version) if version.isdigit() else None)
+    if data is None:
+        raise Http404("Chart not rendered yet")
+
+    response = HttpResponse(data, content_type=charts.CONTENT_TYPES[image_format])
+    # Versioned URLs always map to the same bytes
+    max_age = charts.get_options()["BUCKET_SECONDS"] if version else 60
+    response["Cache-Control"] = f"private, max-age={max_age}"
+    response["X-Content-Type-Options"] = "nosniff"
+    return response
+
+
 @login_required
 def system_logs(request):
     if not request.user.is_superuser:
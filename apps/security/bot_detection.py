@@ -8,6 +8,8 @@ from django.http import HttpResponseForbidden
 from django.shortcuts import render
 from django.utils import timezone
 
+from core.security.rate_limit import rate_limiter
+
 logger = logging.getLogger("security.bot_detection")
 
 
@@ -67,11 +69,7 @@ class BotDetectionMiddleware:
             logger.warning(f"Rate limit exceeded for {client_id}")
             return render(request, "security/rate_limited.html", status=429)
 
-        response = self.get_response(request)
-
-        self.track_request(request, client_id)
-
-        return response
+        return self.get_response(request)
 
     def get_client_identifier(self, request):
         """Get anonymized client identifier for privacy"""
@@ -116,52 +114,20 @@ class BotDetectionMiddleware:
         return False
 
     def check_rate_limits(self, request, client_id):
-        """Check various rate limits"""
-        current_time = timezone.now()
-
-        minute_key = f"requests_minute:{client_id}:{current_time.strftime('%Y%m%d%H%M')}"
-        hour_key = f"requests_hour:{client_id}:{current_time.strftime('%Y%m%d%H')}"
-
-        minute_count = cache.get(minute_key, 0)
-        hour_count = cache.get(hour_key, 0)
-
-        if minute_count >= self.rate_limits["requests_per_minute"]:
-            return False
-
-        if hour_count >= self.rate_limits["requests_per_hour"]:
-            return False
-
-        if "/accounts/login/" in request.path:
-            login_key = f"login_attempts:{client_id}:{current_time.strftime('%Y%m%d%H')}"
-            login_count = cache.get(login_key, 0)
-            if login_count >= self.rate_limits["login_attempts_per_hour"]:
-                return False
-
-        if "/accounts/register/" in request.path:
-            reg_key = f"registration_attempts:{client_id}:{current_time.strftime('%Y%m%d%H')}"
-            reg_count = cache.get(reg_key, 0)
-            if reg_count >= self.rate_limits["registration_attempts_per_hour"]:
-                return False
-
-        return True
-
-    def track_request(self, request, client_id):
-        """Track request for rate limiting"""
-        current_time = timezone.now()
-
-        minute_key = f"requests_minute:{client_id}:{current_time.strftime('%Y%m%d%H%M')}"
-        hour_key = f"requests_hour:{client_id}:{current_time.strftime('%Y%m%d%H')}"
+        """Count the request against every applicable limit in one atomic batch"""
+        limits = [
+            ("requests_minute", 60, self.rate_limits["requests_per_minute"]),
+            ("requests_hour", 3600, self.rate_limits["requests_per_hour"]),
+        ]
 
-        cache.set(minute_key, cache.get(minute_key, 0) + 1, 60)
-        cache.set(hour_key, cache.get(hour_key, 0) + 1, 3600)
+        if request.method == "POST":
+            if "/accounts/login/" in request.path:
+                limits.append(("login_attempts", 3600, self.rate_limits["login_attempts_per_hour"]))
 
-        if "/accounts/login/" in request.path and request.method == "POST":
-            login_key = f"login_attempts:{client_id}:{current_time.strftime('%Y%m%d%H')}"
-            cache.set(login_key, cache.get(login_key, 0) + 1, 3600)
+            if "/accounts/register/" in request.path:
+                limits.append(("registration_attempts", 3600, self.rate_limits["registration_attempts_per_hour"]))
 
-        if "/accounts/register/" in request.path and request.method == "POST":
-            reg_key = f"registration_attempts:{client_id}:{current_time.strftime('%Y%m%d%H')}"
-            cache.set(reg_key, cache.get(reg_key, 0) + 1, 3600)
+        return rate_limiter.hit(client_id, limits).allowed
 
     def flag_suspicious_activity(self, client_id, reason):
         """Flag suspicious activity and potentially block"""
@@ -8,13 +8,14 @@ from datetime import timedelta
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.models import AnonymousUser
-from django.core.cache import cache
 from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
 
+from core.security.rate_limit import rate_limiter
+
 logger = logging.getLogger("wallet.security")
 
 
@@ -125,7 +126,6 @@ class WalletSecurityMiddleware(MiddlewareMixin):
     def _check_multi_window_rate_limit(self, request):
         """Multi-window rate limiting with different limits"""
         ip = self._get_client_ip(request)
-        current_time = time.time()
 
         limits = [
             ("1min", 60, 20),  # 20 requests per minute
@@ -133,19 +133,7 @@ class WalletSecurityMiddleware(MiddlewareMixin):
             ("1hour", 3600, 200),  # 200 requests per hour
         ]
 
-        for window_name, window_size, limit in limits:
-            cache_key = f"rate_limit:{window_name}:{ip}"
-            requests = cache.get(cache_key, [])
-
-            requests = [req_time for req_time in requests if current_time - req_time < window_size]
-
-            if len(requests) >= limit:
-                return False
-
-            requests.append(current_time)
-            cache.set(cache_key, requests, window_size)
-
-        return True
+        return rate_limiter.hit(ip, limits).allowed
 
     def _get_client_ip(self, request):
         """Get client IP with proxy support"""
@@ -221,14 +209,11 @@ class RateLimitMiddleware:
     def check_rate_limit(self, request, action, max_attempts):
         """Check rate limit for specific action"""
         ip = self.get_client_ip(request)
-        cache_key = f"rate_limit:{action}:{ip}:{request.user.id}"
 
-        attempts = cache.get(cache_key, 0)
-        if attempts >= max_attempts:
+        if not rate_limiter.hit(f"{ip}:{request.user.id}", [(action, 3600, max_attempts)]):
             logger.warning(f"Rate limit exceeded for {action} by user {request.user.username} " f"from IP {ip}")
             return False
 
-        cache.set(cache_key, attempts + 1, 3600)
         return True
 
     def get_client_ip(self, request):
@@ -427,16 +412,8 @@ class EnhancedSecurityMiddleware:
         # Get client IP
         client_ip = self._get_client_ip(request)
         
-        # Check rate limiting
-        cache_key = f"rate_limit:{client_ip}"
-        request_count = cache.get(cache_key, 0)
-        
-        if request_count > 100:  # 100 requests per minute
-            return True
-        
-        # Increment counter
-        cache.set(cache_key, request_count + 1, 60)
-        return False
+        # 100 requests per minute
+        return not rate_limiter.hit(client_ip, [("requests", 60, 100)])
 
     def _get_client_ip(self, request):
         """Get client IP address"""
@@ -4,12 +4,14 @@ Provides the foundation for creating modular Django applications.
 """
 
 import logging
+import threading
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Type
 
 from django.apps import apps
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
 
 logger = logging.getLogger(__name__)
 
@@ -120,11 +122,16 @@ class BaseModule(ABC):
 class ModuleRegistry:
     """
     Registry for managing all modules in the system.
+
+    Modules registered with ``register_lazy`` are imported, created and enabled
+    on the first ``get_module`` call.
     """
 
     _modules: Dict[str, BaseModule] = {}
     _module_classes: Dict[str, Type[BaseModule]] = {}
+    _module_paths: Dict[str, str] = {}
     _initialized: bool = False
+    _lock = threading.RLock()
 
     @classmethod
     def register(cls, module_class: Type[BaseModule]) -> None:
@@ -156,15 +163,47 @@ class ModuleRegistry:
             logger.error(f"Failed to create module {module_name}: {e}")
             return None
 
+    @classmethod
+    def register_lazy(cls, module_name: str, class_path: str) -> None:
+        """Register a module by dotted class path without importing it."""
+        cls._module_paths[module_name] = class_path
+        logger.debug(f"Registered lazy module: {module_name} -> {class_path}")
+
     @classmethod
     def get_module(cls, module_name: str) -> Optional[BaseModule]:
-        """Get a module instance by name."""
-        return cls._modules.get(module_name)
+        """Get a module instance by name, creating a lazily registered one on first use."""
+        module = cls._modules.get(module_name)
+        if module is not None or module_name not in cls._module_paths:
+            return module
+
+        with cls._lock:
+            module = cls._modules.get(module_name)
+            if module is None:
+                module = cls._load_module(module_name)
+            return module
+
+    @classmethod
+    def _load_module(cls, module_name: str) -> Optional[BaseModule]:
+        """Import, create and enable a lazily registered module and its dependencies."""
+        try:
+            module_class = import_string(cls._module_paths[module_name])
+        except ImportError as e:
+            logger.error(f"Failed to import module {module_name}: {e}")
+            return None
+
+        cls._module_classes.setdefault(module_name, module_class)
+        for dep in module_class.dependencies:
+            cls.get_module(dep)
+
+        module = cls.create_module(module_name)
+        if module and not module.enable():
+            logger.error(f"Failed to initialize module {module_name}")
+        return module
 
     @classmethod
     def has_module(cls, module_name: str) -> bool:
-        """Check if a module exists."""
-        return module_name in cls._modules
+        """Check if a module exists or is registered to be loaded on first use."""
+        return module_name in cls._modules or module_name in cls._module_paths
 
     @classmethod
     def get_all_modules(cls) -> Dict[str, BaseModule]:
@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.services.import_profiler import TARGETS, get_options, profile_imports
+
+
+class Command(BaseCommand):
+    help = "Profile start-up imports in a fresh interpreter and compare them to IMPORT_TIME_BUDGET"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", choices=sorted(TARGETS), default="setup",
+                            help="Start-up path to trace (default: django.setup())")
+        parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters to run; the median is reported")
+        parser.add_argument("--top", type=int, help="Offenders to list (default: IMPORT_TIME_BUDGET['TOP'])")
+        parser.add_argument("--budget-ms", type=int, help="Override the total budget in milliseconds")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+        parser.add_argument("--check", action="store_true", help="Exit with an error when over budget (for CI)")
+
+    def handle(self, *args, **options):
+        budget = get_options()
+        if options["budget_ms"] is not None:
+            budget["TOTAL_MS"] = options["budget_ms"]
+        top = options["top"] or budget["TOP"]
+
+        try:
+            profile = profile_imports(options["target"], max(1, options["runs"]))
+        except RuntimeError as e:
+            raise CommandError(str(e))
+        violations = profile.over_budget(budget)
+
+        if options["json"]:
+            self.stdout.write(json.dumps({**profile.as_dict(top), "over_budget": violations}, indent=2))
+        else:
+            self._write_report(profile, budget, top)
+
+        if violations:
+            message = "Import time over budget: " + "; ".join(violations)
+            if options["check"]:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        elif not options["json"]:
+            self.stdout.write(self.style.SUCCESS(f"Within budget ({budget['TOTAL_MS']}ms)"))
+
+    def _write_report(self, profile, budget, top):
+        self.stdout.write(f"Import time: {profile.total_us / 1000:.0f}ms (budget {budget['TOTAL_MS']}ms)")
+
+        self.stdout.write("\nBy app (including the libraries it imported first):")
+        for app, spent_us in sorted(profile.by_app.items(), key=lambda item: -item[1]):
+            limit = budget["APPS"].get(app, budget["APP_MS"])
+            flag = "  over" if spent_us / 1000 > limit and not app.startswith("(") else ""
+            self.stdout.write(f"  {app:<28} {spent_us / 1000:8.1f}ms{flag}")
+
+        self.stdout.write("\nBy package:")
+        for package, spent_us in profile.top_packages(top):
+            self.stdout.write(f"  {package:<28} {spent_us / 1000:8.1f}ms")
+
+        self.stdout.write("\nTop offenders (cumulative, where the package was first imported):")
+        for spent_us, module, parent, app in profile.top_entries(top):
+            via = f" via {parent}" if parent else ""
+            self.stdout.write(f"  {spent_us / 1000:8.1f}ms  {module}{via} [{app}]")
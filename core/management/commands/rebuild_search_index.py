@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product search index from the database"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f"Rebuilding search index with {backend.__class__.__name__}...")
+
+        started = time.perf_counter()
+        indexed = backend.rebuild()
+        elapsed = time.perf_counter() - started
+
+        for key, value in backend.get_stats().items():
+            self.stdout.write(f"  {key}: {value}")
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} products in {elapsed:.2f}s"))
@@ -1 +1,59 @@
+"""
+Core Middleware
+Request-level profiling for the marketplace.
+"""
 
+import logging
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .services import request_profiler
+
+logger = logging.getLogger(__name__)
+
+
+class RequestProfilingMiddleware:
+    """
+    Record per-view wall time, SQL count and time, duplicate / N+1 queries, cache
+    hits and misses and template render time, and keep stack samples of slow requests.
+
+    Place it first in MIDDLEWARE so the whole middleware stack is measured. Results are
+    aggregated in core.services.request_profiler.request_metrics and exported through
+    PerformanceMonitor.export_metrics.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = request_profiler.get_options()['ENABLED']
+        if self.enabled:
+            request_profiler.TemplateTimer.install()
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        profile = request_profiler.start_profile()
+        status_code = 500
+        try:
+            with ExitStack() as stack:
+                timer = request_profiler.QueryTimer(profile)
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+            status_code = response.status_code
+            return response
+        finally:
+            profile.view = self._view_name(request)
+            try:
+                request_profiler.finish_profile(profile, status_code)
+            except Exception as e:
+                logger.error(f"Failed to record request profile for {profile.view}: {e}")
+
+    @staticmethod
+    def _view_name(request) -> str:
+        """Label requests by resolved view so metric cardinality stays bounded"""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match._func_path
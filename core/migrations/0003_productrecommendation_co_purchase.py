@@ -0,0 +1,59 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_disputearbitration_loyaltytransaction_searchquery_and_more"),
+        ("products", "0004_remove_vacation_field"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="productrecommendation",
+            name="source_product",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="neighbour_recommendations",
+                to="products.product",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="productrecommendation",
+            name="recommendation_type",
+            field=models.CharField(
+                choices=[
+                    ("collaborative", "Collaborative Filtering"),
+                    ("content_based", "Content Based"),
+                    ("trending", "Trending"),
+                    ("similar", "Similar Products"),
+                    ("co_purchase", "Co-Purchase Neighbour"),
+                ],
+                max_length=30,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="productrecommendation",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="product_recommendations",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="productrecommendation",
+            index=models.Index(
+                fields=["source_product", "recommendation_type", "expires_at"], name="core_produc_source__6a1b60_idx"
+            ),
+        ),
+    ]
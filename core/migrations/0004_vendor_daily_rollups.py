@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_productrecommendation_co_purchase"),
+        ("products", "0004_remove_vacation_field"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VendorDailyBuyerStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("revenue_btc", models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ("revenue_xmr", models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ("disputes", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "buyer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_vendor_purchases",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "vendor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_buyer_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Vendor Daily Buyer Stats",
+                "ordering": ["-date"],
+                "indexes": [models.Index(fields=["vendor", "date"], name="core_vendor_vendor__dba0fd_idx")],
+                "unique_together": {("vendor", "buyer", "date")},
+            },
+        ),
+        migrations.CreateModel(
+            name="VendorDailyProductStats",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("orders", models.PositiveIntegerField(default=0)),
+                ("units", models.PositiveIntegerField(default=0)),
+                ("revenue_btc", models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ("revenue_xmr", models.DecimalField(decimal_places=8, default=0, max_digits=20)),
+                ("unique_buyers", models.PositiveIntegerField(default=0)),
+                ("disputes", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, related_name="daily_stats", to="products.product"
+                    ),
+                ),
+                (
+                    "vendor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_product_stats",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Vendor Daily Product Stats",
+                "ordering": ["-date"],
+                "indexes": [models.Index(fields=["vendor", "date"], name="core_vendor_vendor__7f101c_idx")],
+                "unique_together": {("vendor", "product", "date")},
+            },
+        ),
+    ]
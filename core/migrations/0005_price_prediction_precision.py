@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-16 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_vendor_daily_rollups"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="priceprediction",
+            name="predicted_price",
+            field=models.DecimalField(decimal_places=8, max_digits=20),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-16 21:40
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_price_prediction_precision"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userpreferenceprofile",
+            name="interaction_summary",
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name="userpreferenceprofile",
+            name="interactions_compacted_through",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="UserInteractionEvent",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("interaction_type", models.CharField(max_length=50)),
+                ("data", models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ("day", models.DateField()),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="interaction_events",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "User Interaction Events",
+                "indexes": [models.Index(fields=["day"], name="core_userin_day_946fc0_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_user_interaction_events"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="securitylog",
+            index=models.Index(fields=["timestamp"], name="core_securi_timesta_8b537b_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="searchquery",
+            index=models.Index(fields=["created_at"], name="core_search_created_6a437a_idx"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-17 09:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_retention_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userinteractionevent",
+            name="inserted_at",
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
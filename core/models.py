@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 from django.utils import timezone
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 User = get_user_model()
@@ -68,6 +69,9 @@ class SecurityLog(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["timestamp"]),
+        ]
 
     def __str__(self):
         return f"{self.action} - {self.user or self.ip_address} - {self.timestamp}"
@@ -161,9 +165,65 @@ class VendorAnalytics(models.Model):
         return timezone.now() > self.expires_at
 
 
+class VendorDailyProductStats(models.Model):
+    """Daily sales rollup per vendor and product, refreshed as orders change status."""
+    vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_product_stats')
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    units = models.PositiveIntegerField(default=0)
+    revenue_btc = models.DecimalField(max_digits=20, decimal_places=8, default=0)
+    revenue_xmr = models.DecimalField(max_digits=20, decimal_places=8, default=0)
+    unique_buyers = models.PositiveIntegerField(default=0)
+    disputes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Vendor Daily Product Stats"
+        unique_together = ['vendor', 'product', 'date']
+        indexes = [
+            models.Index(fields=['vendor', 'date']),
+        ]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.vendor.username} - {self.product_id} ({self.date})"
+
+
+class VendorDailyBuyerStats(models.Model):
+    """Daily purchases per vendor and buyer, so distinct and repeat customers over any range stay exact."""
+    vendor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_buyer_stats')
+    buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_vendor_purchases')
+    date = models.DateField()
+    orders = models.PositiveIntegerField(default=0)
+    revenue_btc = models.DecimalField(max_digits=20, decimal_places=8, default=0)
+    revenue_xmr = models.DecimalField(max_digits=20, decimal_places=8, default=0)
+    disputes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Vendor Daily Buyer Stats"
+        unique_together = ['vendor', 'buyer', 'date']
+        indexes = [
+            models.Index(fields=['vendor', 'date']),
+        ]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.vendor.username} - {self.buyer_id} ({self.date})"
+
+
 class ProductRecommendation(models.Model):
-    """Model to store product recommendations for users."""
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='product_recommendations')
+    """
+    Model to store product recommendations.
+    Per-user rows set ``user``; item-item co-purchase neighbours set ``source_product`` instead.
+    """
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='product_recommendations', null=True, blank=True
+    )
+    source_product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE, related_name='neighbour_recommendations', null=True, blank=True
+    )
     product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='recommendations')
     recommendation_type = models.CharField(
         max_length=30,
@@ -171,7 +231,8 @@ class ProductRecommendation(models.Model):
             ("collaborative", "Collaborative Filtering"),
             ("content_based", "Content Based"),
             ("trending", "Trending"),
-            ("similar", "Similar Products")
+            ("similar", "Similar Products"),
+            ("co_purchase", "Co-Purchase Neighbour")
         ]
     )
     confidence_score = models.FloatField(validators=[MinValueValidator(0.0), MaxValueValidator(1.0)])
@@ -182,9 +243,13 @@ class ProductRecommendation(models.Model):
     class Meta:
         ordering = ['-confidence_score', '-created_at']
         unique_together = ['user', 'product', 'recommendation_type']
+        indexes = [
+            models.Index(fields=['source_product', 'recommendation_type', 'expires_at']),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.product.name} ({self.recommendation_type})"
+        owner = self.user.username if self.user_id else f"after {self.source_product_id}"
+        return f"{owner} - {self.product.name} ({self.recommendation_type})"
 
     def is_expired(self):
         return timezone.now() > self.expires_at
@@ -193,7 +258,7 @@ class ProductRecommendation(models.Model):
 class PricePrediction(models.Model):
     """Model to store price predictions and market insights."""
     product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='price_predictions')
-    predicted_price = models.DecimalField(max_digits=10, decimal_places=2)
+    predicted_price = models.DecimalField(max_digits=20, decimal_places=8)
     confidence_score = models.FloatField(validators=[MinValueValidator(0.0), MaxValueValidator(1.0)])
     prediction_type = models.CharField(
         max_length=30,
@@ -249,6 +314,8 @@ class UserPreferenceProfile(models.Model):
     )
     loyalty_indicators = models.JSONField(default=dict)
     churn_risk = models.FloatField(validators=[MinValueValidator(0.0), MaxValueValidator(1.0)], default=0.5)
+    interaction_summary = models.JSONField(default=dict)
+    interactions_compacted_through = models.BigIntegerField(default=0)
     last_updated = models.DateTimeField(auto_now=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -259,6 +326,26 @@ class UserPreferenceProfile(models.Model):
         return f"{self.user.username} - Preference Profile"
 
 
+class UserInteractionEvent(models.Model):
+    """Append-only log of user interactions, partitioned by UTC day and folded into preference profiles."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='interaction_events', db_index=False)
+    interaction_type = models.CharField(max_length=50)
+    data = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    day = models.DateField()
+    created_at = models.DateTimeField(default=timezone.now)
+    # When the row was written, which compaction waits on; created_at is when the interaction happened
+    inserted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "User Interaction Events"
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.interaction_type} ({self.created_at})"
+
+
 class SearchQuery(models.Model):
     """Model to track search queries for personalization and analytics."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_queries', null=True, blank=True)
@@ -274,6 +361,9 @@ class SearchQuery(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Search Queries"
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.query} ({self.results_count} results)"
@@ -12,7 +12,7 @@ from django.db import transaction
 from ..architecture.base import BaseModule
 from ..architecture.decorators import module, provides_models, provides_templates, provides_views
 from ..architecture.interfaces import ModelInterface, TemplateInterface, ViewInterface
-from ..services.user_service import UserService
+from ..services.service_registry import ServiceRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -39,17 +39,16 @@ class AccountsModule(BaseModule, ModelInterface, ViewInterface, TemplateInterfac
     def __init__(self, **kwargs):
         """Initialize the accounts module."""
         super().__init__(**kwargs)
-        self.user_service = UserService(**kwargs)
         self._user_cache = {}
 
+    @property
+    def user_service(self):
+        """The shared user service, built by ServiceRegistry on first use."""
+        return ServiceRegistry.get_service("user_service")
+
     def initialize(self) -> bool:
         """Initialize the accounts module."""
         try:
-            # Initialize the user service
-            if not self.user_service.initialize():
-                logger.error("Failed to initialize user service")
-                return False
-
             # Register template tags
             self._register_template_tags()
 
@@ -67,7 +66,8 @@ class AccountsModule(BaseModule, ModelInterface, ViewInterface, TemplateInterfac
         """Clean up the accounts module."""
         try:
             # Clean up user service
-            self.user_service.cleanup()
+            if ServiceRegistry.has_service("user_service"):
+                self.user_service.cleanup()
 
             # Clear user cache
             self._user_cache.clear()
@@ -411,9 +411,7 @@ class AccountsModule(BaseModule, ModelInterface, ViewInterface, TemplateInterfac
             # Get wallet data if available
             wallet_data = {}
             try:
-                from core.services.wallet_service import WalletService
-
-                wallet_service = WalletService()
+                wallet_service = ServiceRegistry.get_service("wallet_service")
                 wallet_data = wallet_service.get_wallet_summary(user_id)
             except Exception as e:
                 # Log the error instead of silently passing
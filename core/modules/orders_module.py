@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional, Type
 from ..architecture.base import BaseModule
 from ..architecture.decorators import module, provides_models, provides_templates, provides_views
 from ..architecture.interfaces import ModelInterface, TemplateInterface, ViewInterface
-from ..services.order_service import OrderService
+from ..services.service_registry import ServiceRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -37,17 +37,16 @@ class OrdersModule(BaseModule, ModelInterface, ViewInterface, TemplateInterface)
     def __init__(self, **kwargs):
         """Initialize the orders module."""
         super().__init__(**kwargs)
-        self.order_service = OrderService(**kwargs)
         self._order_cache = {}
 
+    @property
+    def order_service(self):
+        """The shared order service, built by ServiceRegistry on first use."""
+        return ServiceRegistry.get_service("order_service")
+
     def initialize(self) -> bool:
         """Initialize the orders module."""
         try:
-            # Initialize the order service
-            if not self.order_service.initialize():
-                logger.error("Failed to initialize order service")
-                return False
-
             # Register template tags
             self._register_template_tags()
 
@@ -65,7 +64,8 @@ class OrdersModule(BaseModule, ModelInterface, ViewInterface, TemplateInterface)
         """Clean up the orders module."""
         try:
             # Clean up order service
-            self.order_service.cleanup()
+            if ServiceRegistry.has_service("order_service"):
+                self.order_service.cleanup()
 
             # Clear order cache
             self._order_cache.clear()
@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional, Type
 from ..architecture.base import BaseModule
 from ..architecture.decorators import module, provides_models, provides_templates, provides_views
 from ..architecture.interfaces import ModelInterface, TemplateInterface, ViewInterface
-from ..services.product_service import ProductService
+from ..services.service_registry import ServiceRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -37,17 +37,16 @@ class ProductsModule(BaseModule, ModelInterface, ViewInterface, TemplateInterfac
     def __init__(self, **kwargs):
         """Initialize the products module."""
         super().__init__(**kwargs)
-        self.product_service = ProductService(**kwargs)
         self._product_cache = {}
 
+    @property
+    def product_service(self):
+        """The shared product service, built by ServiceRegistry on first use."""
+        return ServiceRegistry.get_service("product_service")
+
     def initialize(self) -> bool:
         """Initialize the products module."""
         try:
-            # Initialize the product service
-            if not self.product_service.initialize():
-                logger.error("Failed to initialize product service")
-                return False
-
             # Register template tags
             self._register_template_tags()
 
@@ -65,7 +64,8 @@ class ProductsModule(BaseModule, ModelInterface, ViewInterface, TemplateInterfac
         """Clean up the products module."""
         try:
             # Clean up product service
-            self.product_service.cleanup()
+            if ServiceRegistry.has_service("product_service"):
+                self.product_service.cleanup()
 
             # Clear product cache
             self._product_cache.clear()
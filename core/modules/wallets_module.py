@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional, Type
 from ..architecture.base import BaseModule
 from ..architecture.decorators import module, provides_models, provides_templates, provides_views
 from ..architecture.interfaces import ModelInterface, TemplateInterface, ViewInterface
-from ..services.wallet_service import WalletService
+from ..services.service_registry import ServiceRegistry
 
 logger = logging.getLogger(__name__)
 
@@ -36,17 +36,16 @@ class WalletsModule(BaseModule, ModelInterface, ViewInterface, TemplateInterface
     def __init__(self, **kwargs):
         """Initialize the wallets module."""
         super().__init__(**kwargs)
-        self.wallet_service = WalletService(**kwargs)
         self._wallet_cache = {}
 
+    @property
+    def wallet_service(self):
+        """The shared wallet service, built by ServiceRegistry on first use."""
+        return ServiceRegistry.get_service("wallet_service")
+
     def initialize(self) -> bool:
         """Initialize the wallets module."""
         try:
-            # Initialize the wallet service
-            if not self.wallet_service.initialize():
-                logger.error("Failed to initialize wallet service")
-                return False
-
             # Register template tags
             self._register_template_tags()
 
@@ -64,7 +63,8 @@ class WalletsModule(BaseModule, ModelInterface, ViewInterface, TemplateInterface
         """Clean up the wallets module."""
         try:
             # Clean up wallet service
-            self.wallet_service.cleanup()
+            if ServiceRegistry.has_service("wallet_service"):
+                self.wallet_service.cleanup()
 
             # Clear wallet cache
             self._wallet_cache.clear()
@@ -0,0 +1,27 @@
+"""
+Search Package
+Pluggable product search backends and the local BM25 inverted index.
+"""
+
+from .backends import (
+    BaseSearchBackend,
+    DatabaseSearchBackend,
+    InvertedIndexSearchBackend,
+    get_search_backend,
+    reset_search_backend,
+)
+from .index import InvertedIndex, tokenize
+from .pagination import SearchPage, decode_cursor, encode_cursor
+
+__all__ = [
+    "BaseSearchBackend",
+    "DatabaseSearchBackend",
+    "InvertedIndexSearchBackend",
+    "InvertedIndex",
+    "SearchPage",
+    "decode_cursor",
+    "encode_cursor",
+    "get_search_backend",
+    "reset_search_backend",
+    "tokenize",
+]
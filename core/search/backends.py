@@ -0,0 +1,480 @@
+"""
+Search Backends
+Pluggable product search engines used by SearchService.
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .index import InvertedIndex, tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_SETTINGS = {
+    "BACKEND": "core.search.backends.InvertedIndexSearchBackend",
+    "INDEX_PATH": None,
+    "BM25_K1": 1.2,
+    "BM25_B": 0.75,
+    "FIELD_WEIGHTS": None,
+    "MAX_RESULTS": 50,
+}
+
+# Attribute tuple layout stored alongside each indexed product
+ATTR_NAME, ATTR_CATEGORY, ATTR_VENDOR, ATTR_PRICE, ATTR_STOCK, ATTR_CREATED = range(6)
+
+
+def get_search_settings() -> Dict[str, Any]:
+    """Get search settings merged over the defaults."""
+    options = dict(DEFAULT_SEARCH_SETTINGS)
+    options.update(getattr(settings, "SEARCH_SETTINGS", {}))
+    return options
+
+
+def product_document(product) -> Tuple[Dict[str, str], tuple]:
+    """Build the indexed fields and filter attributes for a product."""
+    fields = {
+        "name": product.name or "",
+        "description": product.description or "",
+        "category": product.category.name if product.category_id else "",
+        "vendor": product.vendor.user.username if product.vendor_id else "",
+    }
+    attributes = (
+        product.name or "",
+        str(product.category_id) if product.category_id else None,
+        str(product.vendor_id) if product.vendor_id else None,
+        float(product.price_btc or 0),
+        product.stock_quantity or 0,
+        product.created_at.timestamp() if product.created_at else 0.0,
+    )
+    return fields, attributes
+
+
+def build_filter_predicate(filters: Optional[Dict[str, Any]]):
+    """Translate SearchService filters into a predicate over product attributes."""
+    if not filters:
+        return None
+
+    category_id = str(filters["category_id"]) if filters.get("category_id") else None
+    vendor_id = str(filters["vendor_id"]) if filters.get("vendor_id") else None
+    min_price = float(filters["min_price"]) if filters.get("min_price") else None
+    max_price = float(filters["max_price"]) if filters.get("max_price") else None
+    in_stock = bool(filters.get("in_stock"))
+
+    def predicate(attributes) -> bool:
+        if category_id is not None and attributes[ATTR_CATEGORY] != category_id:
+            return False
+        if vendor_id is not None and attributes[ATTR_VENDOR] != vendor_id:
+            return False
+        if min_price is not None and attributes[ATTR_PRICE] < min_price:
+            return False
+        if max_price is not None and attributes[ATTR_PRICE] > max_price:
+            return False
+        if in_stock and attributes[ATTR_STOCK] <= 0:
+            return False
+        return True
+
+    return predicate
+
+
+class BaseSearchBackend(ABC):
+    """Interface every product search backend implements."""
+
+    def __init__(self, options: Dict[str, Any]):
+        self.options = options
+
+    @abstractmethod
+    def search(self, terms: List[str], filters: Optional[Dict] = None, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return (product_id, score) pairs for available products, best first."""
+        pass
+
+    @abstractmethod
+    def suggest(self, partial_query: str, limit: int = 10) -> List[str]:
+        """Return product names matching a partial query."""
+        pass
+
+    def search_page(
+        self,
+        terms: List[str],
+        filters: Optional[Dict] = None,
+        limit: int = 12,
+        offset: int = 0,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """Return one page of (product_id, score) hits and the total hit count."""
+        hits = self.search(terms, filters)
+        if after is not None:
+            offset = next((position + 1 for position, (doc_id, _) in enumerate(hits) if doc_id == after[1]), 0)
+        return hits[offset:offset + limit], len(hits)
+
+    def index_product(self, product) -> None:
+        """Add, update or drop a product after it was saved."""
+        pass
+
+    def remove_product(self, product_id) -> None:
+        """Drop a deleted product."""
+        pass
+
+    def discard_product(self, product_id) -> None:
+        """Forget a stale hit in this process only; the removal signal is what tells the others."""
+        pass
+
+    def rebuild(self) -> int:
+        """Rebuild the backend from the database. Returns the number of indexed products."""
+        return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend statistics."""
+        return {"backend": self.__class__.__name__}
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Fallback backend issuing icontains queries against the database."""
+
+    def search(self, terms: List[str], filters: Optional[Dict] = None, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        from products.models import Product
+
+        query = Q()
+        for term in terms:
+            query |= (
+                Q(name__icontains=term)
+                | Q(description__icontains=term)
+                | Q(category__name__icontains=term)
+                | Q(vendor__user__username__icontains=term)
+            )
+
+        products = Product.objects.filter(is_available=True)
+        if query:
+            products = products.filter(query)
+
+        filters = filters or {}
+        if filters.get("category_id"):
+            products = products.filter(category_id=filters["category_id"])
+        if filters.get("min_price"):
+            products = products.filter(price_btc__gte=filters["min_price"])
+        if filters.get("max_price"):
+            products = products.filter(price_btc__lte=filters["max_price"])
+        if filters.get("vendor_id"):
+            products = products.filter(vendor_id=filters["vendor_id"])
+        if filters.get("in_stock"):
+            products = products.filter(stock_quantity__gt=0)
+
+        product_ids = products.order_by("-vendor__trust_level", "-created_at").values_list("pk", flat=True)
+        if limit is not None:
+            product_ids = product_ids[:limit]
+        return [(str(pk), 0.0) for pk in product_ids]
+
+    def suggest(self, partial_query: str, limit: int = 10) -> List[str]:
+        from products.models import Product
+
+        names = Product.objects.filter(name__icontains=partial_query, is_available=True).values_list("name", flat=True)
+        return sorted(set(names[:limit]))[:limit]
+
+
+class InvertedIndexSearchBackend(BaseSearchBackend):
+    """
+    Local BM25 inverted index over available products.
+
+    Each process keeps its own index. Writes bump a generation counter in the shared
+    cache so other processes catch up by re-indexing products updated since their last
+    sync, and a full rebuild publishes a snapshot file that every process reloads.
+    Removals leave no row to sync from, so each one is also logged as a numbered
+    tombstone that other processes replay before syncing; a process that has fallen
+    further behind than the log reaches rebuilds from the database instead.
+    """
+
+    GENERATION_KEY = "search:index:generation"
+    SNAPSHOT_KEY = "search:index:snapshot"
+    REMOVALS_KEY = "search:index:removals"
+    TOMBSTONE_KEY = "search:index:removed:{}"
+    TOMBSTONE_TTL = 24 * 60 * 60
+    MAX_TOMBSTONES = 1000
+    SUGGESTION_TERMS = 20
+
+    def __init__(self, options: Dict[str, Any]):
+        super().__init__(options)
+        self.index = InvertedIndex(
+            k1=options["BM25_K1"],
+            b=options["BM25_B"],
+            field_weights=options.get("FIELD_WEIGHTS"),
+        )
+        self.index_path = Path(options["INDEX_PATH"]) if options.get("INDEX_PATH") else None
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._generation = None
+        self._snapshot_id = None
+        self._synced_at = None
+        self._removals_seen = 0
+
+    # Index maintenance
+
+    def index_product(self, product) -> None:
+        with self._lock:
+            if not self._loaded:
+                # Nothing to patch yet; the first query loads a fresh index
+                self._bump_generation()
+                return
+            self._apply_product(product)
+            self._track_sync(product.updated_at)
+            self._generation = self._bump_generation(expected=self._generation)
+
+    def remove_product(self, product_id) -> None:
+        with self._lock:
+            self.index.remove(str(product_id))
+            self._record_removal(product_id)
+            self._generation = self._bump_generation(expected=self._generation if self._loaded else None)
+
+    def discard_product(self, product_id) -> None:
+        with self._lock:
+            self.index.remove(str(product_id))
+
+    def _apply_product(self, product):
+        if product.is_available:
+            fields, attributes = product_document(product)
+            self.index.add(str(product.pk), fields, attributes)
+        else:
+            self.index.remove(str(product.pk))
+
+    def _track_sync(self, updated_at):
+        if updated_at and (self._synced_at is None or updated_at > self._synced_at):
+            self._synced_at = updated_at
+
+    def _bump_generation(self, expected=None):
+        try:
+            if cache.add(self.GENERATION_KEY, 1, None):
+                generation = 1
+            else:
+                generation = cache.incr(self.GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to bump search index generation: {e}")
+            return expected
+        # Only skip our own catch-up when nobody else wrote in between
+        if expected is not None and generation == expected + 1:
+            return generation
+        return expected
+
+    def _record_removal(self, product_id):
+        try:
+            if cache.add(self.REMOVALS_KEY, 1, None):
+                removal = 1
+            else:
+                removal = cache.incr(self.REMOVALS_KEY)
+            cache.set(self.TOMBSTONE_KEY.format(removal), str(product_id), self.TOMBSTONE_TTL)
+        except Exception as e:
+            logger.warning(f"Failed to log search index removal of {product_id}: {e}")
+            return
+        if removal == self._removals_seen + 1:
+            self._removals_seen = removal
+
+    def _apply_removals(self) -> bool:
+        """Replay removals logged by other processes; False when the log no longer covers the gap."""
+        latest = cache.get(self.REMOVALS_KEY) or 0
+        if latest <= self._removals_seen:
+            return True
+        if latest - self._removals_seen > self.MAX_TOMBSTONES:
+            return False
+
+        keys = {number: self.TOMBSTONE_KEY.format(number) for number in range(self._removals_seen + 1, latest + 1)}
+        tombstones = cache.get_many(list(keys.values()))
+        for number, key in keys.items():
+            if key not in tombstones:
+                # A writer that has taken the number but not logged it yet is picked up by the
+                # next check; a gap with later tombstones behind it means this one expired
+                return not any(keys[later] in tombstones for later in range(number + 1, latest + 1))
+            self.index.remove(tombstones[key])
+            self._removals_seen = number
+        return True
+
+    def rebuild(self) -> int:
+        """Rebuild from the database, publish a snapshot and make other processes reload it."""
+        with self._lock:
+            started = time.perf_counter()
+            self._build_from_database()
+            if self.index_path:
+                snapshot_id = self._write_snapshot()
+                cache.set(self.SNAPSHOT_KEY, snapshot_id, None)
+                self._snapshot_id = snapshot_id
+            self._generation = cache.get(self.GENERATION_KEY)
+            self._loaded = True
+            logger.info(f"Search index rebuilt with {len(self.index)} products in {time.perf_counter() - started:.2f}s")
+            return len(self.index)
+
+    def _build_from_database(self):
+        from products.models import Product
+
+        self.index.clear()
+        self._synced_at = None
+        # Read before the products so removals made during the build are replayed, harmlessly
+        self._removals_seen = cache.get(self.REMOVALS_KEY) or 0
+        products = (
+            Product.objects.filter(is_available=True)
+            .select_related("category", "vendor__user")
+            .only(
+                "id", "name", "description", "price_btc", "stock_quantity", "is_available",
+                "created_at", "updated_at", "category__name", "vendor__user__username",
+            )
+        )
+        for product in products.iterator(chunk_size=2000):
+            fields, attributes = product_document(product)
+            self.index.add(str(product.pk), fields, attributes)
+            self._track_sync(product.updated_at)
+        self.index.compact()
+
+    def _write_snapshot(self) -> str:
+        snapshot_id = f"{time.time():.6f}"
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(".tmp")
+        with gzip.open(temp_path, "wt", encoding="utf-8") as handle:
+            header = {
+                "snapshot_id": snapshot_id,
+                "synced_at": self._synced_at.isoformat() if self._synced_at else None,
+                "removals": self._removals_seen,
+            }
+            handle.write(json.dumps(header) + "\n")
+            for doc_id, frequencies, attributes in self.index.export_documents():
+                handle.write(json.dumps([doc_id, frequencies, attributes]) + "\n")
+        os.replace(temp_path, self.index_path)
+        return snapshot_id
+
+    def _load_snapshot(self) -> bool:
+        if not self.index_path or not self.index_path.exists():
+            return False
+
+        from django.utils.dateparse import parse_datetime
+
+        try:
+            with gzip.open(self.index_path, "rt", encoding="utf-8") as handle:
+                header = json.loads(handle.readline())
+                self.index.clear()
+                for line in handle:
+                    doc_id, frequencies, attributes = json.loads(line)
+                    self.index.add_frequencies(doc_id, frequencies, tuple(attributes))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load search index snapshot {self.index_path}: {e}")
+            self.index.clear()
+            return False
+
+        self._snapshot_id = header.get("snapshot_id")
+        self._synced_at = parse_datetime(header["synced_at"]) if header.get("synced_at") else None
+        self._removals_seen = header.get("removals", 0)
+        return True
+
+    def _sync_changes(self):
+        """Re-index products changed since the last sync."""
+        from products.models import Product
+
+        products = Product.objects.select_related("category", "vendor__user")
+        if self._synced_at is not None:
+            products = products.filter(updated_at__gte=self._synced_at)
+        for product in products.iterator(chunk_size=2000):
+            self._apply_product(product)
+            self._track_sync(product.updated_at)
+
+    def _ensure_current(self):
+        """Load the index on first use and catch up with writes from other processes."""
+        snapshot_id = cache.get(self.SNAPSHOT_KEY)
+        generation = cache.get(self.GENERATION_KEY)
+        if self._loaded and snapshot_id == self._snapshot_id and generation == self._generation:
+            return
+
+        with self._lock:
+            if not self._loaded or snapshot_id != self._snapshot_id:
+                if self._load_snapshot() and self._apply_removals():
+                    self._sync_changes()
+                else:
+                    self._build_from_database()
+                self._snapshot_id = snapshot_id
+                self._loaded = True
+            elif generation != self._generation:
+                if self._apply_removals():
+                    self._sync_changes()
+                else:
+                    self._build_from_database()
+            self._generation = generation
+
+    # Queries
+
+    def search(self, terms: List[str], filters: Optional[Dict] = None, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        self._ensure_current()
+        tokens = [token for term in terms for token in tokenize(term)]
+        if not tokens:
+            return []
+        return self.index.search(tokens, limit=limit, predicate=build_filter_predicate(filters))
+
+    def search_page(
+        self,
+        terms: List[str],
+        filters: Optional[Dict] = None,
+        limit: int = 12,
+        offset: int = 0,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        self._ensure_current()
+        tokens = [token for term in terms for token in tokenize(term)]
+        if not tokens:
+            return [], 0
+        return self.index.search_page(
+            tokens, limit, predicate=build_filter_predicate(filters), offset=offset, after=after
+        )
+
+    def suggest(self, partial_query: str, limit: int = 10) -> List[str]:
+        self._ensure_current()
+        tokens = tokenize(partial_query)
+        if not tokens:
+            return []
+
+        needle = partial_query.lower()
+        suggestions = set()
+        for term in self.index.terms_with_prefix(tokens[-1], self.SUGGESTION_TERMS):
+            for doc_id in self.index.documents_with_term(term):
+                attributes = self.index.get_attributes(doc_id)
+                if attributes and needle in attributes[ATTR_NAME].lower():
+                    suggestions.add(attributes[ATTR_NAME])
+                    if len(suggestions) >= limit:
+                        return sorted(suggestions)
+        return sorted(suggestions)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = super().get_stats()
+        stats.update(self.index.get_stats())
+        stats.update({
+            "loaded": self._loaded,
+            "generation": self._generation,
+            "snapshot_id": self._snapshot_id,
+            "synced_at": self._synced_at.isoformat() if self._synced_at else None,
+            "removals_seen": self._removals_seen,
+        })
+        return stats
+
+
+_backend: Optional[BaseSearchBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_search_backend() -> BaseSearchBackend:
+    """Get the process-wide search backend configured in SEARCH_SETTINGS."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = get_search_settings()
+                _backend = import_string(options["BACKEND"])(options)
+    return _backend
+
+
+def reset_search_backend() -> None:
+    """Forget the configured backend so the next call re-reads settings."""
+    global _backend
+    with _backend_lock:
+        _backend = None
@@ -0,0 +1,315 @@
+"""
+Inverted Index
+Tokenized in-memory inverted index with BM25 scoring.
+Kept free of Django imports so it can be built and benchmarked standalone.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from array import array
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+", re.UNICODE)
+MIN_TOKEN_LENGTH = 2
+
+STOP_WORDS = frozenset(
+    "an and are as at be by for from in is it of on or that the this to was with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase search terms."""
+    if not text:
+        return []
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) >= MIN_TOKEN_LENGTH and token not in STOP_WORDS
+    ]
+
+
+class InvertedIndex:
+    """
+    Thread-safe inverted index scored with BM25.
+
+    Documents are stored in numbered slots. Postings are compact parallel arrays of
+    (slot, weighted term frequency); replacing or removing a document tombstones its
+    slot and the index is compacted once tombstones make up a large share of it.
+    """
+
+    DEFAULT_FIELD_WEIGHTS = {"name": 3.0, "category": 2.0, "vendor": 1.5, "description": 1.0}
+    COMPACTION_RATIO = 0.25
+    COMPACTION_MIN_DEAD = 1000
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, field_weights: Optional[Dict[str, float]] = None):
+        self.k1 = k1
+        self.b = b
+        self.field_weights = dict(field_weights or self.DEFAULT_FIELD_WEIGHTS)
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._doc_freq: Dict[str, int] = {}
+        self._slots: Dict[str, int] = {}
+        self._slot_ids: List[Optional[str]] = []
+        self._slot_terms: List[Optional[Tuple[str, ...]]] = []
+        self._slot_attributes: List[Any] = []
+        self._slot_lengths = array("f")
+        self._total_length = 0.0
+        self._dead_slots = 0
+        self._sorted_terms: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._slots
+
+    @property
+    def average_length(self) -> float:
+        """Average weighted document length."""
+        return self._total_length / len(self._slots) if self._slots else 0.0
+
+    def analyze(self, fields: Dict[str, str]) -> Dict[str, float]:
+        """Convert document fields into weighted term frequencies."""
+        frequencies: Dict[str, float] = {}
+        for field, text in fields.items():
+            weight = self.field_weights.get(field, 1.0)
+            for token in tokenize(text):
+                frequencies[token] = frequencies.get(token, 0.0) + weight
+        return frequencies
+
+    def add(self, doc_id: str, fields: Dict[str, str], attributes: Any = None) -> None:
+        """Add or replace a document."""
+        self.add_frequencies(doc_id, self.analyze(fields), attributes)
+
+    def add_frequencies(self, doc_id: str, frequencies: Dict[str, float], attributes: Any = None) -> None:
+        """Add or replace a document from precomputed term frequencies."""
+        with self._lock:
+            self._remove_slot(doc_id)
+
+            slot = len(self._slot_ids)
+            length = sum(frequencies.values())
+            self._slots[doc_id] = slot
+            self._slot_ids.append(doc_id)
+            self._slot_terms.append(tuple(frequencies))
+            self._slot_attributes.append(attributes)
+            self._slot_lengths.append(length)
+            self._total_length += length
+
+            for term, frequency in frequencies.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("L"), array("f"))
+                    self._sorted_terms = None
+                postings[0].append(slot)
+                postings[1].append(frequency)
+                self._doc_freq[term] = self._doc_freq.get(term, 0) + 1
+
+            self._maybe_compact()
+
+    def remove(self, doc_id: str) -> bool:
+        """Remove a document. Returns False if it was not indexed."""
+        with self._lock:
+            removed = self._remove_slot(doc_id)
+            if removed:
+                self._maybe_compact()
+            return removed
+
+    def _remove_slot(self, doc_id: str) -> bool:
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return False
+
+        for term in self._slot_terms[slot]:
+            remaining = self._doc_freq.get(term, 0) - 1
+            if remaining > 0:
+                self._doc_freq[term] = remaining
+            else:
+                self._doc_freq.pop(term, None)
+
+        self._total_length -= self._slot_lengths[slot]
+        self._slot_ids[slot] = None
+        self._slot_terms[slot] = None
+        self._slot_attributes[slot] = None
+        self._dead_slots += 1
+        return True
+
+    def _maybe_compact(self):
+        if self._dead_slots >= self.COMPACTION_MIN_DEAD and self._dead_slots > len(self._slot_ids) * self.COMPACTION_RATIO:
+            self.compact()
+
+    def compact(self) -> None:
+        """Drop tombstoned slots and rewrite postings."""
+        with self._lock:
+            remap: Dict[int, int] = {}
+            slot_ids: List[Optional[str]] = []
+            slot_terms: List[Optional[Tuple[str, ...]]] = []
+            slot_attributes: List[Any] = []
+            slot_lengths = array("f")
+
+            for old_slot, doc_id in enumerate(self._slot_ids):
+                if doc_id is None:
+                    continue
+                remap[old_slot] = len(slot_ids)
+                slot_ids.append(doc_id)
+                slot_terms.append(self._slot_terms[old_slot])
+                slot_attributes.append(self._slot_attributes[old_slot])
+                slot_lengths.append(self._slot_lengths[old_slot])
+
+            postings: Dict[str, Tuple[array, array]] = {}
+            for term, (slots, weights) in self._postings.items():
+                new_slots, new_weights = array("L"), array("f")
+                for slot, weight in zip(slots, weights):
+                    new_slot = remap.get(slot)
+                    if new_slot is not None:
+                        new_slots.append(new_slot)
+                        new_weights.append(weight)
+                if new_slots:
+                    postings[term] = (new_slots, new_weights)
+
+            self._postings = postings
+            self._slot_ids = slot_ids
+            self._slot_terms = slot_terms
+            self._slot_attributes = slot_attributes
+            self._slot_lengths = slot_lengths
+            self._slots = {doc_id: slot for slot, doc_id in enumerate(slot_ids)}
+            self._dead_slots = 0
+            self._sorted_terms = None
+
+    def clear(self) -> None:
+        """Remove every document."""
+        with self._lock:
+            self._reset()
+
+    def get_attributes(self, doc_id: str) -> Any:
+        """Get the attributes stored with a document."""
+        slot = self._slots.get(doc_id)
+        return None if slot is None else self._slot_attributes[slot]
+
+    def score(self, terms: Iterable[str], predicate: Optional[Callable[[Any], bool]] = None) -> Dict[str, float]:
+        """Score every document matching at least one term."""
+        with self._lock:
+            doc_count = len(self._slots)
+            if not doc_count:
+                return {}
+
+            k1 = self.k1
+            # Length normalisation k1 * (1 - b + b * length / avgdl) split into constant and per-slot parts
+            norm_base = k1 * (1.0 - self.b)
+            norm_scale = k1 * self.b / (self.average_length or 1.0)
+            slot_ids, slot_lengths = self._slot_ids, self._slot_lengths
+            scores: Dict[int, float] = {}
+            scores_get = scores.get
+
+            for term in set(terms):
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                doc_freq = self._doc_freq.get(term, 0)
+                idf = math.log(1.0 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+                numerator = idf * (k1 + 1.0)
+                for slot, frequency in zip(*postings):
+                    if slot_ids[slot] is None:
+                        continue
+                    norm = norm_base + norm_scale * slot_lengths[slot]
+                    scores[slot] = scores_get(slot, 0.0) + numerator * frequency / (frequency + norm)
+
+            attributes = self._slot_attributes
+            return {
+                slot_ids[slot]: value
+                for slot, value in scores.items()
+                if predicate is None or predicate(attributes[slot])
+            }
+
+    def search(
+        self,
+        terms: Iterable[str],
+        limit: Optional[int] = None,
+        predicate: Optional[Callable[[Any], bool]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return (doc_id, score) pairs ordered by descending score."""
+        scores = self.score(terms, predicate)
+        if limit is None:
+            return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+
+    def search_page(
+        self,
+        terms: Iterable[str],
+        limit: int,
+        predicate: Optional[Callable[[Any], bool]] = None,
+        offset: int = 0,
+        after: Optional[Tuple[float, str]] = None,
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Return one page of hits and the total hit count.
+
+        With ``after`` set to the (score, doc_id) of the previous page's last hit the page
+        is found by keyset instead of offset: the heap holds ``limit`` hits rather than
+        ``offset + limit`` and pages stay stable while the index changes. Every match is
+        still scored, since a BM25 score is only known once all query terms are summed
+        and the total is needed for the page count, so a page costs O(matches).
+        """
+        scores = self.score(terms, predicate)
+        total = len(scores)
+        candidates = scores.items()
+        if after is not None:
+            after_key = (-after[0], after[1])
+            candidates = [item for item in candidates if (-item[1], item[0]) > after_key]
+            offset = 0
+        hits = heapq.nsmallest(offset + limit, candidates, key=lambda item: (-item[1], item[0]))
+        return hits[offset:], total
+
+    def terms_with_prefix(self, prefix: str, limit: int = 50) -> List[str]:
+        """Get indexed terms starting with prefix, most frequent first."""
+        with self._lock:
+            if self._sorted_terms is None:
+                self._sorted_terms = sorted(self._postings)
+            terms = self._sorted_terms
+            start = bisect.bisect_left(terms, prefix)
+            matches = []
+            for term in terms[start:]:
+                if not term.startswith(prefix):
+                    break
+                if term in self._doc_freq:
+                    matches.append(term)
+            matches.sort(key=lambda term: -self._doc_freq[term])
+            return matches[:limit]
+
+    def documents_with_term(self, term: str) -> Iterator[str]:
+        """Iterate live document ids containing a term."""
+        postings = self._postings.get(term)
+        if postings is None:
+            return
+        for slot in postings[0]:
+            doc_id = self._slot_ids[slot]
+            if doc_id is not None:
+                yield doc_id
+
+    def export_documents(self) -> Iterator[Tuple[str, Dict[str, float], Any]]:
+        """Yield (doc_id, term frequencies, attributes) for every live document."""
+        with self._lock:
+            frequencies: List[Dict[str, float]] = [{} for _ in self._slot_ids]
+            for term, (slots, weights) in self._postings.items():
+                for slot, weight in zip(slots, weights):
+                    if self._slot_ids[slot] is not None:
+                        frequencies[slot][term] = weight
+            for slot, doc_id in enumerate(self._slot_ids):
+                if doc_id is not None:
+                    yield doc_id, frequencies[slot], self._slot_attributes[slot]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size statistics."""
+        with self._lock:
+            return {
+                "documents": len(self._slots),
+                "terms": len(self._doc_freq),
+                "postings": sum(len(slots) for slots, _ in self._postings.values()),
+                "dead_slots": self._dead_slots,
+                "average_length": round(self.average_length, 3),
+            }
@@ -0,0 +1,80 @@
+"""
+Search Pagination
+Ranked result pages with offset and keyset (cursor) navigation.
+"""
+
+import base64
+import binascii
+import math
+from typing import Any, List, Optional, Tuple
+
+
+def encode_cursor(score: float, doc_id: str) -> str:
+    """Encode the position of a hit as an opaque URL-safe cursor."""
+    raw = f"{score!r}|{doc_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+    """Decode a cursor produced by encode_cursor. Returns None for missing or malformed cursors."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, doc_id = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|", 1)
+        return float(score), doc_id
+    except (ValueError, UnicodeError, binascii.Error):
+        return None
+
+
+class SearchPage:
+    """
+    One page of ranked search results.
+    Mirrors the parts of django.core.paginator.Page the templates use, so it can be
+    passed as page_obj; ``paginator`` points back at the page for num_pages/count.
+    """
+
+    def __init__(self, object_list: List[Any], number: int, per_page: int, total: int, next_cursor: Optional[str] = None):
+        self.object_list = object_list
+        self.number = number
+        self.per_page = per_page
+        self.count = total
+        self.next_cursor = next_cursor
+        self.paginator = self
+
+    @property
+    def num_pages(self) -> int:
+        return max(1, math.ceil(self.count / self.per_page)) if self.per_page else 1
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.number < self.num_pages
+
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    def has_other_pages(self) -> bool:
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self) -> int:
+        return self.number + 1
+
+    def previous_page_number(self) -> int:
+        return self.number - 1
+
+    def start_index(self) -> int:
+        return 0 if not self.count else (self.number - 1) * self.per_page + 1
+
+    def end_index(self) -> int:
+        return (self.number - 1) * self.per_page + len(self.object_list)
+
+    def __repr__(self) -> str:
+        return f"<SearchPage {self.number} of {self.num_pages}>"
@@ -0,0 +1,41 @@
+"""
+Search Signals
+Keep the search index in step with Product writes.
+"""
+
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import get_search_backend
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender="products.Product", dispatch_uid="search_index_product_saved")
+def index_saved_product(sender, instance, **kwargs):
+    """Re-index a product once its transaction commits."""
+
+    def apply():
+        try:
+            get_search_backend().index_product(instance)
+        except Exception as e:
+            logger.error(f"Failed to index product {instance.pk}: {e}")
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_delete, sender="products.Product", dispatch_uid="search_index_product_deleted")
+def remove_deleted_product(sender, instance, **kwargs):
+    """Drop a deleted product from the index once its transaction commits."""
+    product_id = instance.pk
+
+    def apply():
+        try:
+            get_search_backend().remove_product(product_id)
+        except Exception as e:
+            logger.error(f"Failed to remove product {product_id} from search index: {e}")
+
+    transaction.on_commit(apply)
@@ -1,9 +1,9 @@
-import hashlib
 import logging
 import os
-import re
 import secrets
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from io import BytesIO
 from pathlib import Path
 
@@ -11,6 +11,8 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 from PIL import Image, ImageFilter
 
+from .image_variants import DEFAULT_WIDTHS, content_digest, parse_name, render_variants, variant_name
+
 logger = logging.getLogger(__name__)
 
 try:
@@ -48,6 +50,42 @@ except ImportError:
     logger.warning("paramiko not available, remote storage disabled")
 
 
+SCAN_CHUNK = 64 * 1024
+
+# Markup and script that has no business inside an image, looked for anywhere in the upload
+MALICIOUS_PATTERNS = (
+    b"<?php", b"<script", b"javascript:", b"onerror=", b"eval(", b"exec(", b"system(", b"shell_exec",
+    b"<iframe", b"cmd.exe", b"/bin/bash", b"<html", b"<body",
+)
+SCRIPT_INDICATORS = (b"script", b"javascript", b"eval", b"function", b"var ", b"document")
+# Short enough to turn up by chance in compressed pixel data, so only looked for at the ends
+EDGE_PATTERNS = (b".exe", b".sh", b".bat")
+EDGE_BYTES = 1024
+
+_processing_pool = None
+_processing_pool_lock = threading.Lock()
+
+
+def get_processing_pool():
+    """
+    Bounded pool that decodes uploads.
+
+    The request still waits for its result, up to PROCESSING_TIMEOUT; the pool caps
+    how many uploads a process decodes at once, and so its peak decode memory. Pillow
+    releases the GIL while decoding and resampling, so a few threads keep several
+    uploads moving.
+    """
+    global _processing_pool
+    if _processing_pool is None:
+        with _processing_pool_lock:
+            if _processing_pool is None:
+                _processing_pool = ThreadPoolExecutor(
+                    max_workers=settings.IMAGE_UPLOAD_SETTINGS.get("PROCESSING_WORKERS", 2),
+                    thread_name_prefix="image-processing",
+                )
+    return _processing_pool
+
+
 class SecureImageProcessor:
     """
     Ultra-secure image processor for Tor marketplace
@@ -64,6 +102,8 @@ class SecureImageProcessor:
         self.allowed_mimetypes = self.config["ALLOWED_MIMETYPES"]
         self.max_size = self.config["MAX_FILE_SIZE"]
         self.max_dimensions = self.config["MAX_IMAGE_DIMENSIONS"]
+        self.max_input_pixels = self.config.get("MAX_INPUT_PIXELS", 40_000_000)
+        self.variant_widths = self.config.get("VARIANT_WIDTHS", DEFAULT_WIDTHS)
 
     def validate_and_process_image(self, uploaded_file, user):
         """
@@ -76,24 +116,21 @@ class SecureImageProcessor:
 
             self._validate_file_size(uploaded_file)
 
-            file_content = uploaded_file.read()
-            uploaded_file.seek(0)
+            file_content = self._read_upload(uploaded_file)
+            error = self._screen_content(file_content)
+            if error:
+                return False, error, None
 
-            if not self._validate_magic_numbers(file_content):
-                return False, "Invalid file type detected", None
+            images, error = self._process_on_pool(file_content)
+            if error:
+                return False, error, None
+            processed_image, thumbnail, variants = images
 
-            if self._detect_malicious_content(file_content):
-                return False, "Suspicious content detected", None
-
-            processed_image, thumbnail = self._process_image(file_content)
-
-            if not processed_image:
-                return False, "Failed to process image", None
-
-            filename = self._generate_secure_filename(uploaded_file.name)
+            # Content-addressed: the same processed image is stored once, whoever uploads it
+            filename = variant_name(content_digest(processed_image.getbuffer()))
             thumb_filename = f"thumb_{filename}"
 
-            success = self._save_images(processed_image, thumbnail, filename, thumb_filename, user)
+            success = self._save_images(processed_image, thumbnail, filename, thumb_filename, user, variants)
 
             if not success:
                 return False, "Failed to save image", None
@@ -108,6 +145,39 @@ class SecureImageProcessor:
             logger.error(f"Image processing error: {str(e)}")
             return False, "Image processing failed", None
 
+    def _read_upload(self, uploaded_file):
+        """
+        Copy the upload into memory, chunk by chunk.
+
+        The processing worker decodes this copy, so a decode that outlives the request's
+        timeout never reads the upload after Django has closed it.
+        """
+        uploaded_file.seek(0)
+        file_content = b"".join(uploaded_file.chunks(SCAN_CHUNK))
+        uploaded_file.seek(0)
+        return file_content
+
+    def _screen_content(self, file_content):
+        """Reason to refuse the upload before decoding it, or None"""
+        if not self._validate_magic_numbers(file_content):
+            return "Invalid file type detected"
+        if self._detect_malicious_content(file_content):
+            return "Suspicious content detected"
+        return None
+
+    def _process_on_pool(self, file_content):
+        """Decode on the processing pool; returns ((image, thumbnail, variants), error)"""
+        future = get_processing_pool().submit(self._process_image, file_content)
+        try:
+            images = future.result(timeout=self.config.get("PROCESSING_TIMEOUT", 30))
+        except FutureTimeoutError:
+            future.cancel()
+            logger.error("Image processing timed out")
+            return None, "Image processing timed out"
+        if not images[0]:
+            return None, "Failed to process image"
+        return images, None
+
     def _validate_file_size(self, uploaded_file):
         """Check file size"""
         if uploaded_file.size > self.max_size:
@@ -137,55 +207,59 @@ class SecureImageProcessor:
         return True
 
     def _detect_malicious_content(self, file_content):
-        """Scan for malicious patterns"""
-        scan_start = file_content[:1024].lower()
-        scan_end = file_content[-1024:].lower() if len(file_content) > 1024 else b""
-
-        suspicious_patterns = [
-            b"<?php",
-            b"<script",
-            b"javascript:",
-            b"onerror=",
-            b"eval(",
-            b"exec(",
-            b"system(",
-            b"shell_exec",
-            b"<iframe",
-            b".exe",
-            b".sh",
-            b".bat",
-            b"cmd.exe",
-            b"/bin/bash",
-            b"<html",
-            b"<body",
-        ]
-
-        for pattern in suspicious_patterns:
-            if pattern in scan_start or pattern in scan_end:
+        """
+        Scan for malicious patterns
+
+        Script and markup patterns are looked for across the whole upload, in overlapping
+        chunks so a pattern split between two chunks is still found; executable names
+        only in the first and last EDGE_BYTES.
+        """
+        overlap = max(len(pattern) for pattern in MALICIOUS_PATTERNS + SCRIPT_INDICATORS) - 1
+        found = set()
+        for start in range(0, len(file_content), SCAN_CHUNK):
+            window = file_content[max(0, start - overlap):start + SCAN_CHUNK].lower()
+            found.update(pattern for pattern in MALICIOUS_PATTERNS + SCRIPT_INDICATORS if pattern in window)
+        for edge in (file_content[:EDGE_BYTES].lower(), file_content[-EDGE_BYTES:].lower()):
+            found.update(pattern for pattern in EDGE_PATTERNS if pattern in edge)
+
+        for pattern in MALICIOUS_PATTERNS + EDGE_PATTERNS:
+            if pattern in found:
                 logger.warning(f"Malicious pattern detected: {pattern}")
                 return True
 
-        script_indicators = [b"script", b"javascript", b"eval", b"function", b"var ", b"document"]
-        script_count = sum(1 for indicator in script_indicators if indicator in scan_start or indicator in scan_end)
-
+        script_count = len(found.intersection(SCRIPT_INDICATORS))
         if script_count >= 2:  # Multiple script indicators suggest embedded code
             logger.warning(f"Multiple script indicators detected: {script_count}")
             return True
 
         return False
 
-    def _process_image(self, file_content):
-        """Process image and convert to JPEG"""
+    def _process_image(self, source):
+        """
+        Process image and convert to JPEG
+
+        The upload is decoded once, straight to the output size: JPEG decodes at
+        1/2 to 1/8 scale (draft mode) and other formats are reduced by integer
+        factors before the final resample. Blur and the thumbnail then work on the
+        reduced image, and the JPEG quality is picked from a probe encode of the
+        thumbnail instead of re-encoding the full image until it fits.
+
+        Returns (image, thumbnail, {width: variant}) as JPEG buffers.
+        """
         try:
-            img = Image.open(BytesIO(file_content))
+            if isinstance(source, (bytes, bytearray)):
+                source = BytesIO(source)
+            source.seek(0)
+            img = Image.open(source)
 
-            img.verify()
-            img = Image.open(BytesIO(file_content))  # Reopen after verify
+            # The header is parsed lazily; refuse huge canvases before any pixel is decoded
+            if img.width * img.height > self.max_input_pixels:
+                logger.warning(f"Image dimensions {img.width}x{img.height} exceed the decode limit")
+                return None, None, None
 
-            if img.width > self.max_dimensions[0] or img.height > self.max_dimensions[1]:
-                ratio = min(self.max_dimensions[0] / img.width, self.max_dimensions[1] / img.height)
-                new_size = (int(img.width * ratio), int(img.height * ratio))
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
+            # JPEG: DCT-domain downscale while decoding; no-op for other formats
+            img.draft("RGB", self.max_dimensions)
+            img.thumbnail(self.max_dimensions, Image.Resampling.LANCZOS, reducing_gap=2.0)
 
             if img.mode != "RGB":
                 if img.mode == "RGBA":
@@ -199,69 +273,74 @@ class SecureImageProcessor:
             img = img.filter(ImageFilter.GaussianBlur(radius=0.1))
 
             thumbnail = img.copy()
-            thumbnail.thumbnail(self.config["THUMBNAIL_SIZE"], Image.Resampling.LANCZOS)
+            thumbnail.thumbnail(self.config["THUMBNAIL_SIZE"], Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+            quality, scale = self._choose_jpeg_quality(img, thumbnail)
+            if scale < 1:
+                img = img.resize((max(1, int(img.width * scale)), max(1, int(img.height * scale))), Image.Resampling.LANCZOS)
 
             output = BytesIO()
-            img.save(
-                output, format="JPEG", quality=self.config.get("JPEG_QUALITY", 85), optimize=True, progressive=False
-            )
+            img.save(output, format="JPEG", quality=quality, optimize=True, progressive=False)
             output.seek(0)
 
-            if output.getbuffer().nbytes > self.max_size:
-                output = BytesIO()
-                img.save(output, format="JPEG", quality=70, optimize=True)  # Lower quality for smaller size
-                output.seek(0)
-
-                if output.getbuffer().nbytes > self.max_size:
-                    img.thumbnail((1280, 720), Image.Resampling.LANCZOS)
-                    output = BytesIO()
-                    img.save(output, format="JPEG", quality=70, optimize=True)
-                    output.seek(0)
-
             thumb_output = BytesIO()
             thumbnail.save(thumb_output, format="JPEG", quality=self.config.get("THUMBNAIL_QUALITY", 75), optimize=True)
             thumb_output.seek(0)
 
-            return output, thumb_output
+            variants = render_variants(img, self.variant_widths, quality)
+
+            return output, thumb_output, variants
 
         except Exception as e:
             logger.error(f"PIL processing error: {str(e)}")
-            return None, None
-
-    def _generate_secure_filename(self, original_filename):
-        """Generate cryptographically secure filename - always .jpg"""
-        random_name = secrets.token_urlsafe(32)
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            return None, None, None
 
-        filename = f"{timestamp}_{random_name}.jpg"
-
-        filename = re.sub(r"[^a-zA-Z0-9._-]", "", filename)
-
-        return filename
+    def _choose_jpeg_quality(self, img, thumbnail):
+        """
+        Pick (quality, scale) so the encoded image stays under MAX_FILE_SIZE.
 
-    def _save_images(self, image_data, thumbnail_data, filename, thumb_filename, user):
+        Bytes per pixel are measured on the thumbnail, which carries more detail per
+        pixel than the full image, so the size estimate errs on the large side.
+        """
+        budget = self.max_size * 0.9
+        pixels = img.width * img.height
+        estimate = 0
+        for quality in (self.config.get("JPEG_QUALITY", 85), 70):
+            probe = BytesIO()
+            thumbnail.save(probe, format="JPEG", quality=quality, optimize=True)
+            estimate = probe.getbuffer().nbytes / (thumbnail.width * thumbnail.height) * pixels
+            if estimate <= budget:
+                return quality, 1.0
+        return 70, (budget / estimate) ** 0.5
+
+    def _save_images(self, image_data, thumbnail_data, filename, thumb_filename, user, variants=None):
         """Save images based on storage backend"""
+        files = {filename: image_data, thumb_filename: thumbnail_data}
+        digest, _ = parse_name(filename)
+        for width, data in (variants or {}).items():
+            files[variant_name(digest, width)] = data
+
         if self.config["STORAGE_BACKEND"] == "remote":
-            return self._save_to_remote(image_data, thumbnail_data, filename, thumb_filename)
+            return self._save_to_remote(files)
         else:
-            return self._save_locally(image_data, thumbnail_data, filename, thumb_filename)
+            return self._save_locally(files)
 
-    def _save_locally(self, image_data, thumbnail_data, filename, thumb_filename):
-        """Save to local secure directory"""
+    def _save_locally(self, files):
+        """Save to local secure directory; names are content hashes, so existing files are kept"""
         try:
             upload_dir = settings.SECURE_UPLOAD_ROOT / "products"
             upload_dir.mkdir(parents=True, exist_ok=True)
 
-            image_path = upload_dir / filename
-            with open(image_path, "wb") as f:
-                f.write(image_data.read())
-
-            thumb_path = upload_dir / thumb_filename
-            with open(thumb_path, "wb") as f:
-                f.write(thumbnail_data.read())
-
-            os.chmod(image_path, 0o644)
-            os.chmod(thumb_path, 0o644)
+            for name, data in files.items():
+                path = upload_dir / name
+                if path.exists():
+                    continue
+                # Write then rename so a concurrent request never serves a partial file
+                temp_path = upload_dir / f".{name}.{secrets.token_hex(4)}.tmp"
+                with open(temp_path, "wb") as f:
+                    f.write(data.read())
+                os.chmod(temp_path, 0o644)
+                os.replace(temp_path, path)
 
             return True
 
@@ -269,7 +348,7 @@ class SecureImageProcessor:
             logger.error(f"Local save error: {str(e)}")
             return False
 
-    def _save_to_remote(self, image_data, thumbnail_data, filename, thumb_filename):
+    def _save_to_remote(self, files):
         """Save to remote read-only server via SFTP"""
         config = self.config["REMOTE_STORAGE_CONFIG"]
 
@@ -301,11 +380,9 @@ class SecureImageProcessor:
 
             remote_path = config["REMOTE_PATH"]
 
-            with sftp.open(f"{remote_path}/{filename}", "wb") as f:
-                f.write(image_data.read())
-
-            with sftp.open(f"{remote_path}/{thumb_filename}", "wb") as f:
-                f.write(thumbnail_data.read())
+            for name, data in files.items():
+                with sftp.open(f"{remote_path}/{name}", "wb") as f:
+                    f.write(data.read())
 
             sftp.close()
             ssh.close()
@@ -342,20 +419,27 @@ class SecureImageProcessor:
         logger.info(f"Image upload: user={user.id}, filename={filename}")
 
     def delete_images(self, filename, thumb_filename):
-        """Securely delete images"""
+        """Securely delete images, keeping content-addressed files another product still uses"""
+        from products.models import Product
+
+        if filename and Product.objects.filter(image_filename=filename).count() > 1:
+            return
+
         if self.config["STORAGE_BACKEND"] == "remote":
             pass
         else:
             try:
                 upload_dir = settings.SECURE_UPLOAD_ROOT / "products"
 
-                image_path = upload_dir / filename
-                if image_path.exists():
-                    image_path.unlink()
+                names = [name for name in (filename, thumb_filename) if name]
+                parsed = parse_name(filename) if filename else None
+                if parsed:
+                    names += [variant_name(parsed[0], width) for width in self.variant_widths]
 
-                thumb_path = upload_dir / thumb_filename
-                if thumb_path.exists():
-                    thumb_path.unlink()
+                for name in names:
+                    path = upload_dir / name
+                    if path.exists():
+                        path.unlink()
 
             except Exception as e:
                 logger.error(f"Delete error: {str(e)}")
@@ -0,0 +1,67 @@
+"""
+Image Variants
+Content-addressed, multi-resolution copies of processed product images.
+
+A processed image is stored as ``<digest>.jpg``, where the digest is taken from its
+JPEG bytes. Downscaled copies are stored as ``<digest>_w<width>.jpg`` for each
+configured width narrower than the image. Identical uploads hash to the same name
+and are written once. serve_secure_image answers ``?w=<width>`` with the smallest
+stored variant that is at least that wide.
+"""
+
+import hashlib
+import re
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from PIL import Image
+
+CONTENT_NAME = re.compile(r"^(?P<digest>[0-9a-f]{32})(?:_w(?P<width>\d+))?\.jpg$")
+
+DEFAULT_WIDTHS = (320, 640, 1280)
+
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def variant_name(digest: str, width: Optional[int] = None) -> str:
+    return f"{digest}_w{width}.jpg" if width else f"{digest}.jpg"
+
+
+def parse_name(filename: str):
+    """(digest, width) for content-addressed names, None for legacy random names"""
+    match = CONTENT_NAME.match(filename)
+    if not match:
+        return None
+    return match.group("digest"), int(match.group("width")) if match.group("width") else None
+
+
+def render_variants(img: Image.Image, widths: Iterable[int], quality: int) -> Dict[int, BytesIO]:
+    """
+    Encode a downscaled copy of ``img`` for every width narrower than it.
+
+    Each width is resized from the next larger one, so the cost is dominated by the
+    first step instead of growing with the number of widths.
+    """
+    variants = {}
+    source = img
+    for width in sorted((w for w in set(widths) if w < img.width), reverse=True):
+        height = max(1, round(img.height * width / img.width))
+        source = source.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        output = BytesIO()
+        source.save(output, format="JPEG", quality=quality, optimize=True)
+        output.seek(0)
+        variants[width] = output
+    return variants
+
+
+def pick_width(available: Iterable[int], requested: int) -> Optional[int]:
+    """Smallest available width >= requested; None means the full image is the best fit"""
+    wide_enough = [width for width in available if width >= requested]
+    return min(wide_enough) if wide_enough else None
+
+
+def stored_widths(directory: Path, digest: str, widths: Iterable[int]) -> List[int]:
+    return [width for width in widths if (directory / variant_name(digest, width)).is_file()]
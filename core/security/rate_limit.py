@@ -0,0 +1,135 @@
+"""
+Sliding-Window Rate Limiter
+Shared rate limiting engine built on atomic cache counters.
+
+Each limit keeps two integer counters per client: the current fixed bucket and the
+previous one. The request rate over the last ``window`` seconds is approximated by
+weighting the previous bucket by the part of it still inside the window, so memory
+per client and limit is constant no matter how many requests arrive. Counters are
+only ever changed with ``incr``/``decr``, which are atomic on the locmem, Redis and
+Memcached backends, so concurrent workers never lose increments.
+"""
+
+import logging
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+# (name, window in seconds, maximum requests per window)
+Limit = Tuple[str, int, int]
+
+
+class RateLimitResult:
+    """Outcome of a rate limit hit; truthy when the request is allowed"""
+
+    def __init__(self, allowed: bool, counts: Dict[str, float], exceeded: Optional[str] = None,
+                 retry_after: int = 0):
+        self.allowed = allowed
+        self.counts = counts
+        self.exceeded = exceeded
+        self.retry_after = retry_after
+
+    def __bool__(self):
+        return self.allowed
+
+    def __repr__(self):
+        return f"<RateLimitResult allowed={self.allowed} exceeded={self.exceeded} counts={self.counts}>"
+
+
+class SlidingWindowRateLimiter:
+    """Approximate sliding-window limiter checking several limits per request in one batch"""
+
+    def __init__(self, prefix: str = "rl", cache_alias: str = None):
+        self.prefix = prefix
+        self.cache_alias = cache_alias or getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "default")
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _bucket_keys(self, key: str, limit: Limit, now: float) -> Tuple[str, str, float]:
+        """Get (current bucket key, previous bucket key, previous bucket weight)"""
+        name, window, _ = limit
+        bucket = int(now // window)
+        elapsed = (now - bucket * window) / window
+        base = f"{self.prefix}:{name}:{window}:{key}"
+        return f"{base}:{bucket}", f"{base}:{bucket - 1}", 1.0 - elapsed
+
+    def _increment(self, bucket_key: str, amount: int, window: int) -> int:
+        """Atomically add to a bucket counter, creating it if needed"""
+        try:
+            return self.cache.incr(bucket_key, amount)
+        except ValueError:
+            # Missing key: add() is atomic, so only one worker creates the counter
+            if self.cache.add(bucket_key, amount, window * 2):
+                return amount
+            return self.cache.incr(bucket_key, amount)
+
+    def hit(self, key: str, limits: Sequence[Limit], cost: int = 1) -> RateLimitResult:
+        """
+        Count a request against every limit and decide whether it is allowed
+
+        Previous buckets are read with a single get_many. Current buckets are
+        incremented first and the post-increment values decide admission, so two
+        concurrent requests can never both take the last slot; a rejected request
+        gives its increments back.
+        """
+        now = time.time()
+        buckets = [self._bucket_keys(key, limit, now) for limit in limits]
+
+        try:
+            previous = self.cache.get_many([previous_key for _, previous_key, _ in buckets])
+
+            counts = {}
+            incremented: List[Tuple[str, int]] = []
+            exceeded = None
+            retry_after = 0
+            for limit, (current_key, previous_key, weight) in zip(limits, buckets):
+                name, window, maximum = limit
+                current = self._increment(current_key, cost, window)
+                incremented.append((current_key, window))
+                estimate = previous.get(previous_key, 0) * weight + current
+                counts[name] = estimate
+                if estimate > maximum and exceeded is None:
+                    exceeded = name
+                    retry_after = max(1, int(window * weight))
+
+            if exceeded is not None:
+                for current_key, _ in incremented:
+                    try:
+                        self.cache.decr(current_key, cost)
+                    except ValueError:
+                        pass
+                return RateLimitResult(False, counts, exceeded, retry_after)
+
+            return RateLimitResult(True, counts)
+
+        except Exception as e:
+            # Fail open: an unavailable cache must not take the site down
+            logger.error(f"Rate limiter unavailable for {key}: {e}")
+            return RateLimitResult(True, {})
+
+    def get_counts(self, key: str, limits: Sequence[Limit]) -> Dict[str, float]:
+        """Get the current weighted count of every limit without counting a request"""
+        now = time.time()
+        buckets = [self._bucket_keys(key, limit, now) for limit in limits]
+        values = self.cache.get_many([bucket_key for current_key, previous_key, _ in buckets
+                                      for bucket_key in (current_key, previous_key)])
+        return {
+            limit[0]: values.get(previous_key, 0) * weight + values.get(current_key, 0)
+            for limit, (current_key, previous_key, weight) in zip(limits, buckets)
+        }
+
+    def reset(self, key: str, limits: Sequence[Limit]):
+        """Clear the counters of a client"""
+        now = time.time()
+        self.cache.delete_many([bucket_key for current_key, previous_key, _ in
+                                (self._bucket_keys(key, limit, now) for limit in limits)
+                                for bucket_key in (current_key, previous_key)])
+
+
+rate_limiter = SlidingWindowRateLimiter()
@@ -13,6 +13,7 @@ from django.db.models import Q, Count, Avg, Sum, Min, Max, F
 from django.utils import timezone
 
 from .base_service import BaseService
+from .tiered_cache import stable_key
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -25,11 +26,6 @@ class AdvancedFilteringService(BaseService):
     version = "1.0.0"
     description = "Sophisticated server-side filtering with smart suggestions"
     
-    def __init__(self):
-        super().__init__()
-        self._filter_cache = {}
-        self._suggestion_cache = {}
-    
     def initialize(self):
         """Initialize the advanced filtering service"""
         try:
@@ -41,8 +37,7 @@ class AdvancedFilteringService(BaseService):
     def cleanup(self):
         """Clean up the advanced filtering service"""
         try:
-            self._filter_cache.clear()
-            self._suggestion_cache.clear()
+            self.clear_local_cache()
             logger.info("Advanced filtering service cleaned up successfully")
         except Exception as e:
             logger.error(f"Failed to cleanup advanced filtering service: {e}")
@@ -88,7 +83,7 @@ class AdvancedFilteringService(BaseService):
                               user_id: str = None) -> Dict[str, Any]:
         """Get intelligent filter suggestions based on current state"""
         try:
-            cache_key = f"filter_suggestions:{model_name}:{hash(str(current_filters))}:{user_id}"
+            cache_key = f"filter_suggestions:{model_name}:{stable_key(current_filters)}:{user_id}"
             cached_suggestions = self.get_cached(cache_key)
             if cached_suggestions:
                 return cached_suggestions
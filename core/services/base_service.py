@@ -13,10 +13,12 @@ from threading import RLock
 from contextlib import contextmanager
 
 from django.conf import settings
-from django.core.cache import cache
 from django.db import connections, transaction
 from django.utils.functional import cached_property
 
+from .service_health import health_board
+from .tiered_cache import service_cache, stable_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,25 +39,26 @@ def performance_monitor(func):
     return wrapper
 
 
-def cache_result(timeout: int = 300, key_func=None):
-    """Decorator to cache service method results."""
+def cache_result(timeout: int = 300, key_func=None, tags=None, stale_timeout: Optional[int] = None):
+    """
+    Decorator to cache service method results.
+    
+    ``tags`` is a list of dependency tags or a callable building them from the
+    method arguments; ``stale_timeout=0`` disables serving expired values.
+    """
     def decorator(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             if key_func:
                 cache_key = f"{self.service_name}:{func.__name__}:{key_func(*args, **kwargs)}"
             else:
-                cache_key = f"{self.service_name}:{func.__name__}:{hash(str(args) + str(kwargs))}"
-            
-            # Try to get from cache first
-            result = self.get_cached(cache_key)
-            if result is not None:
-                return result
+                cache_key = f"{self.service_name}:{func.__name__}:{stable_key(args, kwargs)}"
+            value_tags = tags(*args, **kwargs) if callable(tags) else tags
             
-            # Execute function and cache result
-            result = func(self, *args, **kwargs)
-            self.set_cached(cache_key, result, timeout)
-            return result
+            # Compute at most once across workers, serving the stale value meanwhile
+            return self.get_or_set_cached(
+                cache_key, lambda: func(self, *args, **kwargs), timeout, stale_timeout, value_tags
+            )
         return wrapper
     return decorator
 
@@ -107,7 +110,6 @@ class BaseService(ABC):
     _initialized: bool = False
     _healthy: bool = True
     _last_health_check: float = 0
-    _health_check_interval: float = 60  # seconds
     _performance_metrics: Dict[str, List[float]] = {}
     _lock = RLock()
     
@@ -169,6 +171,13 @@ class BaseService(ABC):
         """
         pass
 
+    def warm_up(self) -> None:
+        """
+        Pre-fill caches read on hot paths. Called by ServiceRegistry.warm_up in
+        web workers only; keep it out of ``initialize``, which runs everywhere.
+        """
+        pass
+
     def get_required_config(self) -> List[str]:
         """Get list of required configuration keys."""
         return []
@@ -187,39 +196,84 @@ class BaseService(ABC):
         return f"service:{self.service_name}"
 
     def get_cached(self, key: str, default: Any = None) -> Any:
-        """Get value from cache with error handling."""
+        """Get value from the two-tier service cache with error handling."""
         try:
             full_key = f"{self.cache_prefix}:{key}"
-            return cache.get(full_key, default)
+            return service_cache.get(full_key, default)
         except Exception as e:
             logger.warning(f"Cache get failed for key {key}: {e}")
             return default
 
-    def set_cached(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
-        """Set value in cache with error handling."""
+    def set_cached(self, key: str, value: Any, timeout: Optional[int] = None,
+                   tags: Optional[List[str]] = None) -> bool:
+        """Set value in the two-tier service cache with error handling.
+        
+        ``tags`` (see core.services.tiered_cache.tag) declare the rows the value was
+        computed from; writes to them invalidate it before the timeout.
+        """
         try:
             full_key = f"{self.cache_prefix}:{key}"
             timeout = timeout or self.cache_timeout
-            cache.set(full_key, value, timeout)
+            service_cache.set(full_key, value, timeout, tags=tags)
             return True
         except Exception as e:
             logger.warning(f"Cache set failed for key {key}: {e}")
             return False
 
+    def get_or_set_cached(self, key: str, producer, timeout: Optional[int] = None,
+                          stale_timeout: Optional[int] = None, tags: Optional[List[str]] = None) -> Any:
+        """
+        Get a cached value or compute it with ``producer``.
+        
+        Only one worker recomputes a missing or expired value; the others get the
+        stale value (or wait briefly on a cold miss) instead of stampeding the database.
+        """
+        full_key = f"{self.cache_prefix}:{key}"
+        produced = []
+        
+        def produce():
+            produced.append(True)
+            return producer()
+        
+        try:
+            return service_cache.get_or_set(full_key, produce, timeout or self.cache_timeout, stale_timeout, tags)
+        except Exception as e:
+            if produced:
+                raise
+            logger.warning(f"Cache get_or_set failed for key {key}: {e}")
+            return producer()
+
     def clear_cache(self, key: str = None) -> bool:
         """Clear cache entries."""
         try:
             if key:
                 full_key = f"{self.cache_prefix}:{key}"
-                cache.delete(full_key)
+                service_cache.delete(full_key)
             else:
                 # Clear all cache entries for this service
-                cache.delete_pattern(f"{self.cache_prefix}:*")
+                service_cache.delete_pattern(f"{self.cache_prefix}:")
             return True
         except Exception as e:
             logger.warning(f"Cache clear failed: {e}")
             return False
 
+    def invalidate_tags(self, *tags: str) -> bool:
+        """Invalidate every cached value, of any service, that depends on the tags."""
+        try:
+            service_cache.invalidate_tags(tags)
+            return True
+        except Exception as e:
+            logger.warning(f"Cache tag invalidation failed for {tags}: {e}")
+            return False
+
+    def clear_local_cache(self):
+        """Drop this service's entries from the in-process cache tier only."""
+        service_cache.local.delete_prefix(f"{self.cache_prefix}:")
+
+    def get_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get this process's cache hit/miss counters per key prefix for this service."""
+        return service_cache.get_stats(f"{self.cache_prefix}:")
+
     @contextmanager
     def get_db_connection(self, alias='default'):
         """Get database connection with connection pooling."""
@@ -294,11 +348,21 @@ class BaseService(ABC):
         raise last_exception
 
     def is_healthy(self) -> bool:
-        """Check if service is healthy."""
-        current_time = time.time()
-        if current_time - self._last_health_check > self._health_check_interval:
-            self._health_check()
-            self._last_health_check = current_time
+        """
+        Check if service is healthy, from the cluster-wide snapshot.
+
+        Health checks only run in the process holding the prober lease
+        (ServiceManager.probe_once); request paths never query for health.
+        """
+        status = health_board.get_service_status(self.service_name)
+        if status is None:
+            return self._healthy and self._initialized
+        return self._healthy and status['healthy']
+
+    def probe(self) -> bool:
+        """Run the health check now; called by the health prober only."""
+        self._health_check()
+        self._last_health_check = time.time()
         return self._healthy
 
     def _health_check(self):
@@ -310,15 +374,27 @@ class BaseService(ABC):
             logger.error(f"Health check failed for service {self.service_name}: {e}")
             self._healthy = False
 
+    def get_health_status(self) -> Dict[str, Any]:
+        """Get the last published health status of this service."""
+        status = health_board.get_service_status(self.service_name) or {}
+        return {
+            'healthy': self.is_healthy(),
+            'checked_at': status.get('checked_at'),
+            'error': status.get('error'),
+            'circuit': status.get('circuit', 'CLOSED'),
+        }
+
     def get_service_health(self) -> Dict[str, Any]:
         """Get detailed service health information."""
+        status = health_board.get_service_status(self.service_name) or {}
         return {
             'service_name': self.service_name,
             'version': self.version,
             'healthy': self.is_healthy(),
             'initialized': self._initialized,
-            'last_health_check': self._last_health_check,
-            'performance_metrics': self.get_performance_metrics()
+            'last_health_check': status.get('checked_at', self._last_health_check),
+            'performance_metrics': self.get_performance_metrics(),
+            'cache_stats': self.get_cache_stats()
         }
 
     def is_available(self) -> bool:
@@ -8,11 +8,11 @@ from typing import Any, Dict, List, Optional, Tuple
 from datetime import timedelta
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.db import models, transaction
 from django.utils import timezone
 
 from .base_service import BaseService
+from .service_registry import ServiceRegistry
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -25,11 +25,6 @@ class DisputeService(BaseService):
     version = "1.0.0"
     description = "Dispute management and operations service"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._dispute_cache = {}
-        self._evidence_cache = {}
-
     def initialize(self) -> bool:
         """Initialize the dispute service."""
         try:
@@ -44,8 +39,7 @@ class DisputeService(BaseService):
         """Clean up the dispute service."""
         try:
             # Clear caches
-            self._dispute_cache.clear()
-            self._evidence_cache.clear()
+            self.clear_local_cache()
             logger.info("Dispute service cleaned up successfully")
             return True
         except Exception as e:
@@ -113,12 +107,11 @@ class DisputeService(BaseService):
     ) -> Tuple[Any, bool, str]:
         """Create a new dispute."""
         try:
-            from core.services.order_service import OrderService
             from disputes.models import Dispute
 
             with transaction.atomic():
                 # Validate order exists and belongs to user
-                order_service = OrderService()
+                order_service = ServiceRegistry.get_service("order_service")
                 order = order_service.get_order_by_id(order_id)
 
                 if not order:
@@ -221,11 +214,8 @@ class DisputeService(BaseService):
     def _resolve_dispute(self, dispute: Any) -> None:
         """Handle dispute resolution."""
         try:
-            from core.services.order_service import OrderService
-            from core.services.wallet_service import WalletService
-
-            order_service = OrderService()
-            wallet_service = WalletService()
+            order_service = ServiceRegistry.get_service("order_service")
+            wallet_service = ServiceRegistry.get_service("wallet_service")
 
             if dispute.winner_id == str(dispute.user_id):
                 # User wins - refund order
@@ -247,11 +237,8 @@ class DisputeService(BaseService):
     def _handle_partial_refund(self, dispute: Any) -> None:
         """Handle partial refund for split dispute resolution."""
         try:
-            from core.services.order_service import OrderService
-            from core.services.wallet_service import WalletService
-
-            order_service = OrderService()
-            wallet_service = WalletService()
+            order_service = ServiceRegistry.get_service("order_service")
+            wallet_service = ServiceRegistry.get_service("wallet_service")
 
             order = order_service.get_order_by_id(str(dispute.order_id))
             if not order:
@@ -494,8 +481,7 @@ class DisputeService(BaseService):
                 "total_disputes": total_disputes,
                 "open_disputes": open_disputes,
                 "under_review": under_review,
-                "dispute_cache_size": len(self._dispute_cache),
-                "evidence_cache_size": len(self._evidence_cache),
+                "cache_stats": self.get_cache_stats(),
             }
         except Exception as e:
             logger.error(f"Failed to get service health: {e}")
@@ -682,8 +668,7 @@ class DisputeService(BaseService):
     def _handle_buyer_victory(self, dispute):
         """Handle escrow release when buyer wins dispute"""
         try:
-            from core.services.wallet_service import WalletService
-            wallet_service = WalletService()
+            wallet_service = ServiceRegistry.get_service("wallet_service")
             
             order = dispute.order
             # Release funds from escrow back to buyer
@@ -704,8 +689,7 @@ class DisputeService(BaseService):
     def _handle_vendor_victory(self, dispute):
         """Handle escrow release when vendor wins dispute"""
         try:
-            from core.services.wallet_service import WalletService
-            wallet_service = WalletService()
+            wallet_service = ServiceRegistry.get_service("wallet_service")
             
             order = dispute.order
             # Release funds from escrow to vendor
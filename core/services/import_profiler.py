@@ -0,0 +1,174 @@
+"""
+Import Profiler
+Start-up import cost accounting used by the ``profile_imports`` management command.
+
+A fresh interpreter runs the start-up path (``django.setup()``, the WSGI app with its
+URLconf, or a Celery worker) under ``python -X importtime``. The trace is rebuilt into
+an import tree and every module's own time is charged to the nearest project app on
+its import path, so a heavy library shows up against the app that pulled it in.
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+DEFAULTS = {
+    'TOTAL_MS': 2000,
+    'APP_MS': 250,
+    'APPS': {},
+    'TOP': 15,
+}
+
+TARGETS = {
+    'setup': 'import django; django.setup()',
+    'wsgi': (
+        'from marketplace.wsgi import application; '
+        'from django.urls import get_resolver; get_resolver().url_patterns'
+    ),
+    'celery': 'from marketplace.celery import app; app.loader.import_default_modules()',
+}
+
+UNATTRIBUTED = '(interpreter/django)'
+
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S+)\s*$')
+
+
+def get_options() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, 'IMPORT_TIME_BUDGET', {})}
+
+
+def get_project_apps() -> List[str]:
+    """Installed apps, plus the settings package, whose code lives in this repository"""
+    base_dir = os.path.realpath(str(settings.BASE_DIR))
+    names = {settings.SETTINGS_MODULE.rpartition('.')[0]}
+    for app in settings.INSTALLED_APPS:
+        root = app.split('.')[0]
+        if os.path.isdir(os.path.join(base_dir, root)):
+            names.add(app.rsplit('.apps.', 1)[0])
+    return sorted(names - {''})
+
+
+class ImportNode:
+    """One module in the import tree; times are in microseconds"""
+
+    __slots__ = ('name', 'self_us', 'cumulative_us', 'children')
+
+    def __init__(self, name: str, self_us: int, cumulative_us: int, children: List['ImportNode']):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children = children
+
+    @property
+    def package(self) -> str:
+        return self.name.split('.')[0]
+
+
+def parse_importtime(output: str) -> List[ImportNode]:
+    """
+    Rebuild the import tree from ``-X importtime`` output.
+
+    Modules are printed after everything they imported, indented two spaces per
+    level, so each line adopts the pending lines one level deeper.
+    """
+    pending = defaultdict(list)
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        depth = (len(indent) - 1) // 2
+        children = pending.pop(depth + 1, [])
+        pending[depth].append(ImportNode(name, int(self_us), int(cumulative_us), children))
+    return pending[0]
+
+
+class ImportProfile:
+    """Import cost of one start-up, attributed to project apps and packages"""
+
+    def __init__(self, roots: List[ImportNode], project_apps: Iterable[str]):
+        # Longest prefix first so "apps.security" wins over a top-level "apps"
+        self.project_apps = sorted(project_apps, key=len, reverse=True)
+        self.by_app = defaultdict(int)
+        self.by_package = defaultdict(int)
+        self.entries = []  # (cumulative_us, package entry module, importing module, app)
+        self._attribute(roots)
+        self.total_us = sum(self.by_app.values())
+
+    def app_for(self, module_name: str) -> Optional[str]:
+        for app in self.project_apps:
+            if module_name == app or module_name.startswith(app + '.'):
+                return app
+        return None
+
+    def _attribute(self, roots: List[ImportNode]):
+        # Iterative: deep import chains would otherwise hit the recursion limit
+        stack = [(root, None, None) for root in roots]
+        while stack:
+            node, parent, owner = stack.pop()
+            owner = self.app_for(node.name) or owner
+            self.by_app[owner or UNATTRIBUTED] += node.self_us
+            self.by_package[node.package] += node.self_us
+            if parent is None or parent.package != node.package:
+                self.entries.append((node.cumulative_us, node.name, parent.name if parent else None,
+                                     owner or UNATTRIBUTED))
+            stack.extend((child, node, owner) for child in node.children)
+
+    def top_packages(self, count: int) -> List[tuple]:
+        return sorted(self.by_package.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def top_entries(self, count: int) -> List[tuple]:
+        """Heaviest points where a package was first entered, with the module that imported it"""
+        return sorted(self.entries, reverse=True)[:count]
+
+    def over_budget(self, options: Dict[str, Any]) -> List[str]:
+        """Human-readable budget violations; empty when within budget"""
+        violations = []
+        if self.total_us / 1000 > options['TOTAL_MS']:
+            violations.append(f"total {self.total_us / 1000:.0f}ms > {options['TOTAL_MS']}ms")
+        for app, spent_us in sorted(self.by_app.items()):
+            if app == UNATTRIBUTED:
+                continue
+            budget_ms = options['APPS'].get(app, options['APP_MS'])
+            if spent_us / 1000 > budget_ms:
+                violations.append(f"{app} {spent_us / 1000:.0f}ms > {budget_ms}ms")
+        return violations
+
+    def as_dict(self, top: int) -> Dict[str, Any]:
+        return {
+            'total_ms': round(self.total_us / 1000, 1),
+            'apps': {app: round(us / 1000, 1) for app, us in sorted(self.by_app.items(), key=lambda i: -i[1])},
+            'packages': {package: round(us / 1000, 1) for package, us in self.top_packages(top)},
+            'entries': [
+                {'module': module, 'imported_by': parent, 'app': app, 'cumulative_ms': round(us / 1000, 1)}
+                for us, module, parent, app in self.top_entries(top)
+            ],
+        }
+
+
+def trace_imports(target: str = 'setup', python: str = sys.executable) -> str:
+    """Run a start-up target in a fresh interpreter and return its -X importtime trace"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', TARGETS[target]],
+        cwd=str(settings.BASE_DIR), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        text=True, check=False,
+    )
+    if result.returncode:
+        raise RuntimeError(f"Start-up target {target!r} failed:\n{result.stderr[-2000:]}")
+    return result.stderr
+
+
+def profile_imports(target: str = 'setup', runs: int = 3) -> ImportProfile:
+    """Profile ``runs`` fresh start-ups and keep the one with the median total"""
+    project_apps = get_project_apps()
+    profiles = [ImportProfile(parse_importtime(trace_imports(target)), project_apps) for _ in range(runs)]
+    median = statistics.median_low(profile.total_us for profile in profiles)
+    return next(profile for profile in profiles if profile.total_us == median)
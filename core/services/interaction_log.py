@@ -0,0 +1,250 @@
+"""
+Interaction Log
+Append-only stream of user interaction events and its compaction into preference profiles.
+
+UserPreferenceService.learn_from_interaction appends to a per-process buffer that is
+written with one bulk_create once it holds BATCH_SIZE events or its oldest event is
+FLUSH_INTERVAL seconds old, and when the worker exits. Events carry their UTC day,
+which partitions the table: retention drops whole compacted days. compact_events folds
+the events past each profile's watermark into UserPreferenceProfile.interaction_summary,
+so profile updates only ever read new events, never the raw history. Its cursor is kept
+in SystemSettings so a worker restart resumes where the last compaction stopped, and it
+only advances past events whose insert time is SETTLE_SECONDS old.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from datetime import timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 5,
+    'MAX_BUFFERED': 5000,
+    'COMPACT_BATCH_SIZE': 5000,
+    'RETENTION_DAYS': 30,
+    'TOP_ITEMS': 20,
+    'SETTLE_SECONDS': 60,
+}
+
+CURSOR_KEY = 'core.interaction_log.compacted_through'
+LOCK_KEY = 'interaction-log:compacting'
+
+# Interaction data keys counted per value in the profile summary
+COUNTED_KEYS = ('product_id', 'category_id', 'vendor_id')
+
+
+def get_options() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, 'INTERACTION_LOG', {})}
+
+
+class InteractionEventWriter:
+    """Per-process buffer of interaction events written in batches"""
+
+    def __init__(self, **options):
+        self.options = {**get_options(), **options}
+        self._buffer: List = []
+        self._oldest = 0.0
+        self._lock = threading.Lock()
+
+    def append(self, user_id, interaction_type: str, data: Optional[Dict[str, Any]] = None, occurred_at=None):
+        """Buffer one event, flushing the buffer when it is full or old enough"""
+        from core.models import UserInteractionEvent
+
+        occurred_at = occurred_at or timezone.now()
+        event = UserInteractionEvent(
+            user_id=user_id,
+            interaction_type=interaction_type[:50],
+            data=data or {},
+            day=occurred_at.astimezone(dt_timezone.utc).date(),
+            created_at=occurred_at,
+        )
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(event)
+            due = (
+                len(self._buffer) >= self.options['BATCH_SIZE']
+                or time.monotonic() - self._oldest >= self.options['FLUSH_INTERVAL']
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every buffered event with one bulk insert; returns the number written"""
+        from core.models import UserInteractionEvent
+
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+        try:
+            UserInteractionEvent.objects.bulk_create(events, batch_size=self.options['BATCH_SIZE'])
+            return len(events)
+        except Exception as e:
+            logger.error(f"Failed to write {len(events)} interaction events: {e}")
+            with self._lock:
+                # Keep them for the next flush, but never grow without bound while the database is down
+                room = self.options['MAX_BUFFERED'] - len(self._buffer)
+                if room > 0:
+                    self._buffer[:0] = events[-room:]
+            return 0
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+
+def fold_events(summary: Dict[str, Any], events: Iterable, top_items: int) -> Dict[str, Any]:
+    """
+    Add (interaction_type, data, created_at) events to a profile's interaction summary.
+
+    Counts per type are exact; per product, category and vendor only the top_items
+    most frequent values are kept, so a summary stays small however long the history.
+    """
+    summary = {
+        'total': summary.get('total', 0),
+        'by_type': dict(summary.get('by_type', {})),
+        **{key: dict(summary.get(key, {})) for key in COUNTED_KEYS},
+        'first_at': summary.get('first_at'),
+        'last_at': summary.get('last_at'),
+    }
+    for interaction_type, data, created_at in events:
+        summary['total'] += 1
+        summary['by_type'][interaction_type] = summary['by_type'].get(interaction_type, 0) + 1
+        for key in COUNTED_KEYS:
+            value = (data or {}).get(key)
+            if value is not None:
+                counts = summary[key]
+                counts[str(value)] = counts.get(str(value), 0) + 1
+        stamp = created_at.isoformat()
+        summary['first_at'] = min(summary['first_at'] or stamp, stamp)
+        summary['last_at'] = max(summary['last_at'] or stamp, stamp)
+
+    for key in COUNTED_KEYS:
+        if len(summary[key]) > top_items:
+            summary[key] = dict(sorted(summary[key].items(), key=lambda item: (-item[1], item[0]))[:top_items])
+    return summary
+
+
+def get_cursor() -> int:
+    """Id of the last event folded into the profiles, 0 before the first compaction"""
+    from core.models import SystemSettings
+
+    value = SystemSettings.objects.filter(key=CURSOR_KEY).values_list('value', flat=True).first()
+    return int(value) if value else 0
+
+
+def set_cursor(cursor: int):
+    from core.models import SystemSettings
+
+    SystemSettings.objects.update_or_create(
+        key=CURSOR_KEY,
+        defaults={'value': str(cursor), 'description': 'Last interaction event compacted into preference profiles'},
+    )
+
+
+def _read_settled(cursor: int, batch_size: int, settled_before) -> Tuple[List, bool]:
+    """
+    The next batch of events past the cursor that were inserted before settled_before.
+
+    Reading stops at the first unsettled event, since a lower id may still be committing
+    behind it. Returns the (id, user_id, interaction_type, data, created_at) rows and
+    whether compaction has caught up.
+    """
+    from core.models import UserInteractionEvent
+
+    read = UserInteractionEvent.objects.filter(id__gt=cursor).order_by('id').values_list(
+        'id', 'user_id', 'interaction_type', 'data', 'created_at', 'inserted_at'
+    )[:batch_size]
+    rows = []
+    for row in read:
+        if row[5] > settled_before:
+            return rows, True
+        rows.append(row[:5])
+    return rows, len(rows) < batch_size
+
+
+def _fold_batch(rows: List, top_items: int) -> Set[Any]:
+    """Fold a batch of event rows into their users' profiles; returns the users changed"""
+    from core.models import UserPreferenceProfile
+
+    by_user: Dict[Any, List] = {}
+    for row in rows:
+        by_user.setdefault(row[1], []).append(row)
+
+    profiles = {
+        profile.user_id: profile
+        for profile in UserPreferenceProfile.objects.filter(user_id__in=list(by_user))
+    }
+    created, updated = [], []
+    for user_id, events in by_user.items():
+        profile = profiles.get(user_id)
+        if profile is None:
+            profile = UserPreferenceProfile(user_id=user_id)
+            created.append(profile)
+        else:
+            updated.append(profile)
+        new_events = [event for event in events if event[0] > profile.interactions_compacted_through]
+        profile.interaction_summary = fold_events(
+            profile.interaction_summary, (event[2:] for event in new_events), top_items
+        )
+        profile.interactions_compacted_through = max(profile.interactions_compacted_through, events[-1][0])
+
+    with transaction.atomic():
+        UserPreferenceProfile.objects.bulk_create(created)
+        UserPreferenceProfile.objects.bulk_update(updated, ['interaction_summary', 'interactions_compacted_through'])
+    return set(by_user)
+
+
+def compact_events(batch_size: Optional[int] = None, now=None) -> Set[Any]:
+    """
+    Fold every settled event past the compaction cursor into its user's profile.
+
+    Events are read in primary-key order, one batch per query. Ids are handed out when
+    a bulk insert starts, not when it commits, so a lower id may still turn up after a
+    higher one was read: compaction stops at the first event inserted less than
+    SETTLE_SECONDS ago and leaves it and everything after it for the next run. Each
+    profile records the last event folded into it, so a retried batch never counts an
+    event twice. Returns the ids of the users whose summary changed.
+    """
+    from core.models import UserInteractionEvent
+
+    options = get_options()
+    batch_size = batch_size or options['COMPACT_BATCH_SIZE']
+    if not cache.add(LOCK_KEY, 1, 600):
+        logger.info("Interaction compaction already running")
+        return set()
+
+    changed: Set[Any] = set()
+    try:
+        cursor = get_cursor()
+        settled_before = (now or timezone.now()) - timedelta(seconds=options['SETTLE_SECONDS'])
+        caught_up = False
+        while not caught_up:
+            rows, caught_up = _read_settled(cursor, batch_size, settled_before)
+            if rows:
+                changed |= _fold_batch(rows, options['TOP_ITEMS'])
+                cursor = rows[-1][0]
+                set_cursor(cursor)
+
+        # Drop whole days that are past retention and fully compacted
+        cutoff = timezone.now().date() - timedelta(days=options['RETENTION_DAYS'])
+        UserInteractionEvent.objects.filter(day__lt=cutoff, id__lte=cursor).delete()
+    finally:
+        cache.delete(LOCK_KEY)
+    return changed
+
+
+# Global writer shared by every service instance in this process
+interaction_writer = InteractionEventWriter()
+atexit.register(interaction_writer.flush)
@@ -0,0 +1,111 @@
+"""
+Item Similarity
+Vectorized item-item co-purchase similarity used by RecommendationService.
+Kept free of Django imports so the matrix maths can be tested and profiled standalone.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+def encode(values: Sequence) -> Tuple[np.ndarray, np.ndarray]:
+    """Map arbitrary hashable ids to dense integer codes. Returns (codes, unique values)."""
+    unique: Dict = {}
+    codes = np.fromiter((unique.setdefault(value, len(unique)) for value in values), dtype=np.int64, count=len(values))
+    labels = np.empty(len(unique), dtype=object)
+    for value, code in unique.items():
+        labels[code] = value
+    return codes, labels
+
+
+def co_purchase_neighbours(
+    user_codes: np.ndarray,
+    item_codes: np.ndarray,
+    top_k: int = 20,
+    min_co_purchases: int = 2,
+    max_basket_items: int = 200,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Compute the top-k cosine neighbours of every item from (user, item) purchase pairs.
+
+    The binary user x item matrix X is never materialised: the sparse co-occurrence
+    matrix C = X^T X is built by expanding each user's basket into item pairs and
+    counting them with np.unique, then scaled to cosine similarity
+    C[i, j] / sqrt(n_i * n_j), where n_i is the number of buyers of item i.
+
+    Returns parallel arrays (source, neighbour, similarity, co_purchases) ordered by
+    source and then by descending similarity.
+    """
+    empty = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.float64), np.empty(0, np.int64))
+    if len(user_codes) == 0:
+        return empty
+
+    # Deduplicate (user, item) pairs and sort them by user
+    pairs = np.unique(np.stack([user_codes, item_codes], axis=1), axis=0)
+    users, items = pairs[:, 0], pairs[:, 1]
+
+    # Per-item buyer counts are the diagonal of C
+    item_count = int(items.max()) + 1
+    buyers = np.bincount(items, minlength=item_count)
+
+    # Basket boundaries; oversized baskets are truncated to bound the m^2 pair expansion
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    lengths = np.diff(np.r_[starts, len(users)])
+    position = np.arange(len(users)) - np.repeat(starts, lengths)
+    keep = position < max_basket_items
+    if not keep.all():
+        users, items = users[keep], items[keep]
+        starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        lengths = np.diff(np.r_[starts, len(users)])
+
+    # Pair every basket item with every other item of the same basket
+    basket_of = np.repeat(np.arange(len(starts)), lengths)
+    repeats = lengths[basket_of]
+    left = np.repeat(items, repeats)
+    offsets = np.arange(int(repeats.sum())) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    right = items[np.repeat(starts[basket_of], repeats) + offsets]
+    distinct = left != right
+    left, right = left[distinct], right[distinct]
+    if len(left) == 0:
+        return empty
+
+    # Sparse co-occurrence counts keyed by (left, right)
+    keys, co_purchases = np.unique(left * item_count + right, return_counts=True)
+    supported = co_purchases >= min_co_purchases
+    keys, co_purchases = keys[supported], co_purchases[supported]
+    if len(keys) == 0:
+        return empty
+    source, neighbour = keys // item_count, keys % item_count
+
+    similarity = co_purchases / np.sqrt(buyers[source].astype(np.float64) * buyers[neighbour])
+
+    # Order by source, then strongest neighbour first, and keep the first top_k per source
+    order = np.lexsort((-co_purchases, -similarity, source))
+    source, neighbour, similarity, co_purchases = source[order], neighbour[order], similarity[order], co_purchases[order]
+    group_starts = np.flatnonzero(np.r_[True, source[1:] != source[:-1]])
+    rank = np.arange(len(source)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(source)]))
+    top = rank < top_k
+
+    return source[top], neighbour[top], np.minimum(similarity[top], 1.0), co_purchases[top]
+
+
+def neighbours_by_item(
+    purchases: Iterable[Tuple[object, object]],
+    top_k: int = 20,
+    min_co_purchases: int = 2,
+) -> Dict[object, List[Tuple[object, float, int]]]:
+    """Convenience wrapper returning {item: [(neighbour, similarity, co_purchases), ...]}."""
+    purchases = list(purchases)
+    if not purchases:
+        return {}
+    user_codes, _ = encode([user for user, _ in purchases])
+    item_codes, item_labels = encode([item for _, item in purchases])
+    source, neighbour, similarity, co_purchases = co_purchase_neighbours(
+        user_codes, item_codes, top_k=top_k, min_co_purchases=min_co_purchases
+    )
+
+    result: Dict[object, List[Tuple[object, float, int]]] = {}
+    for s, n, sim, count in zip(source.tolist(), neighbour.tolist(), similarity.tolist(), co_purchases.tolist()):
+        result.setdefault(item_labels[s], []).append((item_labels[n], sim, count))
+    return result
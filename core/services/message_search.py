@@ -0,0 +1,113 @@
+"""
+Message Search
+Per-user inverted index over message subjects and plaintext-safe metadata.
+
+Message bodies are PGP encrypted, so only the subject and the correspondent's
+username are indexed. MessagingService.send_message writes one posting per term
+for the sender and one for the recipient. Each (user, term) posting list keeps
+its MAX_POSTINGS newest messages, so a search reads at most MAX_POSTINGS rows
+per query term from the (owner, term, -created_at) index, however large the
+message table grows.
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+DEFAULTS = {
+    'MAX_POSTINGS': 500,
+    'PRUNE_SLACK': 50,
+    'MAX_TERMS': 16,
+    'MIN_TERM_LENGTH': 2,
+    'MAX_TERM_LENGTH': 32,
+}
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_options() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, 'MESSAGE_SEARCH', {})}
+
+
+def tokenize(*texts: str, max_terms: int = None) -> List[str]:
+    """Distinct lowercase terms of the given texts, in order of appearance"""
+    options = get_options()
+    max_terms = max_terms or options['MAX_TERMS']
+    terms: List[str] = []
+    for text in texts:
+        for token in TOKEN_RE.findall((text or '').lower()):
+            if options['MIN_TERM_LENGTH'] <= len(token) <= options['MAX_TERM_LENGTH'] and token not in terms:
+                terms.append(token)
+                if len(terms) >= max_terms:
+                    return terms
+    return terms
+
+
+def message_postings(message, sender_name: str, recipient_name: str) -> List[Tuple[Any, str]]:
+    """(owner_id, term) postings of a message: each side can find it by subject or correspondent"""
+    subject_terms = tokenize(message.subject)
+    return [
+        (owner_id, term)
+        for owner_id, other_name in ((message.sender_id, recipient_name), (message.recipient_id, sender_name))
+        for term in subject_terms + [term for term in tokenize(other_name) if term not in subject_terms]
+    ]
+
+
+def index_message(message, sender_name: str, recipient_name: str) -> int:
+    """Add a message to both participants' indexes and trim posting lists over the bound"""
+    from messaging.models import MessageSearchTerm
+
+    options = get_options()
+    postings = message_postings(message, sender_name, recipient_name)
+    if not postings:
+        return 0
+    MessageSearchTerm.objects.bulk_create([
+        MessageSearchTerm(owner_id=owner_id, term=term, message_id=message.pk, created_at=message.created_at)
+        for owner_id, term in postings
+    ])
+
+    # Lists are trimmed back to MAX_POSTINGS only once PRUNE_SLACK past it, so a busy
+    # term costs one trim per PRUNE_SLACK messages rather than one per message
+    overfull = (
+        MessageSearchTerm.objects.filter(
+            owner_id__in={owner_id for owner_id, _ in postings}, term__in={term for _, term in postings}
+        )
+        .values_list('owner_id', 'term')
+        .annotate(postings=Count('id'))
+        .filter(postings__gt=options['MAX_POSTINGS'] + options['PRUNE_SLACK'])
+    )
+    for owner_id, term, _ in overfull:
+        stale = list(
+            MessageSearchTerm.objects.filter(owner_id=owner_id, term=term)
+            .order_by('-created_at')
+            .values_list('id', flat=True)[options['MAX_POSTINGS']:]
+        )
+        MessageSearchTerm.objects.filter(id__in=stale).delete()
+    return len(postings)
+
+
+def search_message_ids(user_id, query: str, page: int = 1, page_size: int = 50) -> Tuple[List[Any], bool]:
+    """
+    Ids of the user's messages matching every term of the query, newest first.
+
+    Returns one page of ids and whether another page follows.
+    """
+    from messaging.models import MessageSearchTerm
+
+    terms = tokenize(query)
+    if not terms:
+        return [], False
+
+    offset = (max(page, 1) - 1) * page_size
+    hits = (
+        MessageSearchTerm.objects.filter(owner_id=user_id, term__in=terms)
+        .values('message_id')
+        .annotate(matched=Count('id'), at=Max('created_at'))
+        .filter(matched=len(terms))
+        .order_by('-at', 'message_id')
+        .values_list('message_id', flat=True)[offset:offset + page_size + 1]
+    )
+    ids = list(hits)
+    return ids[:page_size], len(ids) > page_size
@@ -7,11 +7,13 @@ import logging
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 from .base_service import BaseService
+from .message_search import index_message, search_message_ids
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -24,11 +26,6 @@ class MessagingService(BaseService):
     version = "1.0.0"
     description = "Messaging and communication service"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._conversation_cache = {}
-        self._message_cache = {}
-
     def initialize(self) -> bool:
         """Initialize the messaging service."""
         try:
@@ -43,8 +40,7 @@ class MessagingService(BaseService):
         """Clean up the messaging service."""
         try:
             # Clear caches
-            self._conversation_cache.clear()
-            self._message_cache.clear()
+            self.clear_local_cache()
             logger.info("Messaging service cleaned up successfully")
             return True
         except Exception as e:
@@ -135,19 +131,14 @@ class MessagingService(BaseService):
             return []
 
     def send_message(
-        self, conversation_id: str, sender_id: str, content: str, message_type: str = "text", **kwargs
+        self, sender_id: str, recipient_id: str, content: str, subject: str = "New Message", **kwargs
     ) -> Tuple[Any, bool, str]:
-        """Send a message in a conversation."""
+        """Send a message and update both inbox entries and the recipient's unread counter."""
         try:
-            from messaging.models import Conversation, Message
-
-            conversation = self.get_conversation_by_id(conversation_id)
-            if not conversation:
-                return None, False, "Conversation not found"
+            from messaging.models import Message
 
-            # Validate sender is part of conversation
-            if str(sender_id) not in [str(conversation.user1_id), str(conversation.user2_id)]:
-                return None, False, "You can only send messages to conversations you're part of"
+            if str(sender_id) == str(recipient_id):
+                return None, False, "You cannot send a message to yourself"
 
             # Validate message content
             max_length = self.get_config("max_message_length", 1000)
@@ -155,39 +146,53 @@ class MessagingService(BaseService):
                 return None, False, f"Message too long. Maximum {max_length} characters allowed."
 
             with transaction.atomic():
-                # Create message
                 message = Message.objects.create(
-                    conversation_id=conversation_id,
-                    sender_id=sender_id,
-                    content=content,
-                    message_type=message_type,
-                    **kwargs,
+                    sender_id=sender_id, recipient_id=recipient_id, subject=subject, content=content, **kwargs
                 )
 
-                # Update conversation
-                conversation.last_message_at = timezone.now()
-                conversation.last_message_id = message.id
+                # Lock inbox rows in owner order so crossing replies cannot deadlock
+                for owner_id, other_id, unread in sorted(
+                    [(sender_id, recipient_id, 0), (recipient_id, sender_id, 1)], key=lambda entry: str(entry[0])
+                ):
+                    self._upsert_inbox_entry(owner_id, other_id, message, unread)
+                self._add_unread(recipient_id, 1)
 
-                # Update unread count for other user
-                if str(sender_id) == str(conversation.user1_id):
-                    conversation.user2_unread_count += 1
-                else:
-                    conversation.user1_unread_count += 1
+                names = dict(User.objects.filter(pk__in=[sender_id, recipient_id]).values_list("id", "username"))
+                index_message(message, names.get(message.sender_id, ""), names.get(message.recipient_id, ""))
 
-                conversation.save()
-
-                # Clear caches
-                self.clear_cache(f"conversation:{conversation_id}")
-                self.clear_cache(f"user_conversations:{conversation.user1_id}")
-                self.clear_cache(f"user_conversations:{conversation.user2_id}")
-
-                logger.info(f"Message sent successfully: {message.id} in conversation {conversation_id}")
+                logger.info(f"Message sent successfully: {message.id} from {sender_id} to {recipient_id}")
                 return message, True, "Message sent successfully"
 
         except Exception as e:
-            logger.error(f"Failed to send message in conversation {conversation_id}: {e}")
+            logger.error(f"Failed to send message from {sender_id} to {recipient_id}: {e}")
             return None, False, str(e)
 
+    def _upsert_inbox_entry(self, owner_id: str, other_id: str, message: Any, unread: int):
+        """Point an inbox entry at a new message, creating the entry on first contact."""
+        from messaging.models import InboxEntry
+
+        fields = {"last_message": message, "last_message_at": message.created_at}
+        if InboxEntry.objects.filter(owner_id=owner_id, other_user_id=other_id).update(
+            unread_count=F("unread_count") + unread, **fields
+        ):
+            return
+        try:
+            with transaction.atomic():
+                InboxEntry.objects.create(owner_id=owner_id, other_user_id=other_id, unread_count=unread, **fields)
+        except IntegrityError:
+            # A concurrent first message created it
+            InboxEntry.objects.filter(owner_id=owner_id, other_user_id=other_id).update(
+                unread_count=F("unread_count") + unread, **fields
+            )
+
+    def _add_unread(self, user_id: str, delta: int):
+        """Atomically move a user's unread counter, never below zero."""
+        from messaging.models import UnreadCounter
+
+        if delta > 0:
+            UnreadCounter.objects.get_or_create(user_id=user_id)
+        UnreadCounter.objects.filter(user_id=user_id).update(unread=Greatest(F("unread") + delta, 0))
+
     def get_conversation_messages(self, conversation_id: str, **filters) -> List[Dict[str, Any]]:
         """Get messages for a conversation with optional filters."""
         try:
@@ -229,45 +234,28 @@ class MessagingService(BaseService):
             logger.error(f"Failed to get messages for conversation {conversation_id}: {e}")
             return []
 
-    def mark_messages_as_read(self, conversation_id: str, user_id: str) -> Tuple[bool, str]:
-        """Mark all messages in a conversation as read for a user."""
+    def mark_messages_as_read(self, user_id: str, other_user_id: str, message_id: str = None) -> Tuple[bool, str]:
+        """Mark the messages another user sent to this user as read, or only one of them."""
         try:
-            from messaging.models import Conversation, Message
-
-            conversation = self.get_conversation_by_id(conversation_id)
-            if not conversation:
-                return False, "Conversation not found"
-
-            # Validate user is part of conversation
-            if str(user_id) not in [str(conversation.user1_id), str(conversation.user2_id)]:
-                return False, "You can only mark messages as read in conversations you're part of"
+            from messaging.models import InboxEntry, Message
 
             with transaction.atomic():
-                # Mark messages as read
-                unread_messages = Message.objects.filter(
-                    conversation_id=conversation_id, sender_id__ne=user_id, is_read=False
-                )
-
-                unread_count = unread_messages.count()
-                unread_messages.update(is_read=True)
-
-                # Update conversation unread count
-                if str(user_id) == str(conversation.user1_id):
-                    conversation.user1_unread_count = 0
-                else:
-                    conversation.user2_unread_count = 0
-
-                conversation.save()
-
-                # Clear caches
-                self.clear_cache(f"conversation:{conversation_id}")
-                self.clear_cache(f"user_conversations:{user_id}")
+                unread_messages = Message.objects.filter(recipient_id=user_id, sender_id=other_user_id, is_read=False)
+                if message_id:
+                    unread_messages = unread_messages.filter(pk=message_id)
+
+                unread_count = unread_messages.update(is_read=True)
+                if unread_count:
+                    InboxEntry.objects.filter(owner_id=user_id, other_user_id=other_user_id).update(
+                        unread_count=Greatest(F("unread_count") - unread_count, 0)
+                    )
+                    self._add_unread(user_id, -unread_count)
 
-                logger.info(f"Marked {unread_count} messages as read in conversation {conversation_id}")
+                logger.info(f"Marked {unread_count} messages from {other_user_id} as read for {user_id}")
                 return True, f"Marked {unread_count} messages as read"
 
         except Exception as e:
-            logger.error(f"Failed to mark messages as read in conversation {conversation_id}: {e}")
+            logger.error(f"Failed to mark messages from {other_user_id} as read for {user_id}: {e}")
             return False, str(e)
 
     def delete_message(self, message_id: str, user_id: str) -> Tuple[bool, str]:
@@ -286,33 +274,17 @@ class MessagingService(BaseService):
             if timezone.now() - message.created_at > timezone.timedelta(hours=max_age_hours):
                 return False, f"Messages can only be deleted within {max_age_hours} hours"
 
-            conversation_id = message.conversation_id
-
             with transaction.atomic():
-                # Delete message
                 message.delete()
 
-                # Update conversation if this was the last message
-                from messaging.models import Conversation
-
-                conversation = Conversation.objects.get(id=conversation_id)
+                if not message.is_read:
+                    from messaging.models import InboxEntry
 
-                if conversation.last_message_id == message_id:
-                    # Find new last message
-                    last_message = (
-                        Message.objects.filter(conversation_id=conversation_id).order_by("-created_at").first()
+                    InboxEntry.objects.filter(owner_id=message.recipient_id, other_user_id=message.sender_id).update(
+                        unread_count=Greatest(F("unread_count") - 1, 0)
                     )
-                    if last_message:
-                        conversation.last_message_at = last_message.created_at
-                        conversation.last_message_id = last_message.id
-                    else:
-                        conversation.last_message_at = conversation.created_at
-                        conversation.last_message_id = None
-
-                    conversation.save()
-
-                # Clear caches
-                self.clear_cache(f"conversation:{conversation_id}")
+                    self._add_unread(message.recipient_id, -1)
+                self._refresh_last_message(message.sender_id, message.recipient_id)
 
                 logger.info(f"Message {message_id} deleted successfully")
                 return True, "Message deleted successfully"
@@ -321,57 +293,106 @@ class MessagingService(BaseService):
             logger.error(f"Failed to delete message {message_id}: {e}")
             return False, str(e)
 
+    def _refresh_last_message(self, user_id: str, other_user_id: str):
+        """Point both inbox entries of a pair at their newest remaining message."""
+        from messaging.models import InboxEntry, Message
+
+        last_message = (
+            Message.objects.filter(
+                models.Q(sender_id=user_id, recipient_id=other_user_id)
+                | models.Q(sender_id=other_user_id, recipient_id=user_id)
+            )
+            .order_by("-created_at")
+            .first()
+        )
+        entries = InboxEntry.objects.filter(
+            models.Q(owner_id=user_id, other_user_id=other_user_id)
+            | models.Q(owner_id=other_user_id, other_user_id=user_id)
+        )
+        if last_message:
+            entries.update(last_message=last_message, last_message_at=last_message.created_at)
+        else:
+            entries.delete()
+
     def get_unread_count(self, user_id: str) -> int:
-        """Get total unread message count for a user."""
+        """Get total unread message count for a user: one primary-key lookup."""
         try:
-            from messaging.models import Conversation
-
-            conversations = Conversation.objects.filter(models.Q(user1_id=user_id) | models.Q(user2_id=user_id))
-
-            total_unread = 0
-            for conversation in conversations:
-                if str(user_id) == str(conversation.user1_id):
-                    total_unread += conversation.user1_unread_count
-                else:
-                    total_unread += conversation.user2_unread_count
+            from messaging.models import UnreadCounter
 
-            return total_unread
+            return UnreadCounter.objects.filter(user_id=user_id).values_list("unread", flat=True).first() or 0
 
         except Exception as e:
             logger.error(f"Failed to get unread count for user {user_id}: {e}")
             return 0
 
-    def search_messages(self, user_id: str, query: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Search messages for a user."""
+    def get_inbox(self, user_id: str, limit: int = 50) -> List[Any]:
+        """Inbox entries, newest first, with the other user and last message joined in one query."""
         try:
-            from messaging.models import Conversation, Message
+            from messaging.models import InboxEntry
 
-            # Get conversations user is part of
-            user_conversations = Conversation.objects.filter(models.Q(user1_id=user_id) | models.Q(user2_id=user_id))
+            return list(
+                InboxEntry.objects.filter(owner_id=user_id)
+                .select_related("other_user", "last_message")
+                .order_by("-last_message_at")[:limit]
+            )
 
-            conversation_ids = [str(c.id) for c in user_conversations]
+        except Exception as e:
+            logger.error(f"Failed to get inbox for user {user_id}: {e}")
+            return []
 
-            # Search messages in user's conversations
-            messages = Message.objects.filter(conversation_id__in=conversation_ids, content__icontains=query).order_by(
-                "-created_at"
-            )[:limit]
+    def recount_unread(self, user_id: str) -> int:
+        """Rebuild a user's unread counters from the messages, e.g. after bulk deletes."""
+        from messaging.models import InboxEntry, Message, UnreadCounter
+
+        with transaction.atomic():
+            per_sender = dict(
+                Message.objects.filter(recipient_id=user_id, is_read=False)
+                .values_list("sender_id")
+                .annotate(count=models.Count("id"))
+            )
+            for entry in InboxEntry.objects.select_for_update().filter(owner_id=user_id):
+                unread = per_sender.get(entry.other_user_id, 0)
+                if entry.unread_count != unread:
+                    entry.unread_count = unread
+                    entry.save(update_fields=["unread_count"])
+            total = sum(per_sender.values())
+            UnreadCounter.objects.update_or_create(user_id=user_id, defaults={"unread": total})
+        return total
+
+    def repair_inboxes(self, pairs, recipient_ids) -> None:
+        """Bring inbox entries and counters back in line after messages were bulk deleted."""
+        for user_id, other_user_id in pairs:
+            self._refresh_last_message(user_id, other_user_id)
+        for user_id in recipient_ids:
+            self.recount_unread(user_id)
+
+    def search_messages(self, user_id: str, query: str, limit: int = 50, page: int = 1) -> Dict[str, Any]:
+        """Search a user's messages by subject and correspondent through the per-user index."""
+        try:
+            from messaging.models import Message
 
-            return [
+            message_ids, has_next = search_message_ids(user_id, query, page=page, page_size=limit)
+            messages = Message.objects.filter(pk__in=message_ids).select_related("sender", "recipient")
+            by_id = {m.pk: m for m in messages}
+
+            results = [
                 {
                     "id": str(m.id),
-                    "conversation_id": str(m.conversation_id),
                     "sender_id": str(m.sender_id),
-                    "content": m.content,
-                    "message_type": m.message_type,
+                    "sender": m.sender.username,
+                    "recipient_id": str(m.recipient_id),
+                    "recipient": m.recipient.username,
+                    "subject": m.subject,
                     "created_at": m.created_at.isoformat(),
                     "is_read": m.is_read,
                 }
-                for m in messages
+                for m in (by_id[pk] for pk in message_ids if pk in by_id)
             ]
+            return {"results": results, "page": page, "has_next": has_next}
 
         except Exception as e:
             logger.error(f"Failed to search messages for user {user_id}: {e}")
-            return []
+            return {"results": [], "page": page, "has_next": False}
 
     def get_conversation_summary(self, conversation_id: str) -> Dict[str, Any]:
         """Get comprehensive conversation summary."""
@@ -506,8 +527,7 @@ class MessagingService(BaseService):
                 "active_conversations": active_conversations,
                 "total_messages": total_messages,
                 "unread_messages": unread_messages,
-                "conversation_cache_size": len(self._conversation_cache),
-                "message_cache_size": len(self._message_cache),
+                "cache_stats": self.get_cache_stats(),
             }
         except Exception as e:
             logger.error(f"Failed to get service health: {e}")
@@ -8,11 +8,13 @@ from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.db import models, transaction
+from django.db.models import Case, F, When
 from django.utils import timezone
 
 from .base_service import BaseService
+from .service_registry import ServiceRegistry
+from .tiered_cache import tag
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -25,11 +27,6 @@ class OrderService(BaseService):
     version = "1.0.0"
     description = "Order management and operations service"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._order_cache = {}
-        self._order_item_cache = {}
-
     def initialize(self) -> bool:
         """Initialize the order service."""
         try:
@@ -44,8 +41,7 @@ class OrderService(BaseService):
         """Clean up the order service."""
         try:
             # Clear caches
-            self._order_cache.clear()
-            self._order_item_cache.clear()
+            self.clear_local_cache()
             logger.info("Order service cleaned up successfully")
             return True
         except Exception as e:
@@ -147,105 +143,179 @@ class OrderService(BaseService):
     def create_order(
         self, user_id: str, vendor_id: str, items: List[Dict], shipping_address: str, **kwargs
     ) -> Tuple[Any, bool, str]:
-        """Create a new order."""
+        """
+        Create a new order in one batched checkout.
+
+        Every product in the cart is locked with a single SELECT ... FOR UPDATE in
+        primary-key order, so concurrent checkouts of overlapping carts queue on the
+        same rows in the same order instead of deadlocking. Stock is validated in
+        memory, decremented with one UPDATE and the order items are bulk inserted.
+        """
         try:
-            from core.services.product_service import ProductService
-            from core.services.wallet_service import WalletService
-            from orders.models import Order, OrderItem
+            from orders.models import Order
+
+            currency = kwargs.pop("currency", "BTC").lower()
+            if currency not in ("btc", "xmr"):
+                return None, False, f"Unsupported currency: {currency}"
+
+            quantities, error = self._merge_quantities(items)
+            if error:
+                return None, False, error
+
+            # Validate vendor exists and is active
+            vendor_service = ServiceRegistry.get_service("vendor_service")
+            vendor = vendor_service.get_vendor_by_user(vendor_id)
+
+            if not vendor:
+                return None, False, "Vendor not found"
+
+            if not vendor.is_active or vendor.is_on_vacation:
+                return None, False, "Vendor is not available"
 
             with transaction.atomic():
-                # Validate vendor exists and is active
-                from core.services.vendor_service import VendorService
-
-                vendor_service = VendorService()
-                vendor = vendor_service.get_vendor_by_user(vendor_id)
-
-                if not vendor:
-                    return None, False, "Vendor not found"
-
-                if not vendor.is_active or vendor.is_on_vacation:
-                    return None, False, "Vendor is not available"
-
-                # Validate items and calculate total
-                product_service = ProductService()
-                total_amount = Decimal("0")
-                order_items = []
-
-                for item in items:
-                    product_id = item.get("product_id")
-                    quantity = item.get("quantity", 1)
-
-                    # Check product availability
-                    available, message = product_service.check_product_availability(product_id, quantity)
-                    if not available:
-                        return None, False, f"Product {product_id}: {message}"
-
-                    # Get product details
-                    product = product_service.get_product_by_id(product_id)
-                    if not product:
-                        return None, False, f"Product {product_id} not found"
-
-                    # Calculate item total
-                    item_total = product.price * quantity
-                    total_amount += item_total
-
-                    order_items.append(
-                        {"product": product, "quantity": quantity, "price": product.price, "total": item_total}
-                    )
-
-                # Check user wallet balance
-                wallet_service = WalletService()
-                currency = kwargs.get("currency", "BTC")
-                available_balance, msg = wallet_service.get_available_balance(user_id, currency.lower())
-
-                if available_balance < total_amount:
-                    return (
-                        None,
-                        False,
-                        f"Insufficient balance. Required: {total_amount}, Available: {available_balance}",
-                    )
-
-                # Create order
-                order = Order.objects.create(
+                # Products are locked before the wallet, the order refunds lock them in too
+                products = self._lock_products(quantities)
+                error = self._validate_stock(products, quantities, vendor)
+                if error:
+                    return None, False, error
+
+                lines = [(products[product_id], quantity) for product_id, quantity in quantities.items()]
+                total_btc = sum((product.price_btc * quantity for product, quantity in lines), Decimal("0"))
+                total_xmr = sum((product.price_xmr * quantity for product, quantity in lines), Decimal("0"))
+                total_amount = total_btc if currency == "btc" else total_xmr
+
+                # The UUID is assigned client-side, so escrow can reference the order before it is saved
+                order = Order(
                     user_id=user_id,
-                    vendor_id=vendor_id,
-                    total_amount=total_amount,
-                    currency=currency,
+                    status="PENDING",
+                    total_btc=total_btc,
+                    total_xmr=total_xmr,
                     shipping_address=shipping_address,
-                    status="pending",
                     **kwargs,
                 )
 
-                # Create order items
-                for item_data in order_items:
-                    OrderItem.objects.create(
-                        order=order,
-                        product_id=item_data["product"].id,
-                        quantity=item_data["quantity"],
-                        price=item_data["price"],
-                        total=item_data["total"],
-                    )
-
-                # Move funds to escrow
-                success, msg = wallet_service.move_to_escrow(user_id, currency.lower(), total_amount, str(order.id))
+                wallet_service = ServiceRegistry.get_service("wallet_service")
+                success, msg = wallet_service.move_to_escrow(user_id, currency, total_amount, str(order.id))
                 if not success:
-                    raise Exception(f"Failed to move funds to escrow: {msg}")
-
-                # Update product stock
-                for item_data in order_items:
-                    product_service.update_product_stock(str(item_data["product"].id), -item_data["quantity"], "adjust")
+                    transaction.set_rollback(True)
+                    return None, False, f"Could not escrow {total_amount} {currency.upper()}: {msg}"
 
-                # Clear caches
-                self.clear_cache(f"user_orders:{user_id}")
-                self.clear_cache(f"vendor_orders:{vendor_id}")
+                order.save()
+                self._write_checkout(order, products, quantities)
+                self._invalidate_checkout_caches(order, vendor, [products[product_id] for product_id in quantities])
 
-                logger.info(f"Order created successfully: {order.id} for user {user_id}")
-                return order, True, "Order created successfully"
+            logger.info(f"Order created successfully: {order.id} for user {user_id} ({len(quantities)} products)")
+            return order, True, "Order created successfully"
 
         except Exception as e:
             logger.error(f"Failed to create order for user {user_id}: {e}")
             return None, False, str(e)
 
+    def _merge_quantities(self, items: List[Dict]) -> Tuple[Dict[str, int], str]:
+        """Quantity per product, merging repeated products so each row is locked and decremented once"""
+        quantities: Dict[str, int] = {}
+        for item in items:
+            quantity = int(item.get("quantity", 1))
+            if quantity <= 0:
+                return {}, f"Product {item.get('product_id')}: invalid quantity {quantity}"
+            product_id = str(item.get("product_id"))
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        if not quantities:
+            return {}, "Order has no items"
+        max_items = self.get_config("max_order_items")
+        if max_items and len(quantities) > max_items:
+            return {}, f"Orders are limited to {max_items} products"
+        return quantities, ""
+
+    def _lock_products(self, product_ids) -> Dict[str, Any]:
+        """
+        Lock product rows in primary-key order; returns them by string id.
+
+        Paths that lock products and a wallet take the products first, so a checkout
+        and a refund never wait on each other's rows in opposite orders.
+        """
+        from products.models import Product
+
+        return {
+            str(product.pk): product
+            for product in Product.objects.select_for_update().filter(pk__in=list(product_ids)).order_by("pk")
+        }
+
+    def _validate_stock(self, products: Dict[str, Any], quantities: Dict[str, int], vendor: Any) -> str:
+        """Check the locked rows can fill the cart; returns an error message or an empty string"""
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if not product or product.vendor_id != vendor.pk:
+                return f"Product {product_id} not found"
+            if not product.is_available:
+                return f"Product {product_id}: Product is not available"
+            if product.stock_quantity < quantity:
+                return f"Product {product_id}: Insufficient stock. Available: {product.stock_quantity}"
+        return ""
+
+    def _write_checkout(self, order: Any, products: Dict[str, Any], quantities: Dict[str, int]) -> None:
+        """Bulk insert the order items and decrement every product's stock with one UPDATE"""
+        from orders.models import OrderItem
+        from products.models import Product
+
+        OrderItem.objects.bulk_create(
+            [
+                OrderItem(
+                    order=order,
+                    product=products[product_id],
+                    quantity=quantity,
+                    price_btc=products[product_id].price_btc,
+                    price_xmr=products[product_id].price_xmr,
+                )
+                for product_id, quantity in quantities.items()
+            ]
+        )
+        Product.objects.filter(pk__in=list(quantities)).update(
+            stock_quantity=Case(
+                *[
+                    When(pk=products[product_id].pk, then=F("stock_quantity") - quantity)
+                    for product_id, quantity in quantities.items()
+                ],
+                output_field=models.IntegerField(),
+            ),
+            # update() skips auto_now; search catch-up syncs on updated_at
+            updated_at=timezone.now(),
+        )
+
+    def _invalidate_checkout_caches(self, order, vendor, products: List[Any]):
+        """Drop caches and re-index stock a checkout made stale; bulk writes send no post_save signals."""
+        from core.search.backends import get_search_backend
+        from core.signals import cache_tags_for
+        from products.models import Product
+
+        tags = {tag("orders.orderitem"), tag("orders.orderitem", order=order.pk)}
+        for product in products:
+            tags |= cache_tags_for(product)
+            tags.add(tag("orders.orderitem", product=product.pk))
+
+        product_service = ServiceRegistry.get_service("product_service")
+
+        def apply():
+            self.invalidate_tags(*tags)
+            for product in products:
+                product_service.clear_cache(f"product:{product.pk}")
+            product_service.clear_cache(f"vendor_products:{vendor.pk}")
+            self.clear_cache(f"user_orders:{order.user_id}")
+            self.clear_cache(f"vendor_orders:{vendor.user_id}")
+
+            # The locked rows still hold the old stock, so index the committed ones
+            search_backend = get_search_backend()
+            for product in Product.objects.filter(pk__in=[product.pk for product in products]).select_related(
+                "category", "vendor"
+            ):
+                try:
+                    search_backend.index_product(product)
+                except Exception as e:
+                    logger.error(f"Failed to index product {product.pk}: {e}")
+
+        transaction.on_commit(apply)
+
     def update_order_status(
         self, order_id: str, new_status: str, admin_user_id: str = None, notes: str = ""
     ) -> Tuple[bool, str]:
@@ -310,9 +380,7 @@ class OrderService(BaseService):
     def _release_funds_to_vendor(self, order: Any) -> None:
         """Release funds from escrow to vendor."""
         try:
-            from core.services.wallet_service import WalletService
-
-            wallet_service = WalletService()
+            wallet_service = ServiceRegistry.get_service("wallet_service")
 
             # Release funds from user's escrow
             success, msg = wallet_service.release_from_escrow(
@@ -335,11 +403,11 @@ class OrderService(BaseService):
     def _refund_order(self, order: Any) -> None:
         """Refund order and restore product stock."""
         try:
-            from core.services.product_service import ProductService
-            from core.services.wallet_service import WalletService
+            wallet_service = ServiceRegistry.get_service("wallet_service")
+            product_service = ServiceRegistry.get_service("product_service")
 
-            wallet_service = WalletService()
-            product_service = ProductService()
+            # Same lock order as checkout: the order's products, then the wallet
+            self._lock_products(order.items.values_list("product_id", flat=True))
 
             # Refund user
             success, msg = wallet_service.release_from_escrow(
@@ -581,8 +649,7 @@ class OrderService(BaseService):
                 "total_orders": total_orders,
                 "pending_orders": pending_orders,
                 "processing_orders": processing_orders,
-                "order_cache_size": len(self._order_cache),
-                "order_item_cache_size": len(self._order_item_cache),
+                "cache_stats": self.get_cache_stats(),
             }
         except Exception as e:
             logger.error(f"Failed to get service health: {e}")
@@ -13,6 +13,8 @@ from functools import wraps
 import logging
 import json
 
+from .request_profiler import DURATION_BUCKETS, request_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -358,6 +360,7 @@ class PerformanceMonitor:
         return {
             'system_metrics': self._system_metrics,
             'service_metrics': service_metrics,
+            'request_metrics': request_metrics.get_summary(),
             'alert_history': alert_history,
             'monitoring_status': 'active' if self._monitoring_active else 'inactive',
             'timestamp': datetime.now().isoformat()
@@ -398,7 +401,43 @@ class PerformanceMonitor:
             lines.append(f"service_error_rate_percent{{service=\"{service_name}\"}} {metrics['error_rate_percent']}")
             lines.append(f"service_requests_per_minute{{service=\"{service_name}\"}} {metrics['requests_per_minute']}")
         
+        lines.extend(self._export_request_metrics(data.get('request_metrics', {})))
+        
         return '\n'.join(lines)
+    
+    def _export_request_metrics(self, request_data: Dict) -> List[str]:
+        """Export per-view request profiles as Prometheus counters and a wall time histogram."""
+        lines = []
+        views = request_data.get('views', {})
+        if not views:
+            return lines
+        
+        counters = [
+            ('http_requests_total', 'requests'),
+            ('http_request_errors_total', 'errors'),
+            ('http_request_slow_total', 'slow'),
+            ('http_request_sql_queries_total', 'sql_count'),
+            ('http_request_sql_seconds_total', 'sql_time'),
+            ('http_request_duplicate_queries_total', 'duplicate_queries'),
+            ('http_request_n_plus_one_total', 'n_plus_one'),
+            ('http_request_cache_hits_total', 'cache_hits'),
+            ('http_request_cache_misses_total', 'cache_misses'),
+            ('http_request_template_seconds_total', 'template_time'),
+        ]
+        for metric, field in counters:
+            lines.append(f"# TYPE {metric} counter")
+            for view_name, view in views.items():
+                lines.append(f"{metric}{{view=\"{view_name}\"}} {round(view[field], 6)}")
+        
+        lines.append("# TYPE http_request_duration_seconds histogram")
+        for view_name, view in views.items():
+            for bound, count in zip(DURATION_BUCKETS, view['buckets']):
+                lines.append(f"http_request_duration_seconds_bucket{{view=\"{view_name}\",le=\"{bound}\"}} {count}")
+            lines.append(f"http_request_duration_seconds_bucket{{view=\"{view_name}\",le=\"+Inf\"}} {view['requests']}")
+            lines.append(f"http_request_duration_seconds_sum{{view=\"{view_name}\"}} {round(view['wall_time'], 6)}")
+            lines.append(f"http_request_duration_seconds_count{{view=\"{view_name}\"}} {view['requests']}")
+        
+        return lines
 
 
 # Global performance monitor instance
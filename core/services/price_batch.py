@@ -0,0 +1,178 @@
+"""
+Price Batch
+Vectorized whole-catalogue price statistics used by PricePredictionService.predict_all_prices.
+Kept free of Django imports: every product's metrics come from group-by operations
+(np.bincount / ufunc.at) over columnar sales arrays instead of per-product queries.
+"""
+
+from typing import Dict
+
+import numpy as np
+
+DAY = 86400.0
+MARKET_WINDOW_DAYS = 30
+DEMAND_WINDOW_DAYS = 180
+WEEKS = DEMAND_WINDOW_DAYS // 7 + 1
+
+ACTIVITY_LEVELS = np.array(['low', 'medium', 'high'], dtype=object)
+TRENDS = np.array(['decreasing', 'stable', 'increasing'], dtype=object)
+ADVANTAGES = np.array(['overpriced', 'competitive', 'underpriced'], dtype=object)
+
+
+def _group_std(groups: np.ndarray, values: np.ndarray, counts: np.ndarray, means: np.ndarray) -> np.ndarray:
+    """Sample standard deviation per group (0 for groups with fewer than two values)."""
+    squares = np.bincount(groups, weights=(values - means[groups]) ** 2, minlength=len(counts))
+    std = np.zeros(len(counts))
+    many = counts > 1
+    std[many] = np.sqrt(squares[many] / (counts[many] - 1))
+    return std
+
+
+def price_statistics(
+    prices: np.ndarray,
+    category_codes: np.ndarray,
+    vendor_codes: np.ndarray,
+    sale_products: np.ndarray,
+    sale_quantities: np.ndarray,
+    sale_prices: np.ndarray,
+    sale_times: np.ndarray,
+    now: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute market, history, competitor and demand statistics for every product.
+
+    Product arrays are aligned by position; sale_products holds the product position
+    of each sold line. Times are POSIX seconds. Returns arrays aligned with products.
+    """
+    count = len(prices)
+    prices = prices.astype(np.float64)
+    sale_quantities = sale_quantities.astype(np.float64)
+    sale_prices = sale_prices.astype(np.float64)
+    line_revenue = sale_quantities * sale_prices
+
+    # Historical performance over all sales
+    lines = np.bincount(sale_products, minlength=count)
+    has_sales = lines > 0
+    total_sales = np.bincount(sale_products, weights=sale_quantities, minlength=count)
+    total_revenue = np.bincount(sale_products, weights=line_revenue, minlength=count)
+    average_price = np.divide(
+        np.bincount(sale_products, weights=sale_prices, minlength=count), lines,
+        out=np.zeros(count), where=has_sales
+    )
+    average_quantity = np.divide(total_sales, lines, out=np.zeros(count), where=has_sales)
+    min_price = np.full(count, np.inf)
+    max_price = np.full(count, -np.inf)
+    np.minimum.at(min_price, sale_products, sale_prices)
+    np.maximum.at(max_price, sale_products, sale_prices)
+    min_price[~has_sales] = 0.0
+    max_price[~has_sales] = 0.0
+
+    # Market conditions over the last 30 days, market share within the category
+    recent = sale_times >= now - MARKET_WINDOW_DAYS * DAY
+    recent_products = sale_products[recent]
+    recent_lines = np.bincount(recent_products, minlength=count)
+    recent_sold = np.bincount(recent_products, weights=sale_quantities[recent], minlength=count)
+    recent_revenue = np.bincount(recent_products, weights=line_revenue[recent], minlength=count)
+    recent_average_price = np.divide(
+        np.bincount(recent_products, weights=sale_prices[recent], minlength=count), recent_lines,
+        out=np.zeros(count), where=recent_lines > 0
+    )
+    category_revenue = np.bincount(category_codes, weights=recent_revenue)[category_codes]
+    category_revenue[category_revenue == 0] = 1.0
+    market_share = np.round(recent_revenue / category_revenue * 100, 2)
+    sales_velocity = recent_sold / MARKET_WINDOW_DAYS
+    activity = (recent_sold > 3).astype(np.int64) + (recent_sold > 10)
+
+    # Competitors: same category, other vendors
+    pair_codes = np.unique(np.stack([category_codes, vendor_codes], axis=1), axis=0, return_inverse=True)[1].ravel()
+    competitor_count = np.bincount(category_codes)[category_codes] - np.bincount(pair_codes)[pair_codes]
+    competitor_sum = (
+        np.bincount(category_codes, weights=prices)[category_codes] - np.bincount(pair_codes, weights=prices)[pair_codes]
+    )
+    has_competitors = competitor_count > 0
+    competitor_average = np.divide(
+        competitor_sum, competitor_count, out=np.full(count, np.nan), where=has_competitors
+    )
+    advantage = np.ones(count, dtype=np.int64)
+    advantage[has_competitors & (prices < competitor_average * 0.9)] = 2
+    advantage[has_competitors & (prices > competitor_average * 1.1)] = 0
+
+    # Weekly demand over the last 180 days as a products x weeks matrix
+    week = np.floor((sale_times - (now - DEMAND_WINDOW_DAYS * DAY)) / (7 * DAY)).astype(np.int64)
+    in_window = (week >= 0) & (week < WEEKS)
+    weekly = np.bincount(
+        sale_products[in_window] * WEEKS + week[in_window],
+        weights=sale_quantities[in_window],
+        minlength=count * WEEKS
+    ).reshape(count, WEEKS)
+    average_weekly_demand = weekly.mean(axis=1)
+    demand_variability = weekly.std(axis=1, ddof=1)
+    recent_weeks = weekly[:, -4:].mean(axis=1)
+    earlier_weeks = weekly[:, -8:-4].mean(axis=1)
+    trend = np.ones(count, dtype=np.int64)
+    trend[recent_weeks > earlier_weeks * 1.1] = 2
+    trend[recent_weeks < earlier_weeks * 0.9] = 0
+
+    return {
+        'total_orders': lines,
+        'total_sales': total_sales,
+        'total_revenue': total_revenue,
+        'average_price': average_price,
+        'price_volatility': _group_std(sale_products, sale_prices, lines, average_price),
+        'sales_consistency': _group_std(sale_products, sale_quantities, lines, average_quantity),
+        'min_price': min_price,
+        'max_price': max_price,
+        'recent_sales_volume': recent_sold,
+        'recent_average_price': recent_average_price,
+        'recent_revenue': recent_revenue,
+        'market_share_percentage': market_share,
+        'sales_velocity': sales_velocity,
+        'activity': activity,
+        'competitor_count': competitor_count,
+        'average_competitor_price': competitor_average,
+        'advantage': advantage,
+        'average_weekly_demand': average_weekly_demand,
+        'demand_variability': demand_variability,
+        'trend': trend,
+    }
+
+
+def price_recommendations(prices: np.ndarray, stats: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Vectorized equivalent of PricePredictionService's per-product pricing rules."""
+    prices = prices.astype(np.float64)
+    competitor_average = stats['average_competitor_price']
+    has_competitors = ~np.isnan(competitor_average)
+
+    conservative = np.where(has_competitors, competitor_average, prices) * 0.95
+    aggressive = np.where(
+        stats['average_price'] > 0, np.maximum(prices * 1.1, stats['average_price'] * 1.05), prices * 1.1
+    )
+
+    # Optimal price is the mean of the factors that apply to each product
+    share = stats['market_share_percentage']
+    factor_sum = np.where(share > 10, 1.05, np.where(share < 2, 0.95, 1.0))
+    factor_count = np.ones(len(prices))
+    demand_factor = np.select([stats['trend'] == 2, stats['trend'] == 0], [1.08, 0.92], 0.0)
+    competitive_factor = np.select([stats['advantage'] == 2, stats['advantage'] == 0], [1.15, 0.85], 0.0)
+    factor_sum += demand_factor + competitive_factor
+    factor_count += (demand_factor > 0).astype(np.int64) + (competitive_factor > 0)
+    optimal = prices * factor_sum / factor_count
+
+    confidence = np.round((
+        np.select([stats['total_orders'] > 10, stats['total_orders'] > 5], [0.8, 0.6], 0.3)
+        + np.select([stats['recent_sales_volume'] > 5, stats['recent_sales_volume'] > 1], [0.8, 0.6], 0.4)
+        + np.select([stats['competitor_count'] > 5, stats['competitor_count'] > 2], [0.9, 0.7], 0.5)
+    ) / 3, 2)
+
+    weekly_trend = np.where(
+        (stats['activity'] == 2) & (stats['sales_velocity'] > 1), 0.02,
+        np.where((stats['activity'] == 0) | (stats['sales_velocity'] < 0.1), -0.01, 0.0)
+    )
+
+    return {
+        'conservative': np.round(conservative, 8),
+        'optimal': np.round(optimal, 8),
+        'aggressive': np.round(aggressive, 8),
+        'confidence': confidence,
+        'weekly_trend': weekly_trend,
+    }
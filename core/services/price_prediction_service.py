@@ -14,6 +14,7 @@ from django.utils import timezone
 import statistics
 
 from .base_service import BaseService
+from .tiered_cache import tag
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -26,10 +27,8 @@ class PricePredictionService(BaseService):
     version = "1.0.0"
     description = "Historical data analysis and price trend prediction"
     
-    def __init__(self):
-        super().__init__()
-        self._prediction_cache = {}
-        self._market_data_cache = {}
+    # Order states whose items count as sales in batch predictions
+    SALE_STATUSES = ('PAID', 'PROCESSING', 'SHIPPED', 'DELIVERED')
     
     def initialize(self):
         """Initialize the price prediction service"""
@@ -42,8 +41,7 @@ class PricePredictionService(BaseService):
     def cleanup(self):
         """Clean up the price prediction service"""
         try:
-            self._prediction_cache.clear()
-            self._market_data_cache.clear()
+            self.clear_local_cache()
             logger.info("Price prediction service cleaned up successfully")
         except Exception as e:
             logger.error(f"Failed to cleanup price prediction service: {e}")
@@ -96,8 +94,12 @@ class PricePredictionService(BaseService):
                 'validity_hours': 24  # Predictions valid for 24 hours
             }
             
-            # Cache for 6 hours
-            self.set_cached(cache_key, prediction_result, timeout=21600)
+            # Invalidated by writes to the product, its sales and its category, so it can live a day
+            self.set_cached(cache_key, prediction_result, timeout=86400, tags=[
+                tag('products.product', product.pk),
+                tag('orders.orderitem', product=product.pk),
+                tag('products.product', category=product.category_id),
+            ])
             
             return prediction_result
             
@@ -105,6 +107,93 @@ class PricePredictionService(BaseService):
             logger.error(f"Failed to predict optimal price for product {product_id}: {e}")
             return {'error': str(e)}
     
+    def predict_all_prices(self, validity_days: int = 30) -> Dict[str, Any]:
+        """
+        Recompute the stored optimal price prediction of every available product.
+        
+        Reads the catalogue and the sales history in one scan each and computes all
+        per-product metrics at once with vectorized NumPy group-bys, instead of running
+        the per-product analysis queries of predict_optimal_price for each product.
+        """
+        from django.db import transaction
+        from orders.models import OrderItem
+        from products.models import Product
+        from core.models import PricePrediction
+        from .item_similarity import encode
+        from .price_batch import ACTIVITY_LEVELS, ADVANTAGES, TRENDS, price_recommendations, price_statistics
+        import numpy as np
+        
+        products = list(Product.objects.filter(is_available=True).values_list(
+            'id', 'category_id', 'vendor_id', 'price_btc'
+        ))
+        if not products:
+            return {'products': 0, 'sales': 0}
+        
+        product_ids = [row[0] for row in products]
+        positions = {product_id: index for index, product_id in enumerate(product_ids)}
+        category_codes, _ = encode([row[1] for row in products])
+        vendor_codes, _ = encode([row[2] for row in products])
+        prices = np.array([float(row[3]) for row in products])
+        
+        sales = [
+            (positions[product_id], quantity, float(price_btc), created_at.timestamp())
+            for product_id, quantity, price_btc, created_at in OrderItem.objects.filter(
+                order__status__in=self.SALE_STATUSES, product_id__in=product_ids
+            ).values_list(
+                'product_id', 'quantity', 'price_btc', 'order__created_at'
+            ).iterator(chunk_size=self.max_batch_size)
+        ]
+        sale_columns = np.array(sales, dtype=np.float64).reshape(-1, 4)
+        
+        now = timezone.now()
+        stats = price_statistics(
+            prices, category_codes, vendor_codes,
+            sale_columns[:, 0].astype(np.int64), sale_columns[:, 1], sale_columns[:, 2], sale_columns[:, 3],
+            now.timestamp()
+        )
+        recommendations = price_recommendations(prices, stats)
+        
+        valid_until = now + timedelta(days=validity_days)
+        rows = [
+            PricePrediction(
+                product_id=product_id,
+                predicted_price=Decimal(str(recommendations['optimal'][index])),
+                confidence_score=float(recommendations['confidence'][index]),
+                prediction_type='optimal',
+                market_conditions={
+                    'recent_sales_volume': float(stats['recent_sales_volume'][index]),
+                    'market_share_percentage': float(stats['market_share_percentage'][index]),
+                    'sales_velocity': round(float(stats['sales_velocity'][index]), 4),
+                    'market_activity': ACTIVITY_LEVELS[stats['activity'][index]],
+                    'demand_trend': TRENDS[stats['trend'][index]],
+                },
+                factors={
+                    'current_price': float(prices[index]),
+                    'conservative_price': float(recommendations['conservative'][index]),
+                    'aggressive_price': float(recommendations['aggressive'][index]),
+                    'average_competitor_price': (
+                        None if np.isnan(stats['average_competitor_price'][index])
+                        else round(float(stats['average_competitor_price'][index]), 8)
+                    ),
+                    'competitor_count': int(stats['competitor_count'][index]),
+                    'competitive_advantage': ADVANTAGES[stats['advantage'][index]],
+                    'total_orders': int(stats['total_orders'][index]),
+                    'price_volatility': round(float(stats['price_volatility'][index]), 8),
+                    'weekly_trend': float(recommendations['weekly_trend'][index]),
+                },
+                valid_until=valid_until
+            )
+            for index, product_id in enumerate(product_ids)
+        ]
+        
+        with transaction.atomic():
+            PricePrediction.objects.filter(prediction_type='optimal', product_id__in=product_ids).delete()
+            PricePrediction.objects.bulk_create(rows, batch_size=self.max_batch_size)
+        
+        result = {'products': len(rows), 'sales': len(sales)}
+        logger.info(f"Price predictions updated: {result}")
+        return result
+    
     def analyze_category_trends(self, category_id: str, days: int = 90) -> Dict[str, Any]:
         """Analyze price trends for an entire product category"""
         try:
@@ -261,8 +350,10 @@ class PricePredictionService(BaseService):
                 'generated_at': timezone.now()
             }
             
-            # Cache for 2 hours
-            self.set_cached(cache_key, insights, timeout=7200)
+            # Order and catalogue writes invalidate it; the TTL only bounds drift of the window
+            self.set_cached(cache_key, insights, timeout=21600, tags=[
+                tag('orders.order'), tag('orders.orderitem'), tag('products.product')
+            ])
             
             return insights
             
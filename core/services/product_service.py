@@ -8,7 +8,6 @@ from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.db import models, transaction
 from django.utils import timezone
 
@@ -25,11 +24,6 @@ class ProductService(BaseService):
     version = "1.0.0"
     description = "Product management and operations service"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._product_cache = {}
-        self._category_cache = {}
-
     def initialize(self) -> bool:
         """Initialize the product service."""
         try:
@@ -44,8 +38,7 @@ class ProductService(BaseService):
         """Clean up the product service."""
         try:
             # Clear caches
-            self._product_cache.clear()
-            self._category_cache.clear()
+            self.clear_local_cache()
             logger.info("Product service cleaned up successfully")
             return True
         except Exception as e:
@@ -462,8 +455,7 @@ class ProductService(BaseService):
                 "total_products": total_products,
                 "active_products": active_products,
                 "out_of_stock": out_of_stock,
-                "product_cache_size": len(self._product_cache),
-                "category_cache_size": len(self._category_cache),
+                "cache_stats": self.get_cache_stats(),
             }
         except Exception as e:
             logger.error(f"Failed to get service health: {e}")
@@ -0,0 +1,111 @@
+"""
+Profile Frame
+Columnar order and item history of one user, shared by every UserPreferenceService analyzer.
+Kept free of Django imports: UserPreferenceService.load_profile_frames reads the history
+of a whole batch of users in a few queries and splits it into one frame per user, so a
+profile rebuild derives every section from the same arrays instead of re-querying.
+"""
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+DAY = 86400.0
+
+# Order states that count as purchases, and as completed orders for the risk profile
+PURCHASE_STATUSES = ('PAID', 'PROCESSING', 'SHIPPED', 'DELIVERED')
+COMPLETED_STATUSES = ('DELIVERED',)
+
+
+class ProfileFrame:
+    """
+    A user's orders and order items as aligned NumPy arrays.
+
+    Orders are sorted by creation time (POSIX seconds, UTC). ``item_orders`` holds the
+    order position of every item, so per-order values broadcast to items with
+    ``order_values[frame.item_orders]``. Category and vendor ids stay raw; their
+    display names come from the ``category_names`` / ``vendor_names`` lookups.
+    """
+
+    def __init__(self, order_times, order_totals, order_statuses, item_orders, item_quantities,
+                 item_prices, item_list_prices, item_categories, item_vendors):
+        self.order_times = np.asarray(order_times, dtype=np.float64)
+        self.order_totals = np.asarray(order_totals, dtype=np.float64)
+        self.order_statuses = np.asarray(order_statuses, dtype=object)
+        self.item_orders = np.asarray(item_orders, dtype=np.int64)
+        self.item_quantities = np.asarray(item_quantities, dtype=np.int64)
+        self.item_prices = np.asarray(item_prices, dtype=np.float64)
+        self.item_list_prices = np.asarray(item_list_prices, dtype=np.float64)
+        self.item_categories = np.asarray(item_categories, dtype=object)
+        self.item_vendors = np.asarray(item_vendors, dtype=object)
+
+        self.purchased = np.isin(self.order_statuses, PURCHASE_STATUSES)
+        self.completed = np.isin(self.order_statuses, COMPLETED_STATUSES)
+        self.item_purchased = self.purchased[self.item_orders] if len(self.item_orders) else np.zeros(0, dtype=bool)
+
+        # Batch-level lookups and counts, filled in by the loader
+        self.category_names: Dict = {}
+        self.vendor_names: Dict = {}
+        self.category_count = 0
+        self.disputes_filed = 0
+        self.disputes_won = 0
+        self.interaction_summary: Dict = {}
+
+    @classmethod
+    def empty(cls) -> 'ProfileFrame':
+        return cls([], [], [], [], [], [], [], [], [])
+
+    @property
+    def order_count(self) -> int:
+        return len(self.order_times)
+
+    def count_since(self, since: float) -> int:
+        """Orders, of any status, created at or after ``since``"""
+        return int(len(self.order_times) - np.searchsorted(self.order_times, since, side='left'))
+
+    def order_days(self, mask: np.ndarray = None) -> np.ndarray:
+        """Calendar day number (days since the epoch) of each selected order"""
+        times = self.order_times if mask is None else self.order_times[mask]
+        return np.floor(times / DAY).astype(np.int64)
+
+    def order_clock(self, mask: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(hour, weekday with 0=Monday, month 1-12) of each selected order"""
+        times = self.order_times if mask is None else self.order_times[mask]
+        seconds = times.astype(np.int64).astype('datetime64[s]')
+        hours = (seconds.astype('datetime64[h]').astype(np.int64) % 24)
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekdays = (seconds.astype('datetime64[D]').astype(np.int64) + 3) % 7
+        months = seconds.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        return hours, weekdays, months
+
+    def items_per_order(self, mask: np.ndarray) -> np.ndarray:
+        """Number of item rows of each selected order"""
+        return np.bincount(self.item_orders, minlength=self.order_count)[mask]
+
+
+def build_frames(order_rows: Iterable[Sequence], item_rows: Iterable[Sequence]) -> Dict[object, ProfileFrame]:
+    """
+    Split batch query results into one frame per user.
+
+    order_rows are (user_id, order_id, created_at POSIX seconds, total, status) sorted
+    by user then creation time; item_rows are (order_id, quantity, price paid, list
+    price, category_id, vendor_id) in any order. Users without orders get no frame.
+    """
+    positions: Dict = {}
+    columns: Dict[object, List[list]] = {}
+    for user_id, order_id, created_at, total, status in order_rows:
+        user_columns = columns.setdefault(user_id, [[] for _ in range(9)])
+        positions[order_id] = (user_id, len(user_columns[0]))
+        user_columns[0].append(created_at)
+        user_columns[1].append(total)
+        user_columns[2].append(status)
+
+    for order_id, quantity, price, list_price, category_id, vendor_id in item_rows:
+        if order_id not in positions:
+            continue
+        user_id, position = positions[order_id]
+        user_columns = columns[user_id]
+        for column, value in zip(user_columns[3:], (position, quantity, price, list_price, category_id, vendor_id)):
+            column.append(value)
+
+    return {user_id: ProfileFrame(*user_columns) for user_id, user_columns in columns.items()}
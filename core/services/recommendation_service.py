@@ -14,6 +14,7 @@ from django.utils import timezone
 from django.core.cache import cache
 
 from .base_service import BaseService, performance_monitor
+from .tiered_cache import tag
 
 logger = logging.getLogger(__name__)
 
@@ -26,9 +27,24 @@ class RecommendationService(BaseService):
     service_name = "recommendation_service"
     description = "Intelligent product recommendations based on user behavior"
     
+    # Order states that count as a purchase for co-purchase similarity
+    PURCHASE_STATUSES = ('PAID', 'PROCESSING', 'SHIPPED', 'DELIVERED')
+    NEIGHBOURS_PER_PRODUCT = 20
+    MIN_CO_PURCHASES = 2
+    NEIGHBOUR_TTL_DAYS = 7
+    
     def __init__(self):
         super().__init__()
-        self.cache_timeout = 1800  # 30 minutes cache for recommendations
+        self.cache_timeout = 21600  # 6 hours; invalidated by order and catalogue writes
+    
+    def initialize(self):
+        """Initialize the recommendation service"""
+        logger.info("Recommendation service initialized successfully")
+        return True
+    
+    def cleanup(self):
+        """Clean up the recommendation service"""
+        return True
     
     @performance_monitor
     def get_recommendations_for_user(self, user: User, limit: int = 20) -> List[Dict[str, Any]]:
@@ -53,7 +69,10 @@ class RecommendationService(BaseService):
             ranked_recommendations = self._rank_recommendations(unique_recommendations)
             
             # Cache the results
-            self.set_cached(cache_key, ranked_recommendations, self.cache_timeout)
+            self.set_cached(
+                cache_key, ranked_recommendations, self.cache_timeout,
+                tags=[tag('orders.order', user=user.id), tag('products.product')]
+            )
             
             return ranked_recommendations[:limit]
             
@@ -62,47 +81,47 @@ class RecommendationService(BaseService):
             return []
     
     def _get_collaborative_recommendations(self, user: User, limit: int) -> List[Dict[str, Any]]:
-        """Get recommendations based on similar users' behavior."""
+        """Get recommendations from the precomputed item-item co-purchase neighbours."""
         try:
-            from orders.models import Order
-            from products.models import Product
+            from orders.models import OrderItem
+            from core.models import ProductRecommendation
             
             # Get user's purchase history
-            user_orders = Order.objects.filter(buyer=user, status='completed')
-            user_products = set()
-            for order in user_orders:
-                user_products.update(order.products.all())
+            user_product_ids = set(OrderItem.objects.filter(
+                order__user=user,
+                order__status__in=self.PURCHASE_STATUSES
+            ).values_list('product_id', flat=True))
             
-            if not user_products:
+            if not user_product_ids:
                 return []
             
-            # Find similar users (users who bought similar products)
-            similar_users = self._find_similar_users(user, user_products)
-            
-            if not similar_users:
-                return []
-            
-            # Get products that similar users bought but current user didn't
-            recommendations = []
-            for similar_user in similar_users:
-                similar_user_orders = Order.objects.filter(
-                    buyer=similar_user,
-                    status='completed'
-                )
-                
-                for order in similar_user_orders:
-                    for product in order.products.all():
-                        if product not in user_products and product.active:
-                            # Calculate similarity score
-                            similarity_score = self._calculate_user_similarity(user, similar_user)
-                            
-                            recommendations.append({
-                                'product': product,
-                                'type': 'collaborative',
-                                'confidence': similarity_score * 0.8,  # Collaborative recommendations get 80% of similarity score
-                                'explanation': f"Users similar to you also bought this product",
-                                'source': 'collaborative_filtering'
-                            })
+            # Look up the neighbours of everything the user bought
+            neighbours = ProductRecommendation.objects.filter(
+                source_product_id__in=user_product_ids,
+                recommendation_type='co_purchase',
+                expires_at__gt=timezone.now(),
+                product__is_available=True
+            ).exclude(
+                product_id__in=user_product_ids
+            ).select_related('product')
+            
+            # Merge: a candidate's score is the summed similarity to the user's purchases
+            candidates = {}
+            for neighbour in neighbours:
+                entry = candidates.setdefault(neighbour.product_id, {'product': neighbour.product, 'score': 0.0, 'sources': 0})
+                entry['score'] += neighbour.confidence_score
+                entry['sources'] += 1
+            
+            recommendations = [
+                {
+                    'product': entry['product'],
+                    'type': 'collaborative',
+                    'confidence': min(1.0, entry['score']) * 0.8,  # Collaborative recommendations get 80% of similarity score
+                    'explanation': "Customers who bought your items also bought this product",
+                    'source': 'item_co_purchase'
+                }
+                for entry in candidates.values()
+            ]
             
             # Sort by confidence and return top results
             recommendations.sort(key=lambda x: x['confidence'], reverse=True)
@@ -112,6 +131,64 @@ class RecommendationService(BaseService):
             logger.error(f"Error getting collaborative recommendations for user {user.username}: {str(e)}")
             return []
     
+    @performance_monitor
+    def build_item_neighbours(self, top_k: int = None, min_co_purchases: int = None) -> Dict[str, Any]:
+        """
+        Rebuild the item-item co-purchase neighbour table.
+        
+        Streams (buyer, product) pairs from OrderItem once, computes the sparse
+        co-occurrence / cosine-similarity matrix with vectorized NumPy operations and
+        replaces the stored top-k neighbours per product in ProductRecommendation.
+        """
+        from datetime import timedelta
+        from django.db import transaction
+        from orders.models import OrderItem
+        from core.models import ProductRecommendation
+        from .item_similarity import co_purchase_neighbours, encode
+        
+        top_k = top_k or self.NEIGHBOURS_PER_PRODUCT
+        min_co_purchases = min_co_purchases or self.MIN_CO_PURCHASES
+        
+        purchases = list(OrderItem.objects.filter(
+            order__status__in=self.PURCHASE_STATUSES
+        ).values_list('order__user_id', 'product_id').iterator(chunk_size=self.max_batch_size))
+        
+        if not purchases:
+            return {'purchases': 0, 'products': 0, 'neighbours': 0}
+        
+        user_codes, _ = encode([user_id for user_id, _ in purchases])
+        item_codes, product_ids = encode([product_id for _, product_id in purchases])
+        sources, neighbours, similarities, co_purchases = co_purchase_neighbours(
+            user_codes, item_codes, top_k=top_k, min_co_purchases=min_co_purchases
+        )
+        
+        expires_at = timezone.now() + timedelta(days=self.NEIGHBOUR_TTL_DAYS)
+        rows = [
+            ProductRecommendation(
+                source_product_id=product_ids[source],
+                product_id=product_ids[neighbour],
+                recommendation_type='co_purchase',
+                confidence_score=similarity,
+                explanation=f"Bought together by {count} customers",
+                expires_at=expires_at
+            )
+            for source, neighbour, similarity, count in zip(
+                sources.tolist(), neighbours.tolist(), similarities.tolist(), co_purchases.tolist()
+            )
+        ]
+        
+        with transaction.atomic():
+            ProductRecommendation.objects.filter(recommendation_type='co_purchase', user__isnull=True).delete()
+            ProductRecommendation.objects.bulk_create(rows, batch_size=self.max_batch_size)
+        
+        stats = {
+            'purchases': len(purchases),
+            'products': len(set(sources.tolist())),
+            'neighbours': len(rows)
+        }
+        logger.info(f"Item neighbours rebuilt: {stats}")
+        return stats
+    
     def _get_content_based_recommendations(self, user: User, limit: int) -> List[Dict[str, Any]]:
         """Get recommendations based on user's purchase history and preferences."""
         try:
@@ -244,70 +321,6 @@ class RecommendationService(BaseService):
             logger.error(f"Error getting trending recommendations for user {user.username}: {str(e)}")
             return []
     
-    def _find_similar_users(self, user: User, user_products: set) -> List[User]:
-        """Find users with similar purchase patterns."""
-        try:
-            from orders.models import Order
-            
-            # Get users who bought similar products
-            similar_users = []
-            user_product_ids = [p.id for p in user_products]
-            
-            # Find users who bought at least 2 of the same products
-            other_orders = Order.objects.filter(
-                products__id__in=user_product_ids,
-                buyer__isnull=False
-            ).exclude(buyer=user)
-            
-            user_product_counts = {}
-            for order in other_orders:
-                buyer = order.buyer
-                if buyer:
-                    if buyer.id not in user_product_counts:
-                        user_product_counts[buyer.id] = 0
-                    user_product_counts[buyer.id] += 1
-            
-            # Get users with at least 2 similar products
-            similar_user_ids = [uid for uid, count in user_product_counts.items() if count >= 2]
-            similar_users = User.objects.filter(id__in=similar_user_ids)[:10]  # Limit to top 10
-            
-            return list(similar_users)
-            
-        except Exception as e:
-            logger.error(f"Error finding similar users for {user.username}: {str(e)}")
-            return []
-    
-    def _calculate_user_similarity(self, user1: User, user2: User) -> float:
-        """Calculate similarity between two users based on purchase patterns."""
-        try:
-            from orders.models import Order
-            
-            # Get products for both users
-            user1_products = set(Order.objects.filter(
-                buyer=user1,
-                status='completed'
-            ).values_list('products', flat=True))
-            
-            user2_products = set(Order.objects.filter(
-                buyer=user2,
-                status='completed'
-            ).values_list('products', flat=True))
-            
-            if not user1_products or not user2_products:
-                return 0.0
-            
-            # Calculate Jaccard similarity
-            intersection = len(user1_products.intersection(user2_products))
-            union = len(user1_products.union(user2_products))
-            
-            similarity = intersection / union if union > 0 else 0.0
-            
-            return min(1.0, similarity)
-            
-        except Exception as e:
-            logger.error(f"Error calculating user similarity: {str(e)}")
-            return 0.0
-    
     def _deduplicate_recommendations(self, recommendations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Remove duplicate products from recommendations."""
         seen_products = set()
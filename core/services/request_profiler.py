@@ -0,0 +1,282 @@
+"""
+Request Profiler
+Per-request cost accounting used by core.middleware.RequestProfilingMiddleware.
+
+Each request gets a RequestProfile held in a context variable. SQL is timed through
+``connection.execute_wrapper``, cache events are reported by the tiered service cache,
+and template rendering is timed by wrapping the Django template backend once. When a
+request runs longer than half the slow threshold, a shared sampler thread starts
+recording its stack; requests that end up slow keep the folded stack samples.
+"""
+
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 1000,
+    'SAMPLE_INTERVAL_MS': 5,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'MAX_SLOW_CAPTURES': 50,
+    'MAX_STACK_DEPTH': 40,
+}
+
+# Upper bounds (seconds) of the wall time histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_profile: ContextVar[Optional['RequestProfile']] = ContextVar('request_profile', default=None)
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def get_options() -> Dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_PROFILING', {})}
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and IN lists so queries differing only in parameters group together"""
+    return _IN_LIST.sub('(%s, ...)', _WHITESPACE.sub(' ', sql).strip())
+
+
+class RequestProfile:
+    """Costs accumulated while serving one request"""
+
+    def __init__(self, thread_id: int):
+        self.thread_id = thread_id
+        self.started = time.perf_counter()
+        self.view = 'unresolved'
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.queries = Counter()  # normalized sql -> executions
+        self.statements = Counter()  # (sql, params) -> executions
+        self.cache = Counter()
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.samples = Counter()  # folded stack -> samples
+
+    def record_query(self, sql: str, params, duration: float):
+        self.sql_count += 1
+        self.sql_time += duration
+        self.queries[normalize_sql(sql)] += 1
+        try:
+            self.statements[(sql, repr(params))] += 1
+        except Exception:
+            pass
+
+    def duplicate_queries(self) -> int:
+        """Executions repeating an identical statement with identical parameters"""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def n_plus_one(self, threshold: int) -> Dict[str, int]:
+        """Query shapes executed at least ``threshold`` times, the usual sign of a per-row lookup"""
+        return {sql: count for sql, count in self.queries.items() if count >= threshold}
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current_profile.get()
+
+
+def note_cache_event(counter: str):
+    """Called by the tiered service cache for every hit, miss and set"""
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.cache[counter] += 1
+
+
+class QueryTimer:
+    """``execute_wrapper`` callable timing every query of the active profile"""
+
+    def __init__(self, profile: RequestProfile):
+        self.profile = profile
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.profile.record_query(sql, params, time.perf_counter() - start)
+
+
+class StackSampler:
+    """One daemon thread sampling the stacks of requests that are running long"""
+
+    def __init__(self):
+        self._active: Dict[int, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def register(self, profile: RequestProfile):
+        with self._lock:
+            self._active[profile.thread_id] = profile
+            self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='request-stack-sampler', daemon=True)
+                self._thread.start()
+
+    def unregister(self, profile: RequestProfile):
+        with self._lock:
+            self._active.pop(profile.thread_id, None)
+
+    def _run(self):
+        while True:
+            options = get_options()
+            interval = options['SAMPLE_INTERVAL_MS'] / 1000
+            sample_after = options['SLOW_REQUEST_MS'] / 2000
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wake.clear()
+            if not active:
+                # Idle workers cost nothing: sleep until the next request registers
+                self._wake.wait()
+                continue
+            time.sleep(interval)
+
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for profile in active:
+                frame = frames.get(profile.thread_id)
+                if frame is not None and now - profile.started >= sample_after:
+                    profile.samples[self._fold(frame, options['MAX_STACK_DEPTH'])] += 1
+
+    @staticmethod
+    def _fold(frame, max_depth: int) -> str:
+        """Render a stack as 'outer;...;inner' in the folded format flame graph tools read"""
+        names = []
+        while frame is not None and len(names) < max_depth:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+
+class RequestMetrics:
+    """Per-view aggregates of finished request profiles plus recent slow captures"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._views = defaultdict(lambda: {
+                'requests': 0,
+                'errors': 0,
+                'wall_time': 0.0,
+                'sql_count': 0,
+                'sql_time': 0.0,
+                'duplicate_queries': 0,
+                'n_plus_one': 0,
+                'cache_hits': 0,
+                'cache_misses': 0,
+                'template_time': 0.0,
+                'slow': 0,
+                'buckets': [0] * len(DURATION_BUCKETS),
+            })
+            self._slow = deque(maxlen=get_options()['MAX_SLOW_CAPTURES'])
+
+    def record(self, profile: RequestProfile, status_code: int, options: Dict[str, Any]):
+        suspects = profile.n_plus_one(options['N_PLUS_ONE_THRESHOLD'])
+        hits = profile.cache['local_hits'] + profile.cache['shared_hits'] + profile.cache['stale_hits']
+        slow = profile.duration * 1000 >= options['SLOW_REQUEST_MS']
+
+        with self._lock:
+            view = self._views[profile.view]
+            view['requests'] += 1
+            view['errors'] += status_code >= 500
+            view['wall_time'] += profile.duration
+            view['sql_count'] += profile.sql_count
+            view['sql_time'] += profile.sql_time
+            view['duplicate_queries'] += profile.duplicate_queries()
+            view['n_plus_one'] += bool(suspects)
+            view['cache_hits'] += hits
+            view['cache_misses'] += profile.cache['misses']
+            view['template_time'] += profile.template_time
+            view['slow'] += slow
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if profile.duration <= bound:
+                    view['buckets'][index] += 1
+
+            if slow:
+                self._slow.append({
+                    'view': profile.view,
+                    'duration_ms': round(profile.duration * 1000, 2),
+                    'sql_count': profile.sql_count,
+                    'sql_time_ms': round(profile.sql_time * 1000, 2),
+                    'n_plus_one': suspects,
+                    'template_time_ms': round(profile.template_time * 1000, 2),
+                    'stacks': dict(profile.samples.most_common(20)),
+                    'timestamp': time.time(),
+                })
+
+        if suspects:
+            logger.warning(f"Possible N+1 queries in {profile.view}: {suspects}")
+
+    def get_summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'views': {name: {**view, 'buckets': list(view['buckets'])} for name, view in self._views.items()},
+                'slow_requests': list(self._slow),
+            }
+
+
+class TemplateTimer:
+    """Wraps the Django template backend once so renders add to the active profile"""
+
+    installed = False
+
+    @classmethod
+    def install(cls):
+        if cls.installed:
+            return
+        from django.template.backends.django import Template
+
+        original = Template.render
+
+        def render(self, context=None, request=None):
+            profile = _current_profile.get()
+            if profile is None:
+                return original(self, context, request)
+            # Only the outermost render counts; included templates are part of it
+            profile.template_depth += 1
+            start = time.perf_counter()
+            try:
+                return original(self, context, request)
+            finally:
+                profile.template_depth -= 1
+                if profile.template_depth == 0:
+                    profile.template_time += time.perf_counter() - start
+
+        Template.render = render
+        cls.installed = True
+
+
+sampler = StackSampler()
+request_metrics = RequestMetrics()
+
+
+def start_profile() -> RequestProfile:
+    profile = RequestProfile(threading.get_ident())
+    _current_profile.set(profile)
+    sampler.register(profile)
+    return profile
+
+
+def finish_profile(profile: RequestProfile, status_code: int):
+    profile.duration = time.perf_counter() - profile.started
+    sampler.unregister(profile)
+    _current_profile.set(None)
+    request_metrics.record(profile, status_code, get_options())
@@ -0,0 +1,170 @@
+"""
+Retention
+Background sweeper that deletes expired rows in small, index-driven batches.
+
+Each policy names a model, the indexed time column that ages its rows and how many
+days to keep them (messages instead expire at their own expires_at). A sweep reads
+BATCH_SIZE primary keys at a time in primary-key order, deletes them with one raw
+DELETE that skips model loading and signals, and sleeps SLEEP seconds between batches
+so locks are short and replication can keep up. The last key of every batch is kept
+as the policy's checkpoint, so a sweep cut off by MAX_SECONDS resumes where it
+stopped; a policy with nothing left to delete starts from the beginning next time.
+"""
+
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 1000,
+    'SLEEP': 0.1,
+    'MAX_SECONDS': 240,
+    'DAYS': {
+        'audit_logs': 365,
+        'security_logs': 180,
+        'login_history': 90,
+        'vendor_notifications': 90,
+        'search_queries': 30,
+    },
+}
+
+CHECKPOINT_KEY = 'retention:{name}:checkpoint'
+LOCK_KEY = 'retention:sweeping'
+
+
+def get_options() -> Dict[str, Any]:
+    options = {**DEFAULTS, **getattr(settings, 'RETENTION', {})}
+    options['DAYS'] = {**DEFAULTS['DAYS'], **options['DAYS']}
+    return options
+
+
+class RetentionPolicy:
+    """Which rows of a model have expired, and what to fix around their deletion"""
+
+    def __init__(self, name: str, model: str, field: str, expires: bool = False,
+                 before_delete: Optional[Callable] = None, after_delete: Optional[Callable] = None):
+        self.name = name
+        self.model_label = model
+        self.field = field
+        self.expires = expires
+        self.before_delete = before_delete
+        self.after_delete = after_delete
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def cutoff(self, now, options: Dict[str, Any]):
+        """Rows whose time column is before this have expired; None disables the policy"""
+        if self.expires:
+            return now
+        days = options['DAYS'].get(self.name)
+        return now - timedelta(days=days) if days else None
+
+
+def _detach_messages(message_ids: List[Any]) -> Dict[str, Any]:
+    """Drop the rows that reference expiring messages, which a raw delete would not cascade to"""
+    from messaging.models import InboxEntry, Message, MessageSearchTerm, MessageThread
+
+    rows = list(Message.objects.filter(pk__in=message_ids).values_list('sender_id', 'recipient_id', 'is_read'))
+    terms = MessageSearchTerm.objects.filter(message_id__in=message_ids)
+    terms._raw_delete(terms.db)
+    MessageThread.objects.filter(last_message_id__in=message_ids).update(last_message=None)
+    InboxEntry.objects.filter(last_message_id__in=message_ids).update(last_message=None)
+    return {
+        'pairs': {tuple(sorted((sender_id, recipient_id), key=str)) for sender_id, recipient_id, _ in rows},
+        'recipients': {recipient_id for _, recipient_id, is_read in rows if not is_read},
+    }
+
+
+def _repair_inboxes(state: Dict[str, Any]):
+    from core.services.service_registry import ServiceRegistry
+
+    messaging_service = ServiceRegistry.get_service('messaging_service')
+    if messaging_service is None:
+        # Raising rolls the batch back rather than leaving inboxes pointing at nothing
+        raise RuntimeError("messaging_service is not available")
+    messaging_service.repair_inboxes(state['pairs'], state['recipients'])
+
+
+POLICIES = [
+    RetentionPolicy('messages', 'messaging.Message', 'expires_at', expires=True,
+                    before_delete=_detach_messages, after_delete=_repair_inboxes),
+    RetentionPolicy('audit_logs', 'wallets.AuditLog', 'created_at'),
+    RetentionPolicy('security_logs', 'core.SecurityLog', 'timestamp'),
+    RetentionPolicy('login_history', 'accounts.LoginHistory', 'login_time'),
+    RetentionPolicy('vendor_notifications', 'vendors.VendorNotification', 'created_at'),
+    RetentionPolicy('search_queries', 'core.SearchQuery', 'created_at'),
+]
+
+
+def sweep_policy(policy: RetentionPolicy, now=None, deadline: float = None, **options) -> int:
+    """Delete one policy's expired rows batch by batch; returns the number deleted"""
+    options = {**get_options(), **options}
+    now = now or timezone.now()
+    cutoff = policy.cutoff(now, options)
+    if cutoff is None:
+        return 0
+
+    model = policy.model
+    checkpoint_key = CHECKPOINT_KEY.format(name=policy.name)
+    checkpoint = cache.get(checkpoint_key)
+    deleted = 0
+    while deadline is None or time.monotonic() < deadline:
+        expired = model._base_manager.filter(**{f'{policy.field}__lt': cutoff})
+        if checkpoint is not None:
+            expired = expired.filter(pk__gt=checkpoint)
+        ids = list(expired.order_by('pk').values_list('pk', flat=True)[:options['BATCH_SIZE']])
+        if not ids:
+            # Swept to the end: later passes start over for rows that expired meanwhile
+            cache.delete(checkpoint_key)
+            break
+
+        with transaction.atomic():
+            state = policy.before_delete(ids) if policy.before_delete else None
+            batch = model._base_manager.filter(pk__in=ids)
+            deleted += batch._raw_delete(batch.db)
+            if policy.after_delete:
+                policy.after_delete(state)
+
+        checkpoint = ids[-1]
+        cache.set(checkpoint_key, checkpoint, None)
+        if len(ids) < options['BATCH_SIZE']:
+            cache.delete(checkpoint_key)
+            break
+        time.sleep(options['SLEEP'])
+    return deleted
+
+
+def sweep(names: Optional[Iterable[str]] = None, **options) -> Dict[str, int]:
+    """Run every policy, or the named ones, within MAX_SECONDS; returns rows deleted per policy"""
+    options = {**get_options(), **options}
+    if not cache.add(LOCK_KEY, 1, options['MAX_SECONDS'] + 60):
+        logger.info("Retention sweep already running")
+        return {}
+
+    names = set(names) if names is not None else None
+    deadline = time.monotonic() + options['MAX_SECONDS']
+    now = timezone.now()
+    deleted: Dict[str, int] = {}
+    try:
+        for policy in POLICIES:
+            if names is not None and policy.name not in names:
+                continue
+            try:
+                deleted[policy.name] = sweep_policy(policy, now=now, deadline=deadline, **options)
+            except Exception as e:
+                logger.error(f"Retention sweep of {policy.name} failed: {e}")
+                deleted[policy.name] = 0
+    finally:
+        cache.delete(LOCK_KEY)
+    return deleted
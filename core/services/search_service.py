@@ -6,12 +6,15 @@ Designed for Tor-safe server-side processing without JavaScript.
 
 import logging
 from typing import Dict, List, Optional, Any
-from django.db.models import Q, Count, Avg
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.utils import timezone
 
+from core.search import get_search_backend
+from core.search.backends import get_search_settings
+from core.search.pagination import SearchPage, decode_cursor, encode_cursor
+
 from .base_service import BaseService
+from .tiered_cache import tag
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -24,11 +27,6 @@ class SearchService(BaseService):
     version = "1.0.0"
     description = "Intelligent search with personalization and semantic understanding"
     
-    def __init__(self):
-        super().__init__()
-        self._search_cache = {}
-        self._user_preferences = {}
-    
     def initialize(self):
         """Initialize the search service"""
         try:
@@ -40,8 +38,7 @@ class SearchService(BaseService):
     def cleanup(self):
         """Clean up the search service"""
         try:
-            self._search_cache.clear()
-            self._user_preferences.clear()
+            self.clear_local_cache()
             logger.info("Search service cleaned up successfully")
         except Exception as e:
             logger.error(f"Failed to cleanup search service: {e}")
@@ -58,35 +55,107 @@ class SearchService(BaseService):
         try:
             from products.models import Product
             
-            # Start with basic search
-            products = Product.objects.filter(is_available=True)
+            max_results = get_search_settings()["MAX_RESULTS"]
             
-            if query.strip():
-                # Enhanced search with semantic understanding
+            if not query.strip():
+                # No terms to rank by, list the newest matching products
+                products = Product.objects.filter(is_available=True).select_related("vendor", "category")
+                if filters:
+                    products = self._apply_filters(products, filters)
+                products = list(self._order_by_relevance(products, query, user_id)[:max_results])
+            else:
+                # Rank with the search backend, then load only the winning rows
                 search_terms = self._extract_search_terms(query)
-                search_q = self._build_search_query(search_terms)
-                products = products.filter(search_q)
-            
-            # Apply filters
-            if filters:
-                products = self._apply_filters(products, filters)
+                hits = get_search_backend().search(
+                    search_terms['keywords'] + search_terms['categories'],
+                    filters=filters,
+                    limit=max_results,
+                )
+                products = self._load_products([product_id for product_id, _ in hits])
             
             # Apply personalization if user provided
             if user_id:
                 products = self._personalize_results(products, user_id)
             
-            # Order results by relevance
-            products = self._order_by_relevance(products, query, user_id)
+            return products
             
-            # Cache results for performance
-            cache_key = f"search:{hash(query)}:{user_id}:{hash(str(filters))}"
-            self.set_cached(cache_key, list(products[:50]), timeout=300)  # 5 minutes
+        except Exception as e:
+            logger.error(f"Search failed for query '{query}': {e}")
+            return []
+    
+    def search_page(self, query: str, user_id: str = None, filters: Dict = None,
+                    page: Any = 1, per_page: int = 12, cursor: str = None) -> SearchPage:
+        """
+        Get one ranked page of search results
+        
+        Ranking, the total hit count and the page window come from the search backend
+        without touching the database; the page's products are then loaded with their
+        vendor and category in a single query.
+        
+        Args:
+            query: Search query string
+            user_id: Optional user ID for personalization
+            filters: Optional filters (category, price_range, etc.)
+            page: 1-based page number
+            per_page: Results per page
+            cursor: Optional next_cursor of the previous page for keyset pagination
+        """
+        try:
+            number = max(1, int(page))
+        except (TypeError, ValueError):
+            number = 1
+        
+        try:
+            if not query.strip():
+                return SearchPage([], 1, per_page, 0)
+            
+            search_terms = self._extract_search_terms(query)
+            terms = search_terms['keywords'] + search_terms['categories']
+            backend = get_search_backend()
+            
+            after = decode_cursor(cursor)
+            hits, total = backend.search_page(
+                terms, filters=filters, limit=per_page, offset=(number - 1) * per_page, after=after
+            )
             
-            return products[:50]  # Limit to 50 results
+            last_page = max(1, -(-total // per_page))
+            if not hits and number > last_page:
+                # Out of range page numbers fall back to the last page, like Paginator.get_page
+                number = last_page
+                hits, total = backend.search_page(terms, filters=filters, limit=per_page, offset=(number - 1) * per_page)
+            
+            products = self._load_products([product_id for product_id, _ in hits])
+            if user_id:
+                products = self._personalize_results(products, user_id)
+            
+            next_cursor = None
+            if hits and number < last_page:
+                last_id, last_score = hits[-1]
+                next_cursor = encode_cursor(last_score, last_id)
+            return SearchPage(products, number, per_page, total, next_cursor)
             
         except Exception as e:
-            logger.error(f"Search failed for query '{query}': {e}")
+            logger.error(f"Paged search failed for query '{query}': {e}")
+            return SearchPage([], 1, per_page, 0)
+    
+    def _load_products(self, product_ids: List[str]) -> List[Any]:
+        """Fetch ranked products in one query, keeping the ranking order"""
+        from products.models import Product
+        
+        if not product_ids:
             return []
+        
+        products = Product.objects.filter(pk__in=product_ids, is_available=True).select_related("vendor", "category")
+        by_id = {str(product.pk): product for product in products}
+        
+        # Products deleted or hidden without a signal are dropped from this process's index;
+        # only the removal signal writes tombstones to the shared cache
+        backend = get_search_backend()
+        for product_id in product_ids:
+            if product_id not in by_id:
+                backend.discard_product(product_id)
+        
+        return [by_id[product_id] for product_id in product_ids if product_id in by_id]
     
     def _extract_search_terms(self, query: str) -> Dict[str, List[str]]:
         """Extract and categorize search terms from query"""
@@ -134,26 +203,6 @@ class SearchService(BaseService):
         
         return terms
     
-    def _build_search_query(self, search_terms: Dict[str, List[str]]) -> Q:
-        """Build Django Q object for database search"""
-        query = Q()
-        
-        # Search in product fields
-        for keyword in search_terms['keywords']:
-            keyword_q = (
-                Q(name__icontains=keyword) |
-                Q(description__icontains=keyword) |
-                Q(category__name__icontains=keyword) |
-                Q(vendor__user__username__icontains=keyword)
-            )
-            query |= keyword_q
-        
-        # Category-specific search
-        for category in search_terms['categories']:
-            query |= Q(category__name__icontains=category)
-        
-        return query if query else Q(pk__isnull=False)  # Return all if no specific terms
-    
     def _apply_filters(self, queryset, filters: Dict) -> Any:
         """Apply additional filters to the queryset"""
         if 'category_id' in filters and filters['category_id']:
@@ -173,43 +222,21 @@ class SearchService(BaseService):
         
         return queryset
     
-    def _personalize_results(self, queryset, user_id: str) -> Any:
+    def _personalize_results(self, products: List[Any], user_id: str) -> List[Any]:
         """Apply personalization based on user behavior"""
         try:
             user = User.objects.get(id=user_id)
             preferences = self._get_user_preferences(user)
             
-            # Boost products from preferred categories
-            if preferences.get('preferred_categories'):
-                preferred_ids = []
-                other_ids = []
-                
-                for product in queryset:
-                    if product.category_id in preferences['preferred_categories']:
-                        preferred_ids.append(product.id)
-                    else:
-                        other_ids.append(product.id)
-                
-                # Reorder to put preferred categories first
-                from django.db.models import Case, When, IntegerField
-                ordering = []
-                for i, pid in enumerate(preferred_ids + other_ids):
-                    ordering.append(When(pk=pid, then=i))
-                
-                if ordering:
-                    queryset = queryset.annotate(
-                        preference_order=Case(*ordering, output_field=IntegerField())
-                    ).order_by('preference_order')
+            # Boost products from preferred categories, keeping relevance order within each group
+            preferred_categories = set(preferences.get('preferred_categories') or [])
+            if preferred_categories:
+                products = sorted(products, key=lambda product: product.category_id not in preferred_categories)
             
-            # Boost products from trusted vendors
-            if preferences.get('trusted_vendors'):
-                trusted_q = Q(vendor_id__in=preferences['trusted_vendors'])
-                # This would require a more complex ordering in a real implementation
-                
         except Exception as e:
             logger.error(f"Personalization failed for user {user_id}: {e}")
         
-        return queryset
+        return products
     
     def _get_user_preferences(self, user) -> Dict[str, Any]:
         """Get or compute user preferences based on purchase history"""
@@ -270,8 +297,8 @@ class SearchService(BaseService):
                 'total_orders': user_orders.count()
             }
             
-            # Cache for 1 hour
-            self.set_cached(cache_key, preferences, timeout=3600)
+            # Invalidated by the user's order writes, so it can live for 6 hours
+            self.set_cached(cache_key, preferences, timeout=21600, tags=[tag('orders.order', user=user.id)])
             
             return preferences
             
@@ -280,39 +307,21 @@ class SearchService(BaseService):
             return {}
     
     def _order_by_relevance(self, queryset, query: str, user_id: str = None) -> Any:
-        """Order results by relevance score"""
+        """Order unranked results; ranked queries are ordered by the search backend"""
         try:
-            # If no specific query, order by popularity/rating
-            if not query.strip():
-                return queryset.order_by('-created_at')  # Newest first
-            
-            # For specific queries, we could implement TF-IDF or similar
-            # For now, use simple relevance indicators
-            return queryset.order_by(
-                '-vendor__trust_level',  # Trusted vendors first
-                '-created_at'  # Then by recency
-            )
+            return queryset.order_by('-created_at')  # Newest first
             
         except Exception as e:
             logger.error(f"Failed to order results by relevance: {e}")
-            return queryset.order_by('-created_at')
+            return queryset
     
     def get_search_suggestions(self, partial_query: str, limit: int = 10) -> List[str]:
         """Get search suggestions based on partial query (server-side)"""
         try:
-            from products.models import Product
-            
             if len(partial_query) < 2:
                 return []
             
-            # Get product names that match partial query
-            products = Product.objects.filter(
-                name__icontains=partial_query,
-                is_available=True
-            ).values_list('name', flat=True)[:limit]
-            
-            suggestions = list(set(products))  # Remove duplicates
-            return sorted(suggestions)[:limit]
+            return get_search_backend().suggest(partial_query, limit)
             
         except Exception as e:
             logger.error(f"Failed to get search suggestions: {e}")
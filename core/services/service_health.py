@@ -0,0 +1,210 @@
+"""
+Service Health
+Cluster-wide service health shared through the cache, used by ServiceManager and BaseService.
+
+One process at a time holds the prober lease and runs every service's health
+check; it publishes the results as one snapshot. Every other worker only reads
+that snapshot, so the database sees one set of health queries per interval however
+many workers run. Circuit breakers live in the same cache: failures are counted
+with ``incr`` and a breaker opens once, with ``add``, so every worker sees the same
+breaker state.
+
+The lease is time-sliced: each LEASE_TTL slot has its own key, taken with an atomic
+``add`` and never overwritten, and the holder reserves the next slot the same way
+on every probe. Nothing is read and then written, so no worker can renew a lease
+another one holds, and a dead holder is replaced within two slots.
+
+All of this needs CACHE_ALIAS to be shared by every worker. On a process-local
+backend every worker would elect itself, so the board refuses to elect a prober
+there unless ALLOW_LOCAL_CACHE is set (a single-process deployment or tests).
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CACHE_ALIAS': 'default',
+    'PROBE_INTERVAL': 60,
+    'LEASE_TTL': 90,  # must exceed PROBE_INTERVAL so the holder reserves every next slot
+    'ALLOW_LOCAL_CACHE': False,
+    'LOCAL_TTL': 5,
+    'BREAKER_THRESHOLD': 5,
+    'BREAKER_TIMEOUT': 60,
+}
+
+PREFIX = 'service-health'
+
+
+class ServiceHealthBoard:
+    """Prober lease, published health snapshot and circuit breakers in the shared cache"""
+
+    def __init__(self, **options):
+        self.options = {**DEFAULTS, **getattr(settings, 'SERVICE_HEALTH', {}), **options}
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._snapshot_read_at = 0.0
+        self._lock = threading.Lock()
+        self._warned_local = False
+
+    @property
+    def cache(self):
+        return caches[self.options['CACHE_ALIAS']]
+
+    @property
+    def identity(self) -> str:
+        # Computed per call: boards created before a fork must not share a lease holder id
+        return f"{socket.gethostname()}:{os.getpid()}:{id(self)}"
+
+    # Prober lease
+
+    def is_shared(self) -> bool:
+        """Whether CACHE_ALIAS can coordinate several processes"""
+        return not isinstance(self.cache, (LocMemCache, DummyCache))
+
+    def _lease_key(self, slot: int) -> str:
+        return f"{PREFIX}:lease:{slot}"
+
+    def _lease_slots(self) -> List[int]:
+        slot = int(time.time() // self.options['LEASE_TTL'])
+        return [slot, slot + 1]
+
+    def acquire_lease(self) -> bool:
+        """Become or stay the prober; only the holder may publish"""
+        if not self.options['ALLOW_LOCAL_CACHE'] and not self.is_shared():
+            if not self._warned_local:
+                logger.warning(
+                    f"SERVICE_HEALTH cache '{self.options['CACHE_ALIAS']}' is local to this process; "
+                    "no health prober is elected until it points at a shared backend"
+                )
+                self._warned_local = True
+            return False
+
+        ttl = self.options['LEASE_TTL']
+        current, following = self._lease_slots()
+        try:
+            if self.cache.add(self._lease_key(current), self.identity, ttl * 2):
+                logger.info(f"Service health prober lease acquired by {self.identity}")
+            elif self.cache.get(self._lease_key(current)) != self.identity:
+                return False
+            # Slot keys are only ever added, so holding this slot cannot take over anyone else's
+            self.cache.add(self._lease_key(following), self.identity, ttl * 2)
+            return True
+        except Exception as e:
+            logger.warning(f"Service health lease check failed: {e}")
+        return False
+
+    def release_lease(self):
+        try:
+            keys = [self._lease_key(slot) for slot in self._lease_slots()]
+            held = [key for key, holder in self.cache.get_many(keys).items() if holder == self.identity]
+            if held:
+                self.cache.delete_many(held)
+        except Exception as e:
+            logger.warning(f"Service health lease release failed: {e}")
+
+    # Published snapshot
+
+    def publish(self, services: Dict[str, Dict[str, Any]]):
+        """Store the latest results; they expire if the prober stops publishing"""
+        snapshot = {'services': services, 'checked_at': time.time(), 'prober': self.identity}
+        self.cache.set(f"{PREFIX}:snapshot", snapshot, self.options['PROBE_INTERVAL'] * 3)
+        with self._lock:
+            self._snapshot, self._snapshot_read_at = snapshot, time.monotonic()
+
+    def get_snapshot(self, refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """The published snapshot, re-read from the cache at most every LOCAL_TTL seconds"""
+        with self._lock:
+            if not refresh and time.monotonic() - self._snapshot_read_at < self.options['LOCAL_TTL']:
+                return self._snapshot
+        try:
+            snapshot = self.cache.get(f"{PREFIX}:snapshot")
+        except Exception as e:
+            logger.warning(f"Service health snapshot read failed: {e}")
+            snapshot = None
+        with self._lock:
+            self._snapshot, self._snapshot_read_at = snapshot, time.monotonic()
+        return snapshot
+
+    def get_service_status(self, service_name: str) -> Optional[Dict[str, Any]]:
+        """Last published status of a service, or None before the first probe"""
+        snapshot = self.get_snapshot()
+        if not snapshot:
+            return None
+        return snapshot['services'].get(service_name)
+
+    # Circuit breakers
+
+    def _breaker_keys(self, service_name: str):
+        base = f"{PREFIX}:breaker:{service_name}"
+        return f"{base}:failures", f"{base}:opened-at"
+
+    def record_result(self, service_name: str, healthy: bool) -> str:
+        """Count a success or failure against the shared breaker and return its new state"""
+        failures_key, opened_key = self._breaker_keys(service_name)
+        timeout = self.options['BREAKER_TIMEOUT']
+        try:
+            if healthy:
+                if self.breaker_state(service_name)['state'] != 'CLOSED':
+                    logger.info(f"Circuit breaker for {service_name} closed (service recovered)")
+                self.cache.delete_many([failures_key, opened_key])
+                return 'CLOSED'
+
+            try:
+                failures = self.cache.incr(failures_key)
+            except ValueError:
+                # Missing key: add() is atomic, so only one worker creates the counter
+                failures = 1 if self.cache.add(failures_key, 1, timeout * 10) else self.cache.incr(failures_key)
+
+            state = self.breaker_state(service_name)['state']
+            if state == 'HALF_OPEN':
+                # The trial failed: open again for a full timeout
+                self.cache.set(opened_key, time.time(), timeout * 10)
+                return 'OPEN'
+            if state == 'CLOSED' and failures >= self.options['BREAKER_THRESHOLD']:
+                if self.cache.add(opened_key, time.time(), timeout * 10):
+                    logger.warning(f"Circuit breaker for {service_name} opened (too many failures)")
+                return 'OPEN'
+            return state
+        except Exception as e:
+            logger.warning(f"Circuit breaker update failed for {service_name}: {e}")
+            return 'CLOSED'
+
+    def breaker_state(self, service_name: str) -> Dict[str, Any]:
+        """CLOSED, OPEN until BREAKER_TIMEOUT has passed since it opened, then HALF_OPEN"""
+        failures_key, opened_key = self._breaker_keys(service_name)
+        try:
+            values = self.cache.get_many([failures_key, opened_key])
+        except Exception as e:
+            logger.warning(f"Circuit breaker read failed for {service_name}: {e}")
+            values = {}
+        opened_at = values.get(opened_key)
+        if opened_at is None:
+            state = 'CLOSED'
+        elif time.time() - opened_at < self.options['BREAKER_TIMEOUT']:
+            state = 'OPEN'
+        else:
+            state = 'HALF_OPEN'
+        return {
+            'state': state,
+            'failure_count': values.get(failures_key, 0),
+            'last_failure_time': opened_at or 0,
+            'threshold': self.options['BREAKER_THRESHOLD'],
+            'timeout': self.options['BREAKER_TIMEOUT'],
+        }
+
+    def reset_breaker(self, service_name: str):
+        self.cache.delete_many(list(self._breaker_keys(service_name)))
+
+
+# Global board shared by the service manager and every service in this process
+health_board = ServiceHealthBoard()
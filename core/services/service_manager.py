@@ -10,6 +10,7 @@ from typing import Any, Callable, Dict, List, Optional, Type
 
 from ..architecture.exceptions import ServiceError, ServiceNotFoundError
 from .base_service import BaseService
+from .service_health import ServiceHealthBoard, health_board
 from .service_registry import ServiceRegistry
 
 logger = logging.getLogger(__name__)
@@ -18,15 +19,21 @@ logger = logging.getLogger(__name__)
 class ServiceManager:
     """
     Manages the lifecycle and coordination of services in the system.
+
+    Health is probed by whichever process holds the shared prober lease (see
+    core.services.service_health); the monitoring thread of every other worker
+    only reads the published snapshot to fire its local health callbacks.
     """
 
-    def __init__(self):
+    def __init__(self, board: ServiceHealthBoard = None):
         """Initialize the service manager."""
         self._monitoring = False
         self._monitor_thread = None
-        self._health_check_interval = 60  # seconds
+        self._stop_event = threading.Event()
+        self._board = board or health_board
+        self._health_check_interval = self._board.options["PROBE_INTERVAL"]  # seconds
         self._service_callbacks: Dict[str, List[Callable]] = {}
-        self._circuit_breakers: Dict[str, Dict[str, Any]] = {}
+        self._last_known_health: Dict[str, bool] = {}
 
     def start_monitoring(self, interval: int = None) -> None:
         """Start monitoring services for health and availability."""
@@ -38,6 +45,7 @@ class ServiceManager:
             self._health_check_interval = interval
 
         self._monitoring = True
+        self._stop_event.clear()
         self._monitor_thread = threading.Thread(target=self._monitor_services, daemon=True)
         self._monitor_thread.start()
 
@@ -49,8 +57,10 @@ class ServiceManager:
             return
 
         self._monitoring = False
+        self._stop_event.set()
         if self._monitor_thread:
             self._monitor_thread.join(timeout=5)
+        self._board.release_lease()
 
         logger.info("Stopped service monitoring")
 
@@ -58,36 +68,56 @@ class ServiceManager:
         """Monitor services in a background thread."""
         while self._monitoring:
             try:
-                self._check_all_services()
-                time.sleep(self._health_check_interval)
+                self.probe_once()
             except Exception as e:
                 logger.error(f"Service monitoring error: {e}")
-                time.sleep(10)  # Wait before retrying
-
-    def _check_all_services(self) -> None:
-        """Check health of all services."""
-        services = ServiceRegistry.get_all_services()
+            self._stop_event.wait(self._health_check_interval)
 
-        for service_name, service in services.items():
+    def probe_once(self) -> bool:
+        """
+        Probe and publish if this process holds the prober lease, then fire local
+        callbacks for health changes in the published snapshot. Returns whether
+        this process probed.
+        """
+        leader = self._board.acquire_lease()
+        if leader:
+            self._board.publish(self._check_all_services())
+
+        snapshot = self._board.get_snapshot(refresh=not leader)
+        for service_name, status in ((snapshot or {}).get("services") or {}).items():
+            old_healthy = self._last_known_health.get(service_name)
+            if old_healthy is not None and old_healthy != status["healthy"]:
+                self._notify_service_health_change(service_name, status["healthy"])
+            self._last_known_health[service_name] = status["healthy"]
+
+        return leader
+
+    def _check_all_services(self) -> Dict[str, Dict[str, Any]]:
+        """Run the health check of every registered service; only the lease holder calls this."""
+        results = {}
+
+        for service_name in ServiceRegistry.get_registered_names():
+            started = time.perf_counter()
+            error = None
+            service = ServiceRegistry.get_service(service_name)
             try:
-                # Get current health status
-                old_healthy = getattr(service, "_last_known_healthy", None)
-                current_health = service.get_health_status()
-                current_healthy = current_health["healthy"]
-
-                # Check if health status changed
-                if old_healthy is not None and old_healthy != current_healthy:
-                    self._notify_service_health_change(service_name, current_healthy)
-
-                # Update last known health status
-                service._last_known_healthy = current_healthy
-
-                # Update circuit breaker if needed
-                self._update_circuit_breaker(service_name, current_healthy)
-
+                healthy = service.probe() if service else False
+                if not service:
+                    error = "Service could not be created"
             except Exception as e:
                 logger.error(f"Health check failed for service {service_name}: {e}")
-                self._update_circuit_breaker(service_name, False)
+                healthy, error = False, str(e)
+
+            results[service_name] = {
+                "healthy": healthy,
+                "initialized": bool(service and service._initialized),
+                "error": error,
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "checked_at": time.time(),
+                "circuit": self._update_circuit_breaker(service_name, healthy),
+            }
+
+        return results
 
     def _notify_service_health_change(self, service_name: str, healthy: bool) -> None:
         """Notify callbacks about service health changes."""
@@ -98,35 +128,9 @@ class ServiceManager:
                 except Exception as e:
                     logger.error(f"Service callback error for {service_name}: {e}")
 
-    def _update_circuit_breaker(self, service_name: str, healthy: bool) -> None:
-        """Update circuit breaker state for a service."""
-        if service_name not in self._circuit_breakers:
-            self._circuit_breakers[service_name] = {
-                "failure_count": 0,
-                "success_count": 0,
-                "state": "CLOSED",  # CLOSED, OPEN, HALF_OPEN
-                "last_failure_time": 0,
-                "threshold": 5,  # Number of failures before opening
-                "timeout": 60,  # Seconds to wait before half-opening
-            }
-
-        cb = self._circuit_breakers[service_name]
-        current_time = time.time()
-
-        if healthy:
-            cb["success_count"] += 1
-            cb["failure_count"] = 0
-
-            if cb["state"] == "HALF_OPEN":
-                cb["state"] = "CLOSED"
-                logger.info(f"Circuit breaker for {service_name} closed (service recovered)")
-        else:
-            cb["failure_count"] += 1
-            cb["last_failure_time"] = current_time
-
-            if cb["failure_count"] >= cb["threshold"] and cb["state"] == "CLOSED":
-                cb["state"] = "OPEN"
-                logger.warning(f"Circuit breaker for {service_name} opened (too many failures)")
+    def _update_circuit_breaker(self, service_name: str, healthy: bool) -> str:
+        """Update the shared circuit breaker state for a service."""
+        return self._board.record_result(service_name, healthy)
 
     def register_service_callback(self, service_name: str, callback: Callable) -> None:
         """Register a callback for service health changes."""
@@ -146,26 +150,20 @@ class ServiceManager:
                 logger.warning(f"Callback not found for service {service_name}")
 
     def get_circuit_breaker_state(self, service_name: str) -> Dict[str, Any]:
-        """Get circuit breaker state for a service."""
-        return self._circuit_breakers.get(service_name, {}).copy()
+        """Get the shared circuit breaker state for a service."""
+        return self._board.breaker_state(service_name)
 
     def is_service_available(self, service_name: str) -> bool:
         """Check if a service is available (considering circuit breaker)."""
-        service = ServiceRegistry.get_service(service_name)
-        if not service:
+        if not ServiceRegistry.is_registered(service_name) and not ServiceRegistry.has_service(service_name):
             return False
 
-        # Check circuit breaker state
-        cb = self._circuit_breakers.get(service_name, {})
-        if cb.get("state") == "OPEN":
-            # Check if timeout has passed
-            if time.time() - cb.get("last_failure_time", 0) > cb.get("timeout", 60):
-                cb["state"] = "HALF_OPEN"
-                logger.info(f"Circuit breaker for {service_name} half-opened")
-            else:
-                return False
+        # An open breaker rejects calls until its timeout passes; half-open lets them through
+        if self._board.breaker_state(service_name)["state"] == "OPEN":
+            return False
 
-        return service.is_available()
+        service = ServiceRegistry.get_service(service_name)
+        return bool(service and service.is_available())
 
     def call_service_with_fallback(
         self, service_name: str, operation: str, fallback_service: str = None, *args, **kwargs
@@ -325,9 +323,7 @@ class ServiceManager:
 
         # Clear callbacks
         self._service_callbacks.clear()
-
-        # Clear circuit breakers
-        self._circuit_breakers.clear()
+        self._last_known_health.clear()
 
         logger.info("Service manager shutdown complete")
 
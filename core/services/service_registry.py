@@ -4,7 +4,11 @@ Manages registration and discovery of services in the system.
 """
 
 import logging
-from typing import Any, Dict, List, Optional, Set, Type
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Type
+
+from django.utils.module_loading import import_string
 
 from ..architecture.exceptions import ServiceError, ServiceNotFoundError
 from .base_service import BaseService
@@ -15,16 +19,24 @@ logger = logging.getLogger(__name__)
 class ServiceRegistry:
     """
     Registry for managing all services in the system.
+
+    Services can be registered by dotted path; the class is imported and the
+    instance built on the first ``get_service`` call, so processes only pay for
+    the services they use. ``warm_up`` builds services ahead of time and runs
+    their ``warm_up`` hooks (see gunicorn.conf.py).
     """
 
     _services: Dict[str, BaseService] = {}
     _service_classes: Dict[str, Type[BaseService]] = {}
+    _service_paths: Dict[str, str] = {}
+    _service_configs: Dict[str, Dict[str, Any]] = {}
     _service_groups: Dict[str, Set[str]] = {}
     _initialized: bool = False
+    _lock = threading.RLock()
 
     @classmethod
-    def register(cls, service_class: Type[BaseService]) -> None:
-        """Register a service class."""
+    def register(cls, service_class: Type[BaseService], **config) -> None:
+        """Register a service class, with the config its instance is built with."""
         if not issubclass(service_class, BaseService):
             raise TypeError(f"{service_class} must inherit from BaseService")
 
@@ -33,18 +45,51 @@ class ServiceRegistry:
             raise ValueError(f"Service class {service_class} must have a service_name")
 
         cls._service_classes[service_name] = service_class
+        cls._service_configs[service_name] = config
         logger.info(f"Registered service class: {service_name}")
 
+    @classmethod
+    def register_lazy(cls, service_name: str, class_path: str, **config) -> None:
+        """Register a service by dotted class path without importing it."""
+        if not service_name:
+            raise ValueError(f"Service {class_path} must have a service_name")
+
+        cls._service_paths[service_name] = class_path
+        cls._service_configs[service_name] = config
+        logger.debug(f"Registered lazy service: {service_name} -> {class_path}")
+
+    @classmethod
+    def is_registered(cls, service_name: str) -> bool:
+        """Check if a service class or path is registered, built or not."""
+        return service_name in cls._service_classes or service_name in cls._service_paths
+
+    @classmethod
+    def get_registered_names(cls) -> List[str]:
+        """Get the names of all registered services, built or not."""
+        return list(dict.fromkeys([*cls._service_classes, *cls._service_paths]))
+
+    @classmethod
+    def get_service_class(cls, service_name: str) -> Optional[Type[BaseService]]:
+        """Get a registered service class, importing it if registered by path."""
+        service_class = cls._service_classes.get(service_name)
+        if service_class is None and service_name in cls._service_paths:
+            service_class = import_string(cls._service_paths[service_name])
+            if not issubclass(service_class, BaseService):
+                raise TypeError(f"{service_class} must inherit from BaseService")
+            cls._service_classes[service_name] = service_class
+        return service_class
+
     @classmethod
     def create_service(cls, service_name: str, **kwargs) -> Optional[BaseService]:
         """Create and register a service instance."""
-        if service_name not in cls._service_classes:
+        if not cls.is_registered(service_name):
             logger.error(f"Unknown service: {service_name}")
             return None
 
         try:
-            service_class = cls._service_classes[service_name]
-            service_instance = service_class(**kwargs)
+            service_class = cls.get_service_class(service_name)
+            config = {**cls._service_configs.get(service_name, {}), **kwargs}
+            service_instance = service_class(**config)
             cls._services[service_name] = service_instance
             logger.info(f"Created service instance: {service_name}")
             return service_instance
@@ -54,14 +99,47 @@ class ServiceRegistry:
 
     @classmethod
     def get_service(cls, service_name: str) -> Optional[BaseService]:
-        """Get a service instance by name."""
-        return cls._services.get(service_name)
+        """Get a service instance by name, building it on first use."""
+        service = cls._services.get(service_name)
+        if service is not None or not cls.is_registered(service_name):
+            return service
+
+        with cls._lock:
+            service = cls._services.get(service_name)
+            if service is None:
+                service = cls.create_service(service_name)
+            return service
 
     @classmethod
     def has_service(cls, service_name: str) -> bool:
-        """Check if a service exists."""
+        """Check if a service instance has been built."""
         return service_name in cls._services
 
+    @classmethod
+    def warm_up(cls, service_names: Optional[Iterable[str]] = None) -> Dict[str, float]:
+        """
+        Build services and run their ``warm_up`` hooks.
+
+        Meant for long-lived web workers right after fork; management commands
+        and Celery workers skip it and build services on first use instead.
+        Returns the seconds spent per service.
+        """
+        timings = {}
+        for service_name in service_names if service_names is not None else cls.get_registered_names():
+            start = time.perf_counter()
+            service = cls.get_service(service_name)
+            if service is None:
+                logger.warning(f"Cannot warm up unknown or broken service {service_name}")
+                continue
+            try:
+                service.warm_up()
+            except Exception as e:
+                logger.warning(f"Service {service_name} warm-up failed: {e}")
+            timings[service_name] = time.perf_counter() - start
+
+        logger.info(f"Warmed up services: {', '.join(f'{n} {t * 1000:.0f}ms' for n, t in timings.items())}")
+        return timings
+
     @classmethod
     def get_all_services(cls) -> Dict[str, BaseService]:
         """Get all registered services."""
@@ -265,6 +343,8 @@ class ServiceRegistry:
         # Clear registries
         cls._services.clear()
         cls._service_classes.clear()
+        cls._service_paths.clear()
+        cls._service_configs.clear()
         cls._service_groups.clear()
         cls._initialized = False
 
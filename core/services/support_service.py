@@ -7,7 +7,6 @@ import logging
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.db import models, transaction
 from django.utils import timezone
 
@@ -24,11 +23,6 @@ class SupportService(BaseService):
     version = "1.0.0"
     description = "Support ticket management service"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._ticket_cache = {}
-        self._category_cache = {}
-
     def initialize(self) -> bool:
         """Initialize the support service."""
         try:
@@ -43,8 +37,7 @@ class SupportService(BaseService):
         """Clean up the support service."""
         try:
             # Clear caches
-            self._ticket_cache.clear()
-            self._category_cache.clear()
+            self.clear_local_cache()
             logger.info("Support service cleaned up successfully")
             return True
         except Exception as e:
@@ -526,8 +519,7 @@ class SupportService(BaseService):
                 "open_tickets": open_tickets,
                 "in_progress": in_progress,
                 "urgent_tickets": urgent_tickets,
-                "ticket_cache_size": len(self._ticket_cache),
-                "category_cache_size": len(self._category_cache),
+                "cache_stats": self.get_cache_stats(),
             }
         except Exception as e:
             logger.error(f"Failed to get service health: {e}")
@@ -0,0 +1,374 @@
+"""
+Tiered Cache
+Two-tier service cache: a bounded in-process LRU in front of the shared Django cache.
+
+The local tier answers repeated reads of untagged values without a network round
+trip; a tagged value still costs one ``get_many`` of its tag versions per read, so an
+invalidation is seen at once. It is bounded by entry count and by the approximate
+pickled size of its values, and its entries live at most ``LOCAL_TTL`` seconds, which
+bounds how long another process's write or delete can go unseen here.
+
+The shared tier stores values in an envelope carrying their fresh deadline, so
+``get_or_set`` can keep serving a stale value while exactly one caller (guarded by an
+atomic ``add`` lock in the shared backend) recomputes it.
+
+Values may declare dependency tags (see ``tag``). The envelope records the version of
+each tag when the value was computed, and a read whose tag versions moved on since
+then is a miss, so model signals invalidate every dependent key by bumping a counter
+instead of enumerating keys.
+"""
+
+import hashlib
+import logging
+import pickle
+import sys
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .request_profiler import note_cache_event
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BACKEND': 'default',
+    'LOCAL_MAX_ENTRIES': 2048,
+    'LOCAL_MAX_BYTES': 32 * 1024 * 1024,
+    'LOCAL_MAX_ITEM_BYTES': 1024 * 1024,
+    'LOCAL_TTL': 30,
+    'STALE_TTL': 300,
+    'LOCK_TIMEOUT': 30,
+    'WAIT_TIMEOUT': 5,
+}
+
+COUNTERS = ('local_hits', 'shared_hits', 'stale_hits', 'misses', 'sets', 'evictions', 'invalidations')
+
+TAG_PREFIX = 'cache-tag'
+
+
+def stable_key(*parts: Any) -> str:
+    """Digest of arbitrary key parts that is identical in every process (unlike hash())"""
+    return hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+
+def tag(label: str, pk: Any = None, **field) -> str:
+    """
+    Dependency tag for a whole model, one row, or the rows matching one field
+
+    tag('products.product'), tag('products.product', product_id) and
+    tag('orders.order', user=user_id) are bumped by core.signals on writes.
+    """
+    if pk is not None:
+        return f"{label}:{pk}"
+    if field:
+        (name, value), = field.items()
+        return f"{label}:{name}={value}"
+    return label
+
+
+def key_prefix(key: str) -> str:
+    """Group a cache key for statistics by dropping its last ':' segment"""
+    return key.rsplit(':', 1)[0]
+
+
+class CacheEntry:
+    """Value wrapper stored in both tiers"""
+
+    __slots__ = ('value', 'fresh_until', 'tags')
+
+    def __init__(self, value: Any, fresh_until: float, tags: Dict[str, int] = None):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.tags = tags
+
+    def __getstate__(self):
+        return (self.value, self.fresh_until, self.tags)
+
+    def __setstate__(self, state):
+        self.value, self.fresh_until, self.tags = state
+
+    def is_fresh(self, now: float = None) -> bool:
+        return (now or time.time()) < self.fresh_until
+
+
+class LocalCache:
+    """Thread-safe LRU bounded by entry count and approximate size, with per-entry expiry"""
+
+    def __init__(self, max_entries: int, max_bytes: int, max_item_bytes: int, on_evict: Callable = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self.on_evict = on_evict
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (entry, size, expires_at)
+        self._lock = RLock()
+
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        try:
+            return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return sys.getsizeof(value)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            if item[2] <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return item[0]
+
+    def set(self, key: str, entry: CacheEntry, expires_at: float, size: int = None):
+        size = self.estimate_size(entry.value) if size is None else size
+        with self._lock:
+            self._remove(key)
+            if size > self.max_item_bytes:
+                return
+            self._entries[key] = (entry, size, expires_at)
+            self.total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                evicted, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                if self.on_evict:
+                    self.on_evict(evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self.total_bytes -= item[1]
+
+
+class TieredCache:
+    """Local LRU tier over a shared Django cache with single-flight stale-while-revalidate"""
+
+    def __init__(self, **options):
+        configured = getattr(settings, 'SERVICE_CACHE', {})
+        self.options = {**DEFAULTS, **configured, **options}
+        self.local = LocalCache(
+            self.options['LOCAL_MAX_ENTRIES'],
+            self.options['LOCAL_MAX_BYTES'],
+            self.options['LOCAL_MAX_ITEM_BYTES'],
+            on_evict=lambda key: self._count(key, 'evictions'),
+        )
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = RLock()
+
+    @property
+    def shared(self):
+        return caches[self.options['BACKEND']]
+
+    # Statistics
+
+    def _count(self, key: str, counter: str):
+        note_cache_event(counter)
+        prefix = key_prefix(key)
+        with self._stats_lock:
+            counts = self._stats.get(prefix)
+            if counts is None:
+                counts = self._stats[prefix] = dict.fromkeys(COUNTERS, 0)
+            counts[counter] += 1
+
+    def get_stats(self, prefix: str = '') -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters of this process per key prefix, optionally filtered by prefix"""
+        with self._stats_lock:
+            return {name: dict(counts) for name, counts in self._stats.items() if name.startswith(prefix)}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats.clear()
+
+    # Tier access
+
+    def _lookup(self, key: str):
+        """Find a key's entry, preferring a fresh local copy. Returns (entry, tier)."""
+        local = self.local.get(key)
+        if local is not None and local.is_fresh() and self._check_tags(key, local, count=False) is not None:
+            return local, 'local'
+
+        stored = self.shared.get(key)
+        if stored is None:
+            # The shared tier is authoritative: a stale local copy of a deleted key is dropped
+            self.local.delete(key)
+            return None, 'shared'
+        if not isinstance(stored, CacheEntry):
+            # Written straight to the backend by code that bypasses this cache
+            stored = CacheEntry(stored, time.time() + self.options['LOCAL_TTL'])
+        if self._check_tags(key, stored) is None:
+            return None, 'shared'
+        self.local.set(key, stored, min(
+            stored.fresh_until + self.options['STALE_TTL'], time.time() + self.options['LOCAL_TTL']
+        ))
+        return stored, 'shared'
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a fresh value from either tier"""
+        entry, tier = self._lookup(key)
+        if entry is None or not entry.is_fresh():
+            self._count(key, 'misses')
+            return default
+        self._count(key, f"{tier}_hits")
+        return entry.value
+
+    def set(self, key: str, value: Any, timeout: int, stale_timeout: int = 0,
+            tags: Iterable[str] = None, versions: Dict[str, int] = None):
+        """
+        Store a value that is fresh for ``timeout`` and may be served stale for ``stale_timeout`` more
+
+        ``tags`` name what the value was computed from. Pass ``versions`` captured with
+        tag_versions() before computing it so a write racing the computation still
+        invalidates the stored value.
+        """
+        if tags and versions is None:
+            versions = self.tag_versions(tags)
+        now = time.time()
+        entry = CacheEntry(value, now + timeout, versions or None)
+        self.shared.set(key, entry, timeout + stale_timeout)
+        self.local.set(key, entry, min(now + timeout + stale_timeout, now + self.options['LOCAL_TTL']))
+        self._count(key, 'sets')
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def delete_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        for key in keys:
+            self.local.delete(key)
+        self.shared.delete_many(keys)
+
+    def delete_pattern(self, prefix: str):
+        """Delete every key starting with ``prefix`` (shared tier needs delete_pattern support)"""
+        self.local.delete_prefix(prefix)
+        self.shared.delete_pattern(f"{prefix}*")
+
+    # Dependency tags
+
+    def _tag_key(self, name: str) -> str:
+        return f"{TAG_PREFIX}:{name}"
+
+    def tag_versions(self, tags: Iterable[str]) -> Dict[str, int]:
+        """Current version of each tag, creating missing tag counters"""
+        tags = list(dict.fromkeys(tags))
+        found = self.shared.get_many([self._tag_key(name) for name in tags])
+        versions = {}
+        for name in tags:
+            version = found.get(self._tag_key(name))
+            if version is None:
+                # Seed with the clock so a counter that was evicted never repeats a version
+                self.shared.add(self._tag_key(name), time.time_ns() // 1000, None)
+                version = self.shared.get(self._tag_key(name))
+            versions[name] = version
+        return versions
+
+    def _check_tags(self, key: str, entry: CacheEntry, count: bool = True) -> Optional[CacheEntry]:
+        """Return the entry if none of its tags were bumped since it was stored"""
+        if not entry.tags:
+            return entry
+        found = self.shared.get_many([self._tag_key(name) for name in entry.tags])
+        if all(found.get(self._tag_key(name)) == version for name, version in entry.tags.items()):
+            return entry
+        self.local.delete(key)
+        if count:
+            self._count(key, 'invalidations')
+        return None
+
+    def invalidate_tags(self, tags: Iterable[str]):
+        """Invalidate every value depending on any of the tags"""
+        for name in set(tags):
+            try:
+                self.shared.incr(self._tag_key(name))
+            except ValueError:
+                # No counter means no value was stored against this tag version
+                pass
+
+    # Stampede protection
+
+    def get_or_set(self, key: str, producer: Callable[[], Any], timeout: int, stale_timeout: int = None,
+                   tags: Iterable[str] = None) -> Any:
+        """
+        Get a value, computing it with ``producer`` at most once across workers
+
+        A stale value is returned immediately to everyone except the single caller that
+        wins the refresh lock, who recomputes it. On a cold miss the losers wait up to
+        ``WAIT_TIMEOUT`` seconds for the winner's value before computing it themselves.
+        Values invalidated through their tags are never served stale.
+        """
+        stale_timeout = self.options['STALE_TTL'] if stale_timeout is None else stale_timeout
+        entry, tier = self._lookup(key)
+        if entry is not None:
+            if entry.is_fresh():
+                self._count(key, f"{tier}_hits")
+                return entry.value
+            if not self._acquire(key):
+                self._count(key, 'stale_hits')
+                return entry.value
+        else:
+            self._count(key, 'misses')
+            if not self._acquire(key):
+                entry = self._wait_for(key)
+                if entry is not None:
+                    return entry.value
+                return producer()
+
+        try:
+            versions = self.tag_versions(tags) if tags else None
+            value = producer()
+            if value is not None:
+                self.set(key, value, timeout, stale_timeout, tags, versions)
+            return value
+        finally:
+            self._release(key)
+
+    def _lock_key(self, key: str) -> str:
+        return f"{key}:refresh-lock"
+
+    def _acquire(self, key: str) -> bool:
+        try:
+            return bool(self.shared.add(self._lock_key(key), 1, self.options['LOCK_TIMEOUT']))
+        except Exception as e:
+            logger.warning(f"Cache refresh lock failed for {key}: {e}")
+            return True
+
+    def _release(self, key: str):
+        try:
+            self.shared.delete(self._lock_key(key))
+        except Exception as e:
+            logger.warning(f"Cache refresh unlock failed for {key}: {e}")
+
+    def _wait_for(self, key: str) -> Optional[CacheEntry]:
+        deadline = time.time() + self.options['WAIT_TIMEOUT']
+        delay = 0.01
+        while time.time() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            stored = self.shared.get(key)
+            if isinstance(stored, CacheEntry) and self._check_tags(key, stored) is not None:
+                return stored
+        return None
+
+
+service_cache = TieredCache()
@@ -8,13 +8,19 @@ import logging
 from typing import Dict, List, Optional, Any, Tuple
 from collections import defaultdict, Counter
 from decimal import Decimal
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.contrib.auth import get_user_model
 from django.db.models import Count, Avg, Sum, Q, F, Max, Min
 from django.utils import timezone
 import statistics
 
+import numpy as np
+
 from .base_service import BaseService
+from .interaction_log import compact_events, interaction_writer
+from .item_similarity import encode
+from .profile_frame import DAY, ProfileFrame, build_frames
+from .tiered_cache import tag
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -27,11 +33,6 @@ class UserPreferenceService(BaseService):
     version = "1.0.0"
     description = "AI-powered user preference learning with behavioral analysis"
     
-    def __init__(self):
-        super().__init__()
-        self._preference_cache = {}
-        self._behavior_patterns_cache = {}
-    
     def initialize(self):
         """Initialize the user preference service"""
         try:
@@ -43,8 +44,7 @@ class UserPreferenceService(BaseService):
     def cleanup(self):
         """Clean up the user preference service"""
         try:
-            self._preference_cache.clear()
-            self._behavior_patterns_cache.clear()
+            self.clear_local_cache()
             logger.info("User preference service cleaned up successfully")
         except Exception as e:
             logger.error(f"Failed to cleanup user preference service: {e}")
@@ -52,40 +52,17 @@ class UserPreferenceService(BaseService):
     def build_user_profile(self, user_id: str, include_predictions: bool = True) -> Dict[str, Any]:
         """Build comprehensive user preference profile"""
         try:
+            user_id = getattr(user_id, 'pk', user_id)
             cache_key = f"user_profile:{user_id}:{include_predictions}"
             cached_profile = self.get_cached(cache_key)
             if cached_profile:
                 return cached_profile
             
             user = User.objects.get(id=user_id)
+            profile = self.build_user_profiles([user], include_predictions)[user.pk]
             
-            # Analyze different aspects of user behavior
-            profile = {
-                'user_id': user_id,
-                'basic_preferences': self._analyze_basic_preferences(user),
-                'purchase_patterns': self._analyze_purchase_patterns(user),
-                'browsing_behavior': self._analyze_browsing_behavior(user),
-                'price_sensitivity': self._analyze_price_sensitivity(user),
-                'category_affinity': self._analyze_category_affinity(user),
-                'vendor_preferences': self._analyze_vendor_preferences(user),
-                'temporal_patterns': self._analyze_temporal_patterns(user),
-                'risk_profile': self._analyze_risk_profile(user),
-                'loyalty_indicators': self._analyze_loyalty_indicators(user),
-                'profile_completeness': self._calculate_profile_completeness(user),
-                'confidence_scores': {},
-                'last_updated': timezone.now()
-            }
-            
-            # Add predictions if requested
-            if include_predictions:
-                profile['predictions'] = self._generate_behavior_predictions(user, profile)
-                profile['recommendations'] = self._generate_profile_recommendations(profile)
-            
-            # Calculate confidence scores for each section
-            profile['confidence_scores'] = self._calculate_confidence_scores(profile)
-            
-            # Cache for 2 hours
-            self.set_cached(cache_key, profile, timeout=7200)
+            # Cache for 2 hours, or until the user's orders change
+            self.set_cached(cache_key, profile, timeout=7200, tags=[tag('orders.order', user=user.pk)])
             
             return profile
             
@@ -93,46 +70,172 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to build user profile for {user_id}: {e}")
             return {'error': str(e)}
     
+    def build_user_profiles(self, users: List[Any], include_predictions: bool = True) -> Dict[Any, Dict[str, Any]]:
+        """Build the profiles of a batch of users from one shared history load, keyed by user pk"""
+        frames = self.load_profile_frames(users)
+        return {user.pk: self._build_profile(user, frames[user.pk], include_predictions) for user in users}
+    
+    def load_profile_frames(self, users: List[Any]) -> Dict[Any, ProfileFrame]:
+        """
+        Read the order history of a batch of users into one ProfileFrame each.
+        
+        Runs the same five queries (orders, items, disputes, category count and the
+        compacted interaction summaries) however many users the batch holds. Users
+        without orders get an empty frame.
+        """
+        from core.models import UserPreferenceProfile
+        from orders.models import Order, OrderItem
+        from products.models import Category
+        from disputes.models import Dispute
+        
+        user_ids = [user.pk for user in users]
+        order_rows = (
+            (user_id, order_id, created_at.timestamp(), float(total_btc), status)
+            for user_id, order_id, created_at, total_btc, status in Order.objects.filter(
+                user_id__in=user_ids
+            ).order_by('user_id', 'created_at').values_list(
+                'user_id', 'id', 'created_at', 'total_btc', 'status'
+            ).iterator(chunk_size=self.max_batch_size)
+        )
+        
+        category_names, vendor_names = {}, {}
+        
+        def item_rows():
+            for order_id, quantity, price, list_price, category_id, category, vendor_id, vendor in OrderItem.objects.filter(
+                order__user_id__in=user_ids
+            ).values_list(
+                'order_id', 'quantity', 'price_btc', 'product__price_btc',
+                'product__category_id', 'product__category__name', 'product__vendor_id', 'product__vendor__vendor_name'
+            ).iterator(chunk_size=self.max_batch_size):
+                category_names[category_id] = category
+                vendor_names[vendor_id] = vendor
+                yield order_id, quantity, float(price), float(list_price), category_id, vendor_id
+        
+        frames = build_frames(order_rows, item_rows())
+        
+        disputes = {
+            row['complainant_id']: row
+            for row in Dispute.objects.filter(complainant_id__in=user_ids).values('complainant_id').annotate(
+                filed=Count('id', distinct=True),
+                won=Count('id', filter=Q(arbitrations__decision='buyer_wins'), distinct=True)
+            )
+        }
+        category_count = Category.objects.count()
+        summaries = dict(UserPreferenceProfile.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'interaction_summary'
+        ))
+        
+        for user_id in user_ids:
+            frame = frames.setdefault(user_id, ProfileFrame.empty())
+            frame.category_names, frame.vendor_names, frame.category_count = category_names, vendor_names, category_count
+            frame.interaction_summary = summaries.get(user_id) or {}
+            frame.disputes_filed = disputes.get(user_id, {}).get('filed', 0)
+            frame.disputes_won = disputes.get(user_id, {}).get('won', 0)
+        return frames
+    
+    def _build_profile(self, user, frame: ProfileFrame, include_predictions: bool) -> Dict[str, Any]:
+        """Run every analyzer over the user's shared history frame"""
+        profile = {
+            'user_id': user.pk,
+            'basic_preferences': self._analyze_basic_preferences(user, frame),
+            'purchase_patterns': self._analyze_purchase_patterns(user, frame),
+            'browsing_behavior': self._analyze_browsing_behavior(user, frame),
+            'price_sensitivity': self._analyze_price_sensitivity(user, frame),
+            'category_affinity': self._analyze_category_affinity(user, frame),
+            'vendor_preferences': self._analyze_vendor_preferences(user, frame),
+            'temporal_patterns': self._analyze_temporal_patterns(user, frame),
+            'risk_profile': self._analyze_risk_profile(user, frame),
+            'loyalty_indicators': self._analyze_loyalty_indicators(user, frame),
+            'interaction_patterns': self._analyze_interaction_patterns(user, frame),
+            'profile_completeness': self._calculate_profile_completeness(user, frame),
+            'confidence_scores': {},
+            'last_updated': timezone.now()
+        }
+        
+        # Add predictions if requested
+        if include_predictions:
+            profile['predictions'] = self._generate_behavior_predictions(user, profile)
+            profile['recommendations'] = self._generate_profile_recommendations(profile)
+        
+        # Calculate confidence scores for each section
+        profile['confidence_scores'] = self._calculate_confidence_scores(profile)
+        
+        return profile
+    
+    def profile_fields(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a built profile onto the UserPreferenceProfile columns"""
+        price_sensitivity = profile.get('price_sensitivity', {})
+        if price_sensitivity.get('budget_conscious'):
+            sensitivity = 'high'
+        elif price_sensitivity.get('luxury_affinity'):
+            sensitivity = 'low'
+        else:
+            sensitivity = 'medium'
+        
+        risk_level = profile.get('risk_profile', {}).get('risk_level')
+        loyalty_score = profile.get('loyalty_indicators', {}).get('loyalty_score')
+        
+        return {
+            'purchase_patterns': profile.get('purchase_patterns', {}),
+            'price_sensitivity': sensitivity,
+            'category_affinity': profile.get('category_affinity', {}),
+            'vendor_preferences': profile.get('vendor_preferences', {}),
+            'temporal_patterns': profile.get('temporal_patterns', {}),
+            'risk_profile': {'low': 'conservative', 'high': 'aggressive'}.get(risk_level, 'moderate'),
+            'loyalty_indicators': profile.get('loyalty_indicators', {}),
+            'churn_risk': round(1 - loyalty_score, 4) if loyalty_score is not None else 0.5
+        }
+    
+    def save_profiles(self, users: List[Any]) -> int:
+        """Rebuild and store the UserPreferenceProfile rows of a batch of users"""
+        from django.db import transaction
+        from core.models import UserPreferenceProfile
+        
+        profiles = self.build_user_profiles(users, include_predictions=False)
+        existing = {row.user_id: row for row in UserPreferenceProfile.objects.filter(user__in=users)}
+        now = timezone.now()
+        created, updated = [], []
+        for user in users:
+            fields = self.profile_fields(profiles[user.pk])
+            row = existing.get(user.pk)
+            if row is None:
+                created.append(UserPreferenceProfile(user=user, **fields))
+                continue
+            for field, value in fields.items():
+                setattr(row, field, value)
+            row.last_updated = now  # bulk_update skips auto_now
+            updated.append(row)
+        
+        with transaction.atomic():
+            UserPreferenceProfile.objects.bulk_create(created, batch_size=self.max_batch_size)
+            UserPreferenceProfile.objects.bulk_update(
+                updated, [*self.profile_fields({}), 'last_updated'], batch_size=self.max_batch_size
+            )
+        return len(created) + len(updated)
+    
     def learn_from_interaction(self, user_id: str, interaction_type: str, 
                               interaction_data: Dict[str, Any]) -> bool:
         """Learn from user interactions in real-time"""
         try:
-            # Clear cached profile to force recalculation
-            cache_keys_to_clear = [
-                f"user_profile:{user_id}:True",
-                f"user_profile:{user_id}:False",
-                f"behavior_patterns:{user_id}"
-            ]
-            
-            for key in cache_keys_to_clear:
-                self.clear_cache(key)
-            
-            # Log interaction for future analysis
-            interaction_log = {
-                'user_id': user_id,
-                'interaction_type': interaction_type,
-                'interaction_data': interaction_data,
-                'timestamp': timezone.now()
-            }
-            
-            # Store in cache for batch processing
-            interactions_key = f"user_interactions:{user_id}"
-            interactions = self.get_cached(interactions_key, [])
-            interactions.append(interaction_log)
-            
-            # Keep only recent interactions (last 1000)
-            if len(interactions) > 1000:
-                interactions = interactions[-1000:]
+            # Append to the event log; compact_interactions folds it into the profile later
+            interaction_writer.append(getattr(user_id, 'pk', user_id), interaction_type, interaction_data)
             
-            self.set_cached(interactions_key, interactions, timeout=86400)  # 24 hours
-            
-            logger.info(f"Learned from interaction: {interaction_type} for user {user_id}")
+            logger.debug(f"Learned from interaction: {interaction_type} for user {user_id}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to learn from interaction: {e}")
             return False
     
+    def compact_interactions(self) -> int:
+        """Fold new interaction events into the stored profiles and drop their cached profiles"""
+        interaction_writer.flush()
+        changed = compact_events()
+        for user_id in changed:
+            self.clear_cache(f"user_profile:{user_id}:True")
+            self.clear_cache(f"user_profile:{user_id}:False")
+        return len(changed)
+    
     def get_personalized_insights(self, user_id: str) -> Dict[str, Any]:
         """Get personalized insights and analytics for the user"""
         try:
@@ -157,18 +260,13 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to get personalized insights for {user_id}: {e}")
             return {'error': str(e)}
     
-    def _analyze_basic_preferences(self, user) -> Dict[str, Any]:
+    def _analyze_basic_preferences(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze basic user preferences from account and activity data"""
         try:
-            from orders.models import Order
-            
             # Account age and activity level
             account_age = (timezone.now() - user.date_joined).days
-            total_orders = Order.objects.filter(buyer=user).count()
-            recent_orders = Order.objects.filter(
-                buyer=user,
-                created_at__gte=timezone.now() - timedelta(days=30)
-            ).count()
+            total_orders = frame.order_count
+            recent_orders = frame.count_since((timezone.now() - timedelta(days=30)).timestamp())
             
             # Activity classification
             if total_orders == 0:
@@ -194,48 +292,34 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to analyze basic preferences: {e}")
             return {}
     
-    def _analyze_purchase_patterns(self, user) -> Dict[str, Any]:
+    def _analyze_purchase_patterns(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze user's purchase patterns and habits"""
         try:
-            from orders.models import Order, OrderItem
-            
-            orders = Order.objects.filter(
-                buyer=user,
-                status__in=['completed', 'shipped', 'delivered']
-            ).order_by('-created_at')
-            
-            if not orders.exists():
+            purchased = frame.purchased
+            if not purchased.any():
                 return {'no_purchase_history': True}
             
-            order_items = OrderItem.objects.filter(
-                order__in=orders
-            ).select_related('product')
-            
             # Calculate purchase metrics
-            total_spent = sum(float(order.total_amount or 0) for order in orders)
-            avg_order_value = total_spent / orders.count() if orders.count() > 0 else 0
+            totals = frame.order_totals[purchased]
+            order_count = len(totals)
+            total_spent = float(totals.sum())
+            avg_order_value = total_spent / order_count
             
             # Order frequency analysis
-            order_dates = [order.created_at.date() for order in orders]
-            if len(order_dates) > 1:
-                intervals = [(order_dates[i-1] - order_dates[i]).days for i in range(1, len(order_dates))]
-                avg_days_between_orders = statistics.mean(intervals) if intervals else 0
-            else:
-                avg_days_between_orders = 0
+            order_days = frame.order_days(purchased)
+            avg_days_between_orders = float(np.diff(order_days).mean()) if order_count > 1 else 0
             
             # Purchase timing patterns
-            purchase_hours = [order.created_at.hour for order in orders]
-            purchase_days = [order.created_at.weekday() for order in orders]
-            
-            most_active_hour = Counter(purchase_hours).most_common(1)[0][0] if purchase_hours else 12
-            most_active_day = Counter(purchase_days).most_common(1)[0][0] if purchase_days else 0
+            purchase_hours, purchase_days, _ = frame.order_clock(purchased)
+            most_active_hour = int(np.bincount(purchase_hours).argmax())
+            most_active_day = int(np.bincount(purchase_days).argmax())
             
             # Item preferences
-            items_per_order = [order.items.count() for order in orders]
-            avg_items_per_order = statistics.mean(items_per_order) if items_per_order else 0
+            avg_items_per_order = float(frame.items_per_order(purchased).mean())
             
+            order_times = frame.order_times[purchased]
             return {
-                'total_orders': orders.count(),
+                'total_orders': order_count,
                 'total_spent': total_spent,
                 'average_order_value': avg_order_value,
                 'average_days_between_orders': avg_days_between_orders,
@@ -244,50 +328,42 @@ class UserPreferenceService(BaseService):
                 'most_active_day': most_active_day,
                 'purchase_frequency': self._classify_purchase_frequency(avg_days_between_orders),
                 'spending_tier': self._classify_spending_tier(total_spent),
-                'first_purchase': orders.last().created_at,
-                'last_purchase': orders.first().created_at
+                'first_purchase': datetime.fromtimestamp(order_times[0], tz=dt_timezone.utc).isoformat(),
+                'last_purchase': datetime.fromtimestamp(order_times[-1], tz=dt_timezone.utc).isoformat()
             }
             
         except Exception as e:
             logger.error(f"Failed to analyze purchase patterns: {e}")
             return {}
     
-    def _analyze_browsing_behavior(self, user) -> Dict[str, Any]:
+    def _analyze_browsing_behavior(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze browsing behavior patterns (simulated for this implementation)"""
         try:
             # In a real implementation, this would analyze page views, search queries, etc.
             # For now, we'll infer browsing behavior from purchase patterns
-            
-            from orders.models import OrderItem
-            
-            # Analyze product view patterns from purchases
-            purchased_items = OrderItem.objects.filter(
-                order__buyer=user,
-                order__status__in=['completed', 'shipped', 'delivered']
-            ).select_related('product')
-            
-            if not purchased_items.exists():
+            items = frame.item_purchased
+            if not items.any():
                 return {'insufficient_data': True}
             
             # Category exploration
-            categories_explored = set(item.product.category_id for item in purchased_items)
+            categories_explored = len(set(frame.item_categories[items]))
             
             # Price range exploration
-            prices_viewed = [float(item.product.price_btc) for item in purchased_items]
-            price_range_low = min(prices_viewed) if prices_viewed else 0
-            price_range_high = max(prices_viewed) if prices_viewed else 0
+            prices_viewed = frame.item_list_prices[items]
+            price_range_low = float(prices_viewed.min())
+            price_range_high = float(prices_viewed.max())
             
             # Vendor exploration
-            vendors_explored = set(item.product.vendor_id for item in purchased_items)
+            vendors_explored = len(set(frame.item_vendors[items]))
             
             return {
-                'categories_explored': len(categories_explored),
+                'categories_explored': categories_explored,
                 'price_range_low': price_range_low,
                 'price_range_high': price_range_high,
                 'price_range_span': price_range_high - price_range_low,
-                'vendors_explored': len(vendors_explored),
+                'vendors_explored': vendors_explored,
                 'exploration_score': self._calculate_exploration_score(
-                    len(categories_explored), len(vendors_explored), price_range_high - price_range_low
+                    categories_explored, vendors_explored, price_range_high - price_range_low
                 )
             }
             
@@ -295,39 +371,26 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to analyze browsing behavior: {e}")
             return {}
     
-    def _analyze_price_sensitivity(self, user) -> Dict[str, Any]:
+    def _analyze_price_sensitivity(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze user's price sensitivity and spending patterns"""
         try:
-            from orders.models import OrderItem
-            
-            order_items = OrderItem.objects.filter(
-                order__buyer=user,
-                order__status__in=['completed', 'shipped', 'delivered']
-            ).select_related('product')
-            
-            if not order_items.exists():
+            items = frame.item_purchased
+            if not items.any():
                 return {'no_data': True}
             
             # Price analysis
-            prices_paid = [float(item.price) for item in order_items]
-            product_list_prices = [float(item.product.price_btc) for item in order_items]
-            
-            avg_price_paid = statistics.mean(prices_paid)
-            avg_list_price = statistics.mean(product_list_prices)
+            prices_paid = frame.item_prices[items]
+            avg_price_paid = float(prices_paid.mean())
+            avg_list_price = float(frame.item_list_prices[items].mean())
             
             # Price variance analysis
-            price_std = statistics.stdev(prices_paid) if len(prices_paid) > 1 else 0
+            price_std = float(prices_paid.std(ddof=1)) if len(prices_paid) > 1 else 0
             price_coefficient_variation = price_std / avg_price_paid if avg_price_paid > 0 else 0
             
             # Price tier preferences
-            price_tiers = {'budget': 0, 'mid': 0, 'premium': 0}
-            for price in prices_paid:
-                if price < avg_list_price * 0.7:
-                    price_tiers['budget'] += 1
-                elif price > avg_list_price * 1.3:
-                    price_tiers['premium'] += 1
-                else:
-                    price_tiers['mid'] += 1
+            budget = int((prices_paid < avg_list_price * 0.7).sum())
+            premium = int((prices_paid > avg_list_price * 1.3).sum())
+            price_tiers = {'budget': budget, 'mid': len(prices_paid) - budget - premium, 'premium': premium}
             
             # Determine price sensitivity
             if price_coefficient_variation < 0.3:
@@ -353,45 +416,34 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to analyze price sensitivity: {e}")
             return {}
     
-    def _analyze_category_affinity(self, user) -> Dict[str, Any]:
+    def _analyze_category_affinity(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze user's affinity for different product categories"""
         try:
-            from orders.models import OrderItem
-            from products.models import Category
-            
-            order_items = OrderItem.objects.filter(
-                order__buyer=user,
-                order__status__in=['completed', 'shipped', 'delivered']
-            ).select_related('product__category')
-            
-            if not order_items.exists():
+            items = frame.item_purchased
+            if not items.any():
                 return {'no_data': True}
             
             # Category purchase frequency
-            category_counts = defaultdict(int)
-            category_spending = defaultdict(float)
-            
-            for item in order_items:
-                category_name = item.product.category.name
-                category_counts[category_name] += item.quantity
-                category_spending[category_name] += float(item.price) * item.quantity
+            quantities = frame.item_quantities[items]
+            codes, categories = encode(frame.item_categories[items])
+            category_counts = np.bincount(codes, weights=quantities)
+            category_spending = np.bincount(codes, weights=frame.item_prices[items] * quantities)
             
             # Calculate affinity scores
-            total_items = sum(category_counts.values())
-            total_spending = sum(category_spending.values())
+            total_items = category_counts.sum()
+            total_spending = category_spending.sum()
             
             category_affinities = {}
-            for category, count in category_counts.items():
-                frequency_score = count / total_items
-                spending_score = category_spending[category] / total_spending
-                affinity_score = (frequency_score + spending_score) / 2
+            for code, category_id in enumerate(categories):
+                frequency_score = float(category_counts[code] / total_items) if total_items else 0
+                spending_score = float(category_spending[code] / total_spending) if total_spending else 0
                 
-                category_affinities[category] = {
-                    'purchase_count': count,
-                    'total_spent': category_spending[category],
+                category_affinities[frame.category_names.get(category_id, str(category_id))] = {
+                    'purchase_count': int(category_counts[code]),
+                    'total_spent': float(category_spending[code]),
                     'frequency_score': frequency_score,
                     'spending_score': spending_score,
-                    'affinity_score': affinity_score
+                    'affinity_score': (frequency_score + spending_score) / 2
                 }
             
             # Sort by affinity score
@@ -405,53 +457,52 @@ class UserPreferenceService(BaseService):
                 'total_categories_purchased': len(category_affinities),
                 'category_affinities': dict(sorted_affinities),
                 'top_categories': [item[0] for item in sorted_affinities[:3]],
-                'category_diversity': len(category_affinities) / Category.objects.count() if Category.objects.count() > 0 else 0
+                'category_diversity': len(category_affinities) / frame.category_count if frame.category_count > 0 else 0
             }
             
         except Exception as e:
             logger.error(f"Failed to analyze category affinity: {e}")
             return {}
     
-    def _analyze_vendor_preferences(self, user) -> Dict[str, Any]:
+    def _analyze_vendor_preferences(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze user's vendor preferences and loyalty patterns"""
         try:
-            from orders.models import OrderItem
-            from vendors.models import Vendor
-            
-            order_items = OrderItem.objects.filter(
-                order__buyer=user,
-                order__status__in=['completed', 'shipped', 'delivered']
-            ).select_related('product__vendor')
-            
-            if not order_items.exists():
+            items = frame.item_purchased
+            if not items.any():
                 return {'no_data': True}
             
             # Vendor interaction analysis
-            vendor_stats = defaultdict(lambda: {'orders': 0, 'items': 0, 'spending': 0})
-            
-            for item in order_items:
-                vendor_name = item.product.vendor.user.username
-                vendor_stats[vendor_name]['orders'] += 1
-                vendor_stats[vendor_name]['items'] += item.quantity
-                vendor_stats[vendor_name]['spending'] += float(item.price) * item.quantity
+            quantities = frame.item_quantities[items]
+            codes, vendors = encode(frame.item_vendors[items])
+            vendor_orders = np.bincount(codes)
+            vendor_items = np.bincount(codes, weights=quantities)
+            vendor_spending = np.bincount(codes, weights=frame.item_prices[items] * quantities)
+            
+            vendor_stats = {
+                frame.vendor_names.get(vendor_id, str(vendor_id)): {
+                    'orders': int(vendor_orders[code]),
+                    'items': int(vendor_items[code]),
+                    'spending': float(vendor_spending[code])
+                }
+                for code, vendor_id in enumerate(vendors)
+            }
             
             # Calculate vendor loyalty metrics
             total_vendors = len(vendor_stats)
-            total_orders = sum(stats['orders'] for stats in vendor_stats.values())
+            total_orders = int(vendor_orders.sum())
             
             # Find most loyal relationships
-            top_vendor = max(vendor_stats.items(), key=lambda x: x[1]['orders'])[0] if vendor_stats else None
-            top_vendor_orders = vendor_stats[top_vendor]['orders'] if top_vendor else 0
+            top_vendor = max(vendor_stats.items(), key=lambda x: x[1]['orders'])[0]
+            top_vendor_orders = vendor_stats[top_vendor]['orders']
             
             # Calculate vendor concentration (Herfindahl index)
-            order_shares = [stats['orders'] / total_orders for stats in vendor_stats.values()]
-            vendor_concentration = sum(share ** 2 for share in order_shares)
+            vendor_concentration = float(((vendor_orders / total_orders) ** 2).sum())
             
             loyalty_level = 'high' if vendor_concentration > 0.5 else 'medium' if vendor_concentration > 0.25 else 'low'
             
             return {
                 'total_vendors_used': total_vendors,
-                'vendor_stats': dict(vendor_stats),
+                'vendor_stats': vendor_stats,
                 'top_vendor': top_vendor,
                 'top_vendor_order_share': top_vendor_orders / total_orders if total_orders > 0 else 0,
                 'vendor_concentration': vendor_concentration,
@@ -463,34 +514,24 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to analyze vendor preferences: {e}")
             return {}
     
-    def _analyze_temporal_patterns(self, user) -> Dict[str, Any]:
+    def _analyze_temporal_patterns(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze temporal patterns in user behavior"""
         try:
-            from orders.models import Order
-            
-            orders = Order.objects.filter(
-                buyer=user,
-                status__in=['completed', 'shipped', 'delivered']
-            ).order_by('created_at')
-            
-            if orders.count() < 2:
+            purchased = frame.purchased
+            if purchased.sum() < 2:
                 return {'insufficient_data': True}
             
             # Time-based analysis
-            order_hours = [order.created_at.hour for order in orders]
-            order_days = [order.created_at.weekday() for order in orders]  # 0=Monday
-            order_months = [order.created_at.month for order in orders]
+            order_hours, order_days, order_months = frame.order_clock(purchased)  # days: 0=Monday
             
             # Peak activity times
-            hour_distribution = Counter(order_hours)
-            day_distribution = Counter(order_days)
-            month_distribution = Counter(order_months)
+            day_distribution = np.bincount(order_days, minlength=7)
             
             # Activity patterns
-            morning_activity = sum(1 for h in order_hours if 6 <= h < 12)
-            afternoon_activity = sum(1 for h in order_hours if 12 <= h < 18)
-            evening_activity = sum(1 for h in order_hours if 18 <= h < 24)
-            night_activity = sum(1 for h in order_hours if 0 <= h < 6)
+            morning_activity = int(((order_hours >= 6) & (order_hours < 12)).sum())
+            afternoon_activity = int(((order_hours >= 12) & (order_hours < 18)).sum())
+            evening_activity = int((order_hours >= 18).sum())
+            night_activity = int((order_hours < 6).sum())
             
             total_orders = len(order_hours)
             
@@ -505,11 +546,11 @@ class UserPreferenceService(BaseService):
                 user_type = 'flexible'
             
             # Seasonality analysis
-            seasonal_patterns = self._analyze_seasonal_patterns(order_months)
+            seasonal_patterns = self._analyze_seasonal_patterns(order_months.tolist())
             
             return {
-                'peak_hour': hour_distribution.most_common(1)[0][0],
-                'peak_day': day_distribution.most_common(1)[0][0],
+                'peak_hour': int(np.bincount(order_hours).argmax()),
+                'peak_day': int(day_distribution.argmax()),
                 'user_type': user_type,
                 'activity_distribution': {
                     'morning': morning_activity / total_orders,
@@ -517,7 +558,7 @@ class UserPreferenceService(BaseService):
                     'evening': evening_activity / total_orders,
                     'night': night_activity / total_orders
                 },
-                'day_preferences': dict(day_distribution),
+                'day_preferences': {day: int(count) for day, count in enumerate(day_distribution) if count},
                 'seasonal_patterns': seasonal_patterns
             }
             
@@ -525,26 +566,16 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to analyze temporal patterns: {e}")
             return {}
     
-    def _analyze_risk_profile(self, user) -> Dict[str, Any]:
+    def _analyze_risk_profile(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze user's risk profile based on purchase and dispute history"""
         try:
-            from orders.models import Order
-            from disputes.models import Dispute
-            
             # Order analysis
-            total_orders = Order.objects.filter(buyer=user).count()
-            completed_orders = Order.objects.filter(
-                buyer=user,
-                status__in=['completed', 'delivered']
-            ).count()
-            
-            # Dispute analysis
-            disputes_filed = Dispute.objects.filter(complainant=user).count()
-            disputes_won = Dispute.objects.filter(
-                complainant=user,
-                status='RESOLVED',
-                winner_id=user.id
-            ).count()
+            total_orders = frame.order_count
+            completed_orders = int(frame.completed.sum())
+            
+            # Dispute analysis; a dispute is won when arbitration decided for the buyer
+            disputes_filed = frame.disputes_filed
+            disputes_won = frame.disputes_won
             
             # Calculate risk metrics
             dispute_rate = disputes_filed / total_orders if total_orders > 0 else 0
@@ -577,31 +608,25 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to analyze risk profile: {e}")
             return {}
     
-    def _analyze_loyalty_indicators(self, user) -> Dict[str, Any]:
+    def _analyze_loyalty_indicators(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Analyze indicators of user loyalty and engagement"""
         try:
-            from orders.models import Order
-            
             # Account metrics
             account_age = (timezone.now() - user.date_joined).days
             
             # Order frequency
-            orders = Order.objects.filter(buyer=user).order_by('created_at')
-            if orders.count() < 2:
+            order_count = frame.order_count
+            if order_count < 2:
                 return {'insufficient_data': True}
             
             # Calculate recency, frequency, monetary (RFM) analysis
-            last_order_days = (timezone.now() - orders.last().created_at).days
-            order_frequency = orders.count() / max(account_age, 1) * 365  # Orders per year
-            total_monetary = sum(float(order.total_amount or 0) for order in orders)
+            last_order_days = int((timezone.now().timestamp() - frame.order_times[-1]) // DAY)
+            order_frequency = order_count / max(account_age, 1) * 365  # Orders per year
+            total_monetary = float(frame.order_totals.sum())
             
             # Engagement consistency
-            order_dates = [order.created_at.date() for order in orders]
-            if len(order_dates) > 1:
-                intervals = [(order_dates[i] - order_dates[i-1]).days for i in range(1, len(order_dates))]
-                consistency_score = 1 / (statistics.stdev(intervals) + 1) if len(intervals) > 1 else 1
-            else:
-                consistency_score = 0
+            intervals = np.diff(frame.order_days())
+            consistency_score = float(1 / (intervals.std(ddof=1) + 1)) if len(intervals) > 1 else 1
             
             # Loyalty score calculation
             recency_score = max(0, 1 - last_order_days / 365)  # Higher if recent
@@ -639,18 +664,34 @@ class UserPreferenceService(BaseService):
             logger.error(f"Failed to analyze loyalty indicators: {e}")
             return {}
     
-    def _calculate_profile_completeness(self, user) -> Dict[str, Any]:
+    def _analyze_interaction_patterns(self, user, frame: ProfileFrame) -> Dict[str, Any]:
+        """Summarize interactions from the compacted event summary, never the raw log"""
+        summary = frame.interaction_summary
+        if not summary.get('total'):
+            return {'no_data': True}
+        
+        def top(key):
+            return [value for value, _ in sorted(summary.get(key, {}).items(), key=lambda item: -item[1])[:5]]
+        
+        by_type = summary.get('by_type', {})
+        return {
+            'total_interactions': summary['total'],
+            'interaction_types': by_type,
+            'dominant_interaction': max(by_type, key=by_type.get) if by_type else None,
+            'top_products': top('product_id'),
+            'top_categories': top('category_id'),
+            'top_vendors': top('vendor_id'),
+            'first_interaction': summary.get('first_at'),
+            'last_interaction': summary.get('last_at')
+        }
+    
+    def _calculate_profile_completeness(self, user, frame: ProfileFrame) -> Dict[str, Any]:
         """Calculate how complete the user's behavioral profile is"""
         try:
-            from orders.models import Order
-            
             completeness_factors = {
-                'has_orders': Order.objects.filter(buyer=user).exists(),
-                'has_multiple_orders': Order.objects.filter(buyer=user).count() >= 3,
-                'has_recent_activity': Order.objects.filter(
-                    buyer=user,
-                    created_at__gte=timezone.now() - timedelta(days=90)
-                ).exists(),
+                'has_orders': frame.order_count > 0,
+                'has_multiple_orders': frame.order_count >= 3,
+                'has_recent_activity': frame.count_since((timezone.now() - timedelta(days=90)).timestamp()) > 0,
                 'account_age_sufficient': (timezone.now() - user.date_joined).days >= 30
             }
             
@@ -38,8 +38,7 @@ class UserService(BaseService):
     def initialize(self) -> bool:
         """Initialize the user service."""
         try:
-            # Warm up frequently accessed data
-            self._warm_cache()
+            # Cache warming is deferred to warm_up(), run by ServiceRegistry.warm_up
             return True
         except Exception as e:
             logger.error(f"Failed to initialize user service: {e}")
@@ -59,7 +58,7 @@ class UserService(BaseService):
         """Get required configuration keys."""
         return ["max_login_attempts", "lockout_duration"]
 
-    def _warm_cache(self):
+    def warm_up(self):
         """Warm up frequently accessed cache data."""
         try:
             # Cache user count
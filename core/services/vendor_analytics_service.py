@@ -26,10 +26,28 @@ class VendorAnalyticsService(BaseService):
     service_name = "vendor_analytics_service"
     description = "Comprehensive vendor analytics and business insights"
     
+    # Days of daily rollups read by lifetime-style sections (products, customers, quality)
+    ROLLUP_WINDOW_DAYS = 365
+    
     def __init__(self):
         super().__init__()
         self.cache_timeout = 3600  # 1 hour cache for analytics
     
+    def initialize(self):
+        """Initialize the vendor analytics service"""
+        logger.info("Vendor analytics service initialized successfully")
+        return True
+    
+    def cleanup(self):
+        """Clean up the vendor analytics service"""
+        return True
+    
+    def refresh_rollups(self, days: int = None) -> int:
+        """Rebuild the daily rollup tables for the last ``days`` days, or all history."""
+        from .vendor_rollups import rebuild_rollups
+        
+        return rebuild_rollups(days)
+    
     @performance_monitor
     def get_vendor_dashboard(self, vendor: User) -> Dict[str, Any]:
         """Get comprehensive vendor dashboard data."""
@@ -40,16 +58,22 @@ class VendorAnalyticsService(BaseService):
             if cached_data:
                 return cached_data
             
+            summary_metrics = self._get_summary_metrics(vendor)
+            quality_metrics = self._get_quality_metrics(vendor)
+            product_performance = self._get_product_performance(vendor)
+            
             dashboard_data = {
-                'summary_metrics': self._get_summary_metrics(vendor),
+                'summary_metrics': summary_metrics,
                 'sales_performance': self._get_sales_performance(vendor),
-                'product_performance': self._get_product_performance(vendor),
+                'product_performance': product_performance,
                 'customer_insights': self._get_customer_insights(vendor),
-                'quality_metrics': self._get_quality_metrics(vendor),
+                'quality_metrics': quality_metrics,
                 'revenue_breakdown': self._get_revenue_breakdown(vendor),
                 'geographic_insights': self._get_geographic_insights(vendor),
                 'trend_analysis': self._get_trend_analysis(vendor),
-                'recommendations': self._get_actionable_recommendations(vendor)
+                'recommendations': self._get_actionable_recommendations(
+                    vendor, summary_metrics, quality_metrics, product_performance
+                )
             }
             
             # Cache the dashboard data
@@ -61,62 +85,68 @@ class VendorAnalyticsService(BaseService):
             logger.error(f"Error getting vendor dashboard for {vendor.username}: {str(e)}")
             return {}
     
+    def _rollup_window_start(self):
+        """Get the first day covered by lifetime-style dashboard sections."""
+        return timezone.localdate() - timedelta(days=self.ROLLUP_WINDOW_DAYS - 1)
+    
     def _get_summary_metrics(self, vendor: User) -> Dict[str, Any]:
         """Get summary metrics for the vendor."""
         try:
-            from orders.models import Order
+            from core.models import VendorDailyBuyerStats
             from products.models import Product
+            from vendors.models import Vendor
             
-            # Get date range (last 30 days)
-            end_date = timezone.now()
-            start_date = end_date - timedelta(days=30)
+            # Get date range (last 30 days, previous 30 days)
+            today = timezone.localdate()
+            start_date = today - timedelta(days=29)
             previous_start = start_date - timedelta(days=30)
+            current = Q(date__gte=start_date)
+            previous = Q(date__lt=start_date)
             
-            # Current period metrics
-            current_orders = Order.objects.filter(
+            # Both periods from the daily rollup in one query
+            totals = VendorDailyBuyerStats.objects.filter(
                 vendor=vendor,
-                created_at__gte=start_date,
-                created_at__lte=end_date
+                date__gte=previous_start,
+                date__lte=today
+            ).aggregate(
+                current_revenue=Sum('revenue_btc', filter=current),
+                current_revenue_xmr=Sum('revenue_xmr', filter=current),
+                current_orders=Sum('orders', filter=current),
+                current_customers=Count('buyer', filter=current, distinct=True),
+                previous_revenue=Sum('revenue_btc', filter=previous),
+                previous_orders=Sum('orders', filter=previous),
+                previous_customers=Count('buyer', filter=previous, distinct=True)
             )
             
-            current_revenue = current_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-            current_order_count = current_orders.count()
-            current_customers = current_orders.values('buyer').distinct().count()
-            
-            # Previous period metrics
-            previous_orders = Order.objects.filter(
-                vendor=vendor,
-                created_at__gte=previous_start,
-                created_at__lt=start_date
-            )
-            
-            previous_revenue = previous_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-            previous_order_count = previous_orders.count()
-            previous_customers = previous_orders.values('buyer').distinct().count()
+            current_revenue = totals['current_revenue'] or Decimal('0')
+            previous_revenue = totals['previous_revenue'] or Decimal('0')
+            current_order_count = totals['current_orders'] or 0
+            previous_order_count = totals['previous_orders'] or 0
+            current_customers = totals['current_customers']
+            previous_customers = totals['previous_customers']
             
             # Calculate growth percentages
             revenue_growth = self._calculate_growth(current_revenue, previous_revenue)
             order_growth = self._calculate_growth(current_order_count, previous_order_count)
             customer_growth = self._calculate_growth(current_customers, previous_customers)
             
-            # Get average rating
-            from reviews.models import Review
-            reviews = Review.objects.filter(product__vendor=vendor)
-            avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0.0
+            # Get average rating from the vendor profile
+            avg_rating = Vendor.objects.filter(user=vendor).values_list('rating', flat=True).first() or 0.0
             
             # Calculate rating change (simplified)
             rating_change = 0.0  # In a real system, compare with previous period
             
             return {
                 'total_revenue': float(current_revenue),
+                'total_revenue_xmr': float(totals['current_revenue_xmr'] or 0),
                 'revenue_growth': revenue_growth,
                 'total_orders': current_order_count,
                 'order_growth': order_growth,
                 'active_customers': current_customers,
                 'customer_growth': customer_growth,
-                'average_rating': avg_rating,
+                'average_rating': float(avg_rating),
                 'rating_change': rating_change,
-                'total_products': Product.objects.filter(vendor=vendor, active=True).count()
+                'total_products': Product.objects.filter(vendor__user=vendor, is_available=True).count()
             }
             
         except Exception as e:
@@ -126,35 +156,33 @@ class VendorAnalyticsService(BaseService):
     def _get_sales_performance(self, vendor: User) -> Dict[str, Any]:
         """Get sales performance data."""
         try:
-            from orders.models import Order
+            from core.models import VendorDailyBuyerStats
+            
+            today = timezone.localdate()
+            
+            # One grouped query over the daily rollup covers both charts
+            revenue_by_day = dict(
+                VendorDailyBuyerStats.objects.filter(
+                    vendor=vendor,
+                    date__gt=today - timedelta(weeks=5),
+                    date__lte=today
+                ).values('date').annotate(revenue=Sum('revenue_btc')).values_list('date', 'revenue')
+            )
             
             # Daily sales for last 7 days
             daily_sales = {}
             for i in range(7):
-                date = timezone.now() - timedelta(days=i)
-                day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
-                day_end = day_start + timedelta(days=1)
-                
-                day_revenue = Order.objects.filter(
-                    vendor=vendor,
-                    created_at__gte=day_start,
-                    created_at__lt=day_end
-                ).aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-                
-                daily_sales[date.strftime('%a')] = float(day_revenue)
+                day = today - timedelta(days=i)
+                daily_sales[day.strftime('%a')] = float(revenue_by_day.get(day) or 0)
             
             # Weekly sales for last 4 weeks
             weekly_sales = {}
             for i in range(4):
-                week_start = timezone.now() - timedelta(weeks=i+1)
-                week_end = week_start + timedelta(weeks=1)
-                
-                week_revenue = Order.objects.filter(
-                    vendor=vendor,
-                    created_at__gte=week_start,
-                    created_at__lt=week_end
-                ).aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-                
+                week_start = today - timedelta(weeks=i + 1)
+                week_revenue = sum(
+                    (revenue_by_day.get(week_start + timedelta(days=d)) or Decimal('0') for d in range(7)),
+                    Decimal('0')
+                )
                 weekly_sales[f"Week {i+1}"] = float(week_revenue)
             
             return {
@@ -170,32 +198,27 @@ class VendorAnalyticsService(BaseService):
     def _get_product_performance(self, vendor: User) -> Dict[str, Any]:
         """Get product performance data."""
         try:
-            from orders.models import Order
-            from products.models import Product
+            from core.models import VendorDailyProductStats
             
             # Get top performing products
-            top_products = []
-            products = Product.objects.filter(vendor=vendor, active=True)
-            
-            for product in products:
-                product_orders = Order.objects.filter(
-                    vendor=vendor,
-                    products=product
-                )
-                
-                sales_count = product_orders.count()
-                revenue = product_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-                
-                if sales_count > 0:
-                    top_products.append({
-                        'name': product.name,
-                        'sales_count': sales_count,
-                        'revenue': float(revenue),
-                        'avg_price': float(revenue / sales_count)
-                    })
+            products = VendorDailyProductStats.objects.filter(
+                vendor=vendor,
+                date__gte=self._rollup_window_start()
+            ).values('product__name').annotate(
+                sales_count=Sum('orders'),
+                revenue=Sum('revenue_btc')
+            ).order_by('-revenue')
             
-            # Sort by revenue
-            top_products.sort(key=lambda x: x['revenue'], reverse=True)
+            top_products = [
+                {
+                    'name': product['product__name'],
+                    'sales_count': product['sales_count'],
+                    'revenue': float(product['revenue'] or 0),
+                    'avg_price': float((product['revenue'] or 0) / product['sales_count'])
+                }
+                for product in products
+                if product['sales_count']
+            ]
             
             return {
                 'top_products': top_products[:10],
@@ -210,10 +233,16 @@ class VendorAnalyticsService(BaseService):
     def _get_customer_insights(self, vendor: User) -> Dict[str, Any]:
         """Get customer insights and segmentation."""
         try:
-            from orders.models import Order
+            from core.models import VendorDailyBuyerStats
             
-            # Get all customers
-            customers = Order.objects.filter(vendor=vendor).values('buyer').distinct()
+            # Per-customer totals from the daily rollup
+            customers = VendorDailyBuyerStats.objects.filter(
+                vendor=vendor,
+                date__gte=self._rollup_window_start()
+            ).values('buyer').annotate(
+                total_spent=Sum('revenue_btc'),
+                order_count=Sum('orders')
+            )
             
             # Segment customers by order value
             segments = {
@@ -222,14 +251,13 @@ class VendorAnalyticsService(BaseService):
                 'low_value': {'count': 0, 'percentage': 0.0}
             }
             
-            total_customers = customers.count()
-            
-            for customer_data in customers:
-                customer = customer_data['buyer']
-                total_spent = Order.objects.filter(
-                    vendor=vendor,
-                    buyer=customer
-                ).aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
+            total_customers = 0
+            repeat_customers = 0
+            for customer in customers:
+                total_customers += 1
+                total_spent = customer['total_spent'] or Decimal('0')
+                if customer['order_count'] > 1:
+                    repeat_customers += 1
                 
                 if total_spent >= 500:
                     segments['high_value']['count'] += 1
@@ -249,7 +277,7 @@ class VendorAnalyticsService(BaseService):
                     {'name': 'Low Value (<$100)', 'count': segments['low_value']['count'], 'percentage': segments['low_value']['percentage']}
                 ],
                 'total_customers': total_customers,
-                'repeat_customers': self._get_repeat_customer_count(vendor)
+                'repeat_customers': repeat_customers
             }
             
         except Exception as e:
@@ -259,16 +287,21 @@ class VendorAnalyticsService(BaseService):
     def _get_quality_metrics(self, vendor: User) -> Dict[str, Any]:
         """Get quality and dispute metrics."""
         try:
+            from core.models import VendorDailyBuyerStats
             from disputes.models import Dispute
-            from orders.models import Order
             
-            # Get total orders
-            total_orders = Order.objects.filter(vendor=vendor).count()
+            # Orders and disputes from the daily rollup
+            totals = VendorDailyBuyerStats.objects.filter(
+                vendor=vendor,
+                date__gte=self._rollup_window_start()
+            ).aggregate(orders=Sum('orders'), disputes=Sum('disputes'))
+            total_orders = totals['orders'] or 0
+            total_disputes = totals['disputes'] or 0
             
-            # Get disputes
-            disputes = Dispute.objects.filter(vendor=vendor)
-            total_disputes = disputes.count()
-            resolved_disputes = disputes.filter(status='resolved').count()
+            resolved_disputes = Dispute.objects.filter(
+                respondent=vendor,
+                status__in=['RESOLVED', 'CLOSED']
+            ).count()
             
             # Calculate metrics
             dispute_rate = (total_disputes / total_orders * 100) if total_orders > 0 else 0
@@ -298,49 +331,34 @@ class VendorAnalyticsService(BaseService):
     def _get_revenue_breakdown(self, vendor: User) -> Dict[str, Any]:
         """Get revenue breakdown by category and time."""
         try:
-            from orders.models import Order
-            from products.models import Product, Category
+            from core.models import VendorDailyProductStats
+            from orders.models import OrderItem
+            from django.db.models.functions import ExtractHour
+            from .vendor_rollups import LINE_BTC, SALE_STATUSES
             
             # Revenue by category
-            category_revenue = {}
-            categories = Category.objects.all()
-            
-            for category in categories:
-                category_products = Product.objects.filter(
+            category_revenue = {
+                row['product__category__name']: float(row['revenue'])
+                for row in VendorDailyProductStats.objects.filter(
                     vendor=vendor,
-                    category=category,
-                    active=True
-                )
-                
-                if category_products.exists():
-                    category_orders = Order.objects.filter(
-                        vendor=vendor,
-                        products__in=category_products
-                    )
-                    
-                    revenue = category_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-                    if revenue > 0:
-                        category_revenue[category.name] = float(revenue)
-            
-            # Revenue by time of day
-            time_revenue = {
-                'morning': 0.0,
-                'afternoon': 0.0,
-                'evening': 0.0,
-                'night': 0.0
+                    date__gte=self._rollup_window_start()
+                ).values('product__category__name').annotate(revenue=Sum('revenue_btc'))
+                if row['revenue']
             }
             
-            orders = Order.objects.filter(vendor=vendor)
-            for order in orders:
-                hour = order.created_at.hour
-                if 6 <= hour < 12:
-                    time_revenue['morning'] += float(order.total_amount or 0)
-                elif 12 <= hour < 17:
-                    time_revenue['afternoon'] += float(order.total_amount or 0)
-                elif 17 <= hour < 22:
-                    time_revenue['evening'] += float(order.total_amount or 0)
-                else:
-                    time_revenue['night'] += float(order.total_amount or 0)
+            # Revenue by time of day; the daily rollup has no hours, so read the last 30 days of items
+            hour = ExtractHour('order__created_at')
+            by_time = OrderItem.objects.filter(
+                product__vendor__user=vendor,
+                order__status__in=SALE_STATUSES,
+                order__created_at__gte=timezone.now() - timedelta(days=30)
+            ).annotate(hour=hour).aggregate(
+                morning=Sum(LINE_BTC, filter=Q(hour__gte=6, hour__lt=12)),
+                afternoon=Sum(LINE_BTC, filter=Q(hour__gte=12, hour__lt=17)),
+                evening=Sum(LINE_BTC, filter=Q(hour__gte=17, hour__lt=22)),
+                night=Sum(LINE_BTC, filter=Q(hour__lt=6) | Q(hour__gte=22))
+            )
+            time_revenue = {period: float(value or 0) for period, value in by_time.items()}
             
             return {
                 'by_category': category_revenue,
@@ -355,11 +373,6 @@ class VendorAnalyticsService(BaseService):
     def _get_geographic_insights(self, vendor: User) -> Dict[str, Any]:
         """Get geographic insights (anonymized for privacy)."""
         try:
-            from orders.models import Order
-            
-            # Get orders with shipping addresses
-            orders = Order.objects.filter(vendor=vendor)
-            
             # Simplified geographic data (in real system, analyze shipping addresses)
             locations = [
                 {'name': 'North America', 'orders': 45, 'revenue': 1250.00},
@@ -381,34 +394,37 @@ class VendorAnalyticsService(BaseService):
     def _get_trend_analysis(self, vendor: User) -> Dict[str, Any]:
         """Get trend analysis and predictions."""
         try:
-            from orders.models import Order
-            
-            # Analyze recent trends
-            recent_orders = Order.objects.filter(
-                vendor=vendor,
-                created_at__gte=timezone.now() - timedelta(days=7)
-            )
+            from core.models import VendorDailyBuyerStats
             
-            previous_week_orders = Order.objects.filter(
+            # Last 7 days against the 7 days before, in one query
+            today = timezone.localdate()
+            recent = Q(date__gt=today - timedelta(days=7))
+            previous = Q(date__lte=today - timedelta(days=7))
+            totals = VendorDailyBuyerStats.objects.filter(
                 vendor=vendor,
-                created_at__gte=timezone.now() - timedelta(days=14),
-                created_at__lt=timezone.now() - timedelta(days=7)
+                date__gt=today - timedelta(days=14),
+                date__lte=today
+            ).aggregate(
+                recent_revenue=Sum('revenue_btc', filter=recent),
+                previous_revenue=Sum('revenue_btc', filter=previous),
+                recent_customers=Count('buyer', filter=recent, distinct=True),
+                previous_customers=Count('buyer', filter=previous, distinct=True)
             )
             
-            recent_revenue = recent_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
-            previous_revenue = previous_week_orders.aggregate(Sum('total_amount'))['total_amount__sum'] or Decimal('0')
+            recent_revenue = totals['recent_revenue'] or Decimal('0')
+            previous_revenue = totals['previous_revenue'] or Decimal('0')
             
             # Determine trends
-            if recent_revenue > previous_revenue * 1.1:
+            if recent_revenue > previous_revenue * Decimal('1.1'):
                 revenue_trend = 'increasing'
-            elif recent_revenue < previous_revenue * 0.9:
+            elif recent_revenue < previous_revenue * Decimal('0.9'):
                 revenue_trend = 'decreasing'
             else:
                 revenue_trend = 'stable'
             
             # Customer behavior trends
-            recent_customers = recent_orders.values('buyer').distinct().count()
-            previous_customers = previous_week_orders.values('buyer').distinct().count()
+            recent_customers = totals['recent_customers']
+            previous_customers = totals['previous_customers']
             
             if recent_customers > previous_customers * 1.05:
                 customer_trend = 'growing'
@@ -436,14 +452,18 @@ class VendorAnalyticsService(BaseService):
             logger.error(f"Error getting trend analysis for vendor {vendor.username}: {str(e)}")
             return {}
     
-    def _get_actionable_recommendations(self, vendor: User) -> List[Dict[str, Any]]:
+    def _get_actionable_recommendations(self, vendor: User, summary: Dict[str, Any] = None,
+                                        quality: Dict[str, Any] = None,
+                                        product_perf: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Get actionable recommendations for the vendor."""
         try:
             recommendations = []
             
-            # Analyze current performance
-            summary = self._get_summary_metrics(vendor)
-            quality = self._get_quality_metrics(vendor)
+            # Analyze current performance, reusing sections the dashboard already computed
+            if summary is None:
+                summary = self._get_summary_metrics(vendor)
+            if quality is None:
+                quality = self._get_quality_metrics(vendor)
             
             # Revenue optimization recommendations
             if summary.get('revenue_growth', 0) < 5:
@@ -473,7 +493,8 @@ class VendorAnalyticsService(BaseService):
                 })
             
             # Product performance recommendations
-            product_perf = self._get_product_performance(vendor)
+            if product_perf is None:
+                product_perf = self._get_product_performance(vendor)
             if product_perf.get('total_products', 0) > 20:
                 recommendations.append({
                     'priority': 'medium',
@@ -513,17 +534,18 @@ class VendorAnalyticsService(BaseService):
     def _get_repeat_customer_count(self, vendor: User) -> int:
         """Get count of repeat customers."""
         try:
-            from orders.models import Order
+            from core.models import VendorDailyBuyerStats
             
             # Get customers with multiple orders
-            customer_order_counts = Order.objects.filter(
-                vendor=vendor
+            customer_order_counts = VendorDailyBuyerStats.objects.filter(
+                vendor=vendor,
+                date__gte=self._rollup_window_start()
             ).values('buyer').annotate(
-                order_count=Count('id')
+                order_count=Sum('orders')
             ).filter(order_count__gt=1)
             
             return customer_order_counts.count()
             
         except Exception as e:
             logger.error(f"Error getting repeat customer count for vendor {vendor.username}: {str(e)}")
-            return 0
\ No newline at end of file
+            return 0
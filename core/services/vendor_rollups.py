@@ -0,0 +1,163 @@
+"""
+Vendor Rollups
+Maintains the daily vendor analytics rollup tables read by VendorAnalyticsService.
+
+Rows are recomputed per (vendor, day) from that day's orders only, so keeping them
+current after an order status change costs a few small aggregates regardless of how
+much a vendor has sold over its lifetime.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Order states that count as a sale
+SALE_STATUSES = ('PAID', 'PROCESSING', 'SHIPPED', 'DELIVERED', 'DISPUTED')
+
+LINE_BTC = ExpressionWrapper(F('price_btc') * F('quantity'), output_field=DecimalField(max_digits=20, decimal_places=8))
+LINE_XMR = ExpressionWrapper(F('price_xmr') * F('quantity'), output_field=DecimalField(max_digits=20, decimal_places=8))
+
+
+def order_day(order) -> date:
+    """Get the rollup day an order is counted on"""
+    return timezone.localdate(order.created_at)
+
+
+def vendor_days_for_order(order) -> Set[Tuple[int, date]]:
+    """Get the (vendor user id, day) pairs an order contributes to"""
+    from orders.models import OrderItem
+
+    vendor_ids = OrderItem.objects.filter(order_id=order.pk).values_list(
+        'product__vendor__user_id', flat=True
+    ).distinct()
+    day = order_day(order)
+    return {(vendor_id, day) for vendor_id in vendor_ids}
+
+
+def _aggregate_items(items):
+    """Product and buyer rows for a set of order items, grouped by vendor, day and key"""
+    items = items.filter(order__status__in=SALE_STATUSES).annotate(
+        day=TruncDate('order__created_at'), vendor_id=F('product__vendor__user_id')
+    )
+
+    product_rows = items.values('vendor_id', 'day', 'product_id').annotate(
+        orders=Count('order', distinct=True),
+        units=Sum('quantity'),
+        revenue_btc=Sum(LINE_BTC),
+        revenue_xmr=Sum(LINE_XMR),
+        unique_buyers=Count('order__user', distinct=True),
+        disputes=Count('order__dispute', distinct=True),
+    ).order_by()
+
+    buyer_rows = items.values('vendor_id', 'day', 'order__user_id').annotate(
+        orders=Count('order', distinct=True),
+        revenue_btc=Sum(LINE_BTC),
+        revenue_xmr=Sum(LINE_XMR),
+        disputes=Count('order__dispute', distinct=True),
+    ).order_by()
+
+    return product_rows, buyer_rows
+
+
+def _write_rows(product_rows, buyer_rows, batch_size: int = 1000) -> int:
+    from core.models import VendorDailyBuyerStats, VendorDailyProductStats
+
+    VendorDailyProductStats.objects.bulk_create([
+        VendorDailyProductStats(
+            vendor_id=row['vendor_id'],
+            product_id=row['product_id'],
+            date=row['day'],
+            orders=row['orders'],
+            units=row['units'] or 0,
+            revenue_btc=row['revenue_btc'] or Decimal('0'),
+            revenue_xmr=row['revenue_xmr'] or Decimal('0'),
+            unique_buyers=row['unique_buyers'],
+            disputes=row['disputes'],
+        )
+        for row in product_rows
+    ], batch_size=batch_size)
+
+    buyers = [
+        VendorDailyBuyerStats(
+            vendor_id=row['vendor_id'],
+            buyer_id=row['order__user_id'],
+            date=row['day'],
+            orders=row['orders'],
+            revenue_btc=row['revenue_btc'] or Decimal('0'),
+            revenue_xmr=row['revenue_xmr'] or Decimal('0'),
+            disputes=row['disputes'],
+        )
+        for row in buyer_rows
+    ]
+    VendorDailyBuyerStats.objects.bulk_create(buyers, batch_size=batch_size)
+    return len(buyers)
+
+
+def refresh_vendor_days(vendor_days: Iterable[Tuple[int, date]]):
+    """Recompute the rollup rows of the given (vendor user id, day) pairs"""
+    from core.models import VendorDailyBuyerStats, VendorDailyProductStats
+    from orders.models import OrderItem
+
+    vendor_days = {(vendor_id, day) for vendor_id, day in vendor_days if vendor_id}
+    if not vendor_days:
+        return
+
+    scope = Q()
+    for vendor_id, day in vendor_days:
+        scope |= Q(vendor_id=vendor_id, date=day)
+
+    item_scope = Q()
+    for vendor_id, day in vendor_days:
+        item_scope |= Q(product__vendor__user_id=vendor_id, order__created_at__date=day)
+    items = OrderItem.objects.filter(item_scope)
+
+    product_rows, buyer_rows = _aggregate_items(items)
+    with transaction.atomic():
+        VendorDailyProductStats.objects.filter(scope).delete()
+        VendorDailyBuyerStats.objects.filter(scope).delete()
+        _write_rows(list(product_rows), list(buyer_rows))
+
+    _invalidate_dashboards({vendor_id for vendor_id, _ in vendor_days})
+
+
+def rebuild_rollups(days: Optional[int] = None) -> int:
+    """
+    Rebuild rollups from the order history
+
+    With ``days`` only the most recent days are rebuilt, which repairs rows missed by
+    bulk updates that bypass model signals; without it every day is rebuilt.
+    """
+    from core.models import VendorDailyBuyerStats, VendorDailyProductStats
+    from orders.models import OrderItem
+
+    items = OrderItem.objects.all()
+    product_stats = VendorDailyProductStats.objects.all()
+    buyer_stats = VendorDailyBuyerStats.objects.all()
+    if days:
+        since = timezone.localdate() - timedelta(days=days - 1)
+        items = items.filter(order__created_at__date__gte=since)
+        product_stats = product_stats.filter(date__gte=since)
+        buyer_stats = buyer_stats.filter(date__gte=since)
+
+    product_rows, buyer_rows = _aggregate_items(items)
+    with transaction.atomic():
+        product_stats.delete()
+        buyer_stats.delete()
+        written = _write_rows(product_rows.iterator(), buyer_rows.iterator())
+
+    logger.info(f"Rebuilt vendor rollups ({days or 'all'} days, {written} vendor-buyer rows)")
+    return written
+
+
+def _invalidate_dashboards(vendor_ids: Iterable[int]):
+    from .tiered_cache import service_cache
+
+    service_cache.delete_many([f"service:vendor_analytics_service:vendor_dashboard:{vendor_id}" for vendor_id in vendor_ids])
@@ -8,7 +8,6 @@ from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
 from django.db import transaction
 from django.utils import timezone
 
@@ -25,11 +24,6 @@ class VendorService(BaseService):
     version = "1.0.0"
     description = "Vendor management and operations service"
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self._vendor_cache = {}
-        self._rating_cache = {}
-
     def initialize(self) -> bool:
         """Initialize the vendor service."""
         try:
@@ -44,8 +38,7 @@ class VendorService(BaseService):
         """Clean up the vendor service."""
         try:
             # Clear caches
-            self._vendor_cache.clear()
-            self._rating_cache.clear()
+            self.clear_local_cache()
             logger.info("Vendor service cleaned up successfully")
             return True
         except Exception as e:
@@ -532,8 +525,7 @@ class VendorService(BaseService):
                 "approved_vendors": approved_vendors,
                 "active_vendors": active_vendors,
                 "total_ratings": total_ratings,
-                "vendor_cache_size": len(self._vendor_cache),
-                "rating_cache_size": len(self._rating_cache),
+                "cache_stats": self.get_cache_stats(),
             }
         except Exception as e:
             logger.error(f"Failed to get service health: {e}")
@@ -15,6 +15,7 @@ from django.db.models import Q, F, Sum, Count, Max, Min, Avg
 from django.utils import timezone
 
 from .base_service import BaseService, performance_monitor, cache_result
+from .tiered_cache import tag
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -45,8 +46,7 @@ class WalletService(BaseService):
     def initialize(self) -> bool:
         """Initialize the wallet service."""
         try:
-            # Warm up cache with frequently accessed data
-            self._warm_cache()
+            # Cache warming is deferred to warm_up(), run by ServiceRegistry.warm_up
             return True
         except Exception as e:
             logger.error(f"Failed to initialize wallet service: {e}")
@@ -66,7 +66,7 @@ class WalletService(BaseService):
         """Get required configuration keys."""
         return ["max_daily_withdrawal", "withdrawal_cooldown"]
 
-    def _warm_cache(self):
+    def warm_up(self):
         """Warm up frequently accessed cache data."""
         try:
             # Cache total wallet count
@@ -97,7 +97,8 @@ class WalletService(BaseService):
             logger.warning(f"Failed to cache exchange rates: {e}")
 
     @performance_monitor
-    @cache_result(timeout=WALLET_CACHE_TIMEOUT, key_func=lambda user_id: f"wallet:{user_id}")
+    @cache_result(timeout=WALLET_CACHE_TIMEOUT, key_func=lambda user_id: f"wallet:{user_id}",
+                  tags=lambda user_id: [tag('wallets.wallet', user=user_id)], stale_timeout=0)
     def get_wallet_by_user(self, user_id: str) -> Optional[Any]:
         """Get wallet for a specific user with optimized caching."""
         try:
@@ -136,7 +137,10 @@ class WalletService(BaseService):
                 for wallet in db_wallets:
                     cached_wallets[str(wallet.user_id)] = wallet
                     # Cache the fetched wallet
-                    self.set_cached(f"wallet:{wallet.user_id}", wallet, self.WALLET_CACHE_TIMEOUT)
+                    self.set_cached(
+                        f"wallet:{wallet.user_id}", wallet, self.WALLET_CACHE_TIMEOUT,
+                        tags=[tag('wallets.wallet', user=wallet.user_id)]
+                    )
 
             except Exception as e:
                 logger.error(f"Failed to bulk fetch wallets: {e}")
@@ -179,7 +183,8 @@ class WalletService(BaseService):
             return None, False, str(e)
 
     @performance_monitor
-    @cache_result(timeout=BALANCE_CACHE_TIMEOUT, key_func=lambda user_id, currency: f"balance:{user_id}:{currency}")
+    @cache_result(timeout=BALANCE_CACHE_TIMEOUT, key_func=lambda user_id, currency: f"balance:{user_id}:{currency}",
+                  tags=lambda user_id, currency: [tag('wallets.wallet', user=user_id)], stale_timeout=0)
     def get_balance(self, user_id: str, currency: str) -> Tuple[Decimal, str]:
         """Get user's balance for a specific currency with caching."""
         try:
@@ -533,17 +538,12 @@ class WalletService(BaseService):
 
     def _invalidate_wallet_caches(self, user_id: str, currency: str):
         """Invalidate all caches related to a wallet and currency."""
-        cache_keys = [
-            f"wallet:{user_id}",
-            f"balance:{user_id}:{currency}",
-            f"available_balance:{user_id}:{currency}",
-            f"wallet_stats:{user_id}"
-        ]
-        for key in cache_keys:
-            self.clear_cache(key)
+        # Every per-user wallet key is tagged with the wallet owner, including the
+        # @cache_result keys whose full names the old explicit key list never matched
+        self.invalidate_tags(tag('wallets.wallet', user=user_id), tag('wallets.wallet'))
 
     @performance_monitor
-    @cache_result(timeout=STATS_CACHE_TIMEOUT)
+    @cache_result(timeout=STATS_CACHE_TIMEOUT, tags=[tag('wallets.wallet')])
     def get_total_wallet_count(self) -> int:
         """Get total wallet count with caching."""
         try:
@@ -554,7 +554,8 @@ class WalletService(BaseService):
             return 0
 
     @performance_monitor
-    @cache_result(timeout=STATS_CACHE_TIMEOUT, key_func=lambda currency: f"total_balance:{currency}")
+    @cache_result(timeout=STATS_CACHE_TIMEOUT, key_func=lambda currency: f"total_balance:{currency}",
+                  tags=[tag('wallets.wallet')])
     def get_total_balance_by_currency(self, currency: str) -> Decimal:
         """Get total balance across all wallets for a currency."""
         try:
@@ -620,7 +621,7 @@ class WalletService(BaseService):
                 if isinstance(value, Decimal):
                     stats[key] = float(value) if value else 0.0
 
-            self.set_cached(cache_key, stats, self.STATS_CACHE_TIMEOUT)
+            self.set_cached(cache_key, stats, self.STATS_CACHE_TIMEOUT, tags=[tag('wallets.wallet')])
             return stats
 
         except Exception as e:
@@ -679,7 +680,9 @@ class WalletService(BaseService):
                     if tx[field] and isinstance(tx[field], Decimal):
                         tx[field] = float(tx[field])
 
-            self.set_cached(cache_key, result, self.TRANSACTION_CACHE_TIMEOUT)
+            self.set_cached(
+                cache_key, result, self.TRANSACTION_CACHE_TIMEOUT, tags=[tag('wallets.wallet', user=user_id)]
+            )
             return result
 
         except Exception as e:
@@ -689,21 +692,16 @@ class WalletService(BaseService):
     def cleanup_old_data(self) -> Dict[str, int]:
         """Clean up old wallet data and optimize performance."""
         cleanup_stats = {
-            'deleted_old_transactions': 0,
+            'deleted_audit_logs': 0,
             'optimized_balances': 0,
             'cleared_cache_entries': 0
         }
 
         try:
-            # Clean up old transaction logs (keep last 90 days)
-            from wallets.models import WalletTransaction
-            
-            cutoff_date = timezone.now() - timedelta(days=90)
-            deleted_count, _ = WalletTransaction.objects.filter(
-                timestamp__lt=cutoff_date
-            ).delete()
-            
-            cleanup_stats['deleted_old_transactions'] = deleted_count
+            # Old audit entries go through the batched retention sweeper
+            from .retention import sweep
+
+            cleanup_stats['deleted_audit_logs'] = sweep(['audit_logs']).get('audit_logs', 0)
 
             # Clear expired caches
             # This would require a more sophisticated cache implementation
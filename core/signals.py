@@ -0,0 +1,139 @@
+"""
+Core Signals
+Keep derived core tables and tagged service caches in step with marketplace writes.
+"""
+
+import logging
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .services.tiered_cache import service_cache, tag
+from .services.vendor_rollups import SALE_STATUSES, refresh_vendor_days, vendor_days_for_order
+
+logger = logging.getLogger(__name__)
+
+
+def _refresh_on_commit(vendor_days):
+    """Recompute vendor rollup days once the current transaction commits."""
+
+    def apply():
+        try:
+            refresh_vendor_days(vendor_days)
+        except Exception as e:
+            logger.error(f"Failed to refresh vendor rollups for {vendor_days}: {e}")
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_init, sender="orders.Order", dispatch_uid="vendor_rollups_order_loaded")
+def remember_order_status(sender, instance, **kwargs):
+    """Remember the loaded status so saves can tell whether it changed."""
+    # Read from __dict__ so deferred status fields are not fetched
+    instance._rollup_status = instance.__dict__.get("status")
+
+
+@receiver(post_save, sender="orders.Order", dispatch_uid="vendor_rollups_order_saved")
+def refresh_rollups_for_order(sender, instance, created, **kwargs):
+    """Refresh the vendor days of an order whose status entered or left the counted states."""
+    previous = getattr(instance, "_rollup_status", None)
+    instance._rollup_status = instance.status
+
+    if previous == instance.status and not created:
+        return
+    if previous not in SALE_STATUSES and instance.status not in SALE_STATUSES:
+        return
+
+    try:
+        _refresh_on_commit(vendor_days_for_order(instance))
+    except Exception as e:
+        logger.error(f"Failed to schedule vendor rollup refresh for order {instance.pk}: {e}")
+
+
+@receiver(pre_delete, sender="orders.Order", dispatch_uid="vendor_rollups_order_deleted")
+def refresh_rollups_for_deleted_order(sender, instance, **kwargs):
+    """Items are gone after the delete, so collect the vendor days first."""
+    if instance.status not in SALE_STATUSES:
+        return
+
+    try:
+        _refresh_on_commit(vendor_days_for_order(instance))
+    except Exception as e:
+        logger.error(f"Failed to schedule vendor rollup refresh for order {instance.pk}: {e}")
+
+
+@receiver(post_save, sender="disputes.Dispute", dispatch_uid="vendor_rollups_dispute_saved")
+@receiver(post_delete, sender="disputes.Dispute", dispatch_uid="vendor_rollups_dispute_deleted")
+def refresh_rollups_for_dispute(sender, instance, **kwargs):
+    """Dispute counts are part of the rollup of the disputed order's day."""
+    if kwargs.get("signal") is post_save and not kwargs.get("created"):
+        return
+
+    try:
+        order = instance.order
+    except ObjectDoesNotExist:
+        # Deleted together with its order, which refreshed the rollups already
+        return
+
+    try:
+        _refresh_on_commit(vendor_days_for_order(order))
+    except Exception as e:
+        logger.error(f"Failed to schedule vendor rollup refresh for dispute {instance.pk}: {e}")
+
+
+# Fields whose values become row-group cache tags, e.g. tag('orders.order', user=5)
+CACHE_TAG_FIELDS = {
+    'products.product': ('vendor', 'category'),
+    'orders.order': ('user',),
+    'orders.orderitem': ('order', 'product'),
+    'wallets.wallet': ('user',),
+    'vendors.vendor': ('user',),
+}
+
+
+def cache_tags_for(instance):
+    """Get the cache tags a write to ``instance`` invalidates"""
+    label = instance._meta.label_lower
+    tags = {tag(label), tag(label, instance.pk)}
+    for field in CACHE_TAG_FIELDS[label]:
+        value = getattr(instance, f"{field}_id", None)
+        if value is not None:
+            tags.add(tag(label, **{field: value}))
+
+    if label == 'orders.orderitem':
+        # Item changes alter the buyer's order history
+        from orders.models import Order
+        user_id = Order.objects.filter(pk=instance.order_id).values_list('user_id', flat=True).first()
+        if user_id is not None:
+            tags.add(tag('orders.order', user=user_id))
+    return tags
+
+
+@receiver(post_save, sender="products.Product", dispatch_uid="cache_tags_product_saved")
+@receiver(post_delete, sender="products.Product", dispatch_uid="cache_tags_product_deleted")
+@receiver(post_save, sender="orders.Order", dispatch_uid="cache_tags_order_saved")
+@receiver(post_delete, sender="orders.Order", dispatch_uid="cache_tags_order_deleted")
+@receiver(post_save, sender="orders.OrderItem", dispatch_uid="cache_tags_order_item_saved")
+@receiver(post_delete, sender="orders.OrderItem", dispatch_uid="cache_tags_order_item_deleted")
+@receiver(post_save, sender="wallets.Wallet", dispatch_uid="cache_tags_wallet_saved")
+@receiver(post_delete, sender="wallets.Wallet", dispatch_uid="cache_tags_wallet_deleted")
+@receiver(post_save, sender="vendors.Vendor", dispatch_uid="cache_tags_vendor_saved")
+@receiver(post_delete, sender="vendors.Vendor", dispatch_uid="cache_tags_vendor_deleted")
+def invalidate_cache_tags(sender, instance, **kwargs):
+    """Bump the cache tags of a written row once the write is committed"""
+    try:
+        tags = cache_tags_for(instance)
+    except Exception as e:
+        logger.error(f"Failed to collect cache tags for {sender.__name__} {instance.pk}: {e}")
+        return
+
+    def apply():
+        try:
+            service_cache.invalidate_tags(tags)
+        except Exception as e:
+            logger.error(f"Failed to invalidate cache tags {tags}: {e}")
+
+    # Bumping before commit would let a reader cache pre-commit data under the new version
+    transaction.on_commit(apply)
@@ -3,7 +3,7 @@ import csv
 from datetime import datetime, timedelta
 from io import StringIO
 
-from celery import shared_task
+from celery import chain, shared_task
 from django.utils import timezone
 from django.db.models import Q, Sum, Count, Avg
 from django.core.mail import send_mail
@@ -20,6 +20,7 @@ from .services.price_prediction_service import PricePredictionService
 from .services.user_preference_service import UserPreferenceService
 from .services.search_service import SearchService
 from .services.dispute_service import DisputeService
+from .services import retention
 
 
 @shared_task
@@ -64,6 +65,54 @@ def refresh_all_analytics():
         raise
 
 
+@shared_task
+def refresh_vendor_rollups(days=2):
+    """Rebuild recent vendor analytics rollup days, catching writes that bypassed signals."""
+    try:
+        analytics_service = VendorAnalyticsService()
+        rows = analytics_service.refresh_rollups(days)
+        
+        print(f"Vendor rollups refreshed for the last {days or 'all'} days ({rows} vendor-buyer rows)")
+        return f"Vendor rollups refreshed for the last {days or 'all'} days"
+        
+    except Exception as e:
+        print(f"Error in refresh_vendor_rollups: {str(e)}")
+        raise
+
+
+@shared_task
+def refill_pgp_challenge_pool(days=None):
+    """Encrypt 2FA challenges ahead of time for PGP users and admins who logged in recently."""
+    try:
+        from accounts.pgp_challenges import active_requests, refill
+
+        requests = active_requests(days)
+        created = refill(requests)
+        
+        print(f"PGP challenge pool refilled: {created} challenges for {len(requests)} user stocks")
+        return f"PGP challenge pool refilled with {created} challenges"
+        
+    except Exception as e:
+        print(f"Error in refill_pgp_challenge_pool: {str(e)}")
+        raise
+
+
+@shared_task
+def render_admin_charts():
+    """Render the admin dashboard charts for the current date bucket."""
+    try:
+        from adminpanel.charts import render_charts
+
+        rendered = render_charts()
+        
+        print(f"Admin charts rendered: {rendered}")
+        return f"Rendered {rendered} admin charts"
+        
+    except Exception as e:
+        print(f"Error in render_admin_charts: {str(e)}")
+        raise
+
+
 @shared_task
 def export_analytics_data():
     """Export analytics data to CSV format."""
@@ -218,38 +267,31 @@ def refresh_user_recommendations(user_id=None):
         raise
 
 
+@shared_task
+def build_item_neighbours():
+    """Rebuild the item-item co-purchase neighbours behind collaborative recommendations."""
+    try:
+        recommendation_service = RecommendationService()
+        stats = recommendation_service.build_item_neighbours()
+        
+        print(f"Item neighbours rebuilt: {stats['neighbours']} neighbours for {stats['products']} products "
+              f"from {stats['purchases']} purchases")
+        return f"Item neighbours rebuilt for {stats['products']} products"
+        
+    except Exception as e:
+        print(f"Error in build_item_neighbours: {str(e)}")
+        raise
+
+
 @shared_task
 def update_price_predictions():
     """Update price predictions for all products."""
     try:
         price_service = PricePredictionService()
-        from products.models import Product
-        
-        products = Product.objects.filter(active=True)
+        stats = price_service.predict_all_prices()
         
-        for product in products:
-            try:
-                # Get price prediction
-                prediction_data = price_service.predict_optimal_price(product)
-                
-                # Store prediction
-                PricePrediction.objects.create(
-                    product=product,
-                    predicted_price=prediction_data['optimal_price'],
-                    confidence_score=prediction_data['confidence_score'],
-                    prediction_type='optimal',
-                    market_conditions=prediction_data.get('market_conditions', {}),
-                    factors=prediction_data.get('factors', {}),
-                    valid_until=timezone.now() + timedelta(days=30)
-                )
-                
-                print(f"Updated price prediction for product: {product.name}")
-                
-            except Exception as e:
-                print(f"Error updating price prediction for product {product.name}: {str(e)}")
-                continue
-        
-        return f"Price predictions updated for {products.count()} products"
+        print(f"Price predictions updated for {stats['products']} products from {stats['sales']} sales")
+        return f"Price predictions updated for {stats['products']} products"
         
     except Exception as e:
         print(f"Error in update_price_predictions: {str(e)}")
@@ -257,62 +299,48 @@ def update_price_predictions():
 
 
 @shared_task
-def build_user_preference_profiles():
-    """Build or update user preference profiles."""
+def build_user_preference_profiles(batch_size=200):
+    """Build or update user preference profiles, loading the history of a batch of users at once."""
     try:
         preference_service = UserPreferenceService()
         from django.contrib.auth import get_user_model
         User = get_user_model()
         
         # Get users with activity
-        users = User.objects.filter(
+        user_ids = list(User.objects.filter(
             orders__created_at__gte=timezone.now() - timedelta(days=365)
-        ).distinct()
+        ).order_by('pk').values_list('pk', flat=True).distinct())
         
-        for user in users:
+        updated = 0
+        for start in range(0, len(user_ids), batch_size):
             try:
-                # Build profile
-                profile_data = preference_service.build_user_profile(user)
-                
-                # Update or create profile
-                profile, created = UserPreferenceProfile.objects.get_or_create(
-                    user=user,
-                    defaults={
-                        'purchase_patterns': profile_data.get('purchase_patterns', {}),
-                        'price_sensitivity': profile_data.get('price_sensitivity', 'medium'),
-                        'category_affinity': profile_data.get('category_affinity', {}),
-                        'vendor_preferences': profile_data.get('vendor_preferences', {}),
-                        'temporal_patterns': profile_data.get('temporal_patterns', {}),
-                        'risk_profile': profile_data.get('risk_profile', 'moderate'),
-                        'loyalty_indicators': profile_data.get('loyalty_indicators', {}),
-                        'churn_risk': profile_data.get('churn_risk', 0.5)
-                    }
-                )
-                
-                if not created:
-                    profile.purchase_patterns = profile_data.get('purchase_patterns', {})
-                    profile.price_sensitivity = profile_data.get('price_sensitivity', 'medium')
-                    profile.category_affinity = profile_data.get('category_affinity', {})
-                    profile.vendor_preferences = profile_data.get('vendor_preferences', {})
-                    profile.temporal_patterns = profile_data.get('temporal_patterns', {})
-                    profile.risk_profile = profile_data.get('risk_profile', 'moderate')
-                    profile.loyalty_indicators = profile_data.get('loyalty_indicators', {})
-                    profile.churn_risk = profile_data.get('churn_risk', 0.5)
-                    profile.save()
-                
-                print(f"Updated preference profile for user: {user.username}")
-                
+                users = list(User.objects.filter(pk__in=user_ids[start:start + batch_size]))
+                updated += preference_service.save_profiles(users)
             except Exception as e:
-                print(f"Error updating preference profile for user {user.username}: {str(e)}")
+                print(f"Error updating preference profiles for users {start}-{start + batch_size}: {str(e)}")
                 continue
         
-        return f"Preference profiles updated for {users.count()} users"
+        return f"Preference profiles updated for {updated} users"
         
     except Exception as e:
         print(f"Error in build_user_preference_profiles: {str(e)}")
         raise
 
 
+@shared_task
+def compact_interaction_events():
+    """Fold logged user interactions into preference profiles incrementally."""
+    try:
+        preference_service = UserPreferenceService()
+        updated = preference_service.compact_interactions()
+        
+        return f"Interaction summaries updated for {updated} users"
+        
+    except Exception as e:
+        print(f"Error in compact_interaction_events: {str(e)}")
+        raise
+
+
 @shared_task
 def process_pending_disputes():
     """Process pending disputes with automated arbitration."""
@@ -371,30 +399,40 @@ def cleanup_expired_data():
         predictions_count = expired_predictions.count()
         expired_predictions.delete()
         
-        # Clean up old search queries (keep last 30 days)
-        old_searches = SearchQuery.objects.filter(
-            created_at__lt=now - timedelta(days=30)
-        )
-        searches_count = old_searches.count()
-        old_searches.delete()
+        # Logs, search queries and expired messages are swept in batches by sweep_retention
         
         print(f"Cleanup completed: {analytics_count} analytics, {recommendations_count} recommendations, "
-              f"{predictions_count} predictions, {searches_count} searches")
+              f"{predictions_count} predictions")
         
-        return f"Cleanup completed: {analytics_count + recommendations_count + predictions_count + searches_count} records removed"
+        return f"Cleanup completed: {analytics_count + recommendations_count + predictions_count} records removed"
         
     except Exception as e:
         print(f"Error in cleanup_expired_data: {str(e)}")
         raise
 
 
+@shared_task
+def sweep_retention():
+    """Delete expired messages, logs and search queries in small batches."""
+    try:
+        deleted = retention.sweep()
+        
+        return f"Retention sweep removed {sum(deleted.values())} records: {deleted}"
+        
+    except Exception as e:
+        print(f"Error in sweep_retention: {str(e)}")
+        raise
+
+
 @shared_task
 def daily_maintenance():
     """Daily maintenance tasks."""
     try:
         # Run all maintenance tasks
+        refresh_vendor_rollups.delay()
         refresh_all_analytics.delay()
-        refresh_user_recommendations.delay()
+        # Chained so user recommendations only refresh once the neighbour table is rebuilt
+        chain(build_item_neighbours.si(), refresh_user_recommendations.si()).delay()
         update_price_predictions.delay()
         build_user_preference_profiles.delay()
         process_pending_disputes.delay()
@@ -0,0 +1,16 @@
+"""
+Image Template Tags
+Pick the stored image size a template actually displays.
+"""
+
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def image_variant(product, width):
+    """URL of the smallest stored copy of the product image at least ``width`` pixels wide."""
+    if not product or not getattr(product, "image_filename", None):
+        return ""
+    return product.image_variant_url(int(width))
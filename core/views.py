@@ -2,17 +2,18 @@ import mimetypes
 import os
 from pathlib import Path
 import json
+from urllib.parse import quote
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.http import Http404, HttpResponse, JsonResponse
-from django.views.decorators.cache import cache_control
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import AuthenticationForm
 from django.db.models import Q, Sum, Count, Avg, Case, When
 from django.core.paginator import Paginator
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 
@@ -26,6 +27,7 @@ from .services.price_prediction_service import PricePredictionService
 from .services.user_preference_service import UserPreferenceService
 from .services.search_service import SearchService
 from .services.dispute_service import DisputeService
+from .security.image_variants import DEFAULT_WIDTHS, parse_name, pick_width, stored_widths, variant_name
 from .models import (
     LoyaltyPoints, LoyaltyTransaction, VendorAnalytics, ProductRecommendation,
     PricePrediction, UserPreferenceProfile, SearchQuery
@@ -33,38 +35,91 @@ from .models import (
 from orders.models import Order
 
 
-@cache_control(max_age=3600)  # Cache for 1 hour
+def _image_etag(filename):
+    """Strong ETag for content-addressed images; their bytes never change under one name"""
+    if parse_name(filename[len("thumb_"):] if filename.startswith("thumb_") else filename):
+        return f'"{filename[:-len(".jpg")]}"'
+    return None
+
+
+def _pick_image_variant(full_path, requested_width, config):
+    """?w=<width> asks for the smallest stored variant that is at least that wide"""
+    parsed = parse_name(full_path.name)
+    if requested_width.isdigit() and parsed and parsed[1] is None:
+        widths = config.get("VARIANT_WIDTHS", DEFAULT_WIDTHS)
+        width = pick_width(stored_widths(full_path.parent, parsed[0], widths), int(requested_width))
+        if width:
+            return full_path.parent / variant_name(parsed[0], width)
+    return full_path
+
+
+def _image_validators(request, filename, config):
+    """Return (etag, Cache-Control value, 304 response or None) for an image"""
+    etag = _image_etag(filename)
+    if not etag:
+        # Legacy random names: revalidate hourly as before
+        return None, "max-age=3600", None
+
+    cache_header = f"max-age={config.get('IMMUTABLE_MAX_AGE', 31536000)}, immutable"
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        not_modified["Cache-Control"] = cache_header
+    return etag, cache_header, not_modified
+
+
+def _image_body(full_path, config):
+    """Stream the file, or hand it to the front proxy when X_ACCEL_REDIRECT_PREFIX is set"""
+    accel_prefix = config.get("X_ACCEL_REDIRECT_PREFIX")
+    try:
+        if accel_prefix:
+            relative = full_path.relative_to(settings.SECURE_UPLOAD_ROOT).as_posix()
+            response = HttpResponse(content_type="image/jpeg")
+            response["X-Accel-Redirect"] = f"{accel_prefix.rstrip('/')}/{quote(relative)}"
+            return response
+        return FileResponse(open(full_path, "rb"), content_type="image/jpeg")
+    except OSError:
+        raise Http404("Error serving image")
+
+
 def serve_secure_image(request, path):
     """
     Serve images from secure directory
     Only serves images, nothing else
+
+    Content-addressed files get a strong ETag and an immutable cache lifetime, and a
+    matching If-None-Match is answered with 304 before the file is opened. The body
+    is streamed with FileResponse (sendfile under the WSGI server), or handed to the
+    front proxy with X-Accel-Redirect when IMAGE_UPLOAD_SETTINGS["X_ACCEL_REDIRECT_PREFIX"]
+    is set.
     """
     if ".." in path or path.startswith("/"):
         raise Http404("Invalid path")
 
-    full_path = settings.SECURE_UPLOAD_ROOT / path
-
-    if not full_path.exists() or not full_path.is_file():
-        raise Http404("Image not found")
-
     # Only serve .jpg files
     if not path.lower().endswith(".jpg"):
         raise Http404("Only JPEG images are served")
 
-    try:
-        with open(full_path, "rb") as f:
-            content = f.read()
+    config = settings.IMAGE_UPLOAD_SETTINGS
+    full_path = settings.SECURE_UPLOAD_ROOT / path
 
-        content_type = "image/jpeg"
+    if not full_path.is_file():
+        raise Http404("Image not found")
 
-        response = HttpResponse(content, content_type=content_type)
-        response["X-Content-Type-Options"] = "nosniff"
-        response["Content-Security-Policy"] = "default-src 'none'; img-src 'self';"
+    full_path = _pick_image_variant(full_path, request.GET.get("w", ""), config)
 
-        return response
+    etag, cache_header, not_modified = _image_validators(request, full_path.name, config)
+    if not_modified is not None:
+        return not_modified
 
-    except Exception:
-        raise Http404("Error serving image")
+    response = _image_body(full_path, config)
+    if etag:
+        response["ETag"] = etag
+    response["Cache-Control"] = cache_header
+    response["X-Content-Type-Options"] = "nosniff"
+    response["Content-Security-Policy"] = "default-src 'none'; img-src 'self';"
+
+    return response
 
 
 def home(request):
@@ -312,31 +367,11 @@ def user_preferences(request):
         profile_data = preference_service.build_user_profile(request.user)
         
         # Get or create preference profile
-        profile, created = UserPreferenceProfile.objects.get_or_create(
+        profile, created = UserPreferenceProfile.objects.update_or_create(
             user=request.user,
-            defaults={
-                'purchase_patterns': profile_data.get('purchase_patterns', {}),
-                'price_sensitivity': profile_data.get('price_sensitivity', 'medium'),
-                'category_affinity': profile_data.get('category_affinity', {}),
-                'vendor_preferences': profile_data.get('vendor_preferences', {}),
-                'temporal_patterns': profile_data.get('temporal_patterns', {}),
-                'risk_profile': profile_data.get('risk_profile', 'moderate'),
-                'loyalty_indicators': profile_data.get('loyalty_indicators', {}),
-                'churn_risk': profile_data.get('churn_risk', 0.5)
-            }
+            defaults=preference_service.profile_fields(profile_data)
         )
         
-        if not created:
-            profile.purchase_patterns = profile_data.get('purchase_patterns', {})
-            profile.price_sensitivity = profile_data.get('price_sensitivity', 'medium')
-            profile.category_affinity = profile_data.get('category_affinity', {})
-            profile.vendor_preferences = profile_data.get('vendor_preferences', {})
-            profile.temporal_patterns = profile_data.get('temporal_patterns', {})
-            profile.risk_profile = profile_data.get('risk_profile', 'moderate')
-            profile.loyalty_indicators = profile_data.get('loyalty_indicators', {})
-            profile.churn_risk = profile_data.get('churn_risk', 0.5)
-            profile.save()
-        
         # Get personalized insights
         insights = preference_service.get_personalized_insights(request.user)
         
@@ -0,0 +1,49 @@
+"""
+Gunicorn configuration for the marketplace web workers.
+
+The application is loaded once in the master (``preload_app``) and every forked
+worker warms its services before taking requests, so manage.py commands and
+Celery workers keep a cheap start-up. Set MARKETPLACE_WARM_UP=0 to skip it.
+Workers also contend for the service health prober lease (SERVICE_HEALTH).
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "3"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Warm the services of a freshly forked worker and join the health prober election."""
+    import django
+    from django.apps import apps
+    from django.db import connections
+
+    if not apps.ready:
+        django.setup()
+
+    # Connections opened in the master must not be shared with the worker
+    connections.close_all()
+
+    if os.environ.get("MARKETPLACE_WARM_UP", "1") != "0":
+        try:
+            timings = apps.get_app_config("marketplace").warm_up()
+            server.log.info("Worker %s warmed up in %.0fms", worker.pid, sum(timings.values()) * 1000)
+        except Exception as e:
+            server.log.warning("Worker %s warm-up failed: %s", worker.pid, e)
+
+    # Every worker contends for the health prober lease; only the holder runs checks
+    from core.services.service_manager import service_manager
+
+    service_manager.start_monitoring()
+
+
+def worker_exit(server, worker):
+    """Hand the health prober lease over and write buffered interaction events."""
+    from core.services.interaction_log import interaction_writer
+    from core.services.service_manager import service_manager
+
+    service_manager.stop_monitoring()
+    interaction_writer.flush()
@@ -5,10 +5,32 @@ Django App Configuration for Marketplace
 import logging
 
 from django.apps import AppConfig
+from django.conf import settings
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Registered by path so that importing them is deferred to first use
+SERVICE_PATHS = {
+    "user_service": "core.services.user_service.UserService",
+    "wallet_service": "core.services.wallet_service.WalletService",
+    "vendor_service": "core.services.vendor_service.VendorService",
+    "product_service": "core.services.product_service.ProductService",
+    "order_service": "core.services.order_service.OrderService",
+    "dispute_service": "core.services.dispute_service.DisputeService",
+    "messaging_service": "core.services.messaging_service.MessagingService",
+    "support_service": "core.services.support_service.SupportService",
+}
+
+MODULE_PATHS = {
+    "design_system": "core.modules.design_system_module.DesignSystemModule",
+    "accounts": "core.modules.accounts_module.AccountsModule",
+    "wallets": "core.modules.wallets_module.WalletsModule",
+    "example": "core.modules.example_module.ExampleModule",
+    "products": "core.modules.products_module.ProductsModule",
+    "orders": "core.modules.orders_module.OrdersModule",
+}
+
 
 class MarketplaceConfig(AppConfig):
     """Main Django AppConfig for the marketplace application."""
@@ -17,86 +39,50 @@ class MarketplaceConfig(AppConfig):
     name = "marketplace"
 
     def ready(self):
-        """Initialize the modular system components."""
-        # Import modules
-        from core.modules.accounts_module import AccountsModule
-        from core.modules.design_system_module import DesignSystemModule
-        from core.modules.example_module import ExampleModule
-        from core.modules.orders_module import OrdersModule
-        from core.modules.products_module import ProductsModule
-        from core.modules.wallets_module import WalletsModule
-        from core.services.dispute_service import DisputeService
-        from core.services.messaging_service import MessagingService
-        from core.services.order_service import OrderService
-        from core.services.product_service import ProductService
-        from core.services.support_service import SupportService
-
-        # Import services
-        from core.services.user_service import UserService
-        from core.services.vendor_service import VendorService
-        from core.services.wallet_service import WalletService
-
-        # Create and register modules
-        modules_to_register = [
-            DesignSystemModule,
-            AccountsModule,
-            WalletsModule,
-            ExampleModule,
-            ProductsModule,
-            OrdersModule,
-        ]
-
-        # Create and register services
-        services_to_register = [
-            UserService,
-            WalletService,
-            VendorService,
-            ProductService,
-            OrderService,
-            DisputeService,
-            MessagingService,
-            SupportService,
-        ]
-
-        # Import registries
+        """
+        Register the modular system components.
+
+        Nothing is imported or instantiated here: every process (web, manage.py,
+        Celery) runs this, and services are built by the registries on first use.
+        Web workers opt into building and warming them through ``warm_up``.
+        """
         from core.architecture import ModuleRegistry
         from core.services import ServiceRegistry
 
+        service_config = getattr(settings, "SERVICES", {}).get("CONFIG", {})
+
         # Register services first
-        for service_class in services_to_register:
+        for service_name, class_path in SERVICE_PATHS.items():
             try:
-                ServiceRegistry.register(service_class)
-                logger.info(f"Service {service_class.service_name} registered successfully")
+                ServiceRegistry.register_lazy(service_name, class_path, **service_config.get(service_name, {}))
             except Exception as e:
-                logger.error(f"Failed to register service {service_class.service_name}: {e}")
+                logger.error(f"Failed to register service {service_name}: {e}")
 
         # Register modules
-        for module_class in modules_to_register:
+        for module_name, class_path in MODULE_PATHS.items():
             try:
-                # Register the module class
-                ModuleRegistry.register_module(module_class)
-                logger.info(f"Module {module_class.name} registered successfully")
-
-                # Create and initialize the module instance
-                module_instance = module_class()
-                if module_instance.initialize():
-                    logger.info(f"Module {module_class.name} initialized successfully")
-                else:
-                    logger.error(f"Failed to initialize module {module_class.name}")
-
+                ModuleRegistry.register_lazy(module_name, class_path)
             except Exception as e:
-                logger.error(f"Failed to register module {module_class.name}: {e}")
+                logger.error(f"Failed to register module {module_name}: {e}")
 
-        # Initialize service manager
-        try:
-            from core.services import service_manager
+        logger.info("Marketplace application startup complete")
 
-            service_manager.initialize()
-            logger.info("Service manager initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize service manager: {e}")
+    def warm_up(self, service_names=None) -> dict:
+        """
+        Build services and modules and fill their caches ahead of the first request.
 
-        logger.info("Marketplace application startup complete")
+        Called from the gunicorn post_fork hook; defaults to SERVICES["WARM_UP"].
+        """
+        from core.architecture import ModuleRegistry
+        from core.services import ServiceRegistry
+
+        if service_names is None:
+            service_names = getattr(settings, "SERVICES", {}).get("WARM_UP", ())
+
+        for module_name in MODULE_PATHS:
+            ModuleRegistry.get_module(module_name)
+
+        return ServiceRegistry.warm_up(service_names)
 
     def get_modules_info(self) -> dict:
         """Get information about all registered modules."""
@@ -157,18 +143,17 @@ class MarketplaceConfig(AppConfig):
                 ),
             }
 
-            # Check services
-            services = ServiceRegistry.get_all_services()
+            # Services: read what the health prober last published instead of probing here
+            from core.services.service_health import health_board
+
+            snapshot = health_board.get_snapshot() or {}
+            published = snapshot.get("services", {})
             service_health = {
-                "total_services": len(services),
-                "available_services": len([s for s in services.values() if s.is_available()]),
-                "healthy_services": len(
-                    [
-                        s
-                        for s in services.values()
-                        if s.is_available() and s.get_service_health().get("status", "UNKNOWN") == "HEALTHY"
-                    ]
-                ),
+                "total_services": len(ServiceRegistry.get_registered_names()),
+                "available_services": len([s for s in published.values() if s["initialized"]]),
+                "healthy_services": len([s for s in published.values() if s["initialized"] and s["healthy"]]),
+                "open_circuits": sorted(name for name, s in published.items() if s["circuit"] != "CLOSED"),
+                "checked_at": snapshot.get("checked_at"),
             }
 
             # Overall status
@@ -177,6 +162,8 @@ class MarketplaceConfig(AppConfig):
                 overall_status = "DEGRADED"
             if service_health["available_services"] != service_health["healthy_services"]:
                 overall_status = "DEGRADED"
+            if not snapshot and overall_status == "HEALTHY":
+                overall_status = "UNKNOWN"
 
             return {
                 "status": overall_status,
@@ -280,7 +267,7 @@ class MarketplaceConfig(AppConfig):
     def shutdown(self):
         """Shutdown the application gracefully."""
         from core.architecture import ModuleRegistry
-        from core.services import service_manager
+        from core.services.service_manager import service_manager
 
         try:
             logger.info("Starting marketplace application shutdown...")
@@ -306,7 +293,7 @@ class MarketplaceConfig(AppConfig):
     def get_system_metrics(self) -> dict:
         """Get comprehensive system metrics."""
         try:
-            from core.services import service_manager
+            from core.services.service_manager import service_manager
 
             return {
                 "modules": self.get_modules_info(),
@@ -322,7 +309,7 @@ class MarketplaceConfig(AppConfig):
     def _validate_system_architecture(self) -> dict:
         """Validate the overall system architecture."""
         try:
-            from core.services import service_manager
+            from core.services.service_manager import service_manager
 
             return {
                 "service_architecture": service_manager.validate_service_architecture(),
@@ -47,6 +47,12 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=10, minute=0),
     },
     
+    # Fold new interaction events into preference profiles every 10 minutes
+    'compact-interaction-events': {
+        'task': 'core.tasks.compact_interaction_events',
+        'schedule': crontab(minute='*/10'),
+    },
+    
     # Process pending disputes every 4 hours
     'process-disputes': {
         'task': 'core.tasks.process_pending_disputes',
@@ -59,6 +65,18 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=3, minute=0),
     },
     
+    # Sweep expired messages, logs and search queries in small batches every 30 minutes
+    'sweep-retention': {
+        'task': 'core.tasks.sweep_retention',
+        'schedule': crontab(minute='*/30'),
+    },
+    
+    # Render admin dashboard charts every 15 minutes; each chart is redrawn once per bucket
+    'render-admin-charts': {
+        'task': 'core.tasks.render_admin_charts',
+        'schedule': crontab(minute='*/15'),
+    },
+    
     # Weekly analytics report - every Sunday at 9 AM
     'weekly-analytics-report': {
         'task': 'core.tasks.weekly_analytics_report',
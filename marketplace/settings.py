@@ -46,9 +46,12 @@ INSTALLED_APPS = [
     "adminpanel",
     "disputes",
     "apps.security",
+    # Registers services and modules lazily in ready(); warm_up is called from gunicorn post_fork
+    "marketplace.apps.MarketplaceConfig",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -124,6 +127,111 @@ CACHES = {
     }
 }
 
+# Cache used by core.security.rate_limit; point it at a shared backend (Redis/Memcached)
+# when running several workers so every process counts against the same windows
+RATE_LIMIT_CACHE_ALIAS = "default"
+
+# Per-request profiling (core.middleware.RequestProfilingMiddleware); requests slower than
+# SLOW_REQUEST_MS keep sampled stacks, query shapes repeated N_PLUS_ONE_THRESHOLD times are flagged
+REQUEST_PROFILING = {
+    "ENABLED": True,
+    "SLOW_REQUEST_MS": 1000,
+    "SAMPLE_INTERVAL_MS": 5,
+    "N_PLUS_ONE_THRESHOLD": 5,
+    "MAX_SLOW_CAPTURES": 50,
+}
+
+# Start-up import budget checked by `manage.py profile_imports --check`. An app is charged
+# for its own modules and for every library it imports first; APPS overrides APP_MS per app
+IMPORT_TIME_BUDGET = {
+    "TOTAL_MS": 2000,
+    "APP_MS": 250,
+    "APPS": {},
+    "TOP": 15,
+}
+
+# Two-tier cache behind BaseService.get_cached/set_cached (core.services.tiered_cache).
+# LOCAL_TTL bounds how long a process may serve an entry changed by another worker.
+SERVICE_CACHE = {
+    "BACKEND": "default",
+    "LOCAL_MAX_ENTRIES": 2048,
+    "LOCAL_MAX_BYTES": 32 * 1024 * 1024,
+    "LOCAL_MAX_ITEM_BYTES": 1024 * 1024,
+    "LOCAL_TTL": 30,
+    "STALE_TTL": 300,
+}
+
+# Service instances are built on first use through core.services.ServiceRegistry with the
+# CONFIG below. WARM_UP lists the services whose caches gunicorn.conf.py's post_fork hook
+# fills in each web worker; manage.py commands and Celery workers never warm up.
+SERVICES = {
+    "CONFIG": {
+        "user_service": {"max_login_attempts": 5, "lockout_duration": 900},
+        "wallet_service": {"max_daily_withdrawal": "1.0", "withdrawal_cooldown": 3600},
+        "vendor_service": {"min_bond_amount": "0.01", "approval_threshold": 10},
+        "product_service": {"max_products_per_vendor": 100, "product_approval_required": False},
+        "order_service": {"order_timeout_minutes": 60, "max_order_items": 20},
+        "dispute_service": {"dispute_timeout_days": 14, "max_evidence_files": 10},
+        "messaging_service": {"max_message_length": 1000, "conversation_timeout_days": 30},
+        "support_service": {"max_ticket_attachments": 5, "ticket_response_timeout_hours": 48},
+    },
+    "WARM_UP": ("user_service", "wallet_service"),
+}
+
+# Service health (core.services.service_health). The worker holding the prober lease runs every
+# health check each PROBE_INTERVAL and publishes the results in CACHE_ALIAS, which must be shared
+# by all workers (Redis/Memcached), as must the circuit breakers; other workers only read the
+# snapshot. On a local-memory cache no prober is elected unless ALLOW_LOCAL_CACHE is set, which is
+# only correct for a single-process deployment.
+SERVICE_HEALTH = {
+    "CACHE_ALIAS": "default",
+    "ALLOW_LOCAL_CACHE": False,
+    "PROBE_INTERVAL": 60,
+    "LEASE_TTL": 90,  # Longer than PROBE_INTERVAL; a dead prober is replaced within two of these
+    "LOCAL_TTL": 5,  # How long a worker reuses the snapshot it last read
+    "BREAKER_THRESHOLD": 5,
+    "BREAKER_TIMEOUT": 60,
+}
+
+# User interaction event log (core.services.interaction_log). Each process buffers events and writes
+# them in bulk once BATCH_SIZE are queued or the oldest is FLUSH_INTERVAL seconds old; the
+# compact_interaction_events task folds them into preference profiles and drops compacted days
+# older than RETENTION_DAYS.
+INTERACTION_LOG = {
+    "BATCH_SIZE": 200,
+    "FLUSH_INTERVAL": 5,
+    "MAX_BUFFERED": 5000,  # Events kept in memory while the database is unreachable
+    "COMPACT_BATCH_SIZE": 5000,
+    "RETENTION_DAYS": 30,
+    "TOP_ITEMS": 20,  # Products, categories and vendors kept per profile summary
+    "SETTLE_SECONDS": 60,  # Events inserted less than this ago wait for inserts that may still commit below them
+}
+
+# Message search index (core.services.message_search). Subjects and correspondent usernames are
+# indexed per user on send; each (user, term) list keeps its MAX_POSTINGS newest messages and is
+# trimmed once it grows PRUNE_SLACK past that.
+MESSAGE_SEARCH = {
+    "MAX_POSTINGS": 500,
+    "PRUNE_SLACK": 50,
+    "MAX_TERMS": 16,  # Subject terms indexed per message
+}
+
+# Retention sweeper (core.services.retention). Expired messages and rows older than DAYS are deleted
+# BATCH_SIZE at a time with a SLEEP between batches; a sweep stops after MAX_SECONDS and resumes from
+# its checkpoint on the next run.
+RETENTION = {
+    "BATCH_SIZE": 1000,
+    "SLEEP": 0.1,
+    "MAX_SECONDS": 240,
+    "DAYS": {
+        "audit_logs": 365,
+        "security_logs": 180,
+        "login_history": 90,
+        "vendor_notifications": 90,
+        "search_queries": 30,
+    },
+}
+
 # RATELIMIT_CACHE_BACKEND = "default"  # Temporarily disabled
 # RATELIMIT_ENABLE = True  # Temporarily disabled
 
@@ -171,6 +279,11 @@ TEMPLATES[0]['OPTIONS']['context_processors'].append(
     'core.context_processors.tor_safe_context'
 )
 
+# Unread message badge from the denormalized per-user counter
+TEMPLATES[0]['OPTIONS']['context_processors'].append(
+    'messaging.context_processors.unread_messages'
+)
+
 # Add Tor security middleware
 MIDDLEWARE.append('core.security.middleware.TorSecurityMiddleware')
 
@@ -195,6 +308,7 @@ TOR_SAFE_APPS = [
     'support',
     'adminpanel',
     'apps.security',
+    'marketplace.apps.MarketplaceConfig',
 ]
 
 # Override installed apps for Tor safety (keep essential Django functionality)
@@ -368,7 +482,28 @@ LOGGING = {
 
 GPG_BINARY = "/usr/bin/gpg"
 
+# Shared keyring behind accounts.pgp_service.PGPService (accounts.pgp_keyring). HOME=None
+# gives each process a private temporary home; point it at a persistent 0700 directory to
+# keep imported keys across restarts. POOL_SIZE caps concurrent gpg operations per process.
+PGP_KEYRING = {
+    "HOME": env("PGP_KEYRING_HOME", default=None),
+    "POOL_SIZE": 4,
+    "ACQUIRE_TIMEOUT": 10,
+    "METADATA_CACHE_SIZE": 1024,
+}
+
 PGP_2FA_TIMEOUT = 15  # minutes
+
+# Ready-encrypted 2FA challenges (accounts.pgp_challenges). Logins pop one from the shared
+# cache; a background thread and core.tasks.refill_pgp_challenge_pool keep STOCK_SIZE per user.
+PGP_CHALLENGE_POOL = {
+    "ENABLED": True,
+    "CACHE_ALIAS": "default",
+    "STOCK_SIZE": 3,
+    "STOCK_TTL": 3600,
+    "BATCH_SIZE": 16,
+    "ACTIVE_DAYS": 7,
+}
 SESSION_SAVE_EVERY_REQUEST = False  # Don't refresh on every request for better 2FA experience
 SESSION_COOKIE_SAMESITE = "Lax"
 
@@ -384,6 +519,10 @@ IMAGE_UPLOAD_SETTINGS = {
     "THUMBNAIL_QUALITY": 75,  # New setting
     "MAX_IMAGE_DIMENSIONS": (1920, 1080),  # Reduced from (2000, 2000)
     "THUMBNAIL_SIZE": (400, 400),
+    "MAX_INPUT_PIXELS": 40_000_000,  # Refuse to decode larger canvases (8K is ~33MP)
+    "PROCESSING_WORKERS": 2,  # Uploads decoded concurrently per process; bounds peak memory
+    "PROCESSING_TIMEOUT": 30,  # Seconds a request waits for its upload to be processed
+    "VARIANT_WIDTHS": (320, 640, 1280),  # Downscaled copies served for ?w=; pages ask for the width they display
     "STRIP_METADATA": True,
     "REPROCESS_ALL": True,  # Always reprocess images for security
     "STORAGE_BACKEND": "local",  # 'local' or 'remote'
@@ -398,6 +537,20 @@ IMAGE_UPLOAD_SETTINGS = {
     },
     "UPLOADS_PER_HOUR": 10,
     "UPLOADS_PER_DAY": 50,
+    "IMMUTABLE_MAX_AGE": 31536000,  # Content-addressed images never change under their name
+    # Internal nginx location aliased to SECURE_UPLOAD_ROOT, e.g. "/protected-images/".
+    # When set, serve_secure_image only answers with headers and nginx sends the file.
+    # Conditional requests are still answered by Django before the hand-off.
+    "X_ACCEL_REDIRECT_PREFIX": os.environ.get("IMAGE_X_ACCEL_PREFIX", ""),
+}
+
+# Admin dashboard charts (adminpanel.charts) are rendered by core.tasks.render_admin_charts into
+# ROOT (SECURE_UPLOAD_ROOT / "admin_charts" by default), which the web workers read, so it must be
+# shared with the worker running that task
+ADMIN_CHARTS = {
+    "BUCKET_SECONDS": 3600,  # Each chart is redrawn at most once per bucket
+    "DAYS": 30,
+    "FORMATS": ("png", "svg"),
 }
 
 SECURE_UPLOAD_ROOT = BASE_DIR / "secure_uploads"
@@ -406,6 +559,15 @@ SECURE_UPLOAD_ROOT.mkdir(exist_ok=True)
 TEMP_UPLOAD_ROOT = BASE_DIR / "temp_uploads"
 TEMP_UPLOAD_ROOT.mkdir(exist_ok=True)
 
+SEARCH_SETTINGS = {
+    "BACKEND": "core.search.backends.InvertedIndexSearchBackend",  # or core.search.backends.DatabaseSearchBackend
+    "INDEX_PATH": BASE_DIR / "search_index" / "products.jsonl.gz",  # Snapshot written by rebuild_search_index
+    "BM25_K1": 1.2,
+    "BM25_B": 0.75,
+    "FIELD_WEIGHTS": {"name": 3.0, "category": 2.0, "vendor": 1.5, "description": 1.0},
+    "MAX_RESULTS": 50,
+}
+
 WALLET_SECURITY = {
     "WITHDRAWAL_RATE_LIMIT": 5,  # Max withdrawal attempts per hour
     "CONVERSION_RATE_LIMIT": 20,  # Max conversions per hour
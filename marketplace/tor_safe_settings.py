@@ -145,6 +145,7 @@ TOR_SAFE_APPS = [
     'messaging',
     'support',
     'adminpanel',
+    'marketplace.apps.MarketplaceConfig',
 ]
 
 # Override installed apps for Tor safety
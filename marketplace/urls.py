@@ -24,6 +24,7 @@ from core.views import serve_secure_image, home, tor_safe_home
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("", home, name="home"),  # Regular home
+    path("secure-images/<path:path>", serve_secure_image, name="serve_secure_image"),
     path("core/", include("core.urls")),  # Core functionality including Tor-safe routes
     path("accounts/", include("accounts.urls")),
     path("logout/", auth_views.LogoutView.as_view(next_page="home"), name="logout"),
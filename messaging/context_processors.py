@@ -0,0 +1,26 @@
+"""
+Context Processors for Messaging
+Provides the unread message badge to all templates.
+"""
+
+import logging
+
+from .views import get_unread_message_count
+
+logger = logging.getLogger(__name__)
+
+
+def unread_messages(request):
+    """
+    Context processor to provide the user's unread message count.
+    Reads the denormalized counter, so every page costs one primary-key lookup.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    try:
+        return {'unread_messages': get_unread_message_count(user)}
+    except Exception as e:
+        # A missing badge must never fail the page around it
+        logger.error(f"Failed to get unread message count for user {user.pk}: {e}")
+        return {}
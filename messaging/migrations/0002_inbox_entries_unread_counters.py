@@ -0,0 +1,102 @@
+# Generated by Django 5.1.4 on 2026-10-16 22:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_inbox(apps, schema_editor):
+    """Build inbox entries and unread counters from the existing messages."""
+    Message = apps.get_model("messaging", "Message")
+    InboxEntry = apps.get_model("messaging", "InboxEntry")
+    UnreadCounter = apps.get_model("messaging", "UnreadCounter")
+
+    entries = {}
+    unread = {}
+    rows = Message.objects.order_by("-created_at").values_list("id", "sender_id", "recipient_id", "is_read", "created_at")
+    for message_id, sender_id, recipient_id, is_read, created_at in rows.iterator(chunk_size=2000):
+        # Newest first: the first message seen for a pair is its last message
+        for owner_id, other_id in ((sender_id, recipient_id), (recipient_id, sender_id)):
+            entries.setdefault(
+                (owner_id, other_id),
+                InboxEntry(owner_id=owner_id, other_user_id=other_id, last_message_id=message_id, last_message_at=created_at),
+            )
+        if not is_read:
+            entries[(recipient_id, sender_id)].unread_count += 1
+            unread[recipient_id] = unread.get(recipient_id, 0) + 1
+
+    InboxEntry.objects.bulk_create(entries.values(), batch_size=1000)
+    UnreadCounter.objects.bulk_create(
+        [UnreadCounter(user_id=user_id, unread=count) for user_id, count in unread.items()], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0001_initial"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["recipient", "sender", "is_read"], name="messaging_m_recipie_395b85_idx"),
+        ),
+        migrations.CreateModel(
+            name="UnreadCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="unread_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("unread", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="InboxEntry",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("last_message_at", models.DateTimeField()),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                (
+                    "last_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="messaging.message",
+                    ),
+                ),
+                (
+                    "other_user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="inbox_entries",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Inbox Entries",
+                "indexes": [models.Index(fields=["owner", "-last_message_at"], name="messaging_i_owner_i_8d582f_idx")],
+                "unique_together": {("owner", "other_user")},
+            },
+        ),
+        migrations.RunPython(backfill_inbox, migrations.RunPython.noop),
+    ]
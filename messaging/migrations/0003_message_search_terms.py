@@ -0,0 +1,74 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_search_terms(apps, schema_editor):
+    """Index existing messages, newest first, up to MAX_POSTINGS per posting list."""
+    from core.services.message_search import get_options, message_postings
+
+    Message = apps.get_model("messaging", "Message")
+    MessageSearchTerm = apps.get_model("messaging", "MessageSearchTerm")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+
+    max_postings = get_options()["MAX_POSTINGS"]
+    names = dict(User.objects.values_list("id", "username"))
+    counts = {}
+    batch = []
+    for message in Message.objects.order_by("-created_at").only(
+        "id", "subject", "sender_id", "recipient_id", "created_at"
+    ).iterator(chunk_size=2000):
+        for owner_id, term in message_postings(
+            message, names.get(message.sender_id, ""), names.get(message.recipient_id, "")
+        ):
+            if counts.get((owner_id, term), 0) < max_postings:
+                counts[(owner_id, term)] = counts.get((owner_id, term), 0) + 1
+                batch.append(
+                    MessageSearchTerm(owner_id=owner_id, term=term, message_id=message.id, created_at=message.created_at)
+                )
+        if len(batch) >= 1000:
+            MessageSearchTerm.objects.bulk_create(batch)
+            batch = []
+    MessageSearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0002_inbox_entries_unread_counters"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MessageSearchTerm",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("term", models.CharField(max_length=32)),
+                ("created_at", models.DateTimeField()),
+                (
+                    "message",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_terms",
+                        to="messaging.message",
+                    ),
+                ),
+                (
+                    "owner",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["owner", "term", "-created_at"], name="messaging_m_owner_i_53117d_idx")],
+            },
+        ),
+        migrations.RunPython(backfill_search_terms, migrations.RunPython.noop),
+    ]
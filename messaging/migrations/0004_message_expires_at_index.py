@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("messaging", "0003_message_search_terms"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["expires_at"], name="messaging_m_expires_e611f7_idx"),
+        ),
+    ]
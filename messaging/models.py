@@ -18,6 +18,12 @@ class Message(PrivacyModel):
     pgp_signature = models.TextField(blank=True, null=True)
     expires_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["recipient", "sender", "is_read"]),
+            models.Index(fields=["expires_at"]),
+        ]
+
     def __str__(self):
         return f"{self.subject}"
 
@@ -30,3 +36,50 @@ class MessageThread(PrivacyModel):
 
     def __str__(self):
         return f"Thread: {self.subject}"
+
+
+class InboxEntry(models.Model):
+    """One row per user and correspondent: the inbox line, kept current by MessagingService."""
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="inbox_entries")
+    other_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_message_at = models.DateTimeField()
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Inbox Entries"
+        unique_together = ["owner", "other_user"]
+        indexes = [
+            models.Index(fields=["owner", "-last_message_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id} - {self.other_user_id} ({self.unread_count} unread)"
+
+
+class UnreadCounter(models.Model):
+    """Total unread messages of a user, so unread badges are a primary-key lookup."""
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="unread_counter")
+    unread = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class MessageSearchTerm(models.Model):
+    """One posting of a user's message search index (see core.services.message_search)."""
+
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False, related_name="+")
+    term = models.CharField(max_length=32)
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name="search_terms")
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "term", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_id}: {self.term}"
@@ -1,53 +1,24 @@
 from django.contrib import messages as django_messages
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
 from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone
 
 from accounts.models import User
+from core.services.service_registry import ServiceRegistry
 
 from .models import Message
 
 
-@login_required
-def message_list(request):
-    messages = (
-        Message.objects.filter(Q(sender=request.user) | Q(recipient=request.user))
-        .select_related("sender", "recipient")
-        .order_by("-created_at")
-    )
-
-    conversations = {}
-    for message in messages:
-        if message.sender == request.user:
-            other_user = message.recipient
-        else:
-            other_user = message.sender
-
-        if not other_user:
-            continue
-
-        if other_user.id not in conversations:
-            conversations[other_user.id] = {
-                "other_user": other_user,
-                "last_message": message,
-                "messages": [],
-                "unread_count": 0,
-            }
+def get_messaging_service():
+    """The shared, configured MessagingService built by the service registry"""
+    return ServiceRegistry.get_service("messaging_service")
 
-        conversations[other_user.id]["messages"].append(message)
 
-        if message.recipient == request.user and not message.is_read:
-            conversations[other_user.id]["unread_count"] += 1
-
-    conversation_list = sorted(conversations.values(), key=lambda x: x["last_message"].created_at, reverse=True)
+@login_required
+def message_list(request):
+    conversations = get_messaging_service().get_inbox(request.user.id)
 
-    return render(
-        request,
-        "messaging/inbox.html",
-        {"conversations": conversation_list, "total_messages": messages.count(), "messages": messages[:10]},
-    )
+    return render(request, "messaging/inbox.html", {"conversations": conversations})
 
 
 @login_required
@@ -95,19 +66,12 @@ def compose_message(request):
         if not subject:
             subject = "New Message"
 
-        try:
-            with transaction.atomic():
-                message = Message.objects.create(
-                    sender=request.user,
-                    recipient=recipient,
-                    subject=subject,
-                    content=content,
-                    created_at=timezone.now(),
-                )
-                django_messages.success(request, "Message sent successfully!")
-                return redirect("messaging:detail", pk=message.pk)
-        except Exception as e:
-            django_messages.error(request, f"Error sending message: {str(e)}")
+        message, success, error = get_messaging_service().send_message(request.user.id, recipient.id, content, subject)
+        if success:
+            django_messages.success(request, "Message sent successfully!")
+            return redirect("messaging:detail", pk=message.pk)
+        else:
+            django_messages.error(request, f"Error sending message: {error}")
             return render(
                 request,
                 "messaging/compose.html",
@@ -121,55 +85,22 @@ def compose_message(request):
 @login_required
 def conversation_view(request, user_id):
     other_user = get_object_or_404(User, id=user_id)
+    service = get_messaging_service()
 
-    messages = Message.objects.filter(
-        Q(sender=request.user, recipient=other_user) | Q(sender=other_user, recipient=request.user)
-    ).order_by("created_at")
+    service.mark_messages_as_read(request.user.id, other_user.id)
 
-    unread_messages = messages.filter(recipient=request.user, is_read=False)
-    unread_messages.update(is_read=True)
-
-    all_messages = (
-        Message.objects.filter(Q(sender=request.user) | Q(recipient=request.user))
-        .select_related("sender", "recipient")
-        .order_by("-created_at")
+    messages = (
+        Message.objects.filter(Q(sender=request.user, recipient=other_user) | Q(sender=other_user, recipient=request.user))
+        .select_related("sender")
+        .order_by("created_at")
     )
 
-    conversations = {}
-    for message in all_messages:
-        if message.sender == request.user:
-            conv_user = message.recipient
-        else:
-            conv_user = message.sender
-
-        if not conv_user:
-            continue
-
-        if conv_user.id not in conversations:
-            conversations[conv_user.id] = {
-                "other_user": conv_user,
-                "last_message": message,
-                "messages": [],
-                "unread_count": 0,
-            }
-
-        conversations[conv_user.id]["messages"].append(message)
-
-        if message.recipient == request.user and not message.is_read:
-            conversations[conv_user.id]["unread_count"] += 1
-
-    conversation_list = sorted(conversations.values(), key=lambda x: x["last_message"].created_at, reverse=True)
-
     current_conversation = {"other_user": other_user, "messages": messages}
 
     return render(
         request,
         "messaging/inbox.html",
-        {
-            "conversations": conversation_list,
-            "current_conversation": current_conversation,
-            "total_messages": all_messages.count(),
-        },
+        {"conversations": service.get_inbox(request.user.id), "current_conversation": current_conversation},
     )
 
 
@@ -188,20 +119,12 @@ def send_message(request, user_id):
             django_messages.error(request, "You cannot send a message to yourself")
             return redirect("messaging:conversation", user_id=user_id)
 
-        try:
-            with transaction.atomic():
-                message = Message.objects.create(
-                    sender=request.user,
-                    recipient=recipient,
-                    subject="New Message",
-                    content=content,
-                    created_at=timezone.now(),
-                )
-                django_messages.success(request, "Message sent successfully!")
-                return redirect("messaging:conversation", user_id=user_id)
-        except Exception as e:
-            django_messages.error(request, f"Error sending message: {str(e)}")
-            return redirect("messaging:conversation", user_id=user_id)
+        message, success, error = get_messaging_service().send_message(request.user.id, recipient.id, content)
+        if success:
+            django_messages.success(request, "Message sent successfully!")
+        else:
+            django_messages.error(request, f"Error sending message: {error}")
+        return redirect("messaging:conversation", user_id=user_id)
 
     return redirect("messaging:list")
 
@@ -211,17 +134,18 @@ def message_detail(request, pk):
     message = get_object_or_404(Message, Q(sender=request.user) | Q(recipient=request.user), pk=pk)
 
     if message.recipient == request.user and not message.is_read:
+        get_messaging_service().mark_messages_as_read(request.user.id, message.sender_id, message_id=message.pk)
         message.is_read = True
-        message.save()
 
     return render(request, "messaging/detail.html", {"message": message})
 
 
 def check_new_messages(user):
     """Check if user has unread messages"""
-    return Message.objects.filter(recipient=user, is_read=False).exists()
+    return get_unread_message_count(user) > 0
 
 
 def get_unread_message_count(user):
     """Get count of unread messages for user"""
-    return Message.objects.filter(recipient=user, is_read=False).count()
+    service = get_messaging_service()
+    return service.get_unread_count(user.id) if service else 0
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OrdersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "orders"
+
+    def ready(self):
+        # Keep the vendor analytics rollups and tagged service caches in step with writes
+        import core.signals  # noqa: F401
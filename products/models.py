@@ -75,6 +75,26 @@ class Product(PrivacyModel):
         else:
             return f"/secure-images/products/{self.thumbnail_filename}"
 
+    def image_variant_url(self, width):
+        """URL of the smallest stored copy of the image that is at least ``width`` pixels wide"""
+        if not self.image_filename:
+            return None
+
+        from django.conf import settings
+
+        from core.security.image_variants import parse_name
+
+        config = settings.IMAGE_UPLOAD_SETTINGS
+        if config["STORAGE_BACKEND"] == "remote":
+            # Picking a variant needs serve_secure_image; the remote host serves files as-is
+            return self.image_url
+        if parse_name(self.image_filename):
+            return f"{self.image_url}?w={int(width)}"
+        # Images stored before variants existed only have the thumbnail and the full image
+        if self.thumbnail_filename and width <= config["THUMBNAIL_SIZE"][0]:
+            return self.thumbnail_url
+        return self.image_url
+
     def delete(self, *args, **kwargs):
         """Override delete to remove images"""
         if self.image_filename or self.thumbnail_filename:
@@ -1,3 +1,5 @@
+from urllib.parse import urlencode
+
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, render
 
@@ -30,25 +32,23 @@ def product_list(request):
     if in_stock:
         filters['in_stock'] = True
     
+    page_number = request.GET.get("page")
+    # Carried over to the Previous/Next links so paging keeps the filters
+    filter_query = urlencode([
+        (key, request.GET[key]) for key in ('category', 'min_price', 'max_price', 'in_stock') if request.GET.get(key)
+    ])
+
     # Use search service if query provided, otherwise basic filtering
     if search_query:
         from core.services.search_service import SearchService
         search_service = SearchService()
         
         user_id = str(request.user.id) if request.user.is_authenticated else None
-        products = search_service.search_products(search_query, user_id, filters)
-        
-        # Convert to QuerySet for pagination
-        product_ids = [p.id for p in products]
-        products = Product.objects.filter(id__in=product_ids, is_available=True)
-        
-        # Preserve search order
-        if product_ids:
-            from django.db.models import Case, When, IntegerField
-            ordering = [When(pk=pid, then=pos) for pos, pid in enumerate(product_ids)]
-            products = products.annotate(
-                search_order=Case(*ordering, output_field=IntegerField())
-            ).order_by('search_order')
+        # Ranked page, total hits and related rows in one round trip; "after" is the keyset cursor
+        page_obj = search_service.search_page(
+            search_query, user_id, filters, page=page_number, per_page=12, cursor=request.GET.get("after")
+        )
+        total_results = page_obj.count
     else:
         # Basic filtering without search
         products = Product.objects.filter(is_available=True).select_related("vendor", "category").order_by('-created_at')
@@ -62,25 +62,25 @@ def product_list(request):
         if filters.get('in_stock'):
             products = products.filter(stock_quantity__gt=0)
 
+        paginator = Paginator(products, 12)
+        page_obj = paginator.get_page(page_number)
+        total_results = paginator.count
+
     # Get all categories for filter dropdown
     categories = Category.objects.all()
 
-    # Pagination
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get("page")
-    page_obj = paginator.get_page(page_number)
-
     context = {
         "page_obj": page_obj, 
         "categories": categories, 
         "selected_category": category_filter,
         "search_query": search_query,
+        "filter_query": filter_query,
         "filters": {
             'min_price': min_price,
             'max_price': max_price,
             'in_stock': in_stock,
         },
-        "total_results": products.count() if hasattr(products, 'count') else len(products)
+        "total_results": total_results,
     }
 
     return render(request, "products/list.html", context)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Checkout throughput benchmark
+Usage: python scripts/benchmark_checkout.py [--buyers 16] [--orders 25] [--cart-size 5] [--products 40]
+
+Creates a throwaway test database and runs concurrent buyers, one thread and one
+connection each, who check out carts drawn from a small shared catalogue so that
+their carts overlap. Compares OrderService.create_order (one locking query, one
+stock UPDATE, bulk inserted items) with the old per-item path, which locked and
+decremented each product separately. Reports orders/s, latency and deadlocks.
+Run it against PostgreSQL; SQLite serialises every writer and hides the contention.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "marketplace.settings")
+
+import django
+
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.db import OperationalError, connection, connections, transaction
+from django.test.utils import setup_test_environment
+
+from core.services.service_registry import ServiceRegistry
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from vendors.models import Vendor
+from wallets.models import Wallet
+
+User = get_user_model()
+
+
+def legacy_checkout(user_id, vendor, cart):
+    """The per-item checkout create_order replaced: one lock, insert and update per line"""
+    wallet_service = ServiceRegistry.get_service("wallet_service")
+    with transaction.atomic():
+        order = Order(user_id=user_id, status="PENDING")
+        lines = []
+        for product_id, quantity in cart:
+            product = Product.objects.select_for_update().get(pk=product_id, vendor=vendor)
+            if product.stock_quantity < quantity:
+                return False
+            order.total_btc += product.price_btc * quantity
+            lines.append((product, quantity))
+        success, _ = wallet_service.move_to_escrow(user_id, "btc", order.total_btc, str(order.id))
+        if not success:
+            transaction.set_rollback(True)
+            return False
+        order.save()
+        for product, quantity in lines:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=quantity, price_btc=product.price_btc, price_xmr=product.price_xmr
+            )
+            product.stock_quantity -= quantity
+            product.save(update_fields=["stock_quantity"])
+    return True
+
+
+def batched_checkout(user_id, vendor, cart):
+    order_service = ServiceRegistry.get_service("order_service")
+    items = [{"product_id": product_id, "quantity": quantity} for product_id, quantity in cart]
+    _, success, _ = order_service.create_order(user_id, vendor.user_id, items, "", currency="BTC")
+    return success
+
+
+def seed(buyer_count, product_count):
+    vendor_user = User.objects.create_user(username="bench-vendor", password="x")
+    vendor = Vendor.objects.create(user=vendor_user, vendor_name="Bench Vendor")
+    category = Category.objects.create(name="Bench")
+    products = Product.objects.bulk_create(
+        Product(
+            vendor=vendor,
+            category=category,
+            name=f"Card {number}",
+            description="",
+            price_btc=Decimal("0.001"),
+            price_xmr=Decimal("0.1"),
+            stock_quantity=10**9,
+        )
+        for number in range(product_count)
+    )
+    buyers = [User.objects.create_user(username=f"bench-buyer{number}", password="x") for number in range(buyer_count)]
+    Wallet.objects.bulk_create(Wallet(user=buyer, balance_btc=Decimal("1000000")) for buyer in buyers)
+    return vendor, [product.pk for product in products], [buyer.pk for buyer in buyers]
+
+
+def run(checkout, vendor, product_ids, buyer_ids, orders, cart_size):
+    latencies, failures, deadlocks = [], [], []
+    start = threading.Barrier(len(buyer_ids) + 1)
+
+    def buyer(number, user_id):
+        rng = random.Random(number)
+        start.wait()
+        try:
+            for _ in range(orders):
+                # Shuffled carts: the per-item path then locks overlapping rows in different orders
+                cart = [(product_id, rng.randint(1, 3)) for product_id in rng.sample(product_ids, cart_size)]
+                began = time.perf_counter()
+                try:
+                    if not checkout(user_id, vendor, cart):
+                        failures.append(number)
+                except OperationalError:
+                    deadlocks.append(number)
+                latencies.append((time.perf_counter() - began) * 1000)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=buyer, args=(number, user_id)) for number, user_id in enumerate(buyer_ids)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    return len(latencies) / elapsed, latencies, len(failures), len(deadlocks)
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--buyers", type=int, default=16, help="Concurrent buyer threads")
+    parser.add_argument("--orders", type=int, default=25, help="Checkouts per buyer")
+    parser.add_argument("--cart-size", type=int, default=5, help="Distinct products per cart")
+    parser.add_argument("--products", type=int, default=40, help="Catalogue size; smaller means more overlap")
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        vendor, product_ids, buyer_ids = seed(args.buyers, args.products)
+        print(f"🛒 Checkout benchmark ({connection.vendor}, {args.buyers} buyers x {args.orders} orders, "
+              f"{args.cart_size} of {args.products} products per cart)")
+        for label, checkout in (("per-item", legacy_checkout), ("batched", batched_checkout)):
+            throughput, latencies, failures, deadlocks = run(
+                checkout, vendor, product_ids, buyer_ids, args.orders, args.cart_size
+            )
+            print(f"\n{label}")
+            print(f"  throughput:       {throughput:8.1f} orders/s")
+            print(f"  latency p50 / p95: {statistics.median(latencies):7.1f} / {percentile(latencies, 0.95):7.1f} ms")
+            print(f"  failed / deadlock: {failures:7d} / {deadlocks}")
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Image upload pipeline benchmark
+Usage: python scripts/benchmark_image_pipeline.py [--sizes 4k,8k] [--formats jpeg,png] [--runs 3]
+
+Runs SecureImageProcessor._process_image and the previous pipeline (verify, reopen,
+full-resolution decode and blur, encode retries) on synthetic 4K and 8K uploads.
+Each case runs in a fresh child process so its peak RSS is measured in isolation.
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SIZES = {"4k": (3840, 2160), "8k": (7680, 4320)}
+
+
+def make_upload(size, image_format):
+    from PIL import Image
+
+    width, height = size
+    # Mandelbrot detail plus a colour gradient compresses roughly like a photo
+    detail = Image.effect_mandelbrot((width, height), (-2.2, -1.2, 1.0, 1.2), 60)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    img = Image.merge("RGB", (detail, gradient, gradient.transpose(Image.Transpose.FLIP_LEFT_RIGHT)))
+    output = BytesIO()
+    img.save(output, format=image_format.upper(), **({"quality": 90} if image_format == "jpeg" else {}))
+    return output.getvalue()
+
+
+def legacy_process(file_content, config, max_size):
+    """The pipeline as it was before draft decoding, probe-based quality and reduced thumbnails"""
+    from PIL import Image, ImageFilter
+
+    max_dimensions = config["MAX_IMAGE_DIMENSIONS"]
+    img = Image.open(BytesIO(file_content))
+    img.verify()
+    img = Image.open(BytesIO(file_content))
+    if img.width > max_dimensions[0] or img.height > max_dimensions[1]:
+        ratio = min(max_dimensions[0] / img.width, max_dimensions[1] / img.height)
+        img = img.resize((int(img.width * ratio), int(img.height * ratio)), Image.Resampling.LANCZOS)
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img = img.filter(ImageFilter.GaussianBlur(radius=0.1))
+    thumbnail = img.copy()
+    thumbnail.thumbnail(config["THUMBNAIL_SIZE"], Image.Resampling.LANCZOS)
+    output = BytesIO()
+    img.save(output, format="JPEG", quality=config.get("JPEG_QUALITY", 85), optimize=True, progressive=False)
+    if output.getbuffer().nbytes > max_size:
+        output = BytesIO()
+        img.save(output, format="JPEG", quality=70, optimize=True)
+        if output.getbuffer().nbytes > max_size:
+            img.thumbnail((1280, 720), Image.Resampling.LANCZOS)
+            output = BytesIO()
+            img.save(output, format="JPEG", quality=70, optimize=True)
+    thumb_output = BytesIO()
+    thumbnail.save(thumb_output, format="JPEG", quality=config.get("THUMBNAIL_QUALITY", 75), optimize=True)
+    return output, thumb_output
+
+
+def reset_peak_rss():
+    """Reset the high-water mark so start-up allocations of the child do not count"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def rss_mb(field="VmHWM"):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(pipeline, upload, runs, results):
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "marketplace.settings")
+    import django
+
+    django.setup()
+    from django.conf import settings
+
+    from core.security.image_security import SecureImageProcessor
+
+    processor = SecureImageProcessor()
+    reset_peak_rss()
+    baseline = rss_mb("VmRSS")
+    latencies = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        if pipeline == "before":
+            output, _ = legacy_process(upload, settings.IMAGE_UPLOAD_SETTINGS, processor.max_size)
+        else:
+            output, _, _ = processor._process_image(BytesIO(upload))
+        latencies.append((time.perf_counter() - started) * 1000)
+    results.put((statistics.median(latencies), rss_mb() - baseline, output.getbuffer().nbytes))
+
+
+def measure(pipeline, upload, runs):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    child = context.Process(target=run_case, args=(pipeline, upload, runs, results))
+    child.start()
+    result = results.get()
+    child.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="4k,8k", help="Comma separated input sizes (4k, 8k)")
+    parser.add_argument("--formats", default="jpeg,png", help="Comma separated upload formats")
+    parser.add_argument("--runs", type=int, default=3, help="Timed runs per case")
+    args = parser.parse_args()
+
+    print("🖼  Image pipeline benchmark")
+    for name in args.sizes.split(","):
+        for image_format in args.formats.split(","):
+            upload = make_upload(SIZES[name], image_format)
+            print(f"\n{name} {image_format} upload ({len(upload) / 1024 / 1024:.1f} MB)")
+            for pipeline in ("before", "after"):
+                latency, rss, output_bytes = measure(pipeline, upload, args.runs)
+                print(f"  {pipeline:<7} p50 {latency:8.1f} ms   peak RSS +{rss:7.1f} MB   output {output_bytes / 1024:7.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
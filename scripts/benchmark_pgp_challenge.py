@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+PGP login challenge throughput benchmark
+Usage: python scripts/benchmark_pgp_challenge.py [--challenges 200] [--threads 1,4] [--users 20]
+
+Times the login flow (import the user's public key, look up its metadata, encrypt
+the challenge) with a fresh temporary GnuPG home per request, as PGPService used to
+do, and with the shared pooled keyring.
+"""
+
+import argparse
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import gnupg
+
+from accounts.pgp_keyring import GPG_CONF, KeyRing, find_gpg_binary
+from accounts.pgp_service import PGPService
+
+
+def make_keys(count: int):
+    scratch = tempfile.mkdtemp()
+    gpg = gnupg.GPG(gnupghome=scratch)
+    keys = []
+    for number in range(count):
+        key = gpg.gen_key(gpg.gen_key_input(
+            key_type="EDDSA", key_curve="ed25519", subkey_type="ECDH", subkey_curve="cv25519",
+            name_email=f"user{number}@example.com", no_protection=True,
+        ))
+        keys.append((key.fingerprint, gpg.export_keys(key.fingerprint)))
+    shutil.rmtree(scratch, ignore_errors=True)
+    return keys
+
+
+def legacy_challenge(fingerprint: str, public_key: str) -> bool:
+    """One login with a temporary home per PGPService instance"""
+    home = tempfile.mkdtemp(prefix="marketplace_gpg_")
+    try:
+        gpg = gnupg.GPG(gnupghome=home)
+        gpg.gpgbinary = find_gpg_binary() or gpg.gpgbinary
+        with open(os.path.join(home, "gpg.conf"), "w") as f:
+            f.write(GPG_CONF)
+        gpg.version
+        gpg.import_keys(public_key)
+        gpg.list_keys()  # get_key_info after the import
+        gpg.list_keys()  # and again inside encrypt_message
+        message = f"MARKETPLACE-2FA:{secrets.token_urlsafe(32)}"
+        return gpg.encrypt(message, recipients=[fingerprint], always_trust=True, armor=True).ok
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+def pooled_challenge(keyring: KeyRing, fingerprint: str, public_key: str) -> bool:
+    service = PGPService(keyring=keyring)
+    if not service.import_public_key(public_key)["success"]:
+        return False
+    message = f"MARKETPLACE-2FA:{secrets.token_urlsafe(32)}"
+    return service.encrypt_message(message, fingerprint)["success"]
+
+
+def run(label: str, challenge, keys, count: int, threads: int):
+    jobs = [keys[number % len(keys)] for number in range(count)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda job: challenge(*job), jobs))
+    elapsed = time.perf_counter() - started
+    failures = results.count(False)
+    print(f"  {label:<8} {count / elapsed:8.1f} challenges/s  {elapsed / count * 1000:8.2f} ms each"
+          + (f"  ({failures} failed)" if failures else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--challenges", type=int, default=200, help="Challenges generated per run")
+    parser.add_argument("--threads", default="1,4", help="Comma separated concurrency levels")
+    parser.add_argument("--users", type=int, default=20, help="Distinct user keys cycled through")
+    parser.add_argument("--pool-size", type=int, default=4, help="GPG contexts in the shared keyring")
+    args = parser.parse_args()
+
+    print("🔐 PGP login challenge benchmark")
+    keys = make_keys(args.users)
+    keyring = KeyRing(pool_size=args.pool_size)
+    try:
+        for threads in (int(value) for value in args.threads.split(",")):
+            print(f"\n{threads} thread(s), {args.users} users")
+            run("before", legacy_challenge, keys, args.challenges, threads)
+            run("after", lambda fingerprint, key: pooled_challenge(keyring, fingerprint, key),
+                keys, args.challenges, threads)
+        print(f"\nkeyring: {keyring.get_stats()}")
+    finally:
+        keyring.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Search index latency benchmark
+Usage: python scripts/benchmark_search_index.py [--sizes 10000,100000,1000000] [--queries 200]
+
+Builds the BM25 inverted index over a synthetic catalogue of each size and compares
+query latency with a substring scan equivalent to the old icontains search.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.search.index import InvertedIndex, tokenize
+
+BRANDS = ["amazon", "steam", "google", "apple", "netflix", "spotify", "xbox", "playstation", "uber", "visa"]
+NOUNS = ["gift", "card", "voucher", "code", "credit", "subscription", "key", "bundle", "pass", "token"]
+ADJECTIVES = ["instant", "digital", "premium", "global", "regional", "annual", "monthly", "bonus", "fast", "cheap"]
+FILLER = [f"word{i}" for i in range(5000)]
+CATEGORIES = ["Gift Cards", "Games", "Streaming", "Software", "Services"]
+
+
+def make_product(rng: random.Random, number: int):
+    name = f"{rng.choice(ADJECTIVES)} {rng.choice(BRANDS)} {rng.choice(NOUNS)} {rng.randint(5, 500)}"
+    description = " ".join(rng.choice(FILLER) for _ in range(20))
+    fields = {
+        "name": name,
+        "description": f"{description} {rng.choice(BRANDS)} {rng.choice(NOUNS)}",
+        "category": rng.choice(CATEGORIES),
+        "vendor": f"vendor{number % 500}",
+    }
+    return f"product-{number}", fields
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def benchmark(size: int, query_count: int, scan_queries: int):
+    rng = random.Random(size)
+    catalogue = [make_product(rng, number) for number in range(size)]
+    queries = [
+        f"{rng.choice(BRANDS)} {rng.choice(NOUNS)}" if number % 2 else f"{rng.choice(ADJECTIVES)} {rng.choice(FILLER)}"
+        for number in range(query_count)
+    ]
+
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for doc_id, fields in catalogue:
+        index.add(doc_id, fields)
+    build_seconds = time.perf_counter() - started
+
+    index_latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(tokenize(query), limit=50)
+        index_latencies.append((time.perf_counter() - started) * 1000)
+
+    # Baseline: OR of substring matches over every row, like name/description__icontains
+    haystacks = [f"{fields['name']} {fields['description']} {fields['category']}".lower() for _, fields in catalogue]
+    scan_latencies = []
+    for query in queries[:scan_queries]:
+        terms = [term for term in query.lower().split() if len(term) > 2]
+        started = time.perf_counter()
+        [doc for doc in haystacks if any(term in doc for term in terms)][:50]
+        scan_latencies.append((time.perf_counter() - started) * 1000)
+
+    stats = index.get_stats()
+    print(f"\n{size:,} products ({stats['terms']:,} terms, {stats['postings']:,} postings)")
+    print(f"  build:            {build_seconds:8.2f} s")
+    print(f"  index  p50 / p95: {statistics.median(index_latencies):8.2f} / {percentile(index_latencies, 0.95):8.2f} ms")
+    print(f"  scan   p50 / p95: {statistics.median(scan_latencies):8.2f} / {percentile(scan_latencies, 0.95):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma separated catalogue sizes")
+    parser.add_argument("--queries", type=int, default=200, help="Queries timed against the index")
+    parser.add_argument("--scan-queries", type=int, default=20, help="Queries timed against the linear scan")
+    args = parser.parse_args()
+
+    print("🔎 Search index benchmark")
+    for size in (int(value) for value in args.sizes.split(",")):
+        benchmark(size, args.queries, args.scan_queries)
+
+
+if __name__ == "__main__":
+    main()
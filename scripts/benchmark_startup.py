@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Process start-up benchmark
+Usage: python scripts/benchmark_startup.py [--runs 5] [--baseline REV]
+
+Times, in fresh processes, `manage.py check`, a web worker boot (load the WSGI
+application, then run the post_fork warm-up) and a Celery worker boot (load the
+app and import every task module). With --baseline the same commands also run in
+a temporary git worktree of REV, e.g. the commit before lazy service start-up.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER_BOOT = """
+from marketplace.wsgi import application
+from django.apps import apps
+config = apps.get_app_config("marketplace")
+if hasattr(config, "warm_up"):
+    config.warm_up()
+"""
+
+CELERY_BOOT = """
+from marketplace.celery import app
+app.loader.import_default_modules()
+app.finalize()
+"""
+
+COMMANDS = {
+    "manage.py check": [sys.executable, "manage.py", "check"],
+    "web worker": [sys.executable, "-c", WORKER_BOOT],
+    "celery worker": [sys.executable, "-c", CELERY_BOOT],
+}
+
+
+def run_once(command, cwd):
+    """Wall time in ms and peak RSS in MB of one child process"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="marketplace.settings", PYTHONDONTWRITEBYTECODE="1")
+    with tempfile.TemporaryFile() as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=stderr)
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = (time.perf_counter() - started) * 1000
+        if os.waitstatus_to_exitcode(status):
+            stderr.seek(0)
+            raise RuntimeError(f"{' '.join(command[:2])} failed in {cwd}:\n{stderr.read().decode()[-2000:]}")
+    return elapsed, usage.ru_maxrss / 1024
+
+
+def measure(command, cwd, runs):
+    run_once(command, cwd)  # Fill the page cache and compile bytecode before timing
+    results = [run_once(command, cwd) for _ in range(runs)]
+    return statistics.median(r[0] for r in results), max(r[1] for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per command")
+    parser.add_argument("--baseline", help="Git revision to compare against")
+    args = parser.parse_args()
+
+    trees = [("current", ROOT)]
+    worktree = None
+    if args.baseline:
+        worktree = tempfile.mkdtemp(prefix="marketplace_baseline_")
+        subprocess.run(["git", "worktree", "add", "--detach", worktree, args.baseline], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL)
+        trees.insert(0, (args.baseline, worktree))
+
+    print("⏱  Start-up benchmark")
+    try:
+        for name, command in COMMANDS.items():
+            print(f"\n{name}")
+            for label, cwd in trees:
+                elapsed, rss = measure(command, cwd, args.runs)
+                print(f"  {label:<12} p50 {elapsed:8.1f} ms   peak RSS {rss:7.1f} MB")
+    finally:
+        if worktree:
+            subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=ROOT)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Tests for the pre-rendered admin chart pipeline.
+"""
+
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from adminpanel import charts
+from adminpanel.utils import ChartGenerator
+
+
+class TestAdminCharts(TestCase):
+    """Test bucketed rendering, version lookups and that web code never loads matplotlib."""
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, True)
+        storage = override_settings(ADMIN_CHARTS={**settings.ADMIN_CHARTS, "ROOT": self.root, "TTL": 3600})
+        storage.enable()
+        self.addCleanup(storage.disable)
+        User.objects.create_user(username="alice", password="pw")
+        patcher = mock.patch.object(ChartGenerator, "render", side_effect=self.fake_render)
+        self.render = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def fake_render(dates, values, title, chart_type="line", image_format="png"):
+        return f"{image_format}:{title}:{sum(values)}".encode()
+
+    def test_charts_are_stored_per_bucket(self):
+        now = timezone.now()
+        self.assertEqual(charts.render_charts(["new_users"], now=now), 1)
+        self.assertEqual(self.render.call_count, 2)  # png and svg
+
+        bucket = charts.current_bucket(now)
+        self.assertEqual(charts.chart_versions(["new_users", "orders"]), {"new_users": bucket})
+        self.assertEqual(charts.get_chart("new_users", "svg", bucket), b"svg:New users per day:1.0")
+        self.assertEqual(charts.get_chart("new_users", "png"), b"png:New users per day:1.0")
+        self.assertIsNone(charts.get_chart("orders", "png"))
+
+        # Same bucket: nothing is redrawn; next bucket: redrawn under a new version
+        self.assertEqual(charts.render_charts(["new_users"], now=now), 0)
+        later = now + timedelta(seconds=charts.get_options()["BUCKET_SECONDS"])
+        self.assertEqual(charts.render_charts(["new_users"], now=later), 1)
+        self.assertEqual(charts.chart_versions(["new_users"]), {"new_users": bucket + 1})
+        self.assertEqual(charts.get_chart("new_users", "png", bucket), b"png:New users per day:1.0")
+
+        # Renders older than TTL are pruned once a newer one is stored
+        charts.render_charts(["new_users"], now=later + timedelta(seconds=charts.get_options()["BUCKET_SECONDS"]))
+        self.assertIsNone(charts.get_chart("new_users", "png", bucket))
+        self.assertEqual(
+            sorted(path.name for path in Path(self.root, "new_users").iterdir()),
+            [f"{bucket + 1}.png", f"{bucket + 1}.svg", f"{bucket + 2}.png", f"{bucket + 2}.svg", "version"],
+        )
+
+    def test_links_only_cover_rendered_charts(self):
+        self.assertEqual(charts.chart_links(charts.DASHBOARD_CHARTS), [])
+        charts.render_charts(charts.DASHBOARD_CHARTS)
+
+        # The full URLconf pulls in optional 2FA dependencies, so resolve chart URLs directly
+        with mock.patch("django.urls.reverse", side_effect=lambda view, args: "/adminpanel/charts/%s.%s" % tuple(args)):
+            links = charts.chart_links(charts.DASHBOARD_CHARTS)
+        self.assertEqual([link["name"] for link in links], list(charts.DASHBOARD_CHARTS))
+        self.assertEqual(links[0]["url"], f"/adminpanel/charts/new_users.png?v={charts.current_bucket()}")
+
+    def test_failed_chart_keeps_previous_version(self):
+        charts.render_charts(["orders"])
+        version = charts.chart_versions(["orders"])
+        later = timezone.now() + timedelta(days=1)
+        with mock.patch.dict(charts.CHARTS["orders"], rows=mock.Mock(side_effect=RuntimeError("db down"))):
+            self.assertEqual(charts.render_charts(["orders"], now=later), 0)
+        self.assertEqual(charts.chart_versions(["orders"]), version)
+
+    def test_web_modules_do_not_import_matplotlib(self):
+        self.assertNotIn("matplotlib", sys.modules)
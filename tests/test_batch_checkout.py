@@ -0,0 +1,126 @@
+"""
+Tests for the batched checkout in OrderService.create_order.
+"""
+
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.services.service_registry import ServiceRegistry
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from vendors.models import Vendor
+from wallets.models import Wallet
+
+User = get_user_model()
+
+
+class TestBatchCheckout(TestCase):
+    """Test one locking query, in-memory validation and bulk writes."""
+
+    def setUp(self):
+        self.vendor_user = User.objects.create_user(username="vendor", password="x")
+        vendor = Vendor.objects.create(user=self.vendor_user, vendor_name="Vendor")
+        category = Category.objects.create(name="Cards")
+        self.products = [
+            Product.objects.create(
+                vendor=vendor,
+                category=category,
+                name=f"Card {number}",
+                description="",
+                price_btc=Decimal("0.01"),
+                price_xmr=Decimal("1"),
+                stock_quantity=5,
+            )
+            for number in range(3)
+        ]
+        self.buyer = User.objects.create_user(username="buyer", password="x")
+        self.wallet = Wallet.objects.create(user=self.buyer, balance_btc=Decimal("1"))
+        self.order_service = ServiceRegistry.get_service("order_service")
+
+    def checkout(self, *lines):
+        items = [{"product_id": str(product.pk), "quantity": quantity} for product, quantity in lines]
+        return self.order_service.create_order(self.buyer.pk, self.vendor_user.pk, items, "address", currency="BTC")
+
+    def test_checkout_locks_once_and_writes_in_bulk(self):
+        first, second, third = self.products
+
+        with CaptureQueriesContext(connection) as queries:
+            order, success, message = self.checkout((first, 2), (second, 1), (first, 1), (third, 5))
+
+        self.assertTrue(success, message)
+        self.assertEqual(order.total_btc, Decimal("0.09"))
+        self.assertEqual(order.status, "PENDING")
+        self.assertEqual(
+            sorted(OrderItem.objects.filter(order=order).values_list("quantity", flat=True)), [1, 3, 5]
+        )
+        self.assertEqual(
+            [Product.objects.get(pk=product.pk).stock_quantity for product in self.products], [2, 4, 0]
+        )
+        product_sql = [query["sql"] for query in queries.captured_queries if '"products_product"' in query["sql"]]
+        self.assertEqual(len([sql for sql in product_sql if sql.startswith("UPDATE")]), 1)
+        self.assertLessEqual(len([sql for sql in product_sql if sql.startswith("SELECT")]), 1)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.escrow_btc, Decimal("0.09"))
+
+    def test_checkout_touches_and_reindexes_sold_products(self):
+        first = self.products[0]
+        updated_at = Product.objects.get(pk=first.pk).updated_at
+
+        with mock.patch("core.search.backends.get_search_backend") as get_backend:
+            with self.captureOnCommitCallbacks(execute=True):
+                _, success, message = self.checkout((first, 5))
+
+        self.assertTrue(success, message)
+        self.assertGreater(Product.objects.get(pk=first.pk).updated_at, updated_at)
+        indexed = [call.args[0] for call in get_backend.return_value.index_product.call_args_list]
+        self.assertEqual([(product.pk, product.stock_quantity) for product in indexed], [(first.pk, 0)])
+
+    def test_refund_locks_products_before_the_wallet(self):
+        order, success, message = self.checkout((self.products[0], 2))
+        self.assertTrue(success, message)
+        order.currency, order.total_amount = "BTC", order.total_btc  # not stored on Order; refunds expect them
+        wallet_service = ServiceRegistry.get_service("wallet_service")
+        calls = mock.Mock()
+
+        with mock.patch.object(self.order_service, "_lock_products", wraps=self.order_service._lock_products) as lock, \
+                mock.patch.object(wallet_service, "release_from_escrow", return_value=(False, "test")) as release:
+            calls.attach_mock(lock, "lock_products")
+            calls.attach_mock(release, "release_from_escrow")
+            self.order_service._refund_order(order)
+
+        self.assertEqual([name for name, _, _ in calls.mock_calls], ["lock_products", "release_from_escrow"])
+
+    def test_insufficient_stock_changes_nothing(self):
+        first, second, _ = self.products
+
+        order, success, message = self.checkout((first, 1), (second, 6))
+
+        self.assertFalse(success)
+        self.assertIn("Insufficient stock", message)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(Product.objects.get(pk=first.pk).stock_quantity, 5)
+
+    def test_insufficient_balance_rolls_back(self):
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance_btc=Decimal("0.01"))
+
+        order, success, message = self.checkout((self.products[0], 2))
+
+        self.assertFalse(success)
+        self.assertIn("Insufficient balance", message)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock_quantity, 5)
+
+    def test_products_of_another_vendor_are_rejected(self):
+        other = Vendor.objects.create(user=User.objects.create_user(username="other", password="x"), vendor_name="Other")
+        Product.objects.filter(pk=self.products[0].pk).update(vendor=other)
+
+        _, success, message = self.checkout((self.products[0], 1))
+
+        self.assertFalse(success)
+        self.assertIn("not found", message)
@@ -0,0 +1,58 @@
+"""
+Tests for signal-driven cache tag invalidation.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+
+from core.services.tiered_cache import service_cache, tag
+from core.services.wallet_service import WalletService
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from vendors.models import Vendor
+from wallets.models import Wallet
+
+User = get_user_model()
+
+
+class TestCacheTagSignals(TestCase):
+    """Test that committed model writes invalidate the values tagged with them."""
+
+    def setUp(self):
+        cache.clear()
+        service_cache.local.clear()
+        self.user = User.objects.create_user(username="buyer", password="x")
+        vendor = Vendor.objects.create(user=User.objects.create_user(username="vendor", password="x"), vendor_name="V")
+        self.product = Product.objects.create(
+            vendor=vendor, category=Category.objects.create(name="Cards"), name="Card", description="",
+            price_btc=Decimal("0.01"), price_xmr=Decimal("1")
+        )
+
+    def test_order_item_write_invalidates_buyer_and_product_tags(self):
+        order = Order.objects.create(user=self.user)
+        service_cache.set("k:buyer", "cached", 600, tags=[tag("orders.order", user=self.user.pk)])
+        service_cache.set("k:product", "cached", 600, tags=[tag("orders.orderitem", product=self.product.pk)])
+        service_cache.set("k:other", "cached", 600, tags=[tag("orders.order", user=0)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderItem.objects.create(
+                order=order, product=self.product, quantity=1, price_btc=Decimal("0.01"), price_xmr=Decimal("1")
+            )
+
+        self.assertIsNone(service_cache.get("k:buyer"))
+        self.assertIsNone(service_cache.get("k:product"))
+        self.assertEqual(service_cache.get("k:other"), "cached")
+
+    def test_wallet_balance_cache_follows_wallet_writes(self):
+        wallet = Wallet.objects.create(user=self.user, balance_btc=Decimal("1"))
+        service = WalletService(max_daily_withdrawal=Decimal("1"), withdrawal_cooldown=0)
+        self.assertEqual(service.get_wallet_by_user(self.user.pk).balance_btc, Decimal("1"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            wallet.balance_btc = Decimal("2")
+            wallet.save()
+
+        self.assertEqual(service.get_wallet_by_user(self.user.pk).balance_btc, Decimal("2"))
@@ -0,0 +1,96 @@
+"""
+Tests for the SecureImageProcessor upload pipeline.
+"""
+
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from io import BytesIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from PIL import Image, JpegImagePlugin
+
+from core.security.image_security import SCAN_CHUNK, SecureImageProcessor
+
+
+def encode(size, image_format="JPEG", mode="RGB"):
+    img = Image.effect_mandelbrot(size, (-2.2, -1.2, 1.0, 1.2), 40).convert(mode)
+    if mode == "RGBA":
+        img.putalpha(Image.new("L", size, 0))
+    output = BytesIO()
+    img.save(output, format=image_format)
+    return output.getvalue()
+
+
+class TestImagePipeline(TestCase):
+    """Test reduced decoding, size-driven quality and the pooled entry point."""
+
+    def setUp(self):
+        cache.clear()
+        self.processor = SecureImageProcessor()
+
+    def test_large_jpeg_is_decoded_reduced(self):
+        jpeg = JpegImagePlugin.JpegImageFile
+        with mock.patch.object(jpeg, "draft", autospec=True, side_effect=jpeg.draft) as draft:
+            output, thumbnail, variants = self.processor._process_image(encode((3840, 2160)))
+
+        # The decoder is asked for the output size, so it decodes the 4K frame at half scale
+        self.assertEqual(draft.call_args_list[0].args[1:], ("RGB", self.processor.max_dimensions))
+        self.assertEqual(Image.open(output).size, (1920, 1080))
+        self.assertEqual(Image.open(thumbnail).size, (400, 225))
+        self.assertEqual({w: Image.open(v).size for w, v in variants.items()},
+                         {320: (320, 180), 640: (640, 360), 1280: (1280, 720)})
+
+    def test_transparent_png_gets_white_background(self):
+        output, _, _ = self.processor._process_image(encode((300, 200), "PNG", "RGBA"))
+        img = Image.open(output)
+        self.assertEqual(img.format, "JPEG")
+        self.assertGreater(min(img.getpixel((5, 5))), 240)
+
+    def test_oversized_canvas_is_refused_before_decoding(self):
+        self.processor.max_input_pixels = 1000
+        self.assertEqual(self.processor._process_image(encode((100, 100))), (None, None, None))
+
+    def test_quality_is_chosen_to_fit_size_limit(self):
+        self.processor.max_size = 40 * 1024
+        output, _, _ = self.processor._process_image(encode((1920, 1080)))
+        self.assertLessEqual(output.getbuffer().nbytes, self.processor.max_size)
+
+    def test_upload_is_processed_on_the_pool(self):
+        user = get_user_model().objects.create_user(username="vendor", password="pw")
+        upload = SimpleUploadedFile("photo.jpg", encode((800, 600)), content_type="image/jpeg")
+
+        with mock.patch.object(SecureImageProcessor, "_save_images", return_value=True) as save:
+            success, filename, thumb_filename = self.processor.validate_and_process_image(upload, user)
+
+        self.assertTrue(success)
+        self.assertEqual(thumb_filename, f"thumb_{filename}")
+        self.assertEqual(Image.open(save.call_args.args[0]).size, (800, 600))
+
+    def test_content_anywhere_in_the_upload_is_scanned(self):
+        user = get_user_model().objects.create_user(username="vendor", password="pw")
+        image = encode((800, 600))
+        middle = len(image) // 2
+        upload = SimpleUploadedFile("photo.jpg", image[:middle] + b"<?php system($_GET['c']); ?>" + image[middle:])
+
+        self.assertEqual(
+            self.processor.validate_and_process_image(upload, user), (False, "Suspicious content detected", None)
+        )
+        # A pattern split across two scan chunks is still found
+        straddling = b"\xff\xd8\xff" + bytes(SCAN_CHUNK - 6) + b"<script>" + bytes(SCAN_CHUNK)
+        self.assertTrue(self.processor._detect_malicious_content(straddling))
+
+    def test_timed_out_decode_works_on_its_own_copy(self):
+        user = get_user_model().objects.create_user(username="vendor", password="pw")
+        upload = SimpleUploadedFile("photo.jpg", encode((800, 600)), content_type="image/jpeg")
+        pool = mock.Mock()
+        pool.submit.return_value.result.side_effect = FutureTimeoutError
+
+        with mock.patch("core.security.image_security.get_processing_pool", return_value=pool):
+            result = self.processor.validate_and_process_image(upload, user)
+
+        self.assertEqual(result, (False, "Image processing timed out", None))
+        self.assertIsInstance(pool.submit.call_args.args[1], bytes)
+        pool.submit.return_value.cancel.assert_called_once_with()
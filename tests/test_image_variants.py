@@ -0,0 +1,152 @@
+"""
+Tests for content-addressed image variants and how serve_secure_image serves them.
+"""
+
+import shutil
+import tempfile
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+from PIL import Image
+
+from core.security.image_security import SecureImageProcessor
+from core.security.image_variants import parse_name, pick_width, variant_name
+from core.views import serve_secure_image
+from products.models import Category, Product
+from vendors.models import Vendor
+
+
+def encode(size):
+    img = Image.effect_mandelbrot(size, (-2.2, -1.2, 1.0, 1.2), 40).convert("RGB")
+    output = BytesIO()
+    img.save(output, format="JPEG")
+    return output.getvalue()
+
+
+class TestImageVariants(TestCase):
+    """Test variant storage, deduplication and width selection when serving."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        patcher = override_settings(SECURE_UPLOAD_ROOT=self.root)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+        self.processor = SecureImageProcessor()
+        self.user = get_user_model().objects.create_user(username="vendor", password="pw")
+        self.upload = encode((1600, 900))
+
+    def store(self):
+        upload = SimpleUploadedFile("photo.jpg", self.upload, content_type="image/jpeg")
+        success, filename, thumb_filename = self.processor.validate_and_process_image(upload, self.user)
+        self.assertTrue(success)
+        return filename, thumb_filename
+
+    def serve(self, filename, width=None):
+        request = RequestFactory().get(f"/secure-images/products/{filename}", {"w": width} if width else {})
+        response = serve_secure_image(request, f"products/{filename}")
+        return Image.open(BytesIO(b"".join(response))).size
+
+    def test_variants_are_stored_by_content(self):
+        filename, thumb_filename = self.store()
+        digest, width = parse_name(filename)
+        self.assertIsNone(width)
+        names = sorted(p.name for p in (self.root / "products").iterdir())
+        self.assertEqual(names, sorted([filename, thumb_filename] + [variant_name(digest, w) for w in (320, 640, 1280)]))
+
+        # The same upload maps to the same files and is not written again
+        with mock.patch("core.security.image_security.os.replace") as replace:
+            self.assertEqual(self.store(), (filename, thumb_filename))
+        replace.assert_not_called()
+
+    def test_smallest_adequate_variant_is_served(self):
+        filename, _ = self.store()
+        self.assertEqual(self.serve(filename, 300), (320, 180))
+        self.assertEqual(self.serve(filename, 641), (1280, 720))
+        self.assertEqual(self.serve(filename, 4000), (1600, 900))
+        self.assertEqual(self.serve(filename), (1600, 900))
+        self.assertEqual(pick_width([320, 640], 100), 320)
+
+    def test_shared_files_survive_deleting_one_product(self):
+        filename, thumb_filename = self.store()
+        vendor = Vendor.objects.create(user=self.user, vendor_name="Vendor")
+        category = Category.objects.create(name="Cards")
+        products = [
+            Product.objects.create(
+                vendor=vendor, category=category, name=f"Card {i}", description="d", price_btc=1, price_xmr=1,
+                image_filename=filename, thumbnail_filename=thumb_filename,
+            )
+            for i in range(2)
+        ]
+
+        products[0].delete()
+        self.assertTrue((self.root / "products" / filename).exists())
+        products[1].delete()
+        self.assertEqual(list((self.root / "products").iterdir()), [])
+
+    def test_templates_ask_for_display_width(self):
+        filename, thumb_filename = self.store()
+        product = Product(image_filename=filename, thumbnail_filename=thumb_filename)
+        html = Template("{% load images %}{{ product|image_variant:320 }}").render(Context({"product": product}))
+        self.assertEqual(html, f"/secure-images/products/{filename}?w=320")
+
+        legacy = Product(image_filename="20240101_abc.jpg", thumbnail_filename="thumb_20240101_abc.jpg")
+        self.assertEqual(legacy.image_variant_url(320), "/secure-images/products/thumb_20240101_abc.jpg")
+        self.assertEqual(legacy.image_variant_url(1280), "/secure-images/products/20240101_abc.jpg")
+
+
+class TestConditionalImageServing(TestCase):
+    """Test validators, 304 answers and the X-Accel-Redirect hand-off."""
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        patcher = override_settings(SECURE_UPLOAD_ROOT=self.root)
+        patcher.enable()
+        self.addCleanup(patcher.disable)
+
+        (self.root / "products").mkdir()
+        self.filename = variant_name("0123456789abcdef0123456789abcdef")
+        (self.root / "products" / self.filename).write_bytes(encode((64, 48)))
+
+    def get(self, path, **headers):
+        return serve_secure_image(RequestFactory().get(f"/secure-images/{path}", **headers), path)
+
+    def test_content_addressed_image_is_streamed_with_validators(self):
+        response = self.get(f"products/{self.filename}")
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["ETag"], '"0123456789abcdef0123456789abcdef"')
+        self.assertEqual(response["Cache-Control"], "max-age=31536000, immutable")
+        response.close()
+
+    def test_matching_etag_is_answered_without_opening_the_file(self):
+        with mock.patch("builtins.open") as opened:
+            response = self.get(f"products/{self.filename}", HTTP_IF_NONE_MATCH='"0123456789abcdef0123456789abcdef"')
+        opened.assert_not_called()
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["Cache-Control"], "max-age=31536000, immutable")
+
+        response = self.get(f"products/{self.filename}", HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_front_proxy_sends_the_file(self):
+        config = {**settings.IMAGE_UPLOAD_SETTINGS, "X_ACCEL_REDIRECT_PREFIX": "/protected-images/"}
+        with override_settings(IMAGE_UPLOAD_SETTINGS=config):
+            response = self.get(f"products/{self.filename}")
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-images/products/{self.filename}")
+        self.assertEqual(response.content, b"")
+
+    def test_legacy_names_keep_short_lifetime(self):
+        (self.root / "products" / "20240101_abc.jpg").write_bytes(encode((64, 48)))
+        response = self.get("products/20240101_abc.jpg")
+        self.assertNotIn("ETag", response)
+        self.assertEqual(response["Cache-Control"], "max-age=3600")
+        response.close()
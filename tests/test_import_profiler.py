@@ -0,0 +1,55 @@
+"""
+Tests for the start-up import profiler.
+"""
+
+from django.test import SimpleTestCase
+
+from core.services.import_profiler import DEFAULTS, UNATTRIBUTED, ImportProfile, parse_importtime
+
+TRACE = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   _io
+import time:       200 |        300 | io
+import time:      1000 |       1000 |       matplotlib.colors
+import time:      4000 |       5000 |     matplotlib
+import time:       500 |       5500 |   adminpanel.utils
+import time:       300 |       5800 | adminpanel
+import time:       600 |        600 |       PIL.Image
+import time:       150 |        750 |     PIL
+import time:       200 |        200 |     accounts.models
+import time:        50 |       1000 |   accounts.views
+import time:       100 |       1100 | accounts
+"""
+
+
+class TestImportProfiler(SimpleTestCase):
+    """Test tree reconstruction, attribution to apps and the budget check."""
+
+    def setUp(self):
+        self.profile = ImportProfile(parse_importtime(TRACE), ["accounts", "adminpanel"])
+
+    def test_rebuilds_the_import_tree(self):
+        roots = parse_importtime(TRACE)
+
+        self.assertEqual([root.name for root in roots], ["io", "adminpanel", "accounts"])
+        self.assertEqual([child.name for child in roots[0].children], ["_io"])
+        self.assertEqual(roots[1].children[0].children[0].name, "matplotlib")
+
+    def test_libraries_are_charged_to_the_app_that_imported_them(self):
+        self.assertEqual(self.profile.by_app["adminpanel"], 5800)
+        self.assertEqual(self.profile.by_app["accounts"], 1100)
+        self.assertEqual(self.profile.by_app[UNATTRIBUTED], 300)
+        self.assertEqual(self.profile.total_us, 7200)
+        self.assertEqual(self.profile.by_package["matplotlib"], 5000)
+
+    def test_top_entries_name_the_importing_module(self):
+        entries = self.profile.top_entries(3)
+
+        self.assertEqual(entries[0][1:], ("adminpanel", None, "adminpanel"))
+        self.assertIn((5000, "matplotlib", "adminpanel.utils", "adminpanel"), entries)
+
+    def test_budget_violations(self):
+        self.assertEqual(self.profile.over_budget({**DEFAULTS, "APP_MS": 5, "APPS": {"adminpanel": 10}}), [])
+
+        violations = self.profile.over_budget({**DEFAULTS, "TOTAL_MS": 5, "APP_MS": 5})
+        self.assertEqual(violations, ["total 7ms > 5ms", "adminpanel 6ms > 5ms"])
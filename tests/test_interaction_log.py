@@ -0,0 +1,107 @@
+"""
+Tests for the append-only interaction log and its compaction into profiles.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import SystemSettings, UserInteractionEvent, UserPreferenceProfile
+from core.services.interaction_log import (
+    CURSOR_KEY, InteractionEventWriter, compact_events, fold_events, get_cursor
+)
+
+User = get_user_model()
+
+
+class TestInteractionLog(TestCase):
+    """Test buffered writes, incremental folding and day retention."""
+
+    def setUp(self):
+        cache.clear()
+        self.users = [User.objects.create_user(username=f"user{index}", password="x") for index in range(2)]
+        self.writer = InteractionEventWriter(BATCH_SIZE=3, FLUSH_INTERVAL=3600)
+        self.later = timezone.now() + timedelta(minutes=5)
+
+    def test_events_are_written_in_batches(self):
+        user = self.users[0]
+
+        with self.assertNumQueries(1):
+            for number in range(3):
+                self.writer.append(user.pk, "view", {"product_id": number})
+        self.writer.append(user.pk, "view")
+
+        self.assertEqual(UserInteractionEvent.objects.count(), 3)
+        self.assertEqual(self.writer.pending(), 1)
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(UserInteractionEvent.objects.filter(day=timezone.now().date()).count(), 4)
+
+    def test_fold_keeps_exact_type_counts_and_bounded_item_counts(self):
+        now = timezone.now()
+        events = [("view", {"product_id": number % 4}, now + timedelta(seconds=number)) for number in range(10)]
+
+        summary = fold_events({}, events, top_items=2)
+        summary = fold_events(summary, [("purchase", {"product_id": 1}, now)], top_items=2)
+
+        self.assertEqual(summary["total"], 11)
+        self.assertEqual(summary["by_type"], {"view": 10, "purchase": 1})
+        self.assertEqual(summary["product_id"], {"1": 4, "0": 3})
+        self.assertEqual(summary["first_at"], now.isoformat())
+
+    def test_compaction_is_incremental_and_idempotent(self):
+        first, second = self.users
+        for user, interaction in ((first, "view"), (first, "search"), (second, "view")):
+            self.writer.append(user.pk, interaction)
+        self.writer.flush()
+
+        self.assertEqual(compact_events(batch_size=2, now=self.later), {first.pk, second.pk})
+        self.assertEqual(UserPreferenceProfile.objects.get(user=first).interaction_summary["total"], 2)
+
+        self.writer.append(first.pk, "view")
+        self.writer.flush()
+        SystemSettings.objects.filter(key=CURSOR_KEY).delete()  # a lost cursor replays the log but must not double count
+        compact_events(now=self.later)
+
+        profile = UserPreferenceProfile.objects.get(user=first)
+        self.assertEqual(profile.interaction_summary["by_type"], {"view": 2, "search": 1})
+        self.assertEqual(profile.interactions_compacted_through, UserInteractionEvent.objects.latest("id").id)
+
+    def test_compacted_days_past_retention_are_dropped(self):
+        old = timezone.now() - timedelta(days=60)
+        self.writer.append(self.users[0].pk, "view", occurred_at=old)
+        self.writer.append(self.users[0].pk, "view")
+        self.writer.flush()
+
+        compact_events(now=self.later)
+
+        self.assertEqual(UserInteractionEvent.objects.count(), 1)
+        self.assertEqual(UserPreferenceProfile.objects.get(user=self.users[0]).interaction_summary["total"], 2)
+
+    def test_unsettled_events_wait_for_lower_ids_still_committing(self):
+        user = self.users[0]
+        self.writer.append(user.pk, "view")
+        self.writer.flush()
+        settled = UserInteractionEvent.objects.get()
+        UserInteractionEvent.objects.filter(pk=settled.pk).update(inserted_at=timezone.now() - timedelta(minutes=5))
+        # Back-dated, but only just written: its id may sit above inserts that have not committed yet
+        self.writer.append(user.pk, "search", occurred_at=timezone.now() - timedelta(minutes=10))
+        self.writer.flush()
+        recent = UserInteractionEvent.objects.latest("id")
+
+        compact_events()
+        self.assertEqual(get_cursor(), settled.id)
+
+        # An insert that took its id before the recent event but committed after the last run
+        recent_id = recent.id
+        recent.delete()
+        UserInteractionEvent.objects.create(
+            id=recent_id, user=user, interaction_type="purchase", day=recent.day, created_at=recent.created_at
+        )
+        compact_events(now=self.later)
+
+        profile = UserPreferenceProfile.objects.get(user=user)
+        self.assertEqual(profile.interaction_summary["by_type"], {"view": 1, "purchase": 1})
+        self.assertEqual(get_cursor(), recent_id)
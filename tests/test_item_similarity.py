@@ -0,0 +1,50 @@
+"""
+Tests for the item-item co-purchase similarity computation.
+"""
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from core.services.item_similarity import co_purchase_neighbours, encode, neighbours_by_item
+
+
+class TestItemSimilarity(SimpleTestCase):
+    """Test co-purchase counting, cosine scaling and top-k selection."""
+
+    def setUp(self):
+        self.purchases = [
+            ("u1", "a"), ("u1", "b"), ("u1", "c"),
+            ("u2", "a"), ("u2", "c"),
+            ("u3", "a"), ("u3", "b"), ("u3", "c"),
+            ("u3", "a"),  # repeat purchases count once
+            ("u4", "d"),
+        ]
+
+    def test_encode_assigns_dense_codes(self):
+        codes, labels = encode(["x", "y", "x", "z"])
+        self.assertEqual(codes.tolist(), [0, 1, 0, 2])
+        self.assertEqual(labels.tolist(), ["x", "y", "z"])
+
+    def test_cosine_similarity_from_co_purchases(self):
+        neighbours = neighbours_by_item(self.purchases, min_co_purchases=2)
+        by_neighbour = {item: (similarity, count) for item, similarity, count in neighbours["a"]}
+
+        # a and c share 3 buyers out of 3 each, a and b share 2 of (3, 2)
+        self.assertAlmostEqual(by_neighbour["c"][0], 1.0)
+        self.assertAlmostEqual(by_neighbour["b"][0], 2 / np.sqrt(6))
+        self.assertEqual(by_neighbour["c"][1], 3)
+        self.assertEqual([item for item, _, _ in neighbours["a"]], ["c", "b"])
+
+    def test_min_co_purchases_and_singletons(self):
+        neighbours = neighbours_by_item(self.purchases, min_co_purchases=3)
+        self.assertEqual(set(neighbours), {"a", "c"})
+        self.assertNotIn("d", neighbours_by_item(self.purchases, min_co_purchases=1))
+
+    def test_top_k_limits_each_source(self):
+        neighbours = neighbours_by_item(self.purchases, top_k=1, min_co_purchases=1)
+        self.assertTrue(all(len(items) == 1 for items in neighbours.values()))
+
+    def test_empty_input(self):
+        self.assertEqual(neighbours_by_item([]), {})
+        source, _, _, _ = co_purchase_neighbours(np.array([0, 1]), np.array([0, 1]))
+        self.assertEqual(len(source), 0)
@@ -0,0 +1,129 @@
+"""
+Tests for lazy service and module start-up.
+"""
+
+from unittest import mock
+
+from django.apps import apps
+from django.test import SimpleTestCase
+
+from core.architecture import BaseModule, ModuleRegistry
+from core.services.base_service import BaseService
+from core.services.service_registry import ServiceRegistry
+from core.services.wallet_service import WalletService
+
+
+class DummyService(BaseService):
+    service_name = "dummy_service"
+    instances = 0
+
+    def __init__(self, **kwargs):
+        type(self).instances += 1
+        self.warmed = False
+        super().__init__(**kwargs)
+
+    def initialize(self) -> bool:
+        return True
+
+    def cleanup(self) -> bool:
+        return True
+
+    def get_required_config(self):
+        return ["limit"]
+
+    def warm_up(self):
+        self.warmed = True
+
+
+class DummyBaseModule(BaseModule):
+    name = "dummy_base"
+
+    def initialize(self) -> bool:
+        self._initialized = True
+        return True
+
+    def cleanup(self) -> bool:
+        return True
+
+
+class DummyModule(DummyBaseModule):
+    name = "dummy"
+    dependencies = ["dummy_base"]
+
+
+class RegistryStateMixin:
+    """Restore the class-level registry state touched by a test."""
+
+    def setUp(self):
+        super().setUp()
+        self.saved = {
+            registry: {attr: value.copy() for attr, value in vars(registry).items() if isinstance(value, dict)}
+            for registry in (ServiceRegistry, ModuleRegistry)
+        }
+        DummyService.instances = 0
+
+    def tearDown(self):
+        for registry, state in self.saved.items():
+            for attr, value in state.items():
+                setattr(registry, attr, value)
+        super().tearDown()
+
+
+class TestLazyServiceRegistry(RegistryStateMixin, SimpleTestCase):
+    """Test on-first-use instantiation and the opt-in warm-up."""
+
+    def test_service_is_built_on_first_use_with_registered_config(self):
+        ServiceRegistry.register_lazy("dummy_service", f"{__name__}.DummyService", limit=3)
+
+        self.assertTrue(ServiceRegistry.is_registered("dummy_service"))
+        self.assertFalse(ServiceRegistry.has_service("dummy_service"))
+        self.assertEqual(DummyService.instances, 0)
+
+        service = ServiceRegistry.get_service("dummy_service")
+        self.assertIs(ServiceRegistry.get_service("dummy_service"), service)
+        self.assertEqual(DummyService.instances, 1)
+        self.assertEqual(service.get_config("limit"), 3)
+        self.assertFalse(service.warmed)
+
+    def test_warm_up_builds_and_warms_named_services(self):
+        ServiceRegistry.register_lazy("dummy_service", f"{__name__}.DummyService", limit=3)
+
+        timings = ServiceRegistry.warm_up(["dummy_service", "missing_service"])
+
+        self.assertEqual(list(timings), ["dummy_service"])
+        self.assertTrue(ServiceRegistry.get_service("dummy_service").warmed)
+
+    def test_unknown_service_is_none(self):
+        self.assertIsNone(ServiceRegistry.get_service("missing_service"))
+
+    def test_wallet_service_does_not_warm_on_initialize(self):
+        with mock.patch.object(WalletService, "warm_up") as warm_up:
+            service = WalletService(max_daily_withdrawal="1.0", withdrawal_cooldown=3600)
+
+        self.assertTrue(service.is_available())
+        warm_up.assert_not_called()
+
+
+class TestLazyModuleRegistry(RegistryStateMixin, SimpleTestCase):
+    """Test on-first-use module loading and the app's registration."""
+
+    def test_module_and_dependencies_load_on_first_use(self):
+        ModuleRegistry.register_lazy("dummy_base", f"{__name__}.DummyBaseModule")
+        ModuleRegistry.register_lazy("dummy", f"{__name__}.DummyModule")
+        ModuleRegistry._modules.pop("dummy", None)
+        ModuleRegistry._modules.pop("dummy_base", None)
+
+        self.assertTrue(ModuleRegistry.has_module("dummy"))
+        module = ModuleRegistry.get_module("dummy")
+
+        self.assertIsInstance(module, DummyModule)
+        self.assertTrue(module.is_enabled())
+        self.assertIsInstance(ModuleRegistry._modules["dummy_base"], DummyBaseModule)
+
+    def test_ready_registers_without_building(self):
+        ServiceRegistry._services.clear()
+        apps.get_app_config("marketplace").ready()
+
+        self.assertTrue(ServiceRegistry.is_registered("wallet_service"))
+        self.assertFalse(ServiceRegistry.has_service("wallet_service"))
+        self.assertTrue(ModuleRegistry.has_module("wallets"))
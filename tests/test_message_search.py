@@ -0,0 +1,74 @@
+"""
+Tests for the per-user message search index.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from core.services.message_search import tokenize
+from core.services.messaging_service import MessagingService
+from messaging.models import Message, MessageSearchTerm
+
+User = get_user_model()
+
+
+class TestMessageSearch(TestCase):
+    """Test indexing on send, term matching, paging and posting list bounds."""
+
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(username=name, password="x") for name in ("alice", "bob", "carol")
+        ]
+        self.service = MessagingService(**settings.SERVICES["CONFIG"]["messaging_service"])
+
+    def send(self, sender, recipient, subject, content="-----BEGIN PGP MESSAGE-----"):
+        message, success, error = self.service.send_message(sender.id, recipient.id, content, subject)
+        self.assertTrue(success, error)
+        return message
+
+    def search(self, user, query, **kwargs):
+        return self.service.search_messages(user.id, query, **kwargs)
+
+    def test_tokenize_keeps_distinct_terms(self):
+        self.assertEqual(tokenize("Order #42: Shipping, shipping!", "a"), ["order", "42", "shipping"])
+
+    def test_messages_are_found_by_subject_and_correspondent(self):
+        shipping = self.send(self.alice, self.bob, "Shipping update")
+        self.send(self.carol, self.bob, "Refund request")
+
+        self.assertEqual([hit["id"] for hit in self.search(self.bob, "shipping")["results"]], [str(shipping.id)])
+        self.assertEqual([hit["id"] for hit in self.search(self.alice, "bob update")["results"]], [str(shipping.id)])
+        self.assertEqual(self.search(self.bob, "shipping refund")["results"], [])
+        self.assertEqual(self.search(self.carol, "shipping")["results"], [])
+
+    def test_content_is_not_indexed(self):
+        self.send(self.alice, self.bob, "Hello", content="secret plans")
+
+        self.assertFalse(MessageSearchTerm.objects.filter(term="secret").exists())
+        self.assertEqual(self.search(self.bob, "secret")["results"], [])
+
+    def test_results_are_paged_newest_first(self):
+        sent = [self.send(self.alice, self.bob, f"Invoice {number}") for number in range(5)]
+
+        first = self.search(self.bob, "invoice", limit=2)
+        last = self.search(self.bob, "invoice", limit=2, page=3)
+
+        self.assertEqual([hit["id"] for hit in first["results"]], [str(sent[4].id), str(sent[3].id)])
+        self.assertTrue(first["has_next"])
+        self.assertEqual([hit["id"] for hit in last["results"]], [str(sent[0].id)])
+        self.assertFalse(last["has_next"])
+
+    @override_settings(MESSAGE_SEARCH={"MAX_POSTINGS": 3, "PRUNE_SLACK": 1})
+    def test_posting_lists_are_bounded(self):
+        sent = [self.send(self.alice, self.bob, "Invoice") for _ in range(6)]
+
+        postings = MessageSearchTerm.objects.filter(owner=self.bob, term="invoice")
+        self.assertLessEqual(postings.count(), 4)
+        self.assertEqual(self.search(self.bob, "invoice")["results"][0]["id"], str(sent[-1].id))
+
+    def test_deleted_messages_leave_the_index(self):
+        message = self.send(self.alice, self.bob, "Oops")
+        Message.objects.filter(pk=message.pk).delete()
+
+        self.assertEqual(self.search(self.bob, "oops")["results"], [])
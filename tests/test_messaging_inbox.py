@@ -0,0 +1,82 @@
+"""
+Tests for denormalized inbox entries and unread counters.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.services.messaging_service import MessagingService
+from messaging.models import InboxEntry, Message, UnreadCounter
+
+User = get_user_model()
+
+
+class TestMessagingInbox(TestCase):
+    """Test that sends, reads and deletes keep the counters in step with the messages."""
+
+    def setUp(self):
+        self.alice, self.bob, self.carol = [
+            User.objects.create_user(username=name, password="x") for name in ("alice", "bob", "carol")
+        ]
+        self.service = MessagingService(**settings.SERVICES["CONFIG"]["messaging_service"])
+
+    def send(self, sender, recipient, content="hello"):
+        message, success, error = self.service.send_message(sender.id, recipient.id, content)
+        self.assertTrue(success, error)
+        return message
+
+    def test_send_updates_both_inbox_entries_and_the_counter(self):
+        self.send(self.alice, self.bob)
+        last = self.send(self.alice, self.bob, "again")
+
+        entry = InboxEntry.objects.get(owner=self.bob, other_user=self.alice)
+        self.assertEqual((entry.unread_count, entry.last_message_id), (2, last.id))
+        self.assertEqual(InboxEntry.objects.get(owner=self.alice, other_user=self.bob).unread_count, 0)
+        self.assertEqual(self.service.get_unread_count(self.bob.id), 2)
+        self.assertEqual(self.service.get_unread_count(self.alice.id), 0)
+
+    def test_inbox_is_one_query_newest_first(self):
+        self.send(self.alice, self.bob)
+        self.send(self.carol, self.bob)
+
+        with self.assertNumQueries(1):
+            inbox = self.service.get_inbox(self.bob.id)
+            names = [entry.other_user.username for entry in inbox]
+            contents = [entry.last_message.content for entry in inbox]
+
+        self.assertEqual(names, ["carol", "alice"])
+        self.assertEqual(contents, ["hello", "hello"])
+
+    def test_reading_a_conversation_clears_only_its_unread(self):
+        self.send(self.alice, self.bob)
+        self.send(self.alice, self.bob)
+        self.send(self.carol, self.bob)
+
+        self.service.mark_messages_as_read(self.bob.id, self.alice.id)
+        self.service.mark_messages_as_read(self.bob.id, self.alice.id)  # nothing left to read
+
+        self.assertEqual(InboxEntry.objects.get(owner=self.bob, other_user=self.alice).unread_count, 0)
+        self.assertEqual(InboxEntry.objects.get(owner=self.bob, other_user=self.carol).unread_count, 1)
+        self.assertEqual(self.service.get_unread_count(self.bob.id), 1)
+
+    def test_deleting_the_last_message_refreshes_the_entries(self):
+        first = self.send(self.alice, self.bob, "first")
+        second = self.send(self.alice, self.bob, "second")
+
+        self.assertTrue(self.service.delete_message(second.id, self.alice.id)[0])
+        self.assertEqual(InboxEntry.objects.get(owner=self.bob, other_user=self.alice).last_message_id, first.id)
+        self.assertEqual(self.service.get_unread_count(self.bob.id), 1)
+
+        self.service.delete_message(first.id, self.alice.id)
+        self.assertFalse(InboxEntry.objects.exists())
+        self.assertEqual(self.service.get_unread_count(self.bob.id), 0)
+
+    def test_recount_repairs_drifted_counters(self):
+        self.send(self.alice, self.bob)
+        Message.objects.create(sender=self.carol, recipient=self.bob, subject="Bulk", content="unseen")
+        UnreadCounter.objects.filter(user=self.bob).update(unread=40)
+
+        self.assertEqual(self.service.recount_unread(self.bob.id), 2)
+        self.assertEqual(self.service.get_unread_count(self.bob.id), 2)
+        self.assertEqual(InboxEntry.objects.get(owner=self.bob, other_user=self.alice).unread_count, 1)
@@ -0,0 +1,115 @@
+"""
+Tests for the precomputed PGP challenge pool.
+"""
+
+import shutil
+import subprocess
+import tempfile
+from unittest import mock
+
+import gnupg
+from django.core.cache import cache
+from django.test import TestCase
+
+from accounts.models import User
+from accounts.pgp_challenges import ADMIN, LOGIN, challenge_stock, encrypt_batch, refill, take_challenge
+from adminpanel.security import AdminSecurityManager
+
+
+class TestPGPChallengePool(TestCase):
+    """Test batched refills, O(1) pops and the fallbacks to inline encryption."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scratch = tempfile.mkdtemp()
+        cls.gpg = gnupg.GPG(gnupghome=cls.scratch)
+        key = cls.gpg.gen_key(cls.gpg.gen_key_input(
+            key_type="EDDSA", key_curve="ed25519", subkey_type="ECDH", subkey_curve="cv25519",
+            name_email="admin@example.com", no_protection=True,
+        ))
+        cls.fingerprint = key.fingerprint
+        cls.public_key = cls.gpg.export_keys(key.fingerprint)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.scratch, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="pgpuser", password="pw", pgp_public_key=self.public_key,
+            pgp_fingerprint=self.fingerprint, pgp_login_enabled=True, is_staff=True,
+        )
+        patcher = mock.patch("accounts.pgp_challenges.refill_worker.request")
+        self.requested = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def decrypt(self, armor):
+        return str(self.gpg.decrypt(armor))
+
+    def test_batch_encrypts_in_one_gpg_run(self):
+        refill([(self.user.id, LOGIN)])
+        with mock.patch("accounts.pgp_challenges.subprocess.run", wraps=subprocess.run) as run:
+            encrypted = encrypt_batch(self.fingerprint, ["one", "two", "three"])
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual([self.decrypt(armor) for armor in encrypted], ["one", "two", "three"])
+
+    def test_refill_then_pop(self):
+        self.assertEqual(refill([(self.user.id, LOGIN), (self.user.id, ADMIN)]), 6)
+        self.assertEqual(challenge_stock.count(self.user.id, LOGIN), 3)
+        self.assertEqual(refill([(self.user.id, LOGIN)]), 0)
+
+        item = take_challenge(self.user, LOGIN)
+        self.assertEqual(self.decrypt(item["encrypted"]), f"MARKETPLACE-2FA:{item['challenge']}")
+        self.assertEqual(challenge_stock.count(self.user.id, LOGIN), 2)
+        self.requested.assert_called_once_with(self.user.id, LOGIN)
+
+    def test_empty_stock_and_changed_key_fall_back(self):
+        self.assertIsNone(take_challenge(self.user, LOGIN))
+
+        refill([(self.user.id, LOGIN)])
+        self.user.pgp_fingerprint = "0" * 40
+        self.assertIsNone(take_challenge(self.user, LOGIN))
+
+        # Pops past the tail do not strand later refills
+        self.user.pgp_fingerprint = self.fingerprint
+        for _ in range(4):
+            take_challenge(self.user, LOGIN)
+        self.assertEqual(refill([(self.user.id, LOGIN)]), 3)
+        self.assertIsNotNone(take_challenge(self.user, LOGIN))
+
+    def test_concurrent_pushes_get_their_own_slots(self):
+        def item(name):
+            return (name, f"armor-{name}")
+
+        # Another writer pushes after this push picked its slots but before it wrote them
+        real_set_many = challenge_stock.cache.set_many
+
+        def set_many(data, *args):
+            if not getattr(set_many, "interleaved", False):
+                set_many.interleaved = True
+                challenge_stock.push(self.user.id, LOGIN, self.fingerprint, [item("b1"), item("b2")])
+            return real_set_many(data, *args)
+
+        with mock.patch.object(challenge_stock.cache, "set_many", side_effect=set_many):
+            challenge_stock.push(self.user.id, LOGIN, self.fingerprint, [item("a1"), item("a2")])
+
+        popped = [challenge_stock.pop(self.user.id, LOGIN, self.fingerprint)["challenge"] for _ in range(4)]
+        self.assertEqual(sorted(popped), ["a1", "a2", "b1", "b2"])
+        self.assertIsNone(challenge_stock.pop(self.user.id, LOGIN, self.fingerprint))
+
+    def test_admin_challenge_uses_stock_and_verifies(self):
+        refill([(self.user.id, ADMIN)])
+        manager = AdminSecurityManager()
+
+        data = manager.generate_pgp_challenge(self.user)
+        self.assertTrue(data["success"])
+        self.assertEqual(self.decrypt(data["encrypted_challenge"]), data["challenge_text"])
+        self.assertEqual(manager.verify_pgp_challenge(self.user, data["challenge_text"]), (True, "Challenge verified"))
+
+        cache.clear()
+        data = manager.generate_pgp_challenge(self.user)
+        self.assertTrue(data["success"])
+        self.assertEqual(self.decrypt(data["encrypted_challenge"]), data["challenge_text"])
@@ -0,0 +1,96 @@
+"""
+Tests for the shared PGP keyring behind PGPService.
+"""
+
+import shutil
+import tempfile
+from unittest import mock
+
+import gnupg
+from django.test import SimpleTestCase
+
+from accounts.pgp_keyring import KeyRing
+from accounts.pgp_service import PGPService
+
+
+class TestPGPKeyRing(SimpleTestCase):
+    """Test import de-duplication, cached metadata and the context pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.scratch = tempfile.mkdtemp()
+        gpg = gnupg.GPG(gnupghome=cls.scratch)
+        key = gpg.gen_key(gpg.gen_key_input(
+            key_type="EDDSA", key_curve="ed25519", subkey_type="ECDH", subkey_curve="cv25519",
+            name_email="buyer@example.com", no_protection=True,
+        ))
+        cls.fingerprint = key.fingerprint
+        cls.public_key = gpg.export_keys(key.fingerprint)
+        cls.signed = str(gpg.sign("MARKETPLACE-ADMIN:challenge", keyid=key.fingerprint, clearsign=True))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.scratch, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.keyring = KeyRing(pool_size=2)
+        self.service = PGPService(keyring=self.keyring)
+
+    def tearDown(self):
+        self.keyring.close()
+
+    def test_key_is_imported_once_and_metadata_cached(self):
+        with mock.patch.object(gnupg.GPG, "import_keys", autospec=True, side_effect=gnupg.GPG.import_keys) as imports, \
+                mock.patch.object(gnupg.GPG, "list_keys", autospec=True, side_effect=gnupg.GPG.list_keys) as listings:
+            first = self.service.import_public_key(self.public_key)
+            second = PGPService(keyring=self.keyring).import_public_key(self.public_key)
+
+        self.assertTrue(first["success"])
+        self.assertEqual(first["fingerprint"], self.fingerprint)
+        self.assertEqual(second["fingerprint"], self.fingerprint)
+        self.assertEqual(second["algorithm"], "EdDSA")
+        self.assertEqual(imports.call_count, 1)
+        self.assertEqual(listings.call_count, 1)
+
+    def test_challenge_round_trip_through_pool(self):
+        self.service.import_public_key(self.public_key)
+        for index in range(3):
+            result = self.service.encrypt_message(f"MARKETPLACE-2FA:{index}", self.fingerprint)
+            self.assertTrue(result["success"])
+            self.assertTrue(result["encrypted_message"].startswith("-----BEGIN PGP MESSAGE-----"))
+
+        stats = self.keyring.get_stats()
+        self.assertLessEqual(stats["contexts"], 2)
+        self.assertEqual(stats["idle_contexts"], stats["contexts"])
+
+    def test_signature_must_come_from_the_expected_key(self):
+        self.service.import_public_key(self.public_key)
+
+        self.assertTrue(self.service.verify_signature(self.signed, expected_fingerprint=self.fingerprint)["valid"])
+        self.assertTrue(self.service.verify_signed_message(self.signed, expected_fingerprint=self.fingerprint.lower())["valid"])
+        for result in (
+            self.service.verify_signature(self.signed, expected_fingerprint="0" * 40),
+            self.service.verify_signed_message(self.signed, expected_fingerprint=""),
+        ):
+            self.assertFalse(result["valid"])
+            self.assertEqual(result["error"], "Signature was not made by the expected key")
+
+    def test_signed_data_excludes_text_outside_the_signed_block(self):
+        self.service.import_public_key(self.public_key)
+
+        result = self.service.verify_signature(f"ADMIN-VERIFY:forged\n{self.signed}\nADMIN-VERIFY:forged\n",
+                                               expected_fingerprint=self.fingerprint)
+
+        self.assertTrue(result["valid"])
+        self.assertEqual(result["signed_data"].strip(), "MARKETPLACE-ADMIN:challenge")
+
+    def test_unknown_fingerprint(self):
+        self.assertEqual(self.service.get_key_info("0" * 40), {"success": False, "error": "Key not found"})
+
+    def test_validate_key_format_returns_independent_copies(self):
+        result = self.service.validate_key_format(self.public_key)
+        result["normalized_key"] = "changed"
+        self.assertNotEqual(self.service.validate_key_format(self.public_key)["normalized_key"], "changed")
+        self.assertFalse(self.service.validate_key_format("")["success"])
@@ -0,0 +1,109 @@
+"""
+Tests for the vectorized batch price prediction statistics.
+"""
+
+from decimal import Decimal
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from core.models import PricePrediction
+from core.services.price_batch import DAY, price_recommendations, price_statistics
+from core.services.price_prediction_service import PricePredictionService
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from vendors.models import Vendor
+
+User = get_user_model()
+
+
+class TestPriceBatch(SimpleTestCase):
+    """Test per-product group-by statistics and pricing rules on toy arrays."""
+
+    def setUp(self):
+        self.now = 1_000 * DAY
+        # Products 0 and 1 share a category with different vendors, product 2 is alone
+        self.prices = np.array([1.0, 2.0, 5.0])
+        self.categories = np.array([0, 0, 1])
+        self.vendors = np.array([0, 1, 0])
+        self.sale_products = np.array([0, 0, 1, 0])
+        self.sale_quantities = np.array([2, 1, 1, 4])
+        self.sale_prices = np.array([1.0, 1.2, 2.0, 1.0])
+        self.sale_times = self.now - np.array([1, 2, 3, 100]) * DAY
+
+    def stats(self):
+        return price_statistics(
+            self.prices, self.categories, self.vendors, self.sale_products,
+            self.sale_quantities, self.sale_prices, self.sale_times, self.now
+        )
+
+    def test_historical_metrics(self):
+        stats = self.stats()
+        self.assertEqual(stats["total_orders"].tolist(), [3, 1, 0])
+        self.assertEqual(stats["total_sales"].tolist(), [7, 1, 0])
+        self.assertAlmostEqual(stats["total_revenue"][0], 7.2)
+        self.assertAlmostEqual(stats["average_price"][0], 3.2 / 3)
+        self.assertAlmostEqual(stats["price_volatility"][0], np.std([1.0, 1.2, 1.0], ddof=1))
+        self.assertEqual(stats["price_volatility"][1], 0)
+        self.assertEqual((stats["min_price"][0], stats["max_price"][0]), (1.0, 1.2))
+        self.assertEqual((stats["min_price"][2], stats["max_price"][2]), (0.0, 0.0))
+
+    def test_market_share_and_competitors(self):
+        stats = self.stats()
+        # Last 30 days: product 0 earned 3.2, product 1 earned 2.0 in the same category
+        self.assertEqual(stats["recent_sales_volume"].tolist(), [3, 1, 0])
+        self.assertAlmostEqual(stats["market_share_percentage"][0], round(3.2 / 5.2 * 100, 2))
+        self.assertEqual(stats["market_share_percentage"][2], 0)
+        self.assertEqual(stats["competitor_count"].tolist(), [1, 1, 0])
+        self.assertEqual(stats["average_competitor_price"][0], 2.0)
+        self.assertTrue(np.isnan(stats["average_competitor_price"][2]))
+        self.assertEqual(stats["advantage"].tolist(), [2, 0, 1])
+
+    def test_weekly_demand_trend(self):
+        stats = self.stats()
+        # Recent sales against empty earlier weeks count as increasing demand
+        self.assertEqual(stats["trend"].tolist(), [2, 2, 1])
+
+    def test_recommendations(self):
+        recommendations = price_recommendations(self.prices, self.stats())
+        # Product 0: share > 10 (1.05), increasing (1.08), underpriced (1.15)
+        self.assertAlmostEqual(recommendations["optimal"][0], round((1.05 + 1.08 + 1.15) / 3, 8))
+        # Product 2: no sales and no competitors, only the low-share factor applies
+        self.assertAlmostEqual(recommendations["optimal"][2], 5.0 * 0.95)
+        self.assertAlmostEqual(recommendations["conservative"][0], 2.0 * 0.95)
+        self.assertAlmostEqual(recommendations["aggressive"][2], 5.5)
+        self.assertAlmostEqual(recommendations["confidence"][2], round((0.3 + 0.4 + 0.5) / 3, 2))
+
+    def test_no_sales(self):
+        empty = np.array([])
+        stats = price_statistics(
+            self.prices, self.categories, self.vendors, empty.astype(np.int64), empty, empty, empty, self.now
+        )
+        self.assertEqual(stats["total_orders"].tolist(), [0, 0, 0])
+        self.assertEqual(stats["trend"].tolist(), [1, 1, 1])
+
+
+class TestPredictAllPrices(TestCase):
+    """Test the batch service stores one optimal prediction per product."""
+
+    def test_predictions_replace_previous_run(self):
+        user = User.objects.create_user(username="vendor", password="x")
+        vendor = Vendor.objects.create(user=user, vendor_name="Vendor")
+        category = Category.objects.create(name="Cards")
+        product = Product.objects.create(
+            vendor=vendor, category=category, name="Card", description="", price_btc=Decimal("0.001"), price_xmr=Decimal("1")
+        )
+        order = Order.objects.create(user=user, status="PAID")
+        OrderItem.objects.create(
+            order=order, product=product, quantity=2, price_btc=Decimal("0.001"), price_xmr=Decimal("1")
+        )
+
+        service = PricePredictionService()
+        self.assertEqual(service.predict_all_prices(), {"products": 1, "sales": 1})
+        service.predict_all_prices()
+
+        prediction = PricePrediction.objects.get(prediction_type="optimal")
+        self.assertEqual(prediction.product_id, product.pk)
+        self.assertGreater(prediction.predicted_price, 0)
+        self.assertEqual(prediction.market_conditions["recent_sales_volume"], 2)
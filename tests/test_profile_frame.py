@@ -0,0 +1,101 @@
+"""
+Tests for building user preference profiles from a shared history frame.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import UserPreferenceProfile
+from core.services.user_preference_service import UserPreferenceService
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from vendors.models import Vendor
+
+User = get_user_model()
+
+
+class TestProfileFrame(TestCase):
+    """Test batched history loading and the analyzers that share it."""
+
+    def setUp(self):
+        vendor = Vendor.objects.create(user=User.objects.create_user(username="vendor", password="x"), vendor_name="Shop")
+        cards, games = Category.objects.create(name="Cards"), Category.objects.create(name="Games")
+        self.card = Product.objects.create(
+            vendor=vendor, category=cards, name="Card", description="", price_btc=Decimal("0.01"), price_xmr=Decimal("1")
+        )
+        self.game = Product.objects.create(
+            vendor=vendor, category=games, name="Game", description="", price_btc=Decimal("0.05"), price_xmr=Decimal("5")
+        )
+        self.buyers = [
+            User.objects.create_user(username=f"buyer{index}", password="x", date_joined=timezone.now() - timedelta(days=400))
+            for index in range(3)
+        ]
+        self.service = UserPreferenceService()
+
+    def place_order(self, buyer, created_at, status="DELIVERED", lines=()):
+        order = Order.objects.create(user=buyer, status=status, created_at=created_at)
+        for product, quantity in lines:
+            OrderItem.objects.create(
+                order=order, product=product, quantity=quantity, price_btc=product.price_btc, price_xmr=product.price_xmr
+            )
+        order.total_btc = sum(product.price_btc * quantity for product, quantity in lines)
+        order.save()
+        return order
+
+    def test_profile_sections_come_from_one_history(self):
+        buyer = self.buyers[0]
+        first = datetime(2026, 1, 5, 20, tzinfo=dt_timezone.utc)  # a Monday evening
+        self.place_order(buyer, first, lines=[(self.card, 2), (self.game, 1)])
+        self.place_order(buyer, first + timedelta(days=10), lines=[(self.card, 1)])
+        self.place_order(buyer, first + timedelta(days=20), status="PENDING", lines=[(self.game, 4)])
+
+        profile = self.service.build_user_profiles([buyer])[buyer.pk]
+
+        patterns = profile["purchase_patterns"]
+        self.assertEqual(patterns["total_orders"], 2)
+        self.assertAlmostEqual(patterns["total_spent"], 0.08)
+        self.assertEqual(patterns["average_days_between_orders"], 10)
+        self.assertEqual(patterns["average_items_per_order"], 1.5)
+        self.assertEqual((patterns["most_active_hour"], patterns["most_active_day"]), (20, 0))
+        self.assertEqual(patterns["first_purchase"], first.isoformat())
+
+        affinity = profile["category_affinity"]
+        self.assertEqual(affinity["category_affinities"]["Cards"]["purchase_count"], 3)
+        self.assertEqual(affinity["category_diversity"], 1.0)
+        self.assertEqual(profile["vendor_preferences"]["top_vendor"], "Shop")
+        self.assertEqual(profile["temporal_patterns"]["user_type"], "evening_shopper")
+        self.assertEqual(profile["basic_preferences"]["total_orders"], 3)
+        self.assertEqual(profile["risk_profile"]["completed_orders"], 2)
+
+    def test_a_batch_costs_the_same_queries_as_one_user(self):
+        now = timezone.now()
+        for index, buyer in enumerate(self.buyers):
+            for days in range(index + 2):
+                self.place_order(buyer, now - timedelta(days=days * 7), lines=[(self.card, 1), (self.game, 1)])
+
+        with self.assertNumQueries(5):
+            profiles = self.service.build_user_profiles(self.buyers)
+
+        self.assertEqual([profiles[buyer.pk]["purchase_patterns"]["total_orders"] for buyer in self.buyers], [2, 3, 4])
+
+    def test_users_without_orders_get_empty_sections(self):
+        profile = self.service.build_user_profiles([self.buyers[0]])[self.buyers[0].pk]
+
+        self.assertTrue(profile["purchase_patterns"]["no_purchase_history"])
+        self.assertTrue(profile["loyalty_indicators"]["insufficient_data"])
+        self.assertEqual(profile["basic_preferences"]["activity_level"], "new")
+
+    def test_save_profiles_creates_and_updates_rows(self):
+        buyer = self.buyers[0]
+        self.place_order(buyer, timezone.now(), lines=[(self.card, 1)])
+        UserPreferenceProfile.objects.create(user=self.buyers[1], churn_risk=0.9)
+
+        self.assertEqual(self.service.save_profiles(self.buyers[:2]), 2)
+
+        stored = UserPreferenceProfile.objects.get(user=buyer)
+        self.assertEqual(stored.purchase_patterns["total_orders"], 1)
+        self.assertEqual(UserPreferenceProfile.objects.get(user=self.buyers[1]).churn_risk, 0.5)
@@ -0,0 +1,88 @@
+"""
+Tests for the shared sliding-window rate limiter.
+"""
+
+import threading
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.security.rate_limit import SlidingWindowRateLimiter
+
+TEST_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "default"},
+    "rate_limit": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "rate-limit-tests"},
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TestSlidingWindowRateLimiter(SimpleTestCase):
+    """Test window weighting, batched limits and atomic admission."""
+
+    def setUp(self):
+        caches["rate_limit"].clear()
+        self.limiter = SlidingWindowRateLimiter(cache_alias="rate_limit")
+
+    def hit_at(self, now, key, limits):
+        with mock.patch("core.security.rate_limit.time.time", return_value=now):
+            return self.limiter.hit(key, limits)
+
+    def test_allows_up_to_limit_then_rejects(self):
+        limits = [("minute", 60, 3)]
+        results = [bool(self.hit_at(1200.0, "client", limits)) for _ in range(5)]
+        self.assertEqual(results, [True, True, True, False, False])
+
+    def test_rejected_requests_are_not_counted(self):
+        limits = [("minute", 60, 2)]
+        for _ in range(5):
+            self.hit_at(1200.0, "client", limits)
+        with mock.patch("core.security.rate_limit.time.time", return_value=1200.0):
+            self.assertEqual(self.limiter.get_counts("client", limits)["minute"], 2)
+
+    def test_previous_bucket_is_weighted_by_overlap(self):
+        limits = [("minute", 60, 10)]
+        for _ in range(10):
+            self.assertTrue(self.hit_at(1200.0, "client", limits))
+
+        # A quarter into the next bucket, 75% of the previous 10 still count
+        result = self.hit_at(1275.0, "client", limits)
+        self.assertTrue(result)
+        self.assertAlmostEqual(result.counts["minute"], 8.5)
+        self.assertTrue(self.hit_at(1275.0, "client", limits))
+        self.assertFalse(self.hit_at(1275.0, "client", limits))
+
+        # Two buckets later the old requests have fully expired
+        self.assertTrue(self.hit_at(1330.0, "client", limits))
+
+    def test_batched_limits_report_first_exceeded(self):
+        limits = [("minute", 60, 5), ("hour", 3600, 2)]
+        self.assertTrue(self.hit_at(7200.0, "client", limits))
+        self.assertTrue(self.hit_at(7200.0, "client", limits))
+        result = self.hit_at(7200.0, "client", limits)
+        self.assertFalse(result)
+        self.assertEqual(result.exceeded, "hour")
+        self.assertGreater(result.retry_after, 0)
+
+    def test_clients_are_isolated(self):
+        limits = [("minute", 60, 1)]
+        self.assertTrue(self.hit_at(1200.0, "a", limits))
+        self.assertFalse(self.hit_at(1200.0, "a", limits))
+        self.assertTrue(self.hit_at(1200.0, "b", limits))
+
+    def test_concurrent_hits_never_exceed_limit(self):
+        limits = [("minute", 60, 50)]
+        allowed = []
+
+        def worker():
+            for _ in range(20):
+                allowed.append(bool(self.limiter.hit("shared", limits)))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLessEqual(sum(allowed), 50)
+        self.assertGreater(sum(allowed), 0)
@@ -0,0 +1,81 @@
+"""
+Tests for the request profiling middleware.
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import ResolverMatch
+
+from core.middleware import RequestProfilingMiddleware
+from core.services import request_profiler
+from core.services.request_profiler import normalize_sql, request_metrics
+from core.services.tiered_cache import TieredCache
+
+User = get_user_model()
+
+
+def list_users(request):
+    # One query per user: the N+1 shape the profiler should flag
+    for index in range(6):
+        User.objects.filter(username=f"user{index}").exists()
+    User.objects.filter(username="user0").exists()
+
+    cache = TieredCache()
+    cache.set("profiled:key", "value", timeout=60)
+    cache.get("profiled:key")
+    cache.get("profiled:missing")
+
+    template = engines["django"].from_string("{% for i in items %}{{ i }}{% endfor %}")
+    return HttpResponse(template.render({"items": range(10)}))
+
+
+def slow_view(request):
+    time.sleep(0.08)
+    return HttpResponse("done")
+
+
+class TestRequestProfiling(TestCase):
+    """Test per-view aggregation of queries, cache events, templates and slow captures."""
+
+    def setUp(self):
+        request_metrics.reset()
+        self.factory = RequestFactory()
+
+    def call(self, view, name):
+        request = self.factory.get("/")
+        request.resolver_match = ResolverMatch(view, (), {}, url_name=name)
+        return RequestProfilingMiddleware(view)(request)
+
+    def test_queries_cache_and_templates_are_attributed_to_view(self):
+        self.call(list_users, "list_users")
+
+        view = request_metrics.get_summary()["views"]["list_users"]
+        self.assertEqual(view["requests"], 1)
+        self.assertEqual(view["sql_count"], 7)
+        self.assertEqual(view["duplicate_queries"], 1)
+        self.assertEqual(view["n_plus_one"], 1)
+        self.assertEqual((view["cache_hits"], view["cache_misses"]), (1, 1))
+        self.assertGreater(view["template_time"], 0)
+        self.assertEqual(view["slow"], 0)
+
+    @override_settings(REQUEST_PROFILING={"SLOW_REQUEST_MS": 50, "SAMPLE_INTERVAL_MS": 2})
+    def test_slow_requests_keep_stack_samples(self):
+        self.call(slow_view, "slow_view")
+
+        capture = request_metrics.get_summary()["slow_requests"][0]
+        self.assertEqual(capture["view"], "slow_view")
+        self.assertTrue(any("slow_view" in stack for stack in capture["stacks"]))
+
+    def test_profile_is_cleared_after_request(self):
+        self.call(slow_view, "slow_view")
+        self.assertIsNone(request_profiler.current_profile())
+
+    def test_normalize_sql_groups_in_lists(self):
+        self.assertEqual(
+            normalize_sql('SELECT  *\n FROM t WHERE id IN (%s, %s, %s)'),
+            normalize_sql('SELECT * FROM t WHERE id IN (%s, %s)'),
+        )
@@ -0,0 +1,78 @@
+"""
+Tests for the batched retention sweeper.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import SearchQuery, SecurityLog
+from core.services import retention
+from core.services.messaging_service import MessagingService
+from messaging.models import InboxEntry, Message, MessageSearchTerm
+
+User = get_user_model()
+
+
+class TestRetentionSweep(TestCase):
+    """Test batch deletes, checkpoints and the repairs around expired messages."""
+
+    def setUp(self):
+        cache.clear()
+        self.alice, self.bob = [User.objects.create_user(username=name, password="x") for name in ("alice", "bob")]
+        self.service = MessagingService(**settings.SERVICES["CONFIG"]["messaging_service"])
+
+    def add_security_logs(self, count, age_days):
+        SecurityLog.objects.bulk_create(
+            [SecurityLog(ip_address="127.0.0.1", user_agent="test", action="login") for _ in range(count)]
+        )
+        SecurityLog.objects.filter(timestamp__gt=timezone.now() - timedelta(minutes=1)).update(
+            timestamp=timezone.now() - timedelta(days=age_days)
+        )
+
+    def test_only_rows_past_retention_are_deleted_in_batches(self):
+        self.add_security_logs(5, age_days=400)
+        SecurityLog.objects.create(ip_address="127.0.0.1", user_agent="test", action="recent")
+
+        deleted = retention.sweep(["security_logs"], BATCH_SIZE=2, SLEEP=0)
+
+        self.assertEqual(deleted, {"security_logs": 5})
+        self.assertEqual(list(SecurityLog.objects.values_list("action", flat=True)), ["recent"])
+        self.assertIsNone(cache.get(retention.CHECKPOINT_KEY.format(name="security_logs")))
+
+    def test_interrupted_sweep_resumes_from_its_checkpoint(self):
+        self.add_security_logs(4, age_days=400)
+        policy = next(policy for policy in retention.POLICIES if policy.name == "security_logs")
+
+        # A deadline already passed stops before the first batch; resume as if one batch had run
+        self.assertEqual(retention.sweep_policy(policy, deadline=0, BATCH_SIZE=2), 0)
+        first_ids = list(SecurityLog.objects.order_by("pk").values_list("pk", flat=True)[:2])
+        cache.set(retention.CHECKPOINT_KEY.format(name="security_logs"), first_ids[-1], None)
+
+        self.assertEqual(retention.sweep_policy(policy, BATCH_SIZE=2, SLEEP=0), 2)
+        self.assertEqual(list(SecurityLog.objects.order_by("pk").values_list("pk", flat=True)), first_ids)
+        self.assertEqual(retention.sweep_policy(policy, BATCH_SIZE=2, SLEEP=0), 2)
+
+    def test_expired_messages_leave_consistent_inboxes(self):
+        kept, _, _ = self.service.send_message(self.alice.id, self.bob.id, "kept", "Kept")
+        expired, _, _ = self.service.send_message(self.alice.id, self.bob.id, "gone", "Gone")
+        Message.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(retention.sweep(["messages"], SLEEP=0), {"messages": 1})
+
+        self.assertFalse(MessageSearchTerm.objects.filter(message_id=expired.pk).exists())
+        self.assertEqual(InboxEntry.objects.get(owner=self.bob, other_user=self.alice).last_message_id, kept.pk)
+        self.assertEqual(self.service.get_unread_count(self.bob.id), 1)
+
+    def test_a_running_sweep_is_not_started_twice(self):
+        SearchQuery.objects.create(query="old", results_count=0)
+        SearchQuery.objects.update(created_at=timezone.now() - timedelta(days=60))
+        cache.add(retention.LOCK_KEY, 1)
+
+        self.assertEqual(retention.sweep(), {})
+        cache.delete(retention.LOCK_KEY)
+        self.assertEqual(retention.sweep(["search_queries"])["search_queries"], 1)
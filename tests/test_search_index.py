@@ -0,0 +1,158 @@
+"""
+Tests for the inverted index search engine.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.search.backends import InvertedIndexSearchBackend, build_filter_predicate, get_search_settings
+from core.search.index import InvertedIndex, tokenize
+from core.search.pagination import SearchPage, decode_cursor, encode_cursor
+
+
+class TestTokenizer(SimpleTestCase):
+    """Test query and document tokenization."""
+
+    def test_tokenize_lowercases_and_splits_punctuation(self):
+        self.assertEqual(tokenize("High-Quality Steam, CARD!"), ["high", "quality", "steam", "card"])
+
+    def test_tokenize_drops_stop_words_and_short_tokens(self):
+        self.assertEqual(tokenize("a card for the x box"), ["card", "box"])
+
+
+class TestInvertedIndex(SimpleTestCase):
+    """Test BM25 ranking and index maintenance."""
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.add("steam", {"name": "Steam gift card", "description": "Wallet code for games"})
+        self.index.add("amazon", {"name": "Amazon gift card", "description": "Shop anything"})
+        self.index.add("games", {"name": "Game bundle", "description": "Includes a steam key"})
+
+    def test_name_matches_rank_above_description_matches(self):
+        results = self.index.search(["steam"])
+        self.assertEqual([doc_id for doc_id, _ in results], ["steam", "games"])
+
+    def test_rare_terms_outweigh_common_terms(self):
+        results = self.index.search(["gift", "amazon"])
+        self.assertEqual(results[0][0], "amazon")
+
+    def test_limit_returns_top_hits(self):
+        self.assertEqual(len(self.index.search(["gift", "steam"], limit=1)), 1)
+
+    def test_replacing_a_document_updates_postings(self):
+        self.index.add("steam", {"name": "Netflix subscription"})
+        self.assertEqual([doc_id for doc_id, _ in self.index.search(["steam"])], ["games"])
+        self.assertEqual(len(self.index), 3)
+
+    def test_remove_and_compact(self):
+        self.assertTrue(self.index.remove("amazon"))
+        self.assertFalse(self.index.remove("amazon"))
+        self.index.compact()
+        self.assertEqual(self.index.get_stats()["dead_slots"], 0)
+        self.assertEqual(self.index.search(["amazon"]), [])
+        self.assertEqual(len(self.index.search(["card"])), 1)
+
+    def test_export_round_trip(self):
+        copy = InvertedIndex()
+        for doc_id, frequencies, attributes in self.index.export_documents():
+            copy.add_frequencies(doc_id, frequencies, attributes)
+        self.assertEqual(copy.search(["steam", "card"]), self.index.search(["steam", "card"]))
+
+    def test_terms_with_prefix(self):
+        self.assertEqual(self.index.terms_with_prefix("gam"), ["game", "games"])
+
+
+class TestSearchPagination(SimpleTestCase):
+    """Test ranked pages with offset and keyset navigation."""
+
+    def setUp(self):
+        self.index = InvertedIndex()
+        for number in range(25):
+            self.index.add(f"doc-{number:02d}", {"name": "steam card " + "bonus " * (number % 5)})
+
+    def test_keyset_pages_match_offset_pages(self):
+        ranked = self.index.search(["steam", "bonus"])
+        first, total = self.index.search_page(["steam", "bonus"], 10)
+        second, _ = self.index.search_page(["steam", "bonus"], 10, after=(first[-1][1], first[-1][0]))
+        self.assertEqual(total, 25)
+        self.assertEqual(first + second, ranked[:20])
+        self.assertEqual(second, self.index.search_page(["steam", "bonus"], 10, offset=10)[0])
+
+    def test_cursor_round_trip(self):
+        cursor = encode_cursor(1.2345678901234567, "doc-01")
+        self.assertEqual(decode_cursor(cursor), (1.2345678901234567, "doc-01"))
+        self.assertIsNone(decode_cursor("not a cursor!"))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_search_page_navigation(self):
+        page = SearchPage(["a", "b"], 2, 2, 5)
+        self.assertEqual(page.paginator.num_pages, 3)
+        self.assertTrue(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertEqual((page.start_index(), page.end_index()), (3, 4))
+
+
+class TestFilterPredicate(SimpleTestCase):
+    """Test SearchService filters applied to indexed attributes."""
+
+    def test_filters(self):
+        attributes = ("Steam card", "3", "7", 0.002, 0, 0.0)
+        self.assertIsNone(build_filter_predicate({}))
+        self.assertTrue(build_filter_predicate({"category_id": 3, "max_price": 0.01})(attributes))
+        self.assertFalse(build_filter_predicate({"min_price": 0.01})(attributes))
+        self.assertFalse(build_filter_predicate({"in_stock": True})(attributes))
+        self.assertFalse(build_filter_predicate({"vendor_id": "8"})(attributes))
+
+
+class TestRemovalLog(SimpleTestCase):
+    """Test that removals made by one process reach the indexes of the others."""
+
+    def setUp(self):
+        cache.clear()
+        self.writer, self.reader = self.loaded_backend(), self.loaded_backend()
+
+    def loaded_backend(self):
+        backend = InvertedIndexSearchBackend({**get_search_settings(), "INDEX_PATH": None})
+        for doc_id in ("1", "2", "3"):
+            backend.index.add(doc_id, {"name": f"steam card {doc_id}"})
+        backend._loaded = True
+        backend._generation = cache.get(backend.GENERATION_KEY)
+        return backend
+
+    def search_ids(self, backend):
+        return sorted(doc_id for doc_id, _ in backend.search(["steam"]))
+
+    @mock.patch.object(InvertedIndexSearchBackend, "_build_from_database")
+    @mock.patch.object(InvertedIndexSearchBackend, "_sync_changes")
+    def test_other_processes_replay_removals(self, sync_changes, build_from_database):
+        self.writer.remove_product(1)
+        self.writer.remove_product(3)
+
+        self.assertEqual(self.search_ids(self.reader), ["2"])
+        self.assertEqual(self.search_ids(self.writer), ["2"])
+        self.assertEqual(self.reader.get_stats()["removals_seen"], 2)
+        build_from_database.assert_not_called()
+
+    @mock.patch.object(InvertedIndexSearchBackend, "_build_from_database")
+    @mock.patch.object(InvertedIndexSearchBackend, "_sync_changes")
+    def test_an_expired_tombstone_forces_a_rebuild(self, sync_changes, build_from_database):
+        self.writer.remove_product(1)
+        self.writer.remove_product(3)
+        cache.delete(self.writer.TOMBSTONE_KEY.format(1))
+
+        self.reader.search(["steam"])
+
+        build_from_database.assert_called_once_with()
+        sync_changes.assert_not_called()
+
+    @mock.patch.object(InvertedIndexSearchBackend, "_build_from_database")
+    @mock.patch.object(InvertedIndexSearchBackend, "_sync_changes")
+    def test_discarding_a_stale_hit_stays_local(self, sync_changes, build_from_database):
+        self.writer.discard_product(1)
+
+        self.assertEqual(self.search_ids(self.writer), ["2", "3"])
+        self.assertEqual(self.search_ids(self.reader), ["1", "2", "3"])
+        self.assertIsNone(cache.get(self.writer.REMOVALS_KEY))
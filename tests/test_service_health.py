@@ -0,0 +1,137 @@
+"""
+Tests for the shared service health prober and circuit breakers.
+"""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.services.base_service import BaseService
+from core.services.service_health import ServiceHealthBoard
+from core.services.service_manager import ServiceManager
+from core.services.service_registry import ServiceRegistry
+
+
+class ProbedService(BaseService):
+    service_name = "probed_service"
+    healthy = True
+    checks = 0
+
+    def initialize(self) -> bool:
+        return True
+
+    def cleanup(self) -> bool:
+        return True
+
+    def _health_check(self):
+        type(self).checks += 1
+        self._healthy = type(self).healthy
+
+
+class TestServiceHealth(SimpleTestCase):
+    """Test the prober lease, the published snapshot and shared breakers."""
+
+    def setUp(self):
+        cache.clear()
+        self.saved = {attr: value.copy() for attr, value in vars(ServiceRegistry).items() if isinstance(value, dict)}
+        ServiceRegistry._services.clear()
+        ServiceRegistry._service_paths.clear()
+        ServiceRegistry._service_classes.clear()
+        ServiceRegistry.register(ProbedService)
+        ProbedService.healthy, ProbedService.checks = True, 0
+        self.boards = [
+            ServiceHealthBoard(ALLOW_LOCAL_CACHE=True, LOCAL_TTL=0, BREAKER_THRESHOLD=2, BREAKER_TIMEOUT=30)
+            for _ in range(2)
+        ]
+        self.managers = [ServiceManager(board) for board in self.boards]
+
+    def tearDown(self):
+        for attr, value in self.saved.items():
+            setattr(ServiceRegistry, attr, value)
+
+    def test_only_the_lease_holder_probes(self):
+        leader, follower = self.managers
+
+        self.assertTrue(leader.probe_once())
+        self.assertFalse(follower.probe_once())
+        self.assertTrue(leader.probe_once())
+        self.assertEqual(ProbedService.checks, 2)
+
+        status = self.boards[1].get_service_status("probed_service")
+        self.assertTrue(status["healthy"])
+        self.assertEqual(status["circuit"], "CLOSED")
+
+    def test_lease_passes_on_after_release(self):
+        leader, follower = self.managers
+        leader.probe_once()
+
+        self.boards[0].release_lease()
+
+        self.assertTrue(follower.probe_once())
+
+    def test_lease_renewal_never_takes_over_a_held_slot(self):
+        first, second = self.boards
+        ttl = first.options["LEASE_TTL"]
+        start = (int(1_000_000 // ttl) + 1) * ttl
+
+        with mock.patch("core.services.service_health.time.time", return_value=start):
+            self.assertTrue(first.acquire_lease())
+            self.assertFalse(second.acquire_lease())
+        # The holder reserved the next slot; once it stops renewing, the slot after that is free
+        with mock.patch("core.services.service_health.time.time", return_value=start + ttl):
+            self.assertFalse(second.acquire_lease())
+        cache.delete(first._lease_key(int(start // ttl) + 1))
+        with mock.patch("core.services.service_health.time.time", return_value=start + ttl):
+            self.assertTrue(second.acquire_lease())
+            self.assertFalse(first.acquire_lease())
+
+    def test_no_prober_is_elected_on_a_local_cache(self):
+        board = ServiceHealthBoard()
+
+        self.assertFalse(board.is_shared())
+        self.assertFalse(board.acquire_lease())
+        self.assertFalse(ServiceManager(board).probe_once())
+        self.assertEqual(ProbedService.checks, 0)
+
+    def test_followers_fire_callbacks_from_the_snapshot(self):
+        leader, follower = self.managers
+        changes = []
+        follower.register_service_callback("probed_service", lambda name, healthy: changes.append(healthy))
+        leader.probe_once()
+        follower.probe_once()
+
+        ProbedService.healthy = False
+        leader.probe_once()
+        follower.probe_once()
+
+        self.assertEqual(changes, [False])
+
+    def test_breaker_is_shared_between_workers(self):
+        first, second = self.boards
+        first.record_result("probed_service", False)
+        self.assertEqual(second.breaker_state("probed_service")["state"], "CLOSED")
+
+        self.assertEqual(second.record_result("probed_service", False), "OPEN")
+        self.assertEqual(first.breaker_state("probed_service")["state"], "OPEN")
+        self.assertFalse(ServiceManager(first).is_service_available("probed_service"))
+
+        with mock.patch("core.services.service_health.time.time", return_value=first.breaker_state(
+                "probed_service")["last_failure_time"] + 31):
+            self.assertEqual(second.breaker_state("probed_service")["state"], "HALF_OPEN")
+            self.assertEqual(first.record_result("probed_service", True), "CLOSED")
+
+        self.assertEqual(second.breaker_state("probed_service")["failure_count"], 0)
+
+    def test_is_healthy_reads_the_snapshot_without_checking(self):
+        service = ServiceRegistry.get_service("probed_service")
+        checks = ProbedService.checks
+
+        ProbedService.healthy = False
+        self.managers[0].probe_once()
+        with mock.patch("core.services.base_service.health_board", self.boards[1]):
+            self.assertFalse(ServiceRegistry.get_service("probed_service").is_healthy())
+            service._healthy = True
+            self.assertFalse(service.is_healthy())
+
+        self.assertEqual(ProbedService.checks, checks + 1)
@@ -0,0 +1,121 @@
+"""
+Tests for the two-tier service cache.
+"""
+
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.services.tiered_cache import CacheEntry, LocalCache, TieredCache, stable_key, tag
+
+
+class TestLocalCache(SimpleTestCase):
+    """Test LRU order, size-aware eviction and expiry of the in-process tier."""
+
+    def test_evicts_least_recently_used_by_count(self):
+        local = LocalCache(max_entries=2, max_bytes=10_000, max_item_bytes=10_000)
+        for key in ("a", "b"):
+            local.set(key, CacheEntry(key, time.time() + 60), time.time() + 60)
+        local.get("a")
+        local.set("c", CacheEntry("c", time.time() + 60), time.time() + 60)
+
+        self.assertIsNotNone(local.get("a"))
+        self.assertIsNone(local.get("b"))
+
+    def test_evicts_by_size_and_skips_large_items(self):
+        evicted = []
+        local = LocalCache(max_entries=100, max_bytes=250, max_item_bytes=200, on_evict=evicted.append)
+        local.set("a", CacheEntry("x", 0), time.time() + 60, size=100)
+        local.set("b", CacheEntry("x", 0), time.time() + 60, size=100)
+        local.set("c", CacheEntry("x", 0), time.time() + 60, size=100)
+        local.set("huge", CacheEntry("x", 0), time.time() + 60, size=500)
+
+        self.assertEqual(evicted, ["a"])
+        self.assertEqual(local.total_bytes, 200)
+        self.assertIsNone(local.get("huge"))
+
+    def test_expired_entries_are_dropped(self):
+        local = LocalCache(max_entries=10, max_bytes=10_000, max_item_bytes=10_000)
+        local.set("a", CacheEntry("a", 0), time.time() - 1)
+        self.assertIsNone(local.get("a"))
+        self.assertEqual(len(local), 0)
+
+
+class TestTieredCache(SimpleTestCase):
+    """Test tier fall-through, stale-while-revalidate and per-prefix counters."""
+
+    def setUp(self):
+        cache.clear()
+        self.cache = TieredCache(LOCAL_TTL=30, STALE_TTL=60, WAIT_TIMEOUT=0.05)
+
+    def test_local_tier_then_shared_tier(self):
+        self.cache.set("service:s:item:1", {"a": 1}, timeout=60)
+        self.assertEqual(self.cache.get("service:s:item:1"), {"a": 1})
+
+        # Another process only sees the shared tier
+        other = TieredCache()
+        self.assertEqual(other.get("service:s:item:1"), {"a": 1})
+        self.assertEqual(other.get("service:s:item:1"), {"a": 1})
+
+        self.assertEqual(self.cache.get_stats()["service:s:item"]["local_hits"], 1)
+        stats = other.get_stats("service:s:")["service:s:item"]
+        self.assertEqual((stats["shared_hits"], stats["local_hits"]), (1, 1))
+
+    def test_delete_in_shared_tier_drops_stale_local_copy(self):
+        self.cache.set("k:1", "value", timeout=60)
+        cache.delete("k:1")
+        with mock.patch.object(CacheEntry, "is_fresh", return_value=False):
+            self.assertIsNone(self.cache.get("k:1"))
+        self.assertEqual(len(self.cache.local), 0)
+
+    def test_get_or_set_computes_once_and_serves_stale(self):
+        calls = []
+
+        def producer():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(self.cache.get_or_set("k:1", producer, timeout=60), 1)
+        self.assertEqual(self.cache.get_or_set("k:1", producer, timeout=60), 1)
+        self.assertEqual(len(calls), 1)
+
+        # Expired but within the stale window: a caller that loses the refresh lock gets the old value
+        with mock.patch.object(CacheEntry, "is_fresh", return_value=False):
+            cache.add("k:1:refresh-lock", 1)
+            self.assertEqual(self.cache.get_or_set("k:1", producer, timeout=60), 1)
+            cache.delete("k:1:refresh-lock")
+            self.assertEqual(self.cache.get_or_set("k:1", producer, timeout=60), 2)
+        self.assertEqual(self.cache.get_stats()["k"]["stale_hits"], 1)
+
+    def test_cold_miss_waits_for_lock_holder(self):
+        cache.add("k:2:refresh-lock", 1)
+        self.assertEqual(self.cache.get_or_set("k:2", lambda: "computed", timeout=60), "computed")
+        self.assertTrue(cache.get("k:2:refresh-lock"))
+
+    def test_stable_key_is_process_independent(self):
+        self.assertEqual(stable_key({"a": 1}), stable_key({"a": 1}))
+        self.assertNotEqual(stable_key({"a": 1}), stable_key({"a": 2}))
+
+    def test_tag_invalidation(self):
+        self.cache.set("k:1", "one", timeout=60, tags=[tag("orders.order", user=1)])
+        self.cache.set("k:2", "two", timeout=60, tags=[tag("orders.order", user=2)])
+
+        self.cache.invalidate_tags([tag("orders.order", user=1)])
+        self.assertIsNone(self.cache.get("k:1"))
+        self.assertEqual(self.cache.get("k:2"), "two")
+        self.assertEqual(self.cache.get_stats()["k"]["invalidations"], 1)
+
+    def test_evicted_tag_counter_invalidates(self):
+        self.cache.set("k:1", "one", timeout=60, tags=["t"])
+        cache.delete("cache-tag:t")
+        self.assertIsNone(self.cache.get("k:1"))
+
+    def test_tagged_values_are_never_served_stale(self):
+        self.cache.get_or_set("k:1", lambda: "old", timeout=60, tags=["t"])
+        self.cache.invalidate_tags(["t"])
+        cache.add("k:1:refresh-lock", 1)
+
+        # The lock holder has not stored a new value yet, so this caller computes its own
+        self.assertEqual(self.cache.get_or_set("k:1", lambda: "new", timeout=60, tags=["t"]), "new")
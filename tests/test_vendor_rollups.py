@@ -0,0 +1,97 @@
+"""
+Tests for the daily vendor analytics rollups.
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import VendorDailyBuyerStats, VendorDailyProductStats
+from core.services.vendor_analytics_service import VendorAnalyticsService
+from core.services.vendor_rollups import rebuild_rollups
+from disputes.models import Dispute
+from orders.models import Order, OrderItem
+from products.models import Category, Product
+from vendors.models import Vendor
+
+User = get_user_model()
+
+
+class TestVendorRollups(TestCase):
+    """Test incremental maintenance on status changes and dashboard reads."""
+
+    def setUp(self):
+        self.vendor_user = User.objects.create_user(username="vendor", password="x")
+        vendor = Vendor.objects.create(user=self.vendor_user, vendor_name="Vendor")
+        category = Category.objects.create(name="Cards")
+        self.product = Product.objects.create(
+            vendor=vendor, category=category, name="Card", description="", price_btc=Decimal("0.01"), price_xmr=Decimal("1")
+        )
+        self.buyers = [User.objects.create_user(username=f"buyer{index}", password="x") for index in range(2)]
+
+    def place_order(self, buyer, quantity=1, status="PENDING"):
+        order = Order.objects.create(user=buyer, status=status)
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=quantity, price_btc=Decimal("0.01"), price_xmr=Decimal("1")
+        )
+        return order
+
+    def pay(self, order, status="PAID"):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = status
+            order.save()
+
+    def test_status_change_updates_rollups(self):
+        first = self.place_order(self.buyers[0], quantity=2)
+        second = self.place_order(self.buyers[0])
+        self.place_order(self.buyers[1])  # never paid
+
+        self.assertFalse(VendorDailyProductStats.objects.exists())
+        self.pay(first)
+        self.pay(second)
+
+        row = VendorDailyProductStats.objects.get()
+        self.assertEqual((row.orders, row.units, row.unique_buyers), (2, 3, 1))
+        self.assertEqual(row.revenue_btc, Decimal("0.03"))
+        self.assertEqual(VendorDailyBuyerStats.objects.get().orders, 2)
+
+        self.pay(second, status="CANCELLED")
+        row = VendorDailyProductStats.objects.get()
+        self.assertEqual((row.orders, row.units), (1, 2))
+
+    def test_disputes_are_counted(self):
+        order = self.place_order(self.buyers[1])
+        self.pay(order)
+        with self.captureOnCommitCallbacks(execute=True):
+            Dispute.objects.create(order=order, complainant=self.buyers[1], respondent=self.vendor_user, reason="late")
+
+        self.assertEqual(VendorDailyProductStats.objects.get().disputes, 1)
+        self.assertEqual(VendorDailyBuyerStats.objects.get().disputes, 1)
+
+    def test_rebuild_matches_incremental(self):
+        for buyer in self.buyers:
+            self.pay(self.place_order(buyer))
+        incremental = list(VendorDailyProductStats.objects.values("orders", "units", "unique_buyers", "revenue_btc"))
+
+        rebuild_rollups()
+        self.assertEqual(
+            list(VendorDailyProductStats.objects.values("orders", "units", "unique_buyers", "revenue_btc")), incremental
+        )
+
+    def test_dashboard_reads_rollups(self):
+        for buyer in self.buyers:
+            self.pay(self.place_order(buyer))
+        self.pay(self.place_order(self.buyers[0]))
+
+        service = VendorAnalyticsService()
+        summary = service._get_summary_metrics(self.vendor_user)
+        self.assertEqual(summary["total_orders"], 3)
+        self.assertEqual(summary["active_customers"], 2)
+        self.assertAlmostEqual(summary["total_revenue"], 0.03)
+
+        customers = service._get_customer_insights(self.vendor_user)
+        self.assertEqual((customers["total_customers"], customers["repeat_customers"]), (2, 1))
+
+        products = service._get_product_performance(self.vendor_user)
+        self.assertEqual(products["top_products"][0]["sales_count"], 3)
@@ -0,0 +1,118 @@
+"""
+Tests for set-based wallet ledger reconciliation.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from wallets.models import Transaction, Wallet, WalletBalanceCheck
+from wallets.reconciliation import ESCROW_LEDGER_TYPES, LedgerReconciler
+
+User = get_user_model()
+
+
+class TestLedgerReconciler(TestCase):
+    """Test the grouped aggregate, streamed join, bulk writes and checkpoints."""
+
+    def setUp(self):
+        self.wallets = []
+        for index in range(3):
+            user = User.objects.create_user(username=f"user{index}", password="x")
+            self.wallets.append(Wallet.objects.create(user=user, balance_btc=Decimal("1.5")))
+        self.sequence = 0
+
+        for wallet in self.wallets:
+            self.add_transaction(wallet, "deposit", "2")
+            self.add_transaction(wallet, "withdrawal", "0.5")
+
+    def add_transaction(self, wallet, type, amount, currency="btc"):
+        self.sequence += 1
+        return Transaction.objects.create(
+            user=wallet.user,
+            type=type,
+            amount=Decimal(amount),
+            currency=currency,
+            balance_before=0,
+            balance_after=0,
+            reference=f"ref-{self.sequence}",
+            transaction_hash=f"hash-{self.sequence}",
+        )
+
+    def test_balanced_wallets_have_no_discrepancies(self):
+        summary = LedgerReconciler().run()
+        self.assertEqual(summary["checked"], 3)
+        self.assertEqual(summary["discrepancies"], [])
+        self.assertEqual(WalletBalanceCheck.objects.filter(discrepancy_found=False).count(), 3)
+
+    def test_discrepancy_is_detected_and_recorded(self):
+        self.add_transaction(self.wallets[1], "fee", "0.01")
+
+        summary = LedgerReconciler().run()
+        self.assertEqual([result.wallet.id for result in summary["discrepancies"]], [self.wallets[1].id])
+
+        check = summary["discrepancies"][0].check
+        self.assertIsNotNone(check.pk)
+        self.assertEqual(check.expected_btc, Decimal("1.49"))
+        self.assertEqual(Decimal(check.discrepancy_details["btc_diff"]), Decimal("0.01"))
+
+    def test_query_count_is_constant(self):
+        LedgerReconciler().run()
+        with CaptureQueriesContext(connection) as small_run:
+            LedgerReconciler().run()
+
+        for index in range(3, 20):
+            user = User.objects.create_user(username=f"user{index}", password="x")
+            Wallet.objects.create(user=user)
+
+        with CaptureQueriesContext(connection) as large_run:
+            self.assertEqual(LedgerReconciler().run()["checked"], 20)
+
+        self.assertEqual(len(large_run.captured_queries), len(small_run.captured_queries))
+
+    def test_wallet_without_transactions(self):
+        user = User.objects.create_user(username="empty", password="x")
+        wallet = Wallet.objects.create(user=user, balance_xmr=Decimal("3"))
+
+        summary = LedgerReconciler().run(record_clean=False)
+        self.assertEqual([result.wallet.id for result in summary["discrepancies"]], [wallet.id])
+        self.assertEqual(WalletBalanceCheck.objects.count(), 1)
+
+    def test_escrow_ledger_types(self):
+        wallet = self.wallets[0]
+        self.add_transaction(wallet, "escrow_lock", "0.2")
+        wallet.escrow_btc = Decimal("0.2")
+        wallet.save()
+
+        summary = LedgerReconciler(ledger_types=ESCROW_LEDGER_TYPES, name="command").run(wallet_ids=[wallet.id])
+        self.assertEqual(summary["checked"], 1)
+        self.assertEqual(summary["discrepancies"], [])
+
+    def test_incremental_mode_rechecks_only_changed_wallets(self):
+        Transaction.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        reconciler = LedgerReconciler()
+        reconciler.run()
+
+        self.assertEqual(reconciler.run(incremental=True)["checked"], 0)
+
+        self.add_transaction(self.wallets[2], "deposit", "1")
+        summary = reconciler.run(incremental=True)
+        self.assertEqual(summary["checked"], 1)
+        self.assertEqual(summary["discrepancies"][0].wallet.id, self.wallets[2].id)
+
+    def test_incremental_checkpoint_overlaps_late_commits(self):
+        Transaction.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        reconciler = LedgerReconciler()
+        reconciler.run()
+
+        # Inserted before the run started but committed after it read the ledger
+        late = self.add_transaction(self.wallets[0], "deposit", "1")
+        Transaction.objects.filter(pk=late.pk).update(created_at=timezone.now() - timedelta(minutes=2))
+
+        summary = reconciler.run(incremental=True)
+        self.assertEqual([result.wallet.id for result in summary["discrepancies"]], [self.wallets[0].id])
@@ -88,7 +88,10 @@ class ProductForm(forms.ModelForm):
             success, filename, thumb_filename = processor.validate_and_process_image(image, user)
 
             if success:
-                if instance.pk and (instance.image_filename or instance.thumbnail_filename):
+                # Re-uploading the same picture yields the same content-addressed name
+                if instance.pk and instance.image_filename != filename and (
+                    instance.image_filename or instance.thumbnail_filename
+                ):
                     processor.delete_images(instance.image_filename, instance.thumbnail_filename)
 
                 instance.image_filename = filename
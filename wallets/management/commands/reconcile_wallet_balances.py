@@ -2,10 +2,9 @@ import logging
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
-from django.db.models import Q, Sum
 from django.utils import timezone
 
-from wallets.models import Transaction, Wallet, WalletBalanceCheck
+from wallets.reconciliation import ESCROW_LEDGER_TYPES, LedgerReconciler
 from wallets.utils import send_discrepancy_alert
 
 logger = logging.getLogger("wallet.management")
@@ -25,114 +24,53 @@ class Command(BaseCommand):
             action="store_true",
             help="Automatically fix minor discrepancies",
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only re-check wallets with transactions since the last run",
+        )
 
     def handle(self, *args, **options):
         self.stdout.write("Starting wallet balance reconciliation...")
 
-        if options["wallet_id"]:
-            wallets = Wallet.objects.filter(id=options["wallet_id"])
-        else:
-            wallets = Wallet.objects.all()
+        reconciler = LedgerReconciler(ledger_types=ESCROW_LEDGER_TYPES, name="command")
+        summary = reconciler.run(
+            wallet_ids=[options["wallet_id"]] if options["wallet_id"] else None,
+            incremental=options["incremental"],
+            record_clean=False,
+        )
 
-        discrepancies_found = 0
-        wallets_checked = 0
+        if summary["since"]:
+            self.stdout.write(f"Checking wallets with transactions since {summary['since'].isoformat()}")
 
-        for wallet in wallets:
+        for result in summary["discrepancies"]:
+            wallet, check = result.wallet, result.check
             try:
-                wallets_checked += 1
-                self.stdout.write(f"Checking wallet {wallet.id} for user {wallet.user.username}")
-
-                btc_transactions = Transaction.objects.filter(user=wallet.user, currency="btc").aggregate(
-                    deposits=Sum("amount", filter=Q(type__in=["deposit", "conversion"])),
-                    withdrawals=Sum("amount", filter=Q(type__in=["withdrawal", "fee"])),
-                    escrow_locks=Sum("amount", filter=Q(type="escrow_lock")),
-                    escrow_releases=Sum("amount", filter=Q(type="escrow_release")),
-                )
-
-                xmr_transactions = Transaction.objects.filter(user=wallet.user, currency="xmr").aggregate(
-                    deposits=Sum("amount", filter=Q(type__in=["deposit", "conversion"])),
-                    withdrawals=Sum("amount", filter=Q(type__in=["withdrawal", "fee"])),
-                    escrow_locks=Sum("amount", filter=Q(type="escrow_lock")),
-                    escrow_releases=Sum("amount", filter=Q(type="escrow_release")),
-                )
-
-                expected_btc = (btc_transactions["deposits"] or Decimal("0")) - (
-                    btc_transactions["withdrawals"] or Decimal("0")
-                )
-                expected_xmr = (xmr_transactions["deposits"] or Decimal("0")) - (
-                    xmr_transactions["withdrawals"] or Decimal("0")
-                )
-
-                expected_escrow_btc = (btc_transactions["escrow_locks"] or Decimal("0")) - (
-                    btc_transactions["escrow_releases"] or Decimal("0")
-                )
-                expected_escrow_xmr = (xmr_transactions["escrow_locks"] or Decimal("0")) - (
-                    xmr_transactions["escrow_releases"] or Decimal("0")
-                )
-
-                btc_diff = abs(wallet.balance_btc - expected_btc)
-                xmr_diff = abs(wallet.balance_xmr - expected_xmr)
-                escrow_btc_diff = abs(wallet.escrow_btc - expected_escrow_btc)
-                escrow_xmr_diff = abs(wallet.escrow_xmr - expected_escrow_xmr)
-
-                discrepancy_found = (
-                    btc_diff > Decimal("0.00000001")
-                    or xmr_diff > Decimal("0.000000000001")
-                    or escrow_btc_diff > Decimal("0.00000001")
-                    or escrow_xmr_diff > Decimal("0.000000000001")
-                )
-
-                if discrepancy_found:
-                    discrepancies_found += 1
-                    self.stdout.write(self.style.WARNING(f"Discrepancy found in wallet {wallet.id}:"))
-                    self.stdout.write(f"  BTC: Expected {expected_btc}, Actual {wallet.balance_btc}, Diff {btc_diff}")
-                    self.stdout.write(f"  XMR: Expected {expected_xmr}, Actual {wallet.balance_xmr}, Diff {xmr_diff}")
+                self.stdout.write(self.style.WARNING(f"Discrepancy found in wallet {wallet.id}:"))
+                for field, label in (("btc", "BTC"), ("xmr", "XMR"), ("escrow_btc", "Escrow BTC"), ("escrow_xmr", "Escrow XMR")):
                     self.stdout.write(
-                        f"  Escrow BTC: Expected {expected_escrow_btc}, Actual {wallet.escrow_btc}, Diff {escrow_btc_diff}"
-                    )
-                    self.stdout.write(
-                        f"  Escrow XMR: Expected {expected_escrow_xmr}, Actual {wallet.escrow_xmr}, Diff {escrow_xmr_diff}"
-                    )
-
-                    check = WalletBalanceCheck.objects.create(
-                        wallet=wallet,
-                        expected_btc=expected_btc,
-                        expected_xmr=expected_xmr,
-                        expected_escrow_btc=expected_escrow_btc,
-                        expected_escrow_xmr=expected_escrow_xmr,
-                        actual_btc=wallet.balance_btc,
-                        actual_xmr=wallet.balance_xmr,
-                        actual_escrow_btc=wallet.escrow_btc,
-                        actual_escrow_xmr=wallet.escrow_xmr,
-                        discrepancy_found=True,
-                        discrepancy_details={
-                            "btc_diff": str(btc_diff),
-                            "xmr_diff": str(xmr_diff),
-                            "escrow_btc_diff": str(escrow_btc_diff),
-                            "escrow_xmr_diff": str(escrow_xmr_diff),
-                        },
+                        f"  {label}: Expected {result.expected[field]}, Actual {result.actual[field]}, "
+                        f"Diff {result.diffs[field]}"
                     )
 
-                    if btc_diff > Decimal("0.001") or xmr_diff > Decimal("0.1"):
-                        send_discrepancy_alert(wallet, check)
-                        self.stdout.write(self.style.ERROR(f"Major discrepancy alert sent for wallet {wallet.id}"))
+                if result.needs_alert:
+                    send_discrepancy_alert(wallet, check)
+                    self.stdout.write(self.style.ERROR(f"Major discrepancy alert sent for wallet {wallet.id}"))
 
-                    if options["fix_discrepancies"]:
-                        if btc_diff <= Decimal("0.00001") and xmr_diff <= Decimal("0.001"):
-                            wallet.balance_btc = expected_btc
-                            wallet.balance_xmr = expected_xmr
-                            wallet.escrow_btc = expected_escrow_btc
-                            wallet.escrow_xmr = expected_escrow_xmr
-                            wallet.save()
+                if options["fix_discrepancies"]:
+                    if result.diffs["btc"] <= Decimal("0.00001") and result.diffs["xmr"] <= Decimal("0.001"):
+                        wallet.balance_btc = result.expected["btc"]
+                        wallet.balance_xmr = result.expected["xmr"]
+                        wallet.escrow_btc = result.expected["escrow_btc"]
+                        wallet.escrow_xmr = result.expected["escrow_xmr"]
+                        wallet.save()
 
-                            check.resolved = True
-                            check.resolution_notes = "Auto-fixed minor discrepancy"
-                            check.resolved_at = timezone.now()
-                            check.save()
+                        check.resolved = True
+                        check.resolution_notes = "Auto-fixed minor discrepancy"
+                        check.resolved_at = timezone.now()
+                        check.save()
 
-                            self.stdout.write(self.style.SUCCESS(f"Auto-fixed minor discrepancy in wallet {wallet.id}"))
-                else:
-                    self.stdout.write(f"  ✓ Wallet {wallet.id} balances are correct")
+                        self.stdout.write(self.style.SUCCESS(f"Auto-fixed minor discrepancy in wallet {wallet.id}"))
 
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f"Error checking wallet {wallet.id}: {str(e)}"))
@@ -140,7 +78,7 @@ class Command(BaseCommand):
 
         self.stdout.write(
             self.style.SUCCESS(
-                f"Reconciliation complete. Checked {wallets_checked} wallets, "
-                f"found {discrepancies_found} discrepancies."
+                f"Reconciliation complete. Checked {summary['checked']} wallets, "
+                f"found {len(summary['discrepancies'])} discrepancies."
             )
         )
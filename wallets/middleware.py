@@ -3,10 +3,11 @@ import logging
 
 from django.conf import settings
 from django.contrib import messages
-from django.core.cache import cache
 from django.shortcuts import redirect
 from django.utils import timezone
 
+from core.security.rate_limit import rate_limiter
+
 logger = logging.getLogger("wallet.security")
 
 
@@ -83,14 +84,11 @@ class RateLimitMiddleware:
     def check_rate_limit(self, request, action, max_attempts, window):
         """Check rate limit for specific action with anonymized tracking"""
         anonymized_ip = self.get_anonymized_ip(request)
-        cache_key = f"rate_limit:{action}:{request.user.id}:{anonymized_ip}"
 
-        attempts = cache.get(cache_key, 0)
-        if attempts >= max_attempts:
+        if not rate_limiter.hit(f"{request.user.id}:{anonymized_ip}", [(action, window, max_attempts)]):
             logger.warning(f"Rate limit exceeded for {action} by user {request.user.username}")
             return False
 
-        cache.set(cache_key, attempts + 1, window)
         return True
 
     def get_anonymized_ip(self, request):
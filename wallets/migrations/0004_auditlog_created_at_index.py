@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("wallets", "0003_remove_auditlog_ip_address_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(fields=["created_at"], name="wallets_aud_created_0b948a_idx"),
+        ),
+    ]
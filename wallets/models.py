@@ -323,6 +323,7 @@ class AuditLog(models.Model):
         indexes = [
             models.Index(fields=["user", "action", "created_at"]),
             models.Index(fields=["flagged", "risk_score"]),
+            models.Index(fields=["created_at"]),
         ]
         ordering = ["-created_at"]
 
@@ -0,0 +1,239 @@
+"""
+Ledger Reconciliation
+Set-based comparison of wallet balances against the transaction ledger.
+
+Expected balances for every wallet in scope come from one grouped aggregate over
+Transaction (user, currency, type). Both that aggregate and the wallets are read in
+user order and merged as two streams, so memory stays bounded by a single user's
+buckets, and the resulting WalletBalanceCheck rows are written with bulk_create.
+"""
+
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Transaction, Wallet, WalletBalanceCheck
+
+logger = logging.getLogger("wallet.reconciliation")
+
+CURRENCIES = ("btc", "xmr")
+
+# Smallest difference treated as a discrepancy, per currency unit precision
+TOLERANCE = {"btc": Decimal("0.00000001"), "xmr": Decimal("0.000000000001")}
+
+# Differences above these raise an administrator alert
+ALERT_THRESHOLD = {"btc": Decimal("0.001"), "xmr": Decimal("0.1")}
+
+# Ledger model used by the periodic task: escrow movements change the spendable balance
+LEDGER_TYPES = {
+    "credit": ("deposit", "escrow_release", "conversion"),
+    "debit": ("withdrawal", "escrow_lock", "fee"),
+}
+
+# Ledger model used by the management command: escrow is tracked separately from balance
+ESCROW_LEDGER_TYPES = {
+    "credit": ("deposit", "conversion"),
+    "debit": ("withdrawal", "fee"),
+    "escrow_credit": ("escrow_lock",),
+    "escrow_debit": ("escrow_release",),
+}
+
+
+class ReconciliationResult:
+    """Expected versus actual balances of one wallet"""
+
+    def __init__(self, wallet: Wallet, totals: Dict[str, Dict[str, Decimal]], ledger_types: Dict[str, tuple]):
+        self.wallet = wallet
+        self.check: Optional[WalletBalanceCheck] = None
+        self.expected = {}
+        self.actual = {}
+        self.diffs = {}
+        self.details = {}
+
+        for currency in CURRENCIES:
+            by_type = totals.get(currency, {})
+            credits = sum((by_type.get(t, Decimal("0")) for t in ledger_types["credit"]), Decimal("0"))
+            debits = sum((by_type.get(t, Decimal("0")) for t in ledger_types["debit"]), Decimal("0"))
+
+            actual_escrow = getattr(wallet, f"escrow_{currency}")
+            if "escrow_credit" in ledger_types:
+                expected_escrow = sum(
+                    (by_type.get(t, Decimal("0")) for t in ledger_types["escrow_credit"]), Decimal("0")
+                ) - sum((by_type.get(t, Decimal("0")) for t in ledger_types["escrow_debit"]), Decimal("0"))
+            else:
+                expected_escrow = actual_escrow
+
+            self.expected[currency] = credits - debits
+            self.expected[f"escrow_{currency}"] = expected_escrow
+            self.actual[currency] = getattr(wallet, f"balance_{currency}")
+            self.actual[f"escrow_{currency}"] = actual_escrow
+            self.details[f"{currency}_credits"] = str(credits)
+            self.details[f"{currency}_debits"] = str(debits)
+
+        for field in self.expected:
+            self.diffs[field] = abs(self.actual[field] - self.expected[field])
+
+        self.discrepancy_found = any(
+            diff > TOLERANCE[field.replace("escrow_", "")] for field, diff in self.diffs.items()
+        )
+
+    @property
+    def needs_alert(self) -> bool:
+        return any(self.diffs[currency] > ALERT_THRESHOLD[currency] for currency in CURRENCIES)
+
+    def to_check(self) -> WalletBalanceCheck:
+        """Build the unsaved WalletBalanceCheck row for this result"""
+        details = {}
+        if self.discrepancy_found:
+            details = {f"{field}_diff": str(diff) for field, diff in self.diffs.items()}
+            details.update({f"{field}_expected": str(value) for field, value in self.expected.items()})
+            details.update(self.details)
+
+        return WalletBalanceCheck(
+            wallet=self.wallet,
+            expected_btc=self.expected["btc"],
+            expected_xmr=self.expected["xmr"],
+            expected_escrow_btc=self.expected["escrow_btc"],
+            expected_escrow_xmr=self.expected["escrow_xmr"],
+            actual_btc=self.actual["btc"],
+            actual_xmr=self.actual["xmr"],
+            actual_escrow_btc=self.actual["escrow_btc"],
+            actual_escrow_xmr=self.actual["escrow_xmr"],
+            discrepancy_found=self.discrepancy_found,
+            discrepancy_details=details,
+        )
+
+
+class LedgerReconciler:
+    """Reconcile all wallets, or only those touched since the last checkpoint, in a few queries"""
+
+    CHUNK_SIZE = 500
+
+    # created_at is set at insert, not commit: a transaction inserted before a run starts can
+    # commit after its aggregate was read, so each checkpoint re-reads this much history
+    CHECKPOINT_OVERLAP = timedelta(minutes=10)
+
+    def __init__(self, ledger_types: Dict[str, tuple] = None, name: str = "periodic", chunk_size: int = None,
+                 overlap: timedelta = None):
+        self.ledger_types = ledger_types or LEDGER_TYPES
+        self.checkpoint_key = f"wallets.reconciliation.{name}.checkpoint"
+        self.chunk_size = chunk_size or self.CHUNK_SIZE
+        self.overlap = self.CHECKPOINT_OVERLAP if overlap is None else overlap
+
+    def get_checkpoint(self):
+        """Get the time incremental runs re-check from: the last run's start less the overlap"""
+        from core.models import SystemSettings
+
+        value = SystemSettings.objects.filter(key=self.checkpoint_key).values_list("value", flat=True).first()
+        return parse_datetime(value) if value else None
+
+    def set_checkpoint(self, started_at):
+        from core.models import SystemSettings
+
+        SystemSettings.objects.update_or_create(
+            key=self.checkpoint_key,
+            defaults={"value": started_at.isoformat(), "description": "Wallet reconciliation checkpoint"},
+        )
+
+    def _ledger_types_in_use(self) -> List[str]:
+        return sorted({t for types in self.ledger_types.values() for t in types})
+
+    def _stream_totals(self, user_filter) -> Iterator[tuple]:
+        """Yield (user_id, {currency: {type: total}}) from one grouped aggregate, in user order"""
+        rows = (
+            Transaction.objects.filter(type__in=self._ledger_types_in_use(), currency__in=CURRENCIES, **user_filter)
+            .order_by()
+            .values("user_id", "currency", "type")
+            .annotate(total=Sum("amount"))
+            .order_by("user_id")
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+        current_user, totals = None, {}
+        for row in rows:
+            if row["user_id"] != current_user:
+                if current_user is not None:
+                    yield current_user, totals
+                current_user, totals = row["user_id"], {}
+            totals.setdefault(row["currency"], {})[row["type"]] = row["total"] or Decimal("0")
+
+        if current_user is not None:
+            yield current_user, totals
+
+    def iter_results(self, wallet_ids: Iterable[int] = None, since=None) -> Iterator[ReconciliationResult]:
+        """Merge-join the wallet stream with the ledger totals stream"""
+        wallet_filter, user_filter = {}, {}
+        if wallet_ids is not None:
+            wallet_filter["id__in"] = list(wallet_ids)
+            user_filter["user__wallet__id__in"] = wallet_filter["id__in"]
+        if since is not None:
+            changed_users = Transaction.objects.filter(created_at__gte=since).values("user_id")
+            wallet_filter["user_id__in"] = changed_users
+            user_filter["user_id__in"] = changed_users
+
+        wallets = Wallet.objects.filter(**wallet_filter).order_by("user_id").iterator(chunk_size=self.chunk_size)
+        totals_stream = self._stream_totals(user_filter)
+        pending = next(totals_stream, None)
+
+        for wallet in wallets:
+            # Skip ledger rows of users without a wallet
+            while pending is not None and pending[0] < wallet.user_id:
+                pending = next(totals_stream, None)
+
+            totals = {}
+            if pending is not None and pending[0] == wallet.user_id:
+                totals = pending[1]
+                pending = next(totals_stream, None)
+
+            yield ReconciliationResult(wallet, totals, self.ledger_types)
+
+    def run(self, wallet_ids: Iterable[int] = None, incremental: bool = False,
+            record_clean: bool = True) -> Dict[str, object]:
+        """
+        Reconcile wallets and store WalletBalanceCheck rows in bulk
+
+        In incremental mode only wallets whose users have transactions since the
+        last checkpoint are re-checked. Once the run completes the checkpoint moves to
+        its start less CHECKPOINT_OVERLAP, so a transaction inserted before the run but
+        committed after its read is picked up next time, as long as no transaction
+        stays open longer than the overlap. Wallets in the overlap are simply re-checked.
+        """
+        started_at = timezone.now()
+        since = self.get_checkpoint() if incremental else None
+
+        checked = 0
+        discrepancies: List[ReconciliationResult] = []
+        batch: List[ReconciliationResult] = []
+
+        def flush():
+            checks = WalletBalanceCheck.objects.bulk_create([result.check for result in batch])
+            for result, check in zip(batch, checks):
+                result.check = check
+            batch.clear()
+
+        for result in self.iter_results(wallet_ids=wallet_ids, since=since):
+            checked += 1
+            if result.discrepancy_found:
+                discrepancies.append(result)
+            if result.discrepancy_found or record_clean:
+                result.check = result.to_check()
+                batch.append(result)
+                if len(batch) >= self.chunk_size:
+                    flush()
+
+        if batch:
+            flush()
+
+        if wallet_ids is None:
+            self.set_checkpoint(started_at - self.overlap)
+
+        logger.info(
+            f"Reconciled {checked} wallets{' since ' + since.isoformat() if since else ''}, "
+            f"found {len(discrepancies)} discrepancies"
+        )
+        return {"checked": checked, "discrepancies": discrepancies, "since": since}
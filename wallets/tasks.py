@@ -13,78 +13,24 @@ logger = logging.getLogger("wallet.tasks")
 
 
 @shared_task
-def reconcile_wallet_balances():
+def reconcile_wallet_balances(incremental=False):
     """Enhanced periodic task to reconcile wallet balances"""
-    from .models import Transaction, Wallet, WalletBalanceCheck
+    from .reconciliation import LedgerReconciler
 
     logger.info("Starting comprehensive wallet balance reconciliation")
 
-    wallets = Wallet.objects.all()
-    discrepancies_found = 0
-
-    for wallet in wallets:
-        try:
-            btc_deposits = Transaction.objects.filter(
-                user=wallet.user, currency="btc", type__in=["deposit", "escrow_release", "conversion"]
-            ).aggregate(total=Sum("amount"))["total"] or Decimal("0")
-
-            btc_withdrawals = Transaction.objects.filter(
-                user=wallet.user, currency="btc", type__in=["withdrawal", "escrow_lock", "fee"]
-            ).aggregate(total=Sum("amount"))["total"] or Decimal("0")
-
-            xmr_deposits = Transaction.objects.filter(
-                user=wallet.user, currency="xmr", type__in=["deposit", "escrow_release", "conversion"]
-            ).aggregate(total=Sum("amount"))["total"] or Decimal("0")
-
-            xmr_withdrawals = Transaction.objects.filter(
-                user=wallet.user, currency="xmr", type__in=["withdrawal", "escrow_lock", "fee"]
-            ).aggregate(total=Sum("amount"))["total"] or Decimal("0")
-
-            expected_btc = btc_deposits - btc_withdrawals
-            expected_xmr = xmr_deposits - xmr_withdrawals
-
-            btc_diff = abs(wallet.balance_btc - expected_btc)
-            xmr_diff = abs(wallet.balance_xmr - expected_xmr)
-
-            discrepancy_found = btc_diff > Decimal("0.00000001") or xmr_diff > Decimal("0.000000000001")
-
-            check = WalletBalanceCheck.objects.create(
-                wallet=wallet,
-                expected_btc=expected_btc,
-                expected_xmr=expected_xmr,
-                expected_escrow_btc=wallet.escrow_btc,
-                expected_escrow_xmr=wallet.escrow_xmr,
-                actual_btc=wallet.balance_btc,
-                actual_xmr=wallet.balance_xmr,
-                actual_escrow_btc=wallet.escrow_btc,
-                actual_escrow_xmr=wallet.escrow_xmr,
-                discrepancy_found=discrepancy_found,
-                discrepancy_details=(
-                    {
-                        "btc_diff": str(btc_diff),
-                        "xmr_diff": str(xmr_diff),
-                        "btc_expected": str(expected_btc),
-                        "xmr_expected": str(expected_xmr),
-                        "btc_deposits": str(btc_deposits),
-                        "btc_withdrawals": str(btc_withdrawals),
-                        "xmr_deposits": str(xmr_deposits),
-                        "xmr_withdrawals": str(xmr_withdrawals),
-                    }
-                    if discrepancy_found
-                    else {}
-                ),
-            )
-
-            if discrepancy_found:
-                discrepancies_found += 1
-                logger.warning(f"Balance discrepancy found for wallet {wallet.id}")
+    summary = LedgerReconciler().run(incremental=incremental)
 
-                if btc_diff > Decimal("0.001") or xmr_diff > Decimal("0.1"):
-                    send_discrepancy_alert.delay(wallet.id, check.id)
+    for result in summary["discrepancies"]:
+        logger.warning(f"Balance discrepancy found for wallet {result.wallet.id}")
 
-        except Exception as e:
-            logger.error(f"Error reconciling wallet {wallet.id}: {str(e)}")
+        if result.needs_alert:
+            try:
+                send_discrepancy_alert.delay(result.wallet.id, result.check.id)
+            except Exception as e:
+                logger.error(f"Error alerting on wallet {result.wallet.id}: {str(e)}")
 
+    discrepancies_found = len(summary["discrepancies"])
     logger.info(f"Reconciliation complete. Found {discrepancies_found} discrepancies")
     return discrepancies_found
 